@@ -0,0 +1,158 @@
+import os
+import pickle
+import hashlib
+
+from .FuncTable import FuncTable
+from .FuncDef import FuncDef
+from .FDFormat import read_fd, get_fd_name, is_device
+from amitools.util.DataDir import get_data_dir, get_data_sub_dir
+
+DB_VERSION = 2
+DB_FILE_NAME = "fd.db"
+
+
+def compile_fd(func_table):
+    """return compact tuple representation of a FuncTable"""
+    funcs = []
+    for f in func_table.get_funcs():
+        args = tuple(f.get_args())
+        funcs.append((f.get_name(), f.get_bias(), f.is_private(), args))
+    return (func_table.get_base_name(), tuple(funcs))
+
+
+def materialize_fd(data, lib_is_device=False, add_std_calls=True):
+    """create a FuncTable from its compact tuple representation"""
+    base_name, funcs = data
+    func_table = FuncTable(base_name, lib_is_device)
+    for name, bias, private, args in funcs:
+        func_def = FuncDef(name, bias, private)
+        func_def.args = list(args)
+        func_table.add_func(func_def)
+    if add_std_calls:
+        func_table.add_std_calls()
+    return func_table
+
+
+def _scan_fd_dir(fd_dir):
+    """return dict of fd file name -> content hash for all fd files in dir"""
+    files = {}
+    for name in os.listdir(fd_dir):
+        if name.endswith(".fd"):
+            with open(os.path.join(fd_dir, name), "rb") as fobj:
+                files[name] = hashlib.sha1(fobj.read()).hexdigest()
+    return files
+
+
+def build_fd_db(fd_dir=None):
+    """parse all fd files in the given dir and return the database dict.
+
+    Each table is pickled on its own so loading the database is cheap
+    and only the tables of the opened libraries are unpickled.
+    """
+    if fd_dir is None:
+        fd_dir = get_data_sub_dir("fd")
+    files = _scan_fd_dir(fd_dir)
+    libs = {}
+    for name in sorted(files):
+        func_table = read_fd(os.path.join(fd_dir, name))
+        if func_table is not None:
+            libs[name] = pickle.dumps(compile_fd(func_table), 4)
+    return {"version": DB_VERSION, "files": files, "libs": libs}
+
+
+def save_fd_db(db, db_file):
+    with open(db_file, "wb") as fobj:
+        pickle.dump(db, fobj, 4)
+
+
+def load_fd_db(db_file):
+    """load database or return None if its missing or invalid"""
+    try:
+        with open(db_file, "rb") as fobj:
+            db = pickle.load(fobj)
+    except (OSError, pickle.UnpicklingError, EOFError):
+        return None
+    if type(db) is not dict or db.get("version") != DB_VERSION:
+        return None
+    return db
+
+
+def get_default_db_file():
+    return os.path.join(get_data_dir(), DB_FILE_NAME)
+
+
+class FDDatabase:
+    """lazy access to the function tables of the bundled fd files.
+
+    The precompiled database is only loaded on the first request and a
+    FuncTable is only created if it is requested. If the database is
+    missing or does not match the fd files then the fd files are parsed
+    on demand instead.
+
+    The returned FuncTables are shared and must not be modified.
+    """
+
+    def __init__(self, db_file=None, fd_dir=None):
+        if db_file is None:
+            db_file = get_default_db_file()
+        if fd_dir is None:
+            fd_dir = get_data_sub_dir("fd")
+        self.db_file = db_file
+        self.fd_dir = fd_dir
+        # fd name -> pickled or compiled table
+        self.libs = None
+        # (lib_name, add_std_calls) -> FuncTable
+        self.tables = {}
+
+    def _load(self):
+        db = load_fd_db(self.db_file)
+        if db is not None and db["files"] == _scan_fd_dir(self.fd_dir):
+            self.libs = db["libs"]
+        else:
+            # no or outdated database: parse fd files on demand
+            self.libs = {}
+            self.db_file = None
+
+    def is_precompiled(self):
+        if self.libs is None:
+            self._load()
+        return self.db_file is not None
+
+    def get_fd(self, lib_name, add_std_calls=True):
+        """return FuncTable for given lib/dev name or None if no fd exists"""
+        key = (lib_name, add_std_calls)
+        func_table = self.tables.get(key)
+        if func_table is not None:
+            return func_table
+        if self.libs is None:
+            self._load()
+        fd_name = get_fd_name(lib_name)
+        data = self.libs.get(fd_name)
+        if type(data) is bytes:
+            data = pickle.loads(data)
+            self.libs[fd_name] = data
+        elif data is None and self.db_file is None:
+            fd_path = os.path.join(self.fd_dir, fd_name)
+            if os.path.isfile(fd_path):
+                data = compile_fd(read_fd(fd_path))
+                self.libs[fd_name] = data
+        if data is None:
+            return None
+        func_table = materialize_fd(data, is_device(lib_name), add_std_calls)
+        self.tables[key] = func_table
+        return func_table
+
+
+# the shared database of the bundled fd files
+_fd_db = None
+use_fd_db = True
+
+
+def get_fd_db():
+    """return the shared FDDatabase or None if disabled"""
+    global _fd_db
+    if not use_fd_db:
+        return None
+    if _fd_db is None:
+        _fd_db = FDDatabase()
+    return _fd_db
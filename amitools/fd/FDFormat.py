@@ -34,6 +34,12 @@ def is_device(lib_name):
 def read_lib_fd(lib_name, fd_dir=None, add_std_calls=True):
     # get default path if none is given
     if fd_dir is None:
+        # bundled fd files are taken from the precompiled database
+        from .FDDatabase import get_fd_db
+
+        fd_db = get_fd_db()
+        if fd_db:
+            return fd_db.get_fd(lib_name, add_std_calls)
         fd_dir = get_data_sub_dir("fd")
     # get fd path
     fd_name = get_fd_name(lib_name)
@@ -1,3 +1,4 @@
+import re
 import struct
 
 from .block.BitmapBlock import BitmapBlock
@@ -5,8 +6,39 @@ from .block.BitmapExtBlock import BitmapExtBlock
 from .DosType import *
 from .FSError import *
 
+# find bytes with free blocks
+_free_byte_re = re.compile(b"[^\x00]")
+
+
+def _popcount(val):
+    return bin(val).count("1")
+
+
+def _swap_longs(data):
+    """swap the bytes of each long: big endian <-> little endian"""
+    res = bytearray(len(data))
+    res[0::4] = data[3::4]
+    res[1::4] = data[2::4]
+    res[2::4] = data[1::4]
+    res[3::4] = data[0::4]
+    return res
+
 
 class ADFSBitmap:
+    """the block allocation bitmap of a volume.
+
+    The bitmap is kept in its on-disk layout in a bytearray: a set bit marks
+    a free block and the bits of each block are stored in big endian longs.
+    Single bits are modified in place. Counting free blocks converts the
+    bitmap to a Python int and works on all bits at once. Searching for a
+    run of free blocks converts windows of growing size starting at the
+    last search position, so small allocations only touch a few longs.
+    Modified bitmap blocks are tracked so write() only stores those.
+    """
+
+    # longs in the first search window
+    FIND_WINDOW_LONGS = 64
+
     def __init__(self, root_blk):
         self.root_blk = root_blk
         self.blkdev = self.root_blk.blkdev
@@ -27,6 +59,7 @@ class ADFSBitmap:
         if last_long_bits == 0:
             last_long_bits = 32
         self.bitmap_last_long_bits = last_long_bits
+        self.bitmap_mask = (1 << self.bitmap_bits) - 1
         # number of blocks required for bitmap (and bytes consumed there)
         self.bitmap_num_blks = (
             self.bitmap_longs + self.bitmap_blk_longs - 1
@@ -43,6 +76,9 @@ class ADFSBitmap:
         self.find_start_off = (root_blk.blk_num - self.blkdev.reserved) // 32
         # was bitmap modified?
         self.dirty = False
+        # indices of modified bitmap blocks and were ext blocks created?
+        self.dirty_blks = set()
+        self.ext_dirty = False
         # for DOS6/7 track used blocks
         self.num_used = 0
 
@@ -99,12 +135,16 @@ class ADFSBitmap:
                     cur_ext_index += 1
         self.valid = True
         self.dirty = True
+        self.ext_dirty = True
+        self.dirty_blks = set(range(self.bitmap_num_blks))
 
     def write(self):
         if self.dirty:
             self.dirty = False
             # update bitmap
-            self._write_ext_blks()
+            if self.ext_dirty:
+                self.ext_dirty = False
+                self._write_ext_blks()
             self._write_bitmap_blks()
             # in DOS6/DOS7 update root block stats
             if rootblock_tracks_used_blocks(self.root_blk.fstype):
@@ -118,12 +158,13 @@ class ADFSBitmap:
             ext_blk.write()
 
     def _write_bitmap_blks(self):
-        # write bitmap blocks
-        off = 0
-        for blk in self.bitmap_blks:
+        # write modified bitmap blocks
+        for i in sorted(self.dirty_blks):
+            blk = self.bitmap_blks[i]
+            off = i * self.bitmap_blk_bytes
             blk.set_bitmap_data(self.bitmap_data[off : off + self.bitmap_blk_bytes])
             blk.write()
-            off += self.bitmap_blk_bytes
+        self.dirty_blks = set()
 
     def read(self):
         self.bitmap_blks = []
@@ -180,6 +221,7 @@ class ADFSBitmap:
             )
 
         self.bitmap_data = bitmap_data
+        self.dirty_blks = set()
         self.valid = True
 
     def find_free(self):
@@ -188,55 +230,116 @@ class ADFSBitmap:
             return result[0]
 
     def find_n_free(self, num):
+        """find num free blocks and return their block numbers.
+
+        A contiguous run of free blocks is preferred. If there is none then
+        the first free blocks are returned. The search starts at the position
+        of the last search and wraps around. Returns None if not enough
+        blocks are free.
+        """
+        if num < 1:
+            return None
+        start_off = self.find_start_off
+        # search from start and wrap around
+        pos = self._find_free_run_in(num, start_off, self.bitmap_longs)
+        if pos is None:
+            pos = self._find_free_run_in(num, 0, start_off)
+        if pos is not None:
+            # keep as start offset for the next time
+            self.find_start_off = (pos + num - 1) // 32
+            res = self.blkdev.reserved
+            return list(range(res + pos, res + pos + num))
+        return self._collect_free(self._get_free_bits(), num, start_off * 32)
+
+    def _get_free_bits(self, first_long=0, end_long=None):
+        """return an int where bit n is set if block reserved + n is free.
+
+        If a range of longs is given then bit n refers to bit first_long*32+n.
+        """
+        if end_long is None:
+            end_long = self.bitmap_longs
+        data = self.bitmap_data[first_long * 4 : end_long * 4]
+        free = int.from_bytes(_swap_longs(data), "little")
+        if end_long < self.bitmap_longs:
+            return free
+        # drop the unused bits of the last long
+        num_bits = (end_long - first_long - 1) * 32 + self.bitmap_last_long_bits
+        return free & ((1 << num_bits) - 1)
+
+    def _find_free_run_in(self, num, first_long, end_long):
+        """return the bit position of the first run of num free blocks
+        that starts in the longs first_long..end_long-1"""
+        data = self.bitmap_data
+        # a run starting in a window may reach into the following longs
+        extra_longs = (num + 30) // 32
+        window = self.FIND_WINDOW_LONGS
+        off = first_long
+        while off < end_long:
+            # skip used longs
+            m = _free_byte_re.search(data, off * 4, end_long * 4)
+            if m is None:
+                return None
+            off = m.start() // 4
+            stop = min(off + window, end_long)
+            free = self._get_free_bits(off, min(stop + extra_longs, self.bitmap_longs))
+            pos = self._find_free_run(free, num, 0)
+            if pos is not None and pos < (stop - off) * 32:
+                return off * 32 + pos
+            off = stop
+            window *= 2
+        return None
+
+    def _find_free_run(self, free, num, start):
+        """return the bit position of the first run of num free blocks"""
+        if num < 1:
+            return None
+        # keep only bits that start a run of num set bits
+        runs = free
+        have = 1
+        while have < num and runs:
+            step = min(have, num - have)
+            runs &= runs >> step
+            have += step
+        if not runs:
+            return None
+        # search from start and wrap around
+        after = runs >> start
+        if after:
+            return start + (after & -after).bit_length() - 1
+        before = runs & ((1 << start) - 1)
+        if before:
+            return (before & -before).bit_length() - 1
+
+    def _collect_free(self, free, num, start):
+        """collect the first num free blocks beginning at bit start"""
         result = []
-        long_off = self.find_start_off
-        last_long = self.bitmap_longs - 1
-        # run through all longs of bitmap if needed
-        for n in range(self.bitmap_longs):
-            # read bitmap long
-            val = struct.unpack_from(">I", self.bitmap_data, long_off * 4)[0]
-            # some bits are free in here.. find em
-            if val != 0:
-                # last long has less bits
-                if long_off == last_long:
-                    max_bits = self.bitmap_last_long_bits
-                else:
-                    max_bits = 32
-
-                base_blk_num = self.blkdev.reserved + long_off * 32
-
-                # walk through bits and collect free ones
-                for bit in range(max_bits):
-                    mask = 1 << bit
-                    if (val & mask) == mask:
-                        blk_num = base_blk_num + bit
-                        result.append(blk_num)
-                        # got all free blocks?
-                        if len(result) == num:
-                            # keep as start offset for the next time
-                            self.find_start_off = long_off
-                            return result
-
-            # next long
-            long_off += 1
-            if long_off == self.bitmap_longs:
-                long_off = 0
+        if num < 1:
+            return None
+        res = self.blkdev.reserved
+        data = free.to_bytes(self.bitmap_longs * 4, "little")
+        start_byte = start // 8
+        for first, last in ((start_byte, len(data)), (0, start_byte)):
+            for m in _free_byte_re.finditer(data, first, last):
+                byte_off = m.start()
+                val = data[byte_off]
+                while val:
+                    low = val & -val
+                    result.append(res + byte_off * 8 + low.bit_length() - 1)
+                    if len(result) == num:
+                        # keep as start offset for the next time
+                        self.find_start_off = byte_off // 4
+                        return result
+                    val ^= low
 
     def get_num_free(self):
-        num = 0
-        res = self.blkdev.reserved
-        for i in range(self.bitmap_bits):
-            if self.get_bit(i + res):
-                num += 1
-        return num
+        num_bytes = self.bitmap_longs * 4
+        num = _popcount(int.from_bytes(self.bitmap_data[:num_bytes], "big"))
+        # do not count the unused bits of the last long
+        last = struct.unpack_from(">I", self.bitmap_data, num_bytes - 4)[0]
+        return num - _popcount(last >> self.bitmap_last_long_bits)
 
     def get_num_used(self):
-        num = 0
-        res = self.blkdev.reserved
-        for i in range(self.bitmap_bits):
-            if not self.get_bit(i + res):
-                num += 1
-        return num
+        return self.bitmap_bits - self.get_num_free()
 
     def alloc_n(self, num):
         free_blks = self.find_n_free(num)
@@ -250,44 +353,44 @@ class ADFSBitmap:
         for b in blks:
             self.set_bit(b)
 
+    def _get_bit_pos(self, off):
+        """return byte offset and mask of the bit for block number off"""
+        off = off - self.blkdev.reserved
+        bit_off = off & 31
+        byte_off = (off >> 5) * 4 + 3 - (bit_off >> 3)
+        return byte_off, 1 << (bit_off & 7)
+
+    def _mark_dirty(self, off):
+        self.dirty = True
+        long_off = (off - self.blkdev.reserved) >> 5
+        self.dirty_blks.add(long_off // self.bitmap_blk_longs)
+
     def get_bit(self, off):
         if off < self.blkdev.reserved or off >= self.blkdev.num_blocks:
             return None
-        off = off - self.blkdev.reserved
-        long_off = off // 32
-        bit_off = off % 32
-        val = struct.unpack_from(">I", self.bitmap_data, long_off * 4)[0]
-        mask = 1 << bit_off
-        return (val & mask) == mask
+        byte_off, mask = self._get_bit_pos(off)
+        return self.bitmap_data[byte_off] & mask == mask
 
     # mark as free
     def set_bit(self, off):
         if off < self.blkdev.reserved or off >= self.blkdev.num_blocks:
             return False
-        off = off - self.blkdev.reserved
-        long_off = off // 32
-        bit_off = off % 32
-        val = struct.unpack_from(">I", self.bitmap_data, long_off * 4)[0]
-        mask = 1 << bit_off
+        byte_off, mask = self._get_bit_pos(off)
+        val = self.bitmap_data[byte_off]
         if val & mask == 0:
-            val = val | mask
-            struct.pack_into(">I", self.bitmap_data, long_off * 4, val)
-            self.dirty = True
+            self.bitmap_data[byte_off] = val | mask
+            self._mark_dirty(off)
             self.num_used -= 1
 
     # mark as used
     def clr_bit(self, off):
         if off < self.blkdev.reserved or off >= self.blkdev.num_blocks:
             return False
-        off = off - self.blkdev.reserved
-        long_off = off // 32
-        bit_off = off % 32
-        val = struct.unpack_from(">I", self.bitmap_data, long_off * 4)[0]
-        mask = 1 << bit_off
+        byte_off, mask = self._get_bit_pos(off)
+        val = self.bitmap_data[byte_off]
         if val & mask == mask:
-            val = val & ~mask
-            struct.pack_into(">I", self.bitmap_data, long_off * 4, val)
-            self.dirty = True
+            self.bitmap_data[byte_off] = val & ~mask
+            self._mark_dirty(off)
             self.num_used += 1
 
     def dump(self):
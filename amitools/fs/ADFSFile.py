@@ -1,3 +1,5 @@
+import io
+
 from .block.EntryBlock import EntryBlock
 from .block.FileHeaderBlock import FileHeaderBlock
 from .block.FileListBlock import FileListBlock
@@ -6,7 +8,57 @@ from .ADFSNode import ADFSNode
 from .FSError import *
 
 
+class ADFSFileReader(io.RawIOBase):
+    """a read-only, seekable file object for the contents of a file node.
+
+    Data is read from the volume on each readinto() call and only the
+    blocks of the requested range are loaded.
+    """
+
+    def __init__(self, node):
+        io.RawIOBase.__init__(self)
+        self.node = node
+        self.size = node.get_size()
+        self.pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            pos = offset
+        elif whence == io.SEEK_CUR:
+            pos = self.pos + offset
+        elif whence == io.SEEK_END:
+            pos = self.size + offset
+        else:
+            raise ValueError("invalid whence: %d" % whence)
+        if pos < 0:
+            raise ValueError("negative seek position: %d" % pos)
+        self.pos = pos
+        return pos
+
+    def readinto(self, buf):
+        view = memoryview(buf).cast("B")
+        num = 0
+        for chunk in self.node.iter_data(self.pos, len(view)):
+            size = len(chunk)
+            view[num : num + size] = chunk
+            num += size
+        self.pos += num
+        return num
+
+
 class ADFSFile(ADFSNode):
+    # max number of adjacent FFS data blocks read at once
+    max_read_blks = 64
+
     def __init__(self, volume, parent):
         ADFSNode.__init__(self, volume, parent)
         # state
@@ -80,24 +132,77 @@ class ADFSFile(ADFSNode):
     def read(self):
         """read data blocks"""
         self.data_blks = []
-        want_seq_num = 1
-        total_size = 0
-        is_ffs = self.volume.is_ffs
-        byte_size = self.block.byte_size
         data = bytearray()
-        for blk in self.data_blk_nums:
-            if is_ffs:
-                # ffs has raw data blocks
-                dat_blk = self.volume.blkdev.read_block(blk)
-                total_size += len(dat_blk)
-                # shrink last read if necessary
-                if total_size > byte_size:
-                    shrink = total_size - byte_size
-                    dat_blk = dat_blk[:-shrink]
-                    total_size = byte_size
-                data += dat_blk
-            else:
-                # ofs
+        for chunk in self._iter_data(0, None, self.data_blks):
+            data += chunk
+        # store full contents of file
+        self.data = data
+
+    def iter_data(self, offset=0, size=None):
+        """iterate over the contents of the file in chunks.
+
+        Only the range of size bytes beginning at offset is returned and
+        the data is not kept in the node. FFS data blocks are read in runs
+        of adjacent blocks. OFS data blocks are verified while reading.
+        """
+        return self._iter_data(offset, size)
+
+    def open_data(self):
+        """return a read-only file object for the contents of the file"""
+        return ADFSFileReader(self)
+
+    def _iter_data(self, offset, size, data_blks=None):
+        byte_size = self.block.byte_size
+        end = byte_size
+        if size is not None:
+            end = min(end, offset + size)
+        if offset >= end:
+            return
+        bpb = self.get_data_block_contents_bytes()
+        first = offset // bpb
+        last = (end + bpb - 1) // bpb
+        pos = first * bpb
+        for chunk in self._iter_blocks(first, last, data_blks):
+            num = len(chunk)
+            # cut chunk to requested range
+            if pos < offset or pos + num > end:
+                chunk = chunk[max(offset - pos, 0) : end - pos]
+            pos += num
+            if len(chunk) > 0:
+                yield chunk
+        # make sure all went well: FFS blocks are padded, OFS blocks are not
+        if first == 0 and end == byte_size:
+            if pos < byte_size or (pos > byte_size and not self.volume.is_ffs):
+                raise FSError(
+                    INTERNAL_ERROR,
+                    block=self.block,
+                    node=self,
+                    extra="file size mismatch: got=%d want=%d" % (pos, byte_size),
+                )
+
+    def _iter_blocks(self, first, last, data_blks=None):
+        """iterate over the contents of the data blocks first to last - 1"""
+        blk_nums = self.data_blk_nums[first:last]
+        if self.volume.is_ffs:
+            # ffs has raw data blocks: read adjacent ones at once
+            read_block = self.volume.blkdev.read_block
+            num = len(blk_nums)
+            i = 0
+            while i < num:
+                start = blk_nums[i]
+                j = i + 1
+                while (
+                    j < num
+                    and j - i < self.max_read_blks
+                    and blk_nums[j] == start + j - i
+                ):
+                    j += 1
+                yield read_block(start, num_blks=j - i)
+                i = j
+        else:
+            # ofs
+            want_seq_num = first + 1
+            for blk in blk_nums:
                 dat_blk = FileDataBlock(self.block.blkdev, blk)
                 dat_blk.read()
                 if not dat_blk.valid:
@@ -110,23 +215,10 @@ class ADFSFile(ADFSNode):
                         node=self,
                         extra="got=%d wanted=%d" % (dat_blk.seq_num, want_seq_num),
                     )
-                # store data blocks
-                self.data_blks.append(dat_blk)
-                total_size += dat_blk.data_size
-                data += dat_blk.get_block_data()
-            want_seq_num += 1
-        # store full contents of file
-        self.data = data
-        # make sure all went well
-        got_size = len(data)
-        want_size = self.block.byte_size
-        if got_size != want_size:
-            raise FSError(
-                INTERNAL_ERROR,
-                block=self.block,
-                node=self,
-                extra="file size mismatch: got=%d want=%d" % (got_size, want_size),
-            )
+                if data_blks is not None:
+                    data_blks.append(dat_blk)
+                yield dat_blk.get_block_data()
+                want_seq_num += 1
 
     def get_file_data(self):
         if self.data != None:
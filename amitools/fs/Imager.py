@@ -109,12 +109,12 @@ class Imager:
             node.flush()
         # file
         elif node.is_file():
-            data = node.get_file_data()
+            # stream file data
+            with open(file_path, "wb") as fh:
+                for chunk in node.iter_data():
+                    fh.write(chunk)
+                    self.total_bytes += len(chunk)
             node.flush()
-            fh = open(file_path, "wb")
-            fh.write(data)
-            fh.close()
-            self.total_bytes += len(data)
 
     # ----- pack -----
 
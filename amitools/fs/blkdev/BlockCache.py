@@ -0,0 +1,160 @@
+import collections
+
+
+class BlockCache:
+    """a LRU cache with write-back for the blocks of an image file.
+
+    Reads are served from the cache if possible. Written blocks are only
+    kept in the cache and marked dirty. The dirty blocks are written on
+    flush() (or if a dirty block is evicted) where adjacent blocks are
+    combined into a single large write. A capacity of 0 disables the cache
+    and passes all accesses to the image file directly.
+    """
+
+    DEFAULT_CAPACITY = 2048
+
+    def __init__(self, img_file, capacity=DEFAULT_CAPACITY):
+        self.img_file = img_file
+        self.capacity = capacity
+        # blk_num -> data in LRU order
+        self.blocks = collections.OrderedDict()
+        self.dirty = set()
+        # counters
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.write_ios = 0
+        self.evictions = 0
+
+    def get_stats(self):
+        return {
+            "capacity": self.capacity,
+            "blocks": len(self.blocks),
+            "dirty": len(self.dirty),
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "write_ios": self.write_ios,
+            "evictions": self.evictions,
+        }
+
+    def get_stats_str(self):
+        return (
+            "block cache: hits=%(hits)d misses=%(misses)d writes=%(writes)d "
+            "write_ios=%(write_ios)d evictions=%(evictions)d" % self.get_stats()
+        )
+
+    def read_blk(self, blk_num, num_blks=1):
+        if self.capacity == 0:
+            return self.img_file.read_blk(blk_num, num_blks)
+        blocks = self.blocks
+        # fast path: single cached block
+        if num_blks == 1:
+            data = blocks.get(blk_num)
+            if data is not None:
+                blocks.move_to_end(blk_num)
+                self.hits += 1
+                return data
+            self.misses += 1
+            data = self.img_file.read_blk(blk_num)
+            if len(data) == self.img_file.block_bytes:
+                self._insert(blk_num, data)
+            return data
+        # multiple blocks: read whole range if one is missing
+        blk_nums = range(blk_num, blk_num + num_blks)
+        parts = [blocks.get(n) for n in blk_nums]
+        num_missing = parts.count(None)
+        self.hits += num_blks - num_missing
+        self.misses += num_missing
+        if num_missing > 0:
+            data = self.img_file.read_blk(blk_num, num_blks)
+            block_bytes = self.img_file.block_bytes
+            if len(data) != block_bytes * num_blks:
+                return data
+            for i, n in enumerate(blk_nums):
+                if parts[i] is None:
+                    off = i * block_bytes
+                    parts[i] = data[off : off + block_bytes]
+        for n, part in zip(blk_nums, parts):
+            self._insert(n, part)
+        return b"".join(parts)
+
+    def write_blk(self, blk_num, data, num_blks=1):
+        if self.capacity == 0:
+            return self.img_file.write_blk(blk_num, data, num_blks)
+        img_file = self.img_file
+        if img_file.read_only:
+            raise IOError("Can't write block: image file is read-only")
+        if blk_num >= img_file.num_blocks:
+            raise IOError(
+                "Invalid image file block num: got %d but max is %d"
+                % (blk_num, img_file.num_blocks)
+            )
+        block_bytes = img_file.block_bytes
+        if len(data) != (block_bytes * num_blks):
+            raise IOError(
+                "Invalid block size written: got %d but size is %d"
+                % (len(data), block_bytes)
+            )
+        data = bytes(data)
+        for i in range(num_blks):
+            n = blk_num + i
+            off = i * block_bytes
+            self.blocks[n] = data[off : off + block_bytes]
+            self.blocks.move_to_end(n)
+            self.dirty.add(n)
+        self.writes += num_blks
+        self._evict()
+
+    def flush(self):
+        """write all dirty blocks and flush the image file"""
+        self._write_dirty()
+        self.img_file.flush()
+
+    def invalidate(self):
+        """write all dirty blocks and drop all cached blocks"""
+        self._write_dirty()
+        self.blocks.clear()
+
+    def close(self):
+        self.invalidate()
+        self.img_file.close()
+
+    def _insert(self, blk_num, data):
+        blocks = self.blocks
+        if blk_num in blocks:
+            blocks.move_to_end(blk_num)
+        else:
+            blocks[blk_num] = data
+            self._evict()
+
+    def _evict(self):
+        blocks = self.blocks
+        while len(blocks) > self.capacity:
+            blk_num, data = blocks.popitem(last=False)
+            self.evictions += 1
+            if blk_num in self.dirty:
+                # keep block until it is written together with all others
+                blocks[blk_num] = data
+                blocks.move_to_end(blk_num, last=False)
+                self._write_dirty()
+                blocks.popitem(last=False)
+
+    def _write_dirty(self):
+        """write all dirty blocks with one write per run of adjacent blocks"""
+        if not self.dirty:
+            return
+        blocks = self.blocks
+        blk_nums = sorted(self.dirty)
+        start = 0
+        num = len(blk_nums)
+        while start < num:
+            end = start + 1
+            while end < num and blk_nums[end] == blk_nums[end - 1] + 1:
+                end += 1
+            run = blk_nums[start:end]
+            data = b"".join(blocks[n] for n in run)
+            self.img_file.write_blk(run[0], data, len(run))
+            self.write_ios += 1
+            start = end
+        self.dirty.clear()
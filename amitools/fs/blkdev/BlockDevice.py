@@ -43,12 +43,16 @@ class BlockDevice:
     def flush(self):
         pass
 
-    def read_block(self, blk_num):
+    def read_block(self, blk_num, num_blks=1):
         pass
 
     def write_block(self, blk_num, data):
         pass
 
+    def get_cache(self):
+        """return the block cache of the device or None"""
+        return None
+
     def get_geometry(self):
         return DiskGeometry(self.cyls, self.heads, self.sectors)
 
@@ -1,10 +1,22 @@
 from .BlockDevice import BlockDevice
 from .ImageFile import ImageFile
+from .BlockCache import BlockCache
 
 
 class HDFBlockDevice(BlockDevice):
-    def __init__(self, hdf_file, read_only=False, block_size=512, fobj=None):
+    def __init__(
+        self,
+        hdf_file,
+        read_only=False,
+        block_size=512,
+        fobj=None,
+        cache_size=BlockCache.DEFAULT_CAPACITY,
+    ):
         self.img_file = ImageFile(hdf_file, read_only, block_size, fobj)
+        self.cache = BlockCache(self.img_file, cache_size)
+
+    def get_cache(self):
+        return self.cache
 
     def create(self, geo, reserved=2):
         self._set_geometry(
@@ -14,6 +26,7 @@ class HDFBlockDevice(BlockDevice):
             reserved=reserved,
             block_bytes=self.img_file.block_bytes,
         )
+        self.cache.invalidate()
         self.img_file.create(geo.get_num_blocks())
         self.img_file.open()
 
@@ -28,13 +41,13 @@ class HDFBlockDevice(BlockDevice):
         self.img_file.open()
 
     def flush(self):
-        pass
+        self.cache.flush()
 
     def close(self):
-        self.img_file.close()
+        self.cache.close()
 
-    def read_block(self, blk_num):
-        return self.img_file.read_blk(blk_num)
+    def read_block(self, blk_num, num_blks=1):
+        return self.cache.read_blk(blk_num, num_blks)
 
     def write_block(self, blk_num, data):
-        return self.img_file.write_blk(blk_num, data)
+        self.cache.write_blk(blk_num, data)
@@ -1,16 +1,34 @@
 import os
 import stat
+import mmap
 import amitools.util.BlkDevTools as BlkDevTools
 
 
 class ImageFile:
-    def __init__(self, file_name, read_only=False, block_bytes=512, fobj=None):
+    """access the blocks of an image file.
+
+    Regular image files are memory mapped if use_mmap is None or True. Then
+    reads return memoryview slices of the mapping and writes modify the
+    mapping in place. Block devices and given file objects are accessed with
+    seek() and read()/write().
+    """
+
+    def __init__(
+        self, file_name, read_only=False, block_bytes=512, fobj=None, use_mmap=None
+    ):
         self.file_name = file_name
         self.read_only = read_only
         self.block_bytes = block_bytes
         self.fobj = fobj
+        self.use_mmap = use_mmap
         self.size = 0
         self.num_blocks = 0
+        self.mmap = None
+        self.view = None
+
+    @staticmethod
+    def is_regular_file(file_name):
+        return stat.S_ISREG(os.stat(file_name).st_mode)
 
     @staticmethod
     def get_image_size(file_name):
@@ -50,6 +68,36 @@ class ImageFile:
             else:
                 flags = "r+b"
             self.fobj = open(self.file_name, flags)
+            # map regular files into memory
+            if self.use_mmap is not False and ImageFile.is_regular_file(self.file_name):
+                self._map()
+
+    def is_mapped(self):
+        return self.mmap is not None
+
+    def _map(self):
+        if self.read_only:
+            access = mmap.ACCESS_READ
+        else:
+            access = mmap.ACCESS_WRITE
+        self.mmap = mmap.mmap(self.fobj.fileno(), self.size, access=access)
+        self.view = memoryview(self.mmap)
+
+    def _unmap(self):
+        if self.mmap is None:
+            return
+        if not self.read_only:
+            self.mmap.flush()
+        self.view.release()
+        try:
+            self.mmap.close()
+        except BufferError:
+            # slices returned by read_blk() are still alive: keep the mapping
+            # as a truncated file would invalidate their memory
+            self.view = memoryview(self.mmap)
+            raise IOError("Can't unmap image file: blocks are still in use")
+        self.view = None
+        self.mmap = None
 
     def read_blk(self, blk_num, num_blks=1):
         if blk_num >= self.num_blocks:
@@ -58,6 +106,8 @@ class ImageFile:
                 % (blk_num, self.num_blocks)
             )
         off = blk_num * self.block_bytes
+        if self.view is not None:
+            return self.view[off : off + self.block_bytes * num_blks]
         if off != self.fobj.tell():
             self.fobj.seek(off, os.SEEK_SET)
         num = self.block_bytes * num_blks
@@ -78,14 +128,20 @@ class ImageFile:
                 % (len(data), self.block_bytes)
             )
         off = blk_num * self.block_bytes
+        if self.view is not None:
+            self.view[off : off + len(data)] = data
+            return
         if off != self.fobj.tell():
             self.fobj.seek(off, os.SEEK_SET)
         self.fobj.write(data)
 
     def flush(self):
+        if self.mmap is not None and not self.read_only:
+            self.mmap.flush()
         self.fobj.flush()
 
     def close(self):
+        self._unmap()
         self.fobj.close()
         self.fobj = None
 
@@ -93,6 +149,7 @@ class ImageFile:
         if self.read_only:
             raise IOError("Can't create image file in read only mode")
         total_size = num_blocks * self.block_bytes
+        self._unmap()
         if self.fobj is not None:
             self.fobj.truncate(total_size)
             self.fobj.seek(0, 0)
@@ -105,6 +162,7 @@ class ImageFile:
         if self.read_only:
             raise IOError("Can't grow image file in read only mode")
         total_size = new_blocks * self.block_bytes
+        self._unmap()
         if self.fobj is not None:
             self.fobj.truncate(total_size)
             self.fobj.seek(0, 0)  # seek start
@@ -1,16 +1,30 @@
 from .BlockDevice import BlockDevice
 from .ImageFile import ImageFile
+from .BlockCache import BlockCache
 
 
 class RawBlockDevice(BlockDevice):
-    def __init__(self, raw_file, read_only=False, block_bytes=512, fobj=None):
+    def __init__(
+        self,
+        raw_file,
+        read_only=False,
+        block_bytes=512,
+        fobj=None,
+        cache_size=BlockCache.DEFAULT_CAPACITY,
+    ):
         self.img_file = ImageFile(raw_file, read_only, block_bytes, fobj)
+        self.cache = BlockCache(self.img_file, cache_size)
+
+    def get_cache(self):
+        return self.cache
 
     def create(self, num_blocks):
+        self.cache.invalidate()
         self.img_file.create(num_blocks)
         self.open()
 
     def resize(self, new_blocks):
+        self.cache.invalidate()
         self.img_file.resize(new_blocks)
         self.open()
 
@@ -22,13 +36,13 @@ class RawBlockDevice(BlockDevice):
         self.num_blocks = self.img_file.num_blocks
 
     def flush(self):
-        self.img_file.flush()
+        self.cache.flush()
 
     def close(self):
-        self.img_file.close()
+        self.cache.close()
 
     def read_block(self, blk_num, num_blks=1):
-        return self.img_file.read_blk(blk_num, num_blks)
+        return self.cache.read_blk(blk_num, num_blks)
 
     def write_block(self, blk_num, data, num_blks=1):
-        self.img_file.write_blk(blk_num, data, num_blks)
+        self.cache.write_blk(blk_num, data, num_blks)
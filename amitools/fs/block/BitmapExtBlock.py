@@ -16,10 +16,7 @@ class BitmapExtBlock(Block):
 
     def _read(self):
         # read bitmap blk ptrs
-        self.bitmap_ptrs = []
-        for i in range(self.blkdev.block_longs - 1):
-            bm_blk = self._get_long(i)
-            self.bitmap_ptrs.append(bm_blk)
+        self.bitmap_ptrs = list(self._get_longs(0, self.blkdev.block_longs - 1))
 
         self.bitmap_ext_blk = self._get_long(-1)
 
@@ -1,6 +1,7 @@
 import struct
 from ..TimeStamp import TimeStamp
 from ..FSString import FSString
+from amitools.util.CheckSum import unpack_longs, calc_neg_chksum
 
 
 class Block:
@@ -101,8 +102,8 @@ class Block:
                 "Invalid Block Data: size=%d but expected %d"
                 % (len(data), self.blkdev.block_bytes)
             )
-        self._create_data()
-        self.data[:] = data
+        # copy bytes or memoryview into a modifiable buffer
+        self.data = bytearray(data)
 
     def _write_data(self):
         if self.data != None:
@@ -125,6 +126,12 @@ class Block:
             num = self.block_longs + num
         return struct.unpack_from(">I", self.data, num * 4)[0]
 
+    def _get_longs(self, num, count):
+        """return a tuple of count longs starting at long num"""
+        if num < 0:
+            num = self.block_longs + num
+        return unpack_longs(self.data, count, num * 4)
+
     def _put_slong(self, num, val):
         if num < 0:
             num = self.block_longs + num
@@ -164,11 +171,7 @@ class Block:
         self._put_long(self.chk_loc, self.calc_chksum)
 
     def _calc_chksum(self):
-        chksum = 0
-        for i in range(self.block_longs):
-            if i != self.chk_loc:
-                chksum += self._get_long(i)
-        return (-chksum) & 0xFFFFFFFF
+        return calc_neg_chksum(self.data, self.chk_loc)
 
     def _get_timestamp(self, loc):
         days = self._get_long(loc)
@@ -41,9 +41,8 @@ class FileHeaderBlock(EntryBlock):
         mbc = self.blkdev.block_longs - 56
         if bc > mbc:
             bc = mbc
-        self.data_blocks = []
-        for i in range(bc):
-            self.data_blocks.append(self._get_long(-51 - i))
+        # data block pointers are stored in reverse order
+        self.data_blocks = list(reversed(self._get_longs(-50 - bc, bc)))
 
         self.protect = self._get_long(-48)
         self.protect_flags = ProtectFlags(self.protect)
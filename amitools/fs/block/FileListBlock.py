@@ -29,9 +29,8 @@ class FileListBlock(Block):
         mbc = self.blkdev.block_longs - 56
         if bc > mbc:
             bc = mbc
-        self.data_blocks = []
-        for i in range(bc):
-            self.data_blocks.append(self._get_long(-51 - i))
+        # data block pointers are stored in reverse order
+        self.data_blocks = list(reversed(self._get_longs(-50 - bc, bc)))
 
         self.parent = self._get_long(-3)
         self.extension = self._get_long(-2)
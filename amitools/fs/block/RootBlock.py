@@ -91,16 +91,11 @@ class RootBlock(Block):
         mhs = self.blkdev.block_longs - 56
         if hs > mhs:
             hs = mhs
-        self.hash_table = []
-        for i in range(hs):
-            self.hash_table.append(self._get_long(6 + i))
+        self.hash_table = list(self._get_longs(6, hs))
 
         # bitmap
         self.bitmap_flag = self._get_long(-50)
-        self.bitmap_ptrs = []
-        for i in range(25):
-            bm_blk = self._get_long(-49 + i)
-            self.bitmap_ptrs.append(bm_blk)
+        self.bitmap_ptrs = list(self._get_longs(-49, 25))
         self.bitmap_ext_blk = self._get_long(-24)
 
         # timestamps
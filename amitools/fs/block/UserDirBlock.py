@@ -38,10 +38,8 @@ class UserDirBlock(EntryBlock):
         self.extension = self._get_long(-2)
 
         # hash table of entries
-        self.hash_table = []
         self.hash_size = self.blkdev.block_longs - 56
-        for i in range(self.hash_size):
-            self.hash_table.append(self._get_long(6 + i))
+        self.hash_table = list(self._get_longs(6, self.hash_size))
 
         self.valid = self.own_key == self.blk_num
         return self.valid
@@ -5,6 +5,7 @@ import struct
 import logging
 
 from .romaccess import RomAccess
+from amitools.util.CheckSum import calc_carry_chksum
 
 
 class KickRomAccess(RomAccess):
@@ -89,19 +90,10 @@ class KickRomAccess(RomAccess):
 
     def calc_check_sum(self, skip_off=None):
         """Check internal kickstart checksum and return True if is correct"""
-        chk_sum = 0
-        num_longs = self.size // 4
-        off = 0
-        max_u32 = 0xFFFFFFFF
-        for i in range(num_longs):
-            val = struct.unpack_from(">I", self.rom_data, off)[0]
-            if off != skip_off:
-                chk_sum += val
-            off += 4
-            if chk_sum > max_u32:
-                chk_sum = chk_sum & max_u32
-                chk_sum += 1
-        return max_u32 - chk_sum
+        skip_long = None
+        if skip_off is not None:
+            skip_long = skip_off // 4
+        return calc_carry_chksum(self.rom_data, skip_long)
 
     def verify_check_sum(self):
         chk_sum = self.calc_check_sum()
@@ -45,12 +45,10 @@ class ADFSScanner:
                     return False
             return True
         elif node.is_file():
-            # read file in ram fobj
-            data = node.get_file_data()
-            node.flush()
-            size = len(data)
+            # read file data on demand
+            fobj = io.BufferedReader(node.open_data())
+            size = node.get_size()
             path = node.get_node_path_name().get_unicode()
-            fobj = io.StringIO(data)
             sf = scan_file.create_sub_path(path, fobj, size, True, False)
             ok = scanner.scan_obj(sf)
             sf.close()
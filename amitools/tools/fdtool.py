@@ -7,6 +7,7 @@ import sys
 import argparse
 
 import amitools.fd.FDFormat as FDFormat
+import amitools.fd.FDDatabase as FDDatabase
 
 # ----- dump -----
 
@@ -67,7 +68,7 @@ def generate_sasc_code(fname, fd, add_private, prefix=""):
 def main(args=None):
     # parse args
     parser = argparse.ArgumentParser()
-    parser.add_argument("files", nargs="+")
+    parser.add_argument("files", nargs="*")
     parser.add_argument(
         "-P",
         "--add-private",
@@ -99,8 +100,23 @@ def main(args=None):
         default="",
         help="add prefix to functions in C",
     )
+    parser.add_argument(
+        "-B",
+        "--build-db",
+        action="store",
+        default=None,
+        help="compile the bundled fd files into the given database file",
+    )
     args = parser.parse_args(args=args)
 
+    # build database
+    if args.build_db:
+        db = FDDatabase.build_fd_db()
+        FDDatabase.save_fd_db(db, args.build_db)
+        print("%s: %d fd files" % (args.build_db, len(db["libs"])))
+    elif not args.files:
+        parser.error("no fd files given")
+
     # main loop
     files = args.files
     for fname in files:
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+#
+# vamosclient [options] <amiga binary> [args ...]
+#
+# run an m68k AmigaOS binary on a running 'vamos --server'
+#
+# takes the same options as vamos. if no server is reachable then the
+# binary is run by vamos directly. if the server fails after the job was
+# sent then an error is reported and the exit code is 1.
+#
+# environment:
+#   VAMOS_SERVER_SOCKET   path of the server socket
+#   VAMOS_TIMING          print the job's run time to stderr
+
+import os
+import sys
+from amitools.vamos.server import (
+    run_job,
+    default_socket_path,
+    ProtocolError,
+    ConnectError,
+)
+
+
+def run_local(args):
+    # import vamos only here to keep startup fast
+    from amitools.tools.vamos import main as vamos_main
+
+    return vamos_main(args)
+
+
+def main(args=None):
+    if args is None:
+        args = sys.argv[1:]
+    socket_path = default_socket_path()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    cfg_files = (
+        os.path.join(os.getcwd(), ".vamosrc"),
+        os.path.expanduser("~/.vamosrc"),
+    )
+    try:
+        reply = run_job(socket_path, args, cfg_files)
+    except ConnectError:
+        # no server: run locally
+        return run_local(args)
+    except (OSError, ProtocolError) as e:
+        # the job was already sent: running it again could repeat its effects
+        print("vamosclient: server job failed: %s" % e, file=sys.stderr)
+        return 1
+    if "VAMOS_TIMING" in os.environ:
+        print(
+            "vamosclient: time=%.3fs warm=%s"
+            % (reply.get("time", 0.0), reply.get("warm")),
+            file=sys.stderr,
+        )
+    return reply["exit_code"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -109,9 +109,12 @@ class FSCommandQueue(CommandQueue):
         # close blkdev
         if self.blkdev:
             self.blkdev.close()
-            self.blkdev = None
             if self.args.verbose:
                 print("closing image:", self.img)
+                cache = self.blkdev.get_cache()
+                if cache:
+                    print(cache.get_stats_str())
+            self.blkdev = None
 
     def create_cmd(self, cclass, name, opts):
         return cclass(self.args, opts)
@@ -394,11 +397,10 @@ class ReadCmd(Command):
             return 2
         # its a file
         if node.is_file():
-            data = node.get_file_data()
-            # write data to file
-            fh = open(out_name, "wb")
-            fh.write(data)
-            fh.close()
+            # stream data to file
+            with open(out_name, "wb") as fh:
+                for chunk in node.iter_data():
+                    fh.write(chunk)
         # its a dir
         elif node.is_dir():
             img = Imager(meta_mode=Imager.META_MODE_NONE)
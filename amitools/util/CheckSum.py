@@ -0,0 +1,68 @@
+# check sum helpers for blocks and roms built from big endian longs
+
+import struct
+import sys
+import array
+
+# use a native array of longs for sums if its item size fits
+_use_array = array.array("I").itemsize == 4
+_swap_array = sys.byteorder == "little"
+
+# num longs -> precompiled struct
+_long_structs = {}
+
+
+def _get_long_struct(num_longs):
+    s = _long_structs.get(num_longs)
+    if s is None:
+        s = struct.Struct(">%dI" % num_longs)
+        _long_structs[num_longs] = s
+    return s
+
+
+def unpack_longs(data, num_longs=None, offset=0):
+    """decode num_longs unsigned big endian longs at byte offset in one go.
+
+    If num_longs is not given then all longs of the buffer are decoded.
+    """
+    if num_longs is None:
+        num_longs = (len(data) - offset) // 4
+    return _get_long_struct(num_longs).unpack_from(data, offset)
+
+
+def sum_longs(data, skip_long=None):
+    """sum up all longs of the buffer without overflow handling.
+
+    The long with index skip_long (typically the check sum itself) is
+    not added.
+    """
+    if _use_array and len(data) % 4 == 0:
+        longs = array.array("I")
+        longs.frombytes(data)
+        if _swap_array:
+            longs.byteswap()
+    else:
+        longs = unpack_longs(data)
+    total = sum(longs)
+    if skip_long is not None:
+        total -= longs[skip_long]
+    return total
+
+
+def calc_neg_chksum(data, skip_long):
+    """check sum of file system and RDB blocks: the negated sum of all longs"""
+    return -sum_longs(data, skip_long) & 0xFFFFFFFF
+
+
+def calc_carry_chksum(data, skip_long=None):
+    """check sum of boot blocks and Kickstart ROMs.
+
+    It is the inverted sum of all longs where each carry is added back
+    (end-around carry).
+    """
+    total = sum_longs(data, skip_long)
+    # folding the carries of the total gives the same result as adding
+    # back each carry after every addition
+    while total > 0xFFFFFFFF:
+        total = (total & 0xFFFFFFFF) + (total >> 32)
+    return total ^ 0xFFFFFFFF
@@ -1,5 +1,256 @@
+import struct
+
 from .astruct import AmigaStruct
-from .pointer import BCPLPointerType
+from .pointer import BCPLPointerType, PointerType
+from .scalar import ScalarType
+from .enum import Enum
+from .bitfield import BitField
+
+
+class FieldAccessor:
+    """a precompiled access to a (sub) field given by its dotted name.
+
+    All struct lookups are done once: the accessor knows the offset from
+    the start of the struct, the width and signedness of the value and
+    if a BPTR needs conversion. read() and write() then are a single
+    memory call.
+
+    Fields that are no scalars or pointers (e.g. arrays or embedded
+    structs) are not compiled and have no read/write functions.
+    """
+
+    # (width, signed) -> format char
+    _formats = {
+        (0, False): "B",
+        (1, False): "H",
+        (2, False): "L",
+        (0, True): "b",
+        (1, True): "h",
+        (2, True): "l",
+    }
+
+    def __init__(self, name, offset, field_def):
+        self.name = name
+        self.offset = offset
+        self.field_def = field_def
+        self.size = field_def.size
+        self.width = None
+        self.signed = False
+        self.bptr = False
+        self.conv = None
+        self.read = None
+        self.write = None
+        field_type = field_def.type
+        if issubclass(field_type, PointerType):
+            self.width = 2
+            self.bptr = issubclass(field_type, BCPLPointerType)
+        elif issubclass(field_type, ScalarType):
+            self.width = field_type.get_mem_width()
+            self.signed = field_type.is_signed()
+            if issubclass(field_type, Enum):
+                self.conv = self._enum_conv(field_type)
+            elif issubclass(field_type, BitField):
+                self.conv = field_type._get_bit_mask
+        if self.width is not None:
+            self._compile()
+
+    def __repr__(self):
+        return "FieldAccessor(%s, offset=%d, width=%s, signed=%s, bptr=%s)" % (
+            self.name,
+            self.offset,
+            self.width,
+            self.signed,
+            self.bptr,
+        )
+
+    def is_compiled(self):
+        return self.read is not None
+
+    def get_format(self):
+        """return struct module format char of field"""
+        return self._formats[(self.width, self.signed)]
+
+    @staticmethod
+    def _enum_conv(enum_type):
+        def conv(val):
+            # allow values or names
+            if val in enum_type._values:
+                return val
+            elif val in enum_type._names:
+                return enum_type.from_str(val)
+            else:
+                raise ValueError("Invalid enum value: %s" % val)
+
+        return conv
+
+    def _compile(self):
+        off = self.offset
+        conv = self.conv
+        if self.bptr:
+
+            def read(mem, base):
+                return mem.r32(base + off) << 2
+
+            def write(mem, base, val):
+                mem.w32(base + off, val >> 2)
+
+        else:
+            width = self.width
+            if self.signed:
+
+                def read(mem, base):
+                    return mem.reads(width, base + off)
+
+                def write(mem, base, val):
+                    mem.writes(width, base + off, val)
+
+            else:
+
+                def read(mem, base):
+                    return mem.read(width, base + off)
+
+                if conv:
+
+                    def write(mem, base, val):
+                        mem.write(width, base + off, conv(val))
+
+                else:
+
+                    def write(mem, base, val):
+                        mem.write(width, base + off, val)
+
+        self.read = read
+        self.write = write
+
+
+class FieldGroup:
+    """a precompiled access to multiple fields with a single block access.
+
+    The fields are sorted by offset and packed with a struct.Struct format.
+    Gaps between the fields are kept as raw bytes so a write preserves
+    them.
+    """
+
+    def __init__(self, accessors):
+        # sort by offset but remember the order of the caller
+        order = sorted(range(len(accessors)), key=lambda i: accessors[i].offset)
+        self.accessors = accessors
+        self.start = accessors[order[0]].offset
+        fmt = ">"
+        pos = self.start
+        # index of each caller field in the unpacked tuple
+        self.index = [0] * len(accessors)
+        self.gaps = []
+        idx = 0
+        for i in order:
+            acc = accessors[i]
+            if not acc.is_compiled():
+                raise ValueError("field '%s' can't be grouped" % acc.name)
+            if acc.offset < pos:
+                raise ValueError("field '%s' overlaps" % acc.name)
+            if acc.offset > pos:
+                gap = acc.offset - pos
+                fmt += "%ds" % gap
+                self.gaps.append(idx)
+                idx += 1
+            fmt += acc.get_format()
+            self.index[i] = idx
+            idx += 1
+            pos = acc.offset + acc.size
+        self.size = pos - self.start
+        self.num_values = idx
+        self.packer = struct.Struct(fmt)
+        # post processing
+        self.bptrs = [i for i, acc in enumerate(accessors) if acc.bptr]
+        self.masks = [
+            (i, (1 << (8 << acc.width)) - 1)
+            for i, acc in enumerate(accessors)
+            if not acc.signed
+        ]
+        self.convs = [(i, acc.conv) for i, acc in enumerate(accessors) if acc.conv]
+
+    def read(self, mem, base):
+        data = mem.r_block(base + self.start, self.size)
+        values = self.packer.unpack(data)
+        index = self.index
+        result = [values[i] for i in index]
+        for i in self.bptrs:
+            result[i] <<= 2
+        return result
+
+    def write(self, mem, base, vals):
+        vals = list(vals)
+        for i, conv in self.convs:
+            vals[i] = conv(vals[i])
+        for i in self.bptrs:
+            vals[i] >>= 2
+        for i, mask in self.masks:
+            vals[i] &= mask
+        values = [None] * self.num_values
+        for i, idx in enumerate(self.index):
+            values[idx] = vals[i]
+        addr = base + self.start
+        # keep the gap bytes
+        if self.gaps:
+            old = self.packer.unpack(mem.r_block(addr, self.size))
+            for idx in self.gaps:
+                values[idx] = old[idx]
+        mem.w_block(addr, self.packer.pack(*values))
+
+
+# (struct_def, name) -> FieldAccessor
+_accessor_cache = {}
+# (struct_def, names) -> FieldGroup
+_group_cache = {}
+
+
+def get_field_accessor(struct_def, name):
+    """return the cached accessor for the dotted name or None"""
+    key = (struct_def, name)
+    acc = _accessor_cache.get(key)
+    if acc is None:
+        acc = _compile_accessor(struct_def, name)
+        if acc is None:
+            return None
+        _accessor_cache[key] = acc
+    return acc
+
+
+def get_field_group(struct_def, names):
+    """return the cached field group for a tuple of dotted names"""
+    key = (struct_def, names)
+    group = _group_cache.get(key)
+    if group is None:
+        accessors = []
+        for name in names:
+            acc = get_field_accessor(struct_def, name)
+            if acc is None:
+                raise KeyError(name)
+            accessors.append(acc)
+        group = FieldGroup(accessors)
+        _group_cache[key] = group
+    return group
+
+
+def _compile_accessor(struct_def, name):
+    sdef = struct_def.sdef
+    offset = 0
+    field_def = None
+    # walk along fields in name "bla.foo.bar"
+    for field_name in name.split("."):
+        if sdef is None:
+            return None
+        field_def = sdef.find_field_def_by_name(field_name)
+        if not field_def:
+            return None
+        offset += field_def.offset
+        # find potential next struct
+        field_type = field_def.type
+        if issubclass(field_type, AmigaStruct):
+            sdef = field_type.sdef
+        else:
+            sdef = None
+    return FieldAccessor(name, offset, field_def)
 
 
 class AccessStruct(object):
@@ -7,9 +258,24 @@ class AccessStruct(object):
 
     def __init__(self, mem, struct_def, struct_addr):
         self.mem = mem
-        self.struct = struct_def(mem, struct_addr)
+        self.struct_def = struct_def
+        self.struct_addr = struct_addr
+        self._struct = None
+
+    @property
+    def struct(self):
+        """the struct instance is only created on demand"""
+        if self._struct is None:
+            self._struct = self.struct_def(self.mem, self.struct_addr)
+        return self._struct
 
     def w_s(self, name, val):
+        acc = _accessor_cache.get((self.struct_def, name))
+        if acc is None:
+            acc = self._get_accessor(name)
+        if acc.write:
+            acc.write(self.mem, self.struct_addr, val)
+            return
         field, field_def = self._get_field_for_name(name)
         # BPTR auto conversion
         if issubclass(field_def.type, BCPLPointerType):
@@ -18,6 +284,11 @@ class AccessStruct(object):
             field.set(val)
 
     def r_s(self, name):
+        acc = _accessor_cache.get((self.struct_def, name))
+        if acc is None:
+            acc = self._get_accessor(name)
+        if acc.read:
+            return acc.read(self.mem, self.struct_addr)
         field, field_def = self._get_field_for_name(name)
         # BPTR auto conversion
         if issubclass(field_def.type, BCPLPointerType):
@@ -26,12 +297,45 @@ class AccessStruct(object):
             val = field.get()
         return val
 
+    def read_fields(self, *names):
+        """read multiple scalar or pointer fields with a single block read.
+
+        return a list of values in the order of the given names
+        """
+        group = _group_cache.get((self.struct_def, names))
+        if group is None:
+            group = self._get_group(names)
+        return group.read(self.mem, self.struct_addr)
+
+    def write_fields(self, fields):
+        """write multiple scalar or pointer fields given as dict name -> value
+        with a single block write"""
+        names = tuple(fields)
+        group = _group_cache.get((self.struct_def, names))
+        if group is None:
+            group = self._get_group(names)
+        group.write(self.mem, self.struct_addr, fields.values())
+
     def s_get_addr(self, name):
-        field, _ = self._get_field_for_name(name)
-        return field.get_addr()
+        acc = _accessor_cache.get((self.struct_def, name))
+        if acc is None:
+            acc = self._get_accessor(name)
+        return self.struct_addr + acc.offset
 
     def get_size(self):
-        return self.struct.get_byte_size()
+        return self.struct_def.get_byte_size()
+
+    def _get_accessor(self, name):
+        acc = get_field_accessor(self.struct_def, name)
+        if acc is None:
+            raise KeyError(self, name)
+        return acc
+
+    def _get_group(self, names):
+        try:
+            return get_field_group(self.struct_def, names)
+        except KeyError as e:
+            raise KeyError(self, e.args[0])
 
     def _get_field_for_name(self, name):
         struct = self.struct
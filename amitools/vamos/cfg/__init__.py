@@ -6,4 +6,7 @@ from .machine import MachineParser
 from .proc import ProcessParser
 from .profile import ProfileParser
 from .schedule import ScheduleParser
+from .loader import LoaderParser
+from .snapshot import SnapshotParser
+from .server import ServerParser
 from .vamos import VamosMainParser
@@ -0,0 +1,49 @@
+from amitools.vamos.cfgcore import *
+
+
+class LoaderParser(Parser):
+    def __init__(self, ini_prefix=None):
+        def_cfg = {
+            "loader": {
+                "seg_cache": True,
+                "seg_cache_size": 32,
+                "seg_cache_dir": Value(str),
+            }
+        }
+        arg_cfg = {
+            "loader": {
+                "seg_cache": Argument(
+                    "--no-seg-cache",
+                    action="store_false",
+                    help="always parse binaries on LoadSeg()",
+                ),
+                "seg_cache_size": Argument(
+                    "--seg-cache-size",
+                    action="store",
+                    type=int,
+                    help="number of parsed binaries kept in memory",
+                ),
+                "seg_cache_dir": Argument(
+                    "--seg-cache-dir",
+                    action="store",
+                    help="store parsed binaries in this dir for later runs",
+                ),
+            }
+        }
+        ini_trafo = {
+            "loader": {
+                "seg_cache": "seg_cache",
+                "seg_cache_size": "seg_cache_size",
+                "seg_cache_dir": "seg_cache_dir",
+            }
+        }
+        Parser.__init__(
+            self,
+            "loader",
+            def_cfg,
+            arg_cfg,
+            "loader",
+            "binary loader options",
+            ini_trafo,
+            ini_prefix,
+        )
@@ -23,6 +23,7 @@ class MachineParser(Parser):
             "40",
         )
         hw_access = ("emu", "ignore", "abort", "disable")
+        alloc_modes = ("bins", "first_fit")
         hw_exc_names = (
             "bus",
             "address",
@@ -52,6 +53,7 @@ class MachineParser(Parser):
             "memmap": {
                 "hw_access": Value(str, "emu", enum=hw_access),
                 "old_dos_guard": False,
+                "alloc": Value(str, "bins", enum=alloc_modes),
             },
         }
         arg_cfg = {
@@ -94,6 +96,11 @@ class MachineParser(Parser):
                     action="store_true",
                     help="Reserve memory range to track access to BCPL addrs",
                 ),
+                "alloc": Argument(
+                    "--mem-alloc",
+                    action="store",
+                    help="Memory allocator: size class bins or classic first_fit",
+                ),
             },
         }
         ini_trafo = {
@@ -103,7 +110,11 @@ class MachineParser(Parser):
                 "ram_size": "ram_size",
                 "hw_exc": "hw_exc",
             },
-            "memmap": {"hw_access": "hw_access", "old_dos_guard": "old_dos_guard"},
+            "memmap": {
+                "hw_access": "hw_access",
+                "old_dos_guard": "old_dos_guard",
+                "alloc": "mem_alloc",
+            },
         }
         Parser.__init__(
             self,
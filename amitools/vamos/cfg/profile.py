@@ -7,6 +7,7 @@ class ProfileParser(Parser):
             "profile": {
                 "enabled": False,
                 "libs": {"names": ValueList(str), "calls": False},
+                "pc": {"enabled": False, "cycles": 10000, "folded": Value(str)},
                 "output": {"file": Value(str), "append": False, "dump": False},
             }
         }
@@ -27,6 +28,24 @@ class ProfileParser(Parser):
                         help="store each lib call individually",
                     ),
                 },
+                "pc": {
+                    "enabled": Argument(
+                        "--profile-pc",
+                        action="store_true",
+                        help="sample the pc of the m68k code",
+                    ),
+                    "cycles": Argument(
+                        "--profile-pc-cycles",
+                        action="store",
+                        type=int,
+                        help="m68k cycles between two pc samples",
+                    ),
+                    "folded": Argument(
+                        "--profile-pc-folded",
+                        action="store",
+                        help="write pc samples as folded stacks to file",
+                    ),
+                },
                 "output": {
                     "file": Argument(
                         "--profile-file",
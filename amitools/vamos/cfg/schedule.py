@@ -6,6 +6,7 @@ class ScheduleParser(Parser):
         def_cfg = {
             "schedule": {
                 "slice_cycles": 100_000,
+                "clock": Value(str, "real", enum=("real", "virtual")),
             }
         }
         arg_cfg = {
@@ -15,12 +16,18 @@ class ScheduleParser(Parser):
                     action="store",
                     type=int,
                     help="duration of one one scheduler slice in m68k cycles",
-                )
+                ),
+                "clock": Argument(
+                    "--clock",
+                    action="store",
+                    help="'real' time or 'virtual' time where delays do not wait",
+                ),
             }
         }
         ini_trafo = {
             "schedule": {
                 "slice_cycles": "slice_cycles",
+                "clock": "clock",
             }
         }
         Parser.__init__(
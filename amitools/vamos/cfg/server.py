@@ -0,0 +1,48 @@
+from amitools.vamos.cfgcore import *
+
+
+class ServerParser(Parser):
+    def __init__(self, ini_prefix=None):
+        def_cfg = {
+            "server": {
+                "enabled": False,
+                "socket": Value(str),
+                "workers": 1,
+            }
+        }
+        arg_cfg = {
+            "server": {
+                "enabled": Argument(
+                    "--server",
+                    action="store_true",
+                    help="run a job server for vamosclient",
+                ),
+                "socket": Argument(
+                    "--server-socket",
+                    action="store",
+                    help="path of the job server's unix socket",
+                ),
+                "workers": Argument(
+                    "--server-workers",
+                    action="store",
+                    type=int,
+                    help="number of worker processes running jobs",
+                ),
+            }
+        }
+        ini_trafo = {
+            "server": {
+                "socket": "server_socket",
+                "workers": "server_workers",
+            }
+        }
+        Parser.__init__(
+            self,
+            "server",
+            def_cfg,
+            arg_cfg,
+            "server",
+            "job server options",
+            ini_trafo,
+            ini_prefix,
+        )
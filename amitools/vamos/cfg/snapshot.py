@@ -0,0 +1,41 @@
+from amitools.vamos.cfgcore import *
+
+
+class SnapshotParser(Parser):
+    def __init__(self, ini_prefix=None):
+        def_cfg = {
+            "snapshot": {
+                "save": Value(str),
+                "load": Value(str),
+            }
+        }
+        arg_cfg = {
+            "snapshot": {
+                "save": Argument(
+                    "--snapshot-save",
+                    action="store",
+                    help="keep the bootstrapped session as named snapshot",
+                ),
+                "load": Argument(
+                    "--snapshot-load",
+                    action="store",
+                    help="run in the named snapshot session. create if missing",
+                ),
+            }
+        }
+        ini_trafo = {
+            "snapshot": {
+                "save": "snapshot_save",
+                "load": "snapshot_load",
+            }
+        }
+        Parser.__init__(
+            self,
+            "snapshot",
+            def_cfg,
+            arg_cfg,
+            "snapshot",
+            "session snapshot options",
+            ini_trafo,
+            ini_prefix,
+        )
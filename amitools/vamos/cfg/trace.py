@@ -10,6 +10,7 @@ class TraceParser(Parser):
                 "vamos_ram": False,
                 "reg_dump": False,
                 "labels": False,
+                "calls": Value(str),
             }
         }
         arg_cfg = {
@@ -44,6 +45,11 @@ class TraceParser(Parser):
                     action="store_true",
                     help="add memory labels for detailed infos",
                 ),
+                "calls": Argument(
+                    "--call-trace",
+                    action="store",
+                    help="trace calls of m68k code and write call graph to file",
+                ),
             }
         }
         ini_trafo = {
@@ -53,6 +59,7 @@ class TraceParser(Parser):
                 "vamos_ram": "internal_memory_trace",
                 "reg_dump": "reg_dump",
                 "labels": "labels",
+                "calls": "call_trace",
             }
         }
         Parser.__init__(
@@ -29,6 +29,15 @@ class VamosMainParser(MainParser):
         # schedule
         self.schedule = ScheduleParser()
         self.add_parser(self.schedule)
+        # loader
+        self.loader = LoaderParser("vamos")
+        self.add_parser(self.loader)
+        # snapshot
+        self.snapshot = SnapshotParser("vamos")
+        self.add_parser(self.snapshot)
+        # server
+        self.server = ServerParser("vamos")
+        self.add_parser(self.server)
 
     def get_log_dict(self):
         return self.log.get_cfg_dict()
@@ -53,3 +62,12 @@ class VamosMainParser(MainParser):
 
     def get_schedule_dict(self):
         return self.schedule.get_cfg_dict()
+
+    def get_loader_dict(self):
+        return self.loader.get_cfg_dict()
+
+    def get_snapshot_dict(self):
+        return self.snapshot.get_cfg_dict()
+
+    def get_server_dict(self):
+        return self.server.get_cfg_dict()
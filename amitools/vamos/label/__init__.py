@@ -3,3 +3,5 @@ from .range import LabelRange
 from .segment import LabelSegment
 from .struct import LabelStruct
 from .lib import LabelLib
+from .traps import LabelTraps
+from .resolve import LabelCodeResolver
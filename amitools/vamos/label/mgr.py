@@ -1,87 +1,149 @@
 import logging
+from bisect import bisect_left, bisect_right
 from amitools.vamos.log import *
 
 
 class LabelManager:
+    """keep track of all labels and find them by address
+
+    Labels may overlap (e.g. a pool puddle and the chunks allocated
+    inside it). The manager splits the address space into elementary
+    segments at all label boundaries. For each segment it keeps the list of
+    labels covering it in insertion order. Point and range queries then
+    only need a bisect on the sorted boundary list.
+    """
+
     def __init__(self):
-        self.first = None
-        self.last = None
-
-    # This is now all done manually with doubly linked
-    # lists. The reason for this is that the python built-in
-    # lists are ill-performing as the list grows larger,
-    # and this is a heavy-duty class.
-    def add_label(self, range):
-        assert range.next == None
-        assert range.prev == None
-        if self.last == None:
-            assert self.first == None
-            self.last = range
-            self.first = range
+        # all labels in insertion order: label -> seq number
+        self.labels = {}
+        self.seq = 0
+        # labels without a size can't be placed in a segment
+        self.empty_labels = {}
+        # sorted segment start addresses and the labels covering
+        # [bounds[i], bounds[i+1])
+        self.bounds = []
+        self.covers = []
+
+    def add_label(self, label):
+        assert label not in self.labels
+        self.labels[label] = self.seq
+        self.seq += 1
+        if label.size <= 0:
+            self.empty_labels[label] = True
+            return
+        begin = self._split_at(label.addr)
+        end = self._split_at(label.end)
+        covers = self.covers
+        for i in range(begin, end):
+            covers[i] = covers[i] + [label]
+
+    def remove_label(self, label):
+        if label not in self.labels:
+            return
+        del self.labels[label]
+        if label.size <= 0:
+            del self.empty_labels[label]
+            return
+        bounds = self.bounds
+        covers = self.covers
+        begin = bisect_left(bounds, label.addr)
+        end = bisect_left(bounds, label.end)
+        for i in range(begin, end):
+            covers[i] = [r for r in covers[i] if r is not label]
+        # merge segments again that are no longer separated
+        self._merge_at(end)
+        self._merge_at(begin)
+
+    def _split_at(self, addr):
+        """make sure a segment starts at addr and return its index"""
+        bounds = self.bounds
+        idx = bisect_left(bounds, addr)
+        if idx < len(bounds) and bounds[idx] == addr:
+            return idx
+        # new segment inherits the labels of the split segment
+        if idx > 0:
+            cover = self.covers[idx - 1]
         else:
-            self.last.next = range
-            range.prev = self.last
-            self.last = range
-
-    def remove_label(self, range):
-        if range.prev != None:
-            range.prev.next = range.next
-        if range.next != None:
-            range.next.prev = range.prev
-        if self.last == range:
-            self.last = range.prev
-        if self.first == range:
-            self.first = range.next
-        range.next = None
-        range.prev = None
+            cover = []
+        bounds.insert(idx, addr)
+        self.covers.insert(idx, cover)
+        return idx
+
+    def _merge_at(self, idx):
+        """remove the segment boundary at idx if it separates equal covers"""
+        covers = self.covers
+        if idx >= len(covers):
+            return
+        cover = covers[idx]
+        if idx > 0:
+            prev = covers[idx - 1]
+        else:
+            prev = []
+        if len(cover) == len(prev) and all(a is b for a, b in zip(cover, prev)):
+            del self.bounds[idx]
+            del covers[idx]
+
+    def _find_seg_range(self, addr, size):
+        """return index range of segments touching [addr, addr + size]"""
+        bounds = self.bounds
+        begin = bisect_left(bounds, addr) - 1
+        if begin < 0:
+            begin = 0
+        end = bisect_right(bounds, addr + size)
+        return begin, end
+
+    def _sort_labels(self, labels):
+        seq = self.labels
+        return sorted(labels, key=lambda r: seq[r])
 
     def delete_labels_within(self, addr, size):
         # try to find compatible: release all labels within the given range
         # this is necessary because the label could be part of a puddle
         # that is released in one go.
-        r = self.first
-        while r != None:
-            if r.addr >= addr and r.addr + r.size <= addr + size:
-                s = r.next
-                self.remove_label(r)
-                r = s
-            else:
-                r = r.next
+        end_addr = addr + size
+        found = {}
+        begin, end = self._find_seg_range(addr, size)
+        for cover in self.covers[begin:end]:
+            for r in cover:
+                if r.addr >= addr and r.addr + r.size <= end_addr:
+                    found[r] = True
+        for r in self.empty_labels:
+            if r.addr >= addr and r.addr <= end_addr:
+                found[r] = True
+        for r in found:
+            self.remove_label(r)
 
     def get_all_labels(self):
-        ranges = []
-        r = self.first
-        while r != None:
-            ranges.append(r)
-            r = r.next
-        return ranges
+        return list(self.labels)
 
     def dump(self):
-        r = self.first
-        while r != None:
+        for r in self.labels:
             print(r)
-            r = r.next
 
     # This is called quite often and hence
     # a bit speed critical. It finds the
     # range within which the given address
     # lies.
     def get_label(self, addr):
-        r = self.first
-        while r != None:
-            if r.addr <= addr and addr < r.end:
-                return r
-            r = r.next
+        idx = bisect_right(self.bounds, addr) - 1
+        if idx < 0:
+            return None
+        cover = self.covers[idx]
+        if cover:
+            return cover[0]
         return None
 
     def get_intersecting_labels(self, addr, size):
-        result = []
-        r = self.first
-        while r != None:
+        found = {}
+        begin, end = self._find_seg_range(addr, size)
+        for cover in self.covers[begin:end]:
+            for r in cover:
+                if r.does_intersect(addr, size):
+                    found[r] = True
+        for r in self.empty_labels:
             if r.does_intersect(addr, size):
-                result.append(r)
-            r = r.next
-        return result
+                found[r] = True
+        return self._sort_labels(found)
 
     def get_label_offset(self, addr):
         r = self.get_label(addr)
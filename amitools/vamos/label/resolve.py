@@ -0,0 +1,84 @@
+from bisect import bisect_right
+from .segment import LabelSegment
+from .lib import LabelLib
+from .traps import LabelTraps
+
+
+class LabelCodeResolver:
+    """resolve code addresses to function names with the help of labels.
+
+    A name is the nearest symbol of a loaded segment, the function of a
+    library jump table or trap block or the name of the label.
+    """
+
+    unknown = "??"
+
+    def __init__(self, label_mgr):
+        self.label_mgr = label_mgr
+        # segment -> (sorted symbol offsets, names)
+        self.seg_syms = {}
+
+    def resolve(self, addr, with_offset=False):
+        """return the name of the code at addr.
+
+        with_offset adds the offset to the label if no symbol was found.
+        """
+        if not self.label_mgr:
+            return self.unknown
+        label = self.label_mgr.get_label(addr)
+        if label is None:
+            if with_offset:
+                return "@%06x" % addr
+            return self.unknown
+        offset = addr - label.addr
+        if isinstance(label, LabelSegment):
+            # real start of code in segment
+            offset -= 8
+            sym = self.find_symbol(label.segment, offset)
+            if sym:
+                return "%s:%s" % (label.name, sym)
+        elif isinstance(label, LabelLib):
+            if addr < label.base_addr and label.fd:
+                # round to the start of the jump table entry
+                bias = (label.base_addr - addr + 5) // 6 * 6
+                func = label.fd.get_func_by_bias(bias)
+                if func:
+                    return "%s:%s" % (label.name, func.get_name())
+        elif isinstance(label, LabelTraps):
+            func = label.get_func(addr)
+            if func:
+                return "%s:%s" % (label.name, func.get_name())
+        if with_offset:
+            return "%s+%x" % (label.name, offset)
+        return label.name
+
+    def find_symbol(self, segment, offset):
+        """find the symbol at or before offset in a segment"""
+        if segment is None:
+            return None
+        syms = self.seg_syms.get(segment)
+        if syms is None:
+            syms = self._build_symbols(segment)
+            self.seg_syms[segment] = syms
+        offsets, names = syms
+        idx = bisect_right(offsets, offset) - 1
+        if idx < 0:
+            return None
+        return names[idx]
+
+    def _build_symbols(self, segment):
+        symtab = segment.get_symtab()
+        if symtab is None:
+            return [], []
+        symbols = sorted(
+            symtab.get_symbols(), key=lambda s: (s.get_offset(), s.get_name())
+        )
+        offsets = [s.get_offset() for s in symbols]
+        names = []
+        for s in symbols:
+            name = s.get_name()
+            # hunk symbols are raw bytes
+            if isinstance(name, bytes):
+                name = name.decode("latin-1")
+            names.append(name)
+        return offsets, names
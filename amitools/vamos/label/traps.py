@@ -0,0 +1,17 @@
+from .range import LabelRange
+
+
+class LabelTraps(LabelRange):
+    """the trap block of a vamos lib with one slot per jump table entry"""
+
+    def __init__(self, name, addr, size, fd=None, slot_size=4):
+        LabelRange.__init__(self, name, addr, size)
+        self.fd = fd
+        self.slot_size = slot_size
+
+    def get_func(self, addr):
+        """return the fd function of the trap slot at addr (if any)"""
+        if self.fd is None:
+            return None
+        slot = (addr - self.addr) // self.slot_size
+        return self.fd.get_func_by_bias((slot + 1) * 6)
@@ -1,5 +1,6 @@
 import time
 import ctypes
+import logging
 import re
 import os
 
@@ -19,6 +20,7 @@ from amitools.vamos.libstructs import (
     SegmentStruct,
     FileHandleStruct,
     FileInfoBlockStruct,
+    ExAllControlStruct,
     InfoDataStruct,
     DevProcStruct,
     AnchorPathStruct,
@@ -48,6 +50,7 @@ from .dos.Process import Process
 from .dos.DosList import DosList
 from .dos.LockManager import LockManager
 from .dos.FileManager import FileManager
+from .dos.FastIO import setup_fast_io
 from .dos.CSource import *
 from .dos.Item import *
 from amitools.vamos.dos import run_command, run_sub_process
@@ -103,6 +106,9 @@ class DosLibrary(LibImpl):
         self.file_mgr = FileManager(
             ctx.path_mgr, ctx.exec_lib.port_mgr, ctx.alloc, ctx.mem
         )
+        # fast paths for buffered char I/O
+        neg_size = self.access.r_s("lib.lib_NegSize")
+        self.fast_io = setup_fast_io(ctx, base_addr, neg_size)
 
     # --- Timing ---
 
@@ -111,12 +117,19 @@ class DosLibrary(LibImpl):
         ticks = ctx.cpu.r_reg(REG_D1)
         log_dos.info("Delay(%d)", ticks)
         if ticks > 0:
-            time.sleep(ticks / 50.0)
+            # park the task and let others run
+            task = ctx.scheduler.get_cur_task() if ctx.scheduler else None
+            if task:
+                ctx.scheduler.delay_task(task, ticks * 20_000_000)
+            else:
+                ctx.clock.delay(ticks / 50.0)
         return 0
 
     def finish_lib(self, ctx):
         # finish file manager
         self.file_mgr.finish()
+        if self.fast_io:
+            ctx.alloc.free_memory(self.fast_io)
         # free dos list
         self.dos_list.free_list()
         # free path
@@ -475,7 +488,7 @@ class DosLibrary(LibImpl):
     def DateStamp(self, ctx):
         ds_ptr = ctx.cpu.r_reg(REG_D1)
         ds = AccessStruct(ctx.mem, DateStampStruct, struct_addr=ds_ptr)
-        t = time.time()
+        t = ctx.clock.get_time()
         at = sys_to_ami_time(t)
         log_dos.info("DateStamp: ptr=%06x sys_time=%d time=%s", ds_ptr, t, at)
         ds.w_s("ds_Days", at.tday)
@@ -910,95 +923,99 @@ class DosLibrary(LibImpl):
             self.setioerr(ctx, 0)
         return DOSTRUE
 
+    def _get_show_data(self, ctx, buf_ptr, size):
+        """data shown in the log: only read if logging is enabled"""
+        if size > 0:
+            return ctx.mem.r_block(buf_ptr, min(size, self.MAX_SHOW_DATA))
+        return "n/a"
+
     def Read(self, ctx, fh_b_addr, buf_ptr, size):
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, False)
-        data = fh.read(size)
-        if data == -1:
+        got = fh.read_mem(ctx.mem, buf_ptr, size)
+        if got == -1:
             log_dos.info("Read(%s, @%06x, %d) -> FAILED!", fh, buf_ptr, size)
             return -1
 
-        got = len(data)
-        if got > 0:
-            ctx.mem.w_block(buf_ptr, data)
-            show_data = data[: self.MAX_SHOW_DATA]
-        else:
-            show_data = "n/a"
-
-        log_dos.info(
-            "Read(%s, @%06x, %d) -> size=%d data=%s", fh, buf_ptr, size, got, show_data
-        )
+        if log_dos.isEnabledFor(logging.INFO):
+            show_data = self._get_show_data(ctx, buf_ptr, got)
+            log_dos.info(
+                "Read(%s, @%06x, %d) -> size=%d data=%s",
+                fh,
+                buf_ptr,
+                size,
+                got,
+                show_data,
+            )
         return got
 
     def Write(self, ctx, fh_b_addr, buf_ptr, size):
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, True)
-        data = ctx.mem.r_block(buf_ptr, size)
-        res = fh.write(data)
+        res = fh.write_mem(ctx.mem, buf_ptr, size)
         if res == -1:
             log_dos.info("Write(%s, %06x, %d) -> FAILED!", fh, buf_ptr, size)
             return -1
 
-        got = len(data)
-        if got > 0:
-            show_len = min(got, self.MAX_SHOW_DATA)
-            show_data = data[:show_len]
-        else:
-            show_data = "n/a"
-
-        log_dos.info(
-            "Write(%s, %06x, %d) -> size=%d data=%s", fh, buf_ptr, size, got, show_data
-        )
+        if log_dos.isEnabledFor(logging.INFO):
+            show_data = self._get_show_data(ctx, buf_ptr, size)
+            log_dos.info(
+                "Write(%s, %06x, %d) -> size=%d data=%s",
+                fh,
+                buf_ptr,
+                size,
+                size,
+                show_data,
+            )
         return size
 
     def FWrite(self, ctx, fh_b_addr, buf_ptr, size, number):
-        # Actually, this is buffered I/O, not unbuffered IO. For the
-        # time being, keep it unbuffered.
+        # buffered I/O: write through the buffer of the file handle
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, True)
-        data = ctx.mem.r_block(buf_ptr, size * number)
-        res = fh.write(data)
+        total = size * number
+        res = fh.put(ctx.mem.r_block(buf_ptr, total))
         if res == -1:
             log_dos.info(
                 "FWrite(%s, %06x, %d, %d) -> FAILED!", fh, buf_ptr, size, number
             )
             return 0
 
-        got = len(data) // size
-        show_data = data[: self.MAX_SHOW_DATA]
-        log_dos.info(
-            "FWrite(%s, %06x, %d, %d) -> %d  data=%s",
-            fh,
-            buf_ptr,
-            size,
-            number,
-            got,
-            show_data,
-        )
+        got = number
+        if log_dos.isEnabledFor(logging.INFO):
+            show_data = self._get_show_data(ctx, buf_ptr, total)
+            log_dos.info(
+                "FWrite(%s, %06x, %d, %d) -> %d  data=%s",
+                fh,
+                buf_ptr,
+                size,
+                number,
+                got,
+                show_data,
+            )
         return got
 
     def FRead(self, ctx, fh_b_addr, buf_ptr, size, number):
-        # Again, this is actually buffered I/O and I should really
-        # go through all the buffer logic. However, for the time
-        # being, keep it unbuffered.
+        # buffered I/O: read_mem() consumes the buffer of the file handle
+        # first and reads the rest directly
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, True)
 
-        data = fh.read(size * number)
-        if data == -1:
+        num_bytes = fh.read_mem(ctx.mem, buf_ptr, size * number)
+        if num_bytes == -1:
             log_dos.info(
                 "FRead(%s, %06x, %d, %d) -> FAILED!", fh, buf_ptr, size, number
             )
             return 0
 
-        got = len(data) // size
-        ctx.mem.w_block(buf_ptr, data)
-        show_data = data[: self.MAX_SHOW_DATA]
-        log_dos.info(
-            "FRead(%s, %06x, %d, %d) -> %d  data=%s",
-            fh,
-            buf_ptr,
-            size,
-            number,
-            got,
-            show_data,
-        )
+        got = num_bytes // size
+        if log_dos.isEnabledFor(logging.INFO):
+            show_data = self._get_show_data(ctx, buf_ptr, num_bytes)
+            log_dos.info(
+                "FRead(%s, %06x, %d, %d) -> %d  data=%s",
+                fh,
+                buf_ptr,
+                size,
+                number,
+                got,
+                show_data,
+            )
         return got
 
     def Seek(self, ctx, fh_b_addr, pos, mode):
@@ -1053,18 +1070,19 @@ class DosLibrary(LibImpl):
     def FPutC(self, ctx, fh_b_addr, val):
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, True)
         log_dos.info("FPutC(%s, '%c' (%d))", fh, val, val)
-        fh.write(bytes((val,)))
+        if fh.putc(val & 0xFF) < 0:
+            return -1
         return val
 
     def FPuts(self, ctx, fh_b_addr, str_ptr):
         str_dat = ctx.mem.r_cbytes(str_ptr)
         # write to stdout
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, True)
-        ok = fh.write(str_dat)
+        ok = fh.put(str_dat)
 
         show_data = str_dat[: self.MAX_SHOW_DATA]
         log_dos.info("FPuts(%s,#%d:%s)", fh, len(str_dat), show_data)
-        return 0 if ok else -1
+        return 0 if ok >= 0 else -1
 
     def UnGetC(self, ctx, fh_b_addr, val):
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, False)
@@ -1078,7 +1096,7 @@ class DosLibrary(LibImpl):
         str_dat = ctx.mem.r_cbytes(str_ptr)
         # write to stdout
         fh = ctx.process.get_output()
-        ok = fh.write(str_dat)
+        ok = fh.put(str_dat)
 
         show_data = str_dat[: self.MAX_SHOW_DATA]
         log_dos.info("PutStr: %s", show_data)
@@ -1090,6 +1108,18 @@ class DosLibrary(LibImpl):
         fh.flush()
         return -1
 
+    def SetVBuf(self, ctx, fh_b_addr, buff, buf_type: LONG, size: LONG):
+        fh = self.file_mgr.get_by_b_addr(fh_b_addr)
+        buf_type = buf_type.val
+        size = size.val
+        log_dos.info(
+            "SetVBuf(fh=%s,buff=%06x,type=%d,size=%d)", fh, buff, buf_type, size
+        )
+        if not fh.set_vbuf(buff, buf_type, size):
+            self.setioerr(ctx, ERROR_BAD_NUMBER)
+            return -1
+        return 0
+
     def VPrintf(self, ctx):
         format_ptr = ctx.cpu.r_reg(REG_D1)
         argv_ptr = ctx.cpu.r_reg(REG_D2)
@@ -1098,12 +1128,10 @@ class DosLibrary(LibImpl):
         fh = ctx.process.get_output()
         log_dos.info("VPrintf: format='%s' argv=%06x", fmt, argv_ptr)
         # now decode printf
-        ps = Printf.printf_parse_string(fmt)
-        Printf.printf_read_data(ps, ctx.mem, argv_ptr)
-        log_dos.debug("VPrintf: parsed format: %s", ps)
-        result = Printf.printf_generate_output(ps)
+        result, _ = Printf.printf_format(fmt, ctx.mem, argv_ptr)
+        log_dos.debug("VPrintf: result: '%s'", result)
         # write result
-        fh.write(result.encode("latin-1"))
+        fh.put(result.encode("latin-1"))
         return len(result)
 
     def VFPrintf(self, ctx):
@@ -1115,12 +1143,10 @@ class DosLibrary(LibImpl):
         # write on output
         log_dos.info("VFPrintf: format='%s' argv=%06x", fmt, argv_ptr)
         # now decode printf
-        ps = Printf.printf_parse_string(fmt)
-        Printf.printf_read_data(ps, ctx.mem, argv_ptr)
-        log_dos.debug("VFPrintf: parsed format: %s", ps)
-        result = Printf.printf_generate_output(ps)
+        result, _ = Printf.printf_format(fmt, ctx.mem, argv_ptr)
+        log_dos.debug("VFPrintf: result: '%s'", result)
         # write result
-        fh.write(result.encode("latin-1"))
+        fh.put(result.encode("latin-1"))
         return len(result)
 
     def WriteChars(self, ctx):
@@ -1128,7 +1154,7 @@ class DosLibrary(LibImpl):
         buf_addr = ctx.cpu.r_reg(REG_D1)
         siz = ctx.cpu.r_reg(REG_D2)
         buf = ctx.mem.r_cbytes(buf_addr)[:siz]
-        fh.write(buf)
+        fh.put(buf)
         return len(buf)
 
     def VFWritef(self, ctx):
@@ -1192,7 +1218,7 @@ class DosLibrary(LibImpl):
                 else:
                     out = out + ch
         data = out.encode("latin-1")
-        fh.write(data)
+        fh.put(data)
         return len(data)
 
     # ----- Stdin --------
@@ -1209,7 +1235,8 @@ class DosLibrary(LibImpl):
             return 0
 
         fh = self.file_mgr.get_by_b_addr(fh_b_addr, False)
-        line, error = fh.gets(buflen)
+        # keep room for the terminating zero
+        line, error = fh.gets(buflen - 1)
         log_dos.info("FGetS(%s,%d) -> '%s' error=%s", fh, buflen, line, error)
         ctx.mem.w_cstr(bufaddr, line)
         if line == "":
@@ -1383,6 +1410,47 @@ class DosLibrary(LibImpl):
         else:
             return DOSFALSE
 
+    def ExAll(self, ctx):
+        lock_b_addr = ctx.cpu.r_reg(REG_D1)
+        buf_ptr = ctx.cpu.r_reg(REG_D2)
+        buf_size = ctx.cpu.r_reg(REG_D3)
+        data_type = ctx.cpu.r_reg(REG_D4)
+        ctrl_ptr = ctx.cpu.r_reg(REG_D5)
+        lock = self.lock_mgr.get_by_b_addr(lock_b_addr)
+        ctrl = AccessStruct(ctx.mem, ExAllControlStruct, struct_addr=ctrl_ptr)
+        # match string is a parsed pattern
+        pattern = None
+        match_ptr = ctrl.r_s("eac_MatchString")
+        if match_ptr != 0:
+            pat = ctx.mem.r_cstr(match_ptr)
+            pattern = Pattern(None, pat, True, True)
+        if ctrl.r_s("eac_MatchFunc") != 0:
+            log_dos.warning("ExAll: eac_MatchFunc hook is not supported!")
+        err = lock.examine_all(ctx.mem, buf_ptr, buf_size, data_type, ctrl, pattern)
+        log_dos.info(
+            "ExAll: %s buf=%06x size=%d type=%d ctrl=%06x -> entries=%d %s",
+            lock,
+            buf_ptr,
+            buf_size,
+            data_type,
+            ctrl_ptr,
+            ctrl.r_s("eac_Entries"),
+            err,
+        )
+        self.setioerr(ctx, err)
+        if err == NO_ERROR:
+            return DOSTRUE
+        else:
+            return DOSFALSE
+
+    def ExAllEnd(self, ctx):
+        lock_b_addr = ctx.cpu.r_reg(REG_D1)
+        ctrl_ptr = ctx.cpu.r_reg(REG_D5)
+        lock = self.lock_mgr.get_by_b_addr(lock_b_addr)
+        ctrl = AccessStruct(ctx.mem, ExAllControlStruct, struct_addr=ctrl_ptr)
+        log_dos.info("ExAllEnd: %s ctrl=%06x", lock, ctrl_ptr)
+        lock.exall_end(ctrl)
+
     def Info(self, ctx):
         lock_b_addr = ctx.cpu.r_reg(REG_D1)
         info_ptr = ctx.cpu.r_reg(REG_D2)
@@ -2097,7 +2165,7 @@ class DosLibrary(LibImpl):
             struct_def = FileHandleStruct
         elif obj_type == 1:  # DOS_EXALLCONTROL
             name = "DOS_EXALLCONTROL"
-            struct_def = None
+            struct_def = ExAllControlStruct
         elif obj_type == 2:  # DOS_FIB
             name = "DOS_FIB"
             struct_def = FileInfoBlockStruct
@@ -2132,6 +2200,8 @@ class DosLibrary(LibImpl):
         if obj_type == 0:
             dos_obj.access.w_s("fh_Pos", 0xFFFFFFFF)
             dos_obj.access.w_s("fh_End", 0xFFFFFFFF)
+        elif obj_type == 1:
+            ctx.mem.clear_block(ptr, dos_obj.size, 0)
         elif obj_type == 4:
             raise UnsupportedFeatureError("AllocDosObject: DOS_CLI fill TBD")
         return ptr
@@ -9,6 +9,7 @@ from amitools.vamos.libstructs import (
     IORequestStruct,
     MessageStruct,
     MsgPortStruct,
+    MsgPortFlags,
     ListStruct,
     NodeStruct,
     NodeType,
@@ -23,7 +24,8 @@ from amitools.vamos.lib.lexec.taskfunc import TaskFunc
 from .lexec.PortManager import PortManager
 from .lexec.SemaphoreManager import SemaphoreManager
 from .lexec.Pool import Pool
-from .lexec.RawDoFmt import raw_do_fmt
+from .lexec.RawDoFmt import raw_do_fmt, PutProcFragment
+from .lexec.flags import IOFlag, IOErr
 from .lexec import Alloc
 
 
@@ -59,6 +61,11 @@ class ExecLibrary(LibImpl):
         self.mem = ctx.mem
         self.signal_func = SignalFunc(ctx, self.exec_lib)
         self.task_func = TaskFunc(ctx, self.exec_lib)
+        # reused fragment for RawDoFmt with unknown PutChProcs
+        self.raw_do_fmt_frag = PutProcFragment(ctx.alloc, ctx.mem)
+
+    def finish_lib(self, ctx):
+        self.raw_do_fmt_frag.free()
 
     # helper
 
@@ -457,6 +464,7 @@ class ExecLibrary(LibImpl):
                 "PutMsg: on invalid Port (%06x) called!" % port_addr
             )
         self.port_mgr.put_msg(port_addr, msg_addr)
+        self._signal_port(ctx, port_addr)
 
     def GetMsg(self, ctx):
         port_addr = ctx.cpu.r_reg(REG_A0)
@@ -483,16 +491,39 @@ class ExecLibrary(LibImpl):
         reply_port = msg.r_s("mn_ReplyPort")
         if reply_port == 0:
             return 0
-        if not self.port_mgr.has_port(reply_port):
-            log_exec.warning("ReplyMsg: invalid reply port %06x", reply_port)
-            return 0
         msg.w_s("mn_Node.ln_Type", NodeType.NT_REPLYMSG)
-        self.port_mgr.put_msg(reply_port, msg_addr)
+        if self.port_mgr.has_port(reply_port):
+            self.port_mgr.put_msg(reply_port, msg_addr)
+        else:
+            log_exec.warning("ReplyMsg: invalid reply port %06x", reply_port)
+        self._signal_port(ctx, reply_port)
         return 0
 
+    def _signal_port(self, ctx, port_addr):
+        """signal the task of a port after a message arrived"""
+        mp = AccessStruct(ctx.mem, MsgPortStruct, port_addr)
+        if mp.r_s("mp_Flags") & 3 != MsgPortFlags.PA_SIGNAL:
+            return
+        sig_task = mp.r_s("mp_SigTask")
+        if sig_task == 0:
+            return
+        self.signal_func.signal(sig_task, 1 << mp.r_s("mp_SigBit"))
+
     def CreateMsgPort(self, ctx):
         port = self.port_mgr.create_port("exec_port", None)
-        log_exec.info("CreateMsgPort: -> port=%06x" % (port))
+        # the port signals its creator
+        mp = AccessStruct(ctx.mem, MsgPortStruct, port)
+        mp.w_s("mp_Node.ln_Type", NodeType.NT_MSGPORT)
+        sig_bit = self.signal_func.alloc_signal(-1)
+        if sig_bit == -1:
+            log_exec.warning("CreateMsgPort: no free signal!")
+            mp.w_s("mp_Flags", MsgPortFlags.PA_IGNORE)
+        else:
+            task = self.signal_func.get_my_ami_task()
+            mp.w_s("mp_Flags", MsgPortFlags.PA_SIGNAL)
+            mp.w_s("mp_SigBit", sig_bit)
+            mp.w_s("mp_SigTask", task.addr if task else 0)
+        log_exec.info("CreateMsgPort: -> port=%06x sig_bit=%d" % (port, sig_bit))
         return port
 
     def AddPort(self, ctx):
@@ -565,6 +596,9 @@ class ExecLibrary(LibImpl):
     def DeleteMsgPort(self, ctx):
         port = ctx.cpu.r_reg(REG_A0)
         log_exec.info("DeleteMsgPort(%06x)" % port)
+        mp = AccessStruct(ctx.mem, MsgPortStruct, port)
+        if mp.r_s("mp_Flags") & 3 == MsgPortFlags.PA_SIGNAL:
+            self.signal_func.free_signal(mp.r_s("mp_SigBit"))
         self.port_mgr.free_port(port)
         return 0
 
@@ -629,8 +663,25 @@ class ExecLibrary(LibImpl):
                 self.lib_mgr.close_lib(dev_addr)
                 io.w_s("io_Device", 0)
 
+    def _get_device_impl(self, io):
+        dev_addr = io.r_s("io_Device")
+        vlib = self.lib_mgr.get_vlib_by_addr(dev_addr)
+        if vlib is None:
+            return None
+        return vlib.get_impl()
+
+    def _io_done(self, io):
+        """a request is done if it was quick or was replied"""
+        if io.r_s("io_Flags") & IOFlag.IOF_QUICK:
+            return True
+        return io.r_s("io_Message.mn_Node.ln_Type") == NodeType.NT_REPLYMSG
+
     def _dispatch_begin_io(self, ctx, io_addr):
-        """Helper to call BeginIO on the target device and mark the request done."""
+        """Helper to call BeginIO on the target device.
+
+        A device completes the request at once and keeps IOF_QUICK set or it
+        clears the flag and replies the request later.
+        """
         io = AccessStruct(ctx.mem, IORequestStruct, io_addr)
         dev_addr = io.r_s("io_Device")
         vlib = self.lib_mgr.get_vlib_by_addr(dev_addr)
@@ -643,18 +694,42 @@ class ExecLibrary(LibImpl):
         # ensure regs point at the IORequest
         ctx.cpu.w_reg(REG_A1, io_addr)
         if hasattr(impl, "BeginIO"):
+            flags = io.r_s("io_Flags") | IOFlag.IOF_QUICK
+            io.w_s("io_Flags", flags)
+            io.w_s("io_Message.mn_Node.ln_Type", NodeType.NT_MESSAGE)
             impl.BeginIO(ctx)
             # flag completion
-            flags = io.r_s("io_Flags") | 1  # IOF_QUICK
-            io.w_s("io_Flags", flags)
-            io.w_s("io_Message.mn_Node.ln_Type", NodeType.NT_REPLYMSG)
+            if io.r_s("io_Flags") & IOFlag.IOF_QUICK:
+                io.w_s("io_Message.mn_Node.ln_Type", NodeType.NT_REPLYMSG)
             return io.r_s("io_Error")
         log_exec.warning("DoIO: device impl missing BeginIO for dev=0x%06x", dev_addr)
         return -1
 
+    def _wait_io(self, ctx, io_addr):
+        """wait for a pending request and remove its reply. return io_Error"""
+        io = AccessStruct(ctx.mem, IORequestStruct, io_addr)
+        reply_port = io.r_s("io_Message.mn_ReplyPort")
+        if not self._io_done(io):
+            if self.signal_func.get_my_sched_task() is None:
+                raise UnsupportedFeatureError(
+                    "WaitIO on pending request (%06x) without task" % io_addr
+                )
+            mp = AccessStruct(ctx.mem, MsgPortStruct, reply_port)
+            sig_mask = 1 << mp.r_s("mp_SigBit")
+            while not self._io_done(io):
+                self.signal_func.set_signal(0, sig_mask)
+                self.signal_func.wait(sig_mask)
+        # take reply from port
+        if reply_port != 0 and self.port_mgr.has_port(reply_port):
+            self.port_mgr.remove_msg(reply_port, io_addr)
+        return io.r_s("io_Error")
+
     def DoIO(self, ctx):
         io_addr = ctx.cpu.r_reg(REG_A1)
         res = self._dispatch_begin_io(ctx, io_addr)
+        io = AccessStruct(ctx.mem, IORequestStruct, io_addr)
+        if res != -1 and not self._io_done(io):
+            res = self._wait_io(ctx, io_addr)
         log_exec.info("DoIO(io=0x%06x) -> %d", io_addr, res)
         return res
 
@@ -663,13 +738,18 @@ class ExecLibrary(LibImpl):
         res = self._dispatch_begin_io(ctx, io_addr)
         log_exec.info("SendIO(io=0x%06x) -> %d", io_addr, res)
         # SendIO is asynchronous - the caller expects a reply message when IO completes.
-        # Since we complete synchronously in _dispatch_begin_io, we simulate async
-        # completion by sending the IORequest as a reply message to the reply port.
+        # A pending request is replied by its device. If the device completed
+        # synchronously then we simulate async completion by sending the
+        # IORequest as a reply message to the reply port.
         io = AccessStruct(ctx.mem, IORequestStruct, io_addr)
+        if not (io.r_s("io_Flags") & IOFlag.IOF_QUICK):
+            log_exec.info("SendIO: pending")
+            return res
         reply_port = io.r_s("io_Message.mn_ReplyPort")
         has_port = reply_port != 0 and self.port_mgr.has_port(reply_port)
         if has_port:
             self.port_mgr.put_msg(reply_port, io_addr)
+            self._signal_port(ctx, reply_port)
             log_exec.info("SendIO: queued reply to port 0x%06x", reply_port)
         else:
             log_exec.warning(
@@ -681,14 +761,25 @@ class ExecLibrary(LibImpl):
         io_addr = ctx.cpu.r_reg(REG_A1)
         io = AccessStruct(ctx.mem, IORequestStruct, io_addr)
         log_exec.info("CheckIO(io=0x%06x)", io_addr)
-        # Return io_addr if complete (IOF_QUICK set), 0 if still pending
-        return io_addr if (io.r_s("io_Flags") & 1) else 0
+        # Return io_addr if complete, 0 if still pending
+        return io_addr if self._io_done(io) else 0
 
     def WaitIO(self, ctx):
         io_addr = ctx.cpu.r_reg(REG_A1)
-        io = AccessStruct(ctx.mem, IORequestStruct, io_addr)
         log_exec.info("WaitIO(io=0x%06x)", io_addr)
-        return io.r_s("io_Error")
+        return self._wait_io(ctx, io_addr)
+
+    def AbortIO(self, ctx):
+        io_addr = ctx.cpu.r_reg(REG_A1)
+        io = AccessStruct(ctx.mem, IORequestStruct, io_addr)
+        log_exec.info("AbortIO(io=0x%06x)", io_addr)
+        if self._io_done(io):
+            return 0
+        impl = self._get_device_impl(io)
+        if impl is None or not hasattr(impl, "AbortIO"):
+            log_exec.warning("AbortIO: device can't abort io=0x%06x", io_addr)
+            return IOErr.IOERR_NOCMD
+        return impl.AbortIO(ctx)
 
     # Class variables for tracking blocked WaitPort/Wait state (used by amifuse)
     _waitport_blocked_sp = None
@@ -698,6 +789,16 @@ class ExecLibrary(LibImpl):
     _wait_blocked_ret = None
     _wait_blocked_mask = None
 
+    def _can_wait_port(self, ctx, port_addr):
+        """a task can wait if the port signals it"""
+        task = self.signal_func.get_my_ami_task()
+        if task is None:
+            return False
+        mp = AccessStruct(ctx.mem, MsgPortStruct, port_addr)
+        if mp.r_s("mp_Flags") & 3 != MsgPortFlags.PA_SIGNAL:
+            return False
+        return mp.r_s("mp_SigTask") == task.addr
+
     def WaitPort(self, ctx):
         port_addr = ctx.cpu.r_reg(REG_A0)
         log_exec.info("WaitPort: port=%06x" % (port_addr))
@@ -707,6 +808,13 @@ class ExecLibrary(LibImpl):
                 "WaitPort: on invalid Port (%06x) called!" % port_addr
             )
         has_msg = self.port_mgr.has_msg(port_addr)
+        if not has_msg and self._can_wait_port(ctx, port_addr):
+            mp = AccessStruct(ctx.mem, MsgPortStruct, port_addr)
+            sig_mask = 1 << mp.r_s("mp_SigBit")
+            while not self.port_mgr.has_msg(port_addr):
+                self.signal_func.set_signal(0, sig_mask)
+                self.signal_func.wait(sig_mask)
+            has_msg = True
         if not has_msg:
             # Set blocking state before raising exception (for amifuse resume support)
             sp = ctx.cpu.r_reg(REG_A7)
@@ -835,7 +943,7 @@ class ExecLibrary(LibImpl):
         putProc = ctx.cpu.r_reg(REG_A2)
         putData = ctx.cpu.r_reg(REG_A3)
         dataStream, fmt, resultstr, known = raw_do_fmt(
-            ctx, fmtString, dataStream, putProc, putData
+            ctx, fmtString, dataStream, putProc, putData, self.raw_do_fmt_frag
         )
         log_exec.info(
             "RawDoFmt: fmtString=%s -> %s (known=%s, dataStream=%06x)"
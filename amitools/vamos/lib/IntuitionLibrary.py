@@ -22,7 +22,7 @@ class IntuitionLibrary(LibImpl):
         log_intuition.error("-----> EasyRequest '%s'", msg)
 
     def CurrentTime(self, ctx, secs_ptr, micros_ptr):
-        secs, micros = TimerDevice.get_sys_time()
+        secs, micros = TimerDevice.get_sys_time(ctx.clock)
         log_intuition.info(
             "CurrentTime(%08x, %08x) -> secs=%d micros=%d",
             secs_ptr,
@@ -1,10 +1,11 @@
-import time
 from amitools.vamos.libcore import LibImpl
 from amitools.vamos.machine.regs import REG_A0, REG_A1
 from amitools.vamos.astructs import AccessStruct, LONG
 from amitools.vamos.libtypes import TimeVal
-from amitools.vamos.libstructs import IORequestStruct
+from amitools.vamos.libstructs import IORequestStruct, NodeType
 from amitools.vamos.log import log_timer
+from amitools.vamos.schedule.clock import default_clock
+from amitools.vamos.lib.lexec.flags import IOFlag, IOErr
 
 # Timer commands
 TR_ADDREQUEST = 9
@@ -20,23 +21,34 @@ class TimerDevice(LibImpl):
     # micros per second
     MICRO_HZ = 1_000_000
 
+    # real delays are capped to avoid long hangs
+    MAX_REAL_DELAY = 1.0
+
     @classmethod
-    def get_sys_time(cls):
+    def get_sys_time(cls, clock=default_clock):
         """a static method so we could share it if needed
 
         return secs, micros
         """
-        t = time.time()
-        secs = int(t)
-        micros = t - secs
-        micros *= cls.MICRO_HZ
-        micros = int(micros)
+        t_ns = clock.get_time_ns()
+        secs, nanos = divmod(t_ns, 1_000_000_000)
+        micros = nanos // 1000
         return secs, micros
 
+    def setup_lib(self, ctx, base_addr):
+        # pending TR_ADDREQUESTs: io_addr -> timer handle
+        self.pending = {}
+
+    def finish_lib(self, ctx):
+        # drop requests that were never waited for
+        for handle in self.pending.values():
+            ctx.scheduler.cancel_timer(handle)
+        self.pending = {}
+
     @classmethod
-    def get_eclock_lo_hi(cls):
+    def get_eclock_lo_hi(cls, clock=default_clock):
         # use the monotonic time here to have a suitable clock for benchmarks
-        ts_ns = time.monotonic_ns()
+        ts_ns = clock.get_monotonic_ns()
         eclk = ts_ns // cls.ECLOCK_NS_FACTOR
         eclk_lo = eclk & 0xFFFFFFFF
         eclk_hi = eclk >> 32
@@ -61,12 +73,25 @@ class TimerDevice(LibImpl):
             log_timer.info(
                 "BeginIO: TR_ADDREQUEST secs=%d micro=%d", tv_secs, tv_micro
             )
-            # Cap at 1 second max to avoid long hangs, but still provide real delay
-            if delay_secs > 0:
-                time.sleep(min(delay_secs, 1.0))
+            sched = ctx.scheduler
+            if sched and sched.get_cur_task() and delay_secs > 0:
+                # queue request and let the scheduler reply it on expiry.
+                # real delays are capped like the synchronous ones.
+                delay_ns = tv_secs * 1_000_000_000 + tv_micro * 1000
+                if not ctx.clock.virtual:
+                    max_ns = int(self.MAX_REAL_DELAY * 1_000_000_000)
+                    delay_ns = min(delay_ns, max_ns)
+                self._add_request(ctx, io, io_addr, delay_ns)
+            else:
+                # no tasks: delay synchronously.
+                # a virtual clock simply skips the time. a real delay is capped
+                # at 1 second max to avoid long hangs.
+                if not ctx.clock.virtual:
+                    delay_secs = min(delay_secs, self.MAX_REAL_DELAY)
+                ctx.clock.delay(delay_secs)
         elif cmd == TR_GETSYSTIME:
             # Return current time
-            secs, micros = self.get_sys_time()
+            secs, micros = self.get_sys_time(ctx.clock)
             log_timer.info("BeginIO: TR_GETSYSTIME -> secs=%d micro=%d", secs, micros)
             ctx.mem.w32(io_addr + 32, secs)
             ctx.mem.w32(io_addr + 36, micros)
@@ -75,8 +100,41 @@ class TimerDevice(LibImpl):
         # Other commands just succeed
         return 0
 
+    def AbortIO(self, ctx):
+        io_addr = ctx.cpu.r_reg(REG_A1)
+        handle = self.pending.pop(io_addr, None)
+        log_timer.info("AbortIO: io=%06x pending=%s", io_addr, handle is not None)
+        if handle is None:
+            return 0
+        ctx.scheduler.cancel_timer(handle)
+        io = AccessStruct(ctx.mem, IORequestStruct, io_addr)
+        io.w_s("io_Error", IOErr.IOERR_ABORTED)
+        self._reply_request(ctx, io_addr)
+        return 0
+
+    def _add_request(self, ctx, io, io_addr, delay_ns):
+        # mark request as pending
+        io.w_s("io_Flags", io.r_s("io_Flags") & ~IOFlag.IOF_QUICK)
+        io.w_s("io_Message.mn_Node.ln_Type", NodeType.NT_MESSAGE)
+        deadline = ctx.clock.get_monotonic_ns() + delay_ns
+        old = self.pending.pop(io_addr, None)
+        if old is not None:
+            log_timer.warning("BeginIO: request %06x still pending!", io_addr)
+            ctx.scheduler.cancel_timer(old)
+
+        def expire():
+            log_timer.info("TR_ADDREQUEST: io=%06x done", io_addr)
+            del self.pending[io_addr]
+            self._reply_request(ctx, io_addr)
+
+        self.pending[io_addr] = ctx.scheduler.add_timer(deadline, expire)
+
+    def _reply_request(self, ctx, io_addr):
+        exec_lib = ctx.proxies.get_exec_lib_proxy()
+        exec_lib.ReplyMsg(io_addr)
+
     def ReadEClock(self, ctx, tv: TimeVal):
-        lo, hi = self.get_eclock_lo_hi()
+        lo, hi = self.get_eclock_lo_hi(ctx.clock)
         log_timer.info("ReadEClock(%s) -> lo=%d hi=%d", tv, lo, hi)
         tv.set_time_val(hi, lo)
 
@@ -84,7 +142,7 @@ class TimerDevice(LibImpl):
         return self.ECLOCK_HZ
 
     def GetSysTime(self, ctx, tv: TimeVal):
-        secs, micros = self.get_sys_time()
+        secs, micros = self.get_sys_time(ctx.clock)
         log_timer.info("GetSysTime(%s) -> secs=%d micros=%d", tv, secs, micros)
         tv.set_time_val(secs, micros)
 
@@ -0,0 +1,146 @@
+import struct
+from amitools.vamos.libcore import LibJumpTable, NoJumpTableEntryError
+from amitools.vamos.log import log_dos
+
+# Fast paths for the buffered character I/O of dos.library
+#
+# The fragments work directly on the guest buffer of a FileHandle
+# (see FileHandle) and only jump to the original (trap) entry of the
+# function if the buffer needs to be filled or flushed.
+
+# FGetC(fh)(d1)
+# +0000: 4a81                 tst.l   d1
+# +0002: 6726                 beq.s   slow
+# +0004: 2041                 movea.l d1,a0
+# +0006: d1c8                 adda.l  a0,a0
+# +0008: d1c8                 adda.l  a0,a0
+# +000a: 2028 0010            move.l  fh_Pos(a0),d0
+# +000e: 6b1a                 bmi.s   slow
+# +0010: b0a8 0014            cmp.l   fh_End(a0),d0
+# +0014: 6c14                 bge.s   slow
+# +0016: 52a8 0010            addq.l  #1,fh_Pos(a0)
+# +001a: 2268 000c            movea.l fh_Buf(a0),a1
+# +001e: d3c9                 adda.l  a1,a1
+# +0020: d3c9                 adda.l  a1,a1
+# +0022: d3c0                 adda.l  d0,a1
+# +0024: 7000                 moveq   #0,d0
+# +0026: 1011                 move.b  (a1),d0
+# +0028: 4e75                 rts
+# slow:
+# +002a: 4ef9 <func>          jmp     func
+# =0030
+
+fgetc_hex = (
+    0x4A81,
+    0x6726,
+    0x2041,
+    0xD1C8,
+    0xD1C8,
+    0x2028,
+    0x0010,
+    0x6B1A,
+    0xB0A8,
+    0x0014,
+    0x6C14,
+    0x52A8,
+    0x0010,
+    0x2268,
+    0x000C,
+    0xD3C9,
+    0xD3C9,
+    0xD3C0,
+    0x7000,
+    0x1011,
+    0x4E75,
+    0x4EF9,
+    0,
+    0,
+)
+fgetc_bin = b"".join([struct.pack(">H", x) for x in fgetc_hex])
+
+# FPutC(fh,ch)(d1/d2)
+# +0000: 4a81                 tst.l   d1
+# +0002: 6732                 beq.s   slow
+# +0004: 2041                 movea.l d1,a0
+# +0006: d1c8                 adda.l  a0,a0
+# +0008: d1c8                 adda.l  a0,a0
+# +000a: 2028 0010            move.l  fh_Pos(a0),d0
+# +000e: 6b26                 bmi.s   slow
+# +0010: b0a8 0020            cmp.l   fh_Func3(a0),d0     ; buffer size
+# +0014: 6c20                 bge.s   slow
+# +0016: 4aa8 001c            tst.l   fh_Func2(a0)        ; line buffered?
+# +001a: 6706                 beq.s   store
+# +001c: 0c02 000a            cmpi.b  #10,d2
+# +0020: 6714                 beq.s   slow
+# store:
+# +0022: 52a8 0010            addq.l  #1,fh_Pos(a0)
+# +0026: 2268 000c            movea.l fh_Buf(a0),a1
+# +002a: d3c9                 adda.l  a1,a1
+# +002c: d3c9                 adda.l  a1,a1
+# +002e: 1382 0800            move.b  d2,(0,a1,d0.l)
+# +0032: 2002                 move.l  d2,d0
+# +0034: 4e75                 rts
+# slow:
+# +0036: 4ef9 <func>          jmp     func
+# =003c
+
+fputc_hex = (
+    0x4A81,
+    0x6732,
+    0x2041,
+    0xD1C8,
+    0xD1C8,
+    0x2028,
+    0x0010,
+    0x6B26,
+    0xB0A8,
+    0x0020,
+    0x6C20,
+    0x4AA8,
+    0x001C,
+    0x6706,
+    0x0C02,
+    0x000A,
+    0x6714,
+    0x52A8,
+    0x0010,
+    0x2268,
+    0x000C,
+    0xD3C9,
+    0xD3C9,
+    0x1382,
+    0x0800,
+    0x2002,
+    0x4E75,
+    0x4EF9,
+    0,
+    0,
+)
+fputc_bin = b"".join([struct.pack(">H", x) for x in fputc_hex])
+
+# lvo -> code
+fast_funcs = ((-306, fgetc_bin), (-312, fputc_bin))
+
+
+def setup_fast_io(ctx, base_addr, neg_size):
+    """install the fast paths in the jump table of dos.library
+
+    return memory object of fragments or None if jump table is not patchable
+    """
+    jt = LibJumpTable(ctx.mem, base_addr, neg_size)
+    try:
+        funcs = [(lvo, code, jt[lvo]) for lvo, code in fast_funcs]
+    except NoJumpTableEntryError as e:
+        log_dos.warning("no fast I/O: no jump table entry at %06x", e.addr)
+        return None
+    size = sum([len(code) for _, code, _ in funcs])
+    mem_obj = ctx.alloc.alloc_memory(size, "DosFastIO")
+    addr = mem_obj.addr
+    for lvo, code, func_addr in funcs:
+        code_len = len(code)
+        ctx.mem.w_block(addr, code)
+        ctx.mem.w32(addr + code_len - 4, func_addr)
+        jt[lvo] = addr
+        log_dos.debug("fast I/O: lvo %d at %06x -> %06x", lvo, addr, func_addr)
+        addr += code_len
+    return mem_obj
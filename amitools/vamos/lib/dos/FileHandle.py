@@ -4,9 +4,34 @@ import sys
 from amitools.vamos.libstructs import FileHandleStruct
 from .terminal import Terminal
 
+# SetVBuf() buffer types
+BUF_LINE = 0
+BUF_FULL = 1
+BUF_NONE = 2
+
+# state of the guest buffer
+BUF_MODE_NONE = 0
+BUF_MODE_READ = 1
+BUF_MODE_WRITE = 2
+
 
 class FileHandle:
-    """represent an AmigaOS file handle (FH) in vamos"""
+    """represent an AmigaOS file handle (FH) in vamos
+
+    Buffered I/O (FGetC, FPutC, FGets, FPuts, ...) uses a buffer in guest
+    memory that is attached to the FileHandle struct:
+
+    fh_Buf   BPTR of the buffer
+    fh_Pos   index of next char in buffer or -1 if no buffer is active
+    fh_End   read mode: end of valid data in buffer, otherwise -1
+    fh_Func2 write mode: != 0 if buffer is flushed on a newline
+    fh_Func3 write mode: size of buffer, otherwise -1
+
+    This allows the m68k fast path of FGetC and FPutC (see FastIO) to work
+    on the buffer directly and only call into vamos to refill or flush it.
+    """
+
+    default_buf_size = 4096
 
     def __init__(
         self, obj, ami_path, sys_path, need_close=True, is_nil=False, auto_flush=False
@@ -28,6 +53,22 @@ class FileHandle:
             self.terminal = Terminal(obj)
         else:
             self.terminal = None
+        # guest buffer
+        self.alloc = None
+        self.ram = None
+        self.buf_mem = None
+        self.buf_addr = 0
+        self.buf_size = self.default_buf_size
+        if self.interactive:
+            self.buf_type = BUF_LINE
+        else:
+            self.buf_type = BUF_FULL
+        self.buf_mode = BUF_MODE_NONE
+        self.buf_from_host = False
+        # data already read from host but not in guest buffer
+        self.pending = bytearray()
+        # output handle to flush before reading from host
+        self.tied_output = None
 
     def __repr__(self):
         return "[FH:'%s'(ami='%s',sys='%s',nc=%s,af=%s,int=%s)@%06x=B@%06x]" % (
@@ -45,27 +86,232 @@ class FileHandle:
         return "[FH:'%s'@%06x=B@%06x]" % (self.name, self.mem.addr, self.b_addr)
 
     def close(self):
+        self._flush_buffer()
         if self.need_close:
             self.obj.close()
         # restore tty
         if self.terminal:
             self.terminal.close()
 
+    def rebind(self, obj):
+        """attach the handle to a new host file object, e.g. a new stdin"""
+        self._flush_buffer()
+        self._reset_buffer()
+        self.pending = bytearray()
+        if self.terminal:
+            self.terminal.close()
+        self.obj = obj
+        self.unch = bytearray()
+        self.ch = -1
+        self.interactive = self.obj.isatty()
+        if self.interactive:
+            self.terminal = Terminal(obj)
+        else:
+            self.terminal = None
+
     def alloc_fh(self, alloc, fs_handler_port):
         name = "File:" + self.name
+        self.alloc = alloc
+        self.ram = alloc.mem
         self.mem = alloc.alloc_struct(FileHandleStruct, label=name)
         self.b_addr = self.mem.addr >> 2
         # -- fill filehandle
+        access = self.mem.access
         # use baddr of FH itself as identifier
-        self.mem.access.w_s("fh_Args", self.b_addr)
+        access.w_s("fh_Args", self.b_addr)
         # set port
-        self.mem.access.w_s("fh_Type", fs_handler_port)
-        # buffer handling: set fh_End != 0 (to prepare for EOF hack in FGetS)
-        self.mem.access.w_s("fh_End", 1)
+        access.w_s("fh_Type", fs_handler_port)
+        # no buffer yet. fh_End != 0 (to prepare for EOF hack in FGetS)
+        access.write_fields(
+            {"fh_Buf": 0, "fh_Pos": -1, "fh_End": -1, "fh_Func2": 0, "fh_Func3": -1}
+        )
         return self.b_addr
 
     def free_fh(self, alloc):
+        self._flush_buffer()
+        self._free_buffer()
         alloc.free_struct(self.mem)
+        self.alloc = None
+
+    # --- guest buffer ---
+
+    def _use_buffer(self):
+        return self.alloc is not None and self.buf_type != BUF_NONE
+
+    def _alloc_buffer(self):
+        if self.buf_addr == 0:
+            label = "FileBuf:" + self.name
+            self.buf_mem = self.alloc.alloc_memory(self.buf_size, label=label)
+            self.buf_addr = self.buf_mem.addr
+            self.mem.access.w_s("fh_Buf", self.buf_addr >> 2)
+
+    def _free_buffer(self):
+        self._reset_buffer()
+        if self.buf_mem is not None:
+            self.alloc.free_memory(self.buf_mem)
+            self.buf_mem = None
+        if self.buf_addr != 0:
+            self.buf_addr = 0
+            self.mem.access.w_s("fh_Buf", 0)
+
+    def _reset_buffer(self):
+        if self.buf_mode != BUF_MODE_NONE:
+            self.buf_mode = BUF_MODE_NONE
+            self.mem.access.write_fields({"fh_Pos": -1, "fh_End": -1, "fh_Func3": -1})
+
+    def _get_read_data(self, injected=True):
+        """return pos, end of unread data in guest buffer"""
+        if self.buf_mode != BUF_MODE_READ:
+            return 0, 0
+        # injected data is only visible for buffered reads
+        if not injected and not self.buf_from_host:
+            return 0, 0
+        pos, end = self.mem.access.read_fields("fh_Pos", "fh_End")
+        if pos < 0 or pos > end:
+            return 0, 0
+        return pos, end
+
+    def _unbuffer(self, keep_injected=True):
+        """move unread data of the guest buffer back to the host side"""
+        if self.buf_mode == BUF_MODE_READ:
+            pos, end = self._get_read_data()
+            if pos < end:
+                data = self.ram.r_block(self.buf_addr + pos, end - pos)
+                if self.buf_from_host:
+                    self.pending[0:0] = data
+                elif keep_injected:
+                    self.unch[0:0] = data
+            self._reset_buffer()
+
+    def _read_raw(self, size, injected=True):
+        """read injected data, pending data or from host.
+
+        return -1 on error, otherwise data (empty on EOF)"""
+        if injected and len(self.unch) > 0:
+            data = bytes(self.unch[:size])
+            del self.unch[:size]
+            return data
+        if len(self.pending) > 0:
+            data = bytes(self.pending[:size])
+            del self.pending[:size]
+            return data
+        if self.tied_output:
+            self.tied_output.flush_buffer()
+        if self.terminal:
+            return self.terminal.read(size)
+        try:
+            read1 = getattr(self.obj, "read1", None)
+            if read1:
+                return read1(size)
+            return self.obj.read(size)
+        except IOError:
+            return -1
+
+    def _fill_buffer(self):
+        """refill the read buffer.
+
+        return -1 on error, 0=EOF, >0 bytes in buffer"""
+        self._flush_buffer()
+        self._alloc_buffer()
+        self.buf_from_host = len(self.unch) == 0
+        data = self._read_raw(self.buf_size)
+        if data == -1:
+            self._reset_buffer()
+            return -1
+        num = len(data)
+        if num == 0:
+            self._reset_buffer()
+            return 0
+        self.ram.w_block(self.buf_addr, data)
+        self.buf_mode = BUF_MODE_READ
+        self.mem.access.write_fields({"fh_Pos": 0, "fh_End": num, "fh_Func3": -1})
+        return num
+
+    def _prepare_write(self):
+        """switch buffer to write mode and return current pos"""
+        if self.buf_mode == BUF_MODE_WRITE:
+            return self.mem.access.r_s("fh_Pos")
+        self._drop_read_buffer()
+        self._alloc_buffer()
+        self.buf_mode = BUF_MODE_WRITE
+        line = 1 if self.buf_type == BUF_LINE else 0
+        self.mem.access.write_fields(
+            {"fh_Pos": 0, "fh_End": -1, "fh_Func2": line, "fh_Func3": self.buf_size}
+        )
+        return 0
+
+    def _drop_read_buffer(self):
+        """give up read buffer and move host file back to logical pos"""
+        if self.buf_mode != BUF_MODE_READ:
+            return
+        pos, end = self._get_read_data()
+        if pos < end and self.buf_from_host and self._is_seekable():
+            self.obj.seek(pos - end - len(self.pending), 1)
+            self.pending = bytearray()
+            self._reset_buffer()
+        else:
+            self._unbuffer()
+
+    def _flush_buffer(self):
+        """write out pending data of the write buffer"""
+        if self.buf_mode != BUF_MODE_WRITE:
+            return 0
+        pos = self.mem.access.r_s("fh_Pos")
+        if pos <= 0:
+            return 0
+        self.mem.access.w_s("fh_Pos", 0)
+        return self._write_raw(self.ram.r_block(self.buf_addr, pos))
+
+    def _is_seekable(self):
+        if self.terminal:
+            return False
+        try:
+            return self.obj.seekable()
+        except (AttributeError, ValueError):
+            return False
+
+    def flush_buffer(self):
+        """write out the guest buffer if it holds output"""
+        if self.buf_mode == BUF_MODE_WRITE:
+            self._flush_buffer()
+            if self.auto_flush:
+                self.obj.flush()
+
+    def set_vbuf(self, buf_addr, buf_type, size):
+        """change buffering like SetVBuf()
+
+        A buf_addr of 0 lets vamos allocate the buffer. size <= 0 keeps
+        the current size but is rejected for a caller supplied buffer.
+        return True if buffer was set
+        """
+        if buf_type not in (BUF_LINE, BUF_FULL, BUF_NONE):
+            return False
+        if buf_addr != 0 and size <= 0:
+            return False
+        # keep read data and flush written data
+        self._flush_buffer()
+        self._unbuffer()
+        if self.alloc is not None:
+            self._free_buffer()
+        self.buf_type = buf_type
+        if size > 0:
+            self.buf_size = size
+        if buf_addr != 0 and buf_addr & 3 == 0 and self.alloc is not None:
+            # use the caller's buffer
+            self.buf_addr = buf_addr
+            self.mem.access.w_s("fh_Buf", buf_addr >> 2)
+        return True
+
+    def has_input(self):
+        """is host input already read ahead?"""
+        if len(self.pending) > 0:
+            return True
+        pos, end = self._get_read_data(False)
+        return pos < end
+
+    def tie(self, fh):
+        """flush the given output handle before accessing the host file"""
+        self.tied_output = fh
 
     # --- file ops ---
 
@@ -73,20 +319,20 @@ class FileHandle:
         # no tty support on this platform
         if not self.terminal:
             return False
+        self.flush_buffer()
         # set mode
         return self.terminal.set_mode(cooked)
 
     def wait_for_char(self, timeout):
+        if self.has_input():
+            return True
         if not self.terminal:
             return False
         return self.terminal.wait_for_char(timeout)
 
-    def write(self, data):
-        """write data
-
-        return -1 on error, 0=EOF, >0 written bytes"""
-        assert isinstance(data, (bytes, bytearray))
-
+    def _write_raw(self, data):
+        if self.tied_output:
+            self.tied_output.flush_buffer()
         # read from terminal or direct
         if self.terminal:
             got = self.terminal.write(data)
@@ -103,82 +349,202 @@ class FileHandle:
         # return got bytes
         return got
 
+    def write(self, data):
+        """write data unbuffered
+
+        return -1 on error, 0=EOF, >0 written bytes"""
+        assert isinstance(data, (bytes, bytearray))
+        self._flush_buffer()
+        return self._write_raw(data)
+
+    def put(self, data):
+        """write data through the guest buffer
+
+        return -1 on error, >=0 written bytes"""
+        if not self._use_buffer():
+            return self.write(data)
+        num = len(data)
+        pos = self._prepare_write()
+        if pos + num > self.buf_size:
+            if self._flush_buffer() < 0:
+                return -1
+            pos = 0
+            # does not fit at all
+            if num > self.buf_size:
+                return self._write_raw(data)
+        self.ram.w_block(self.buf_addr + pos, data)
+        pos += num
+        self.mem.access.w_s("fh_Pos", pos)
+        if pos >= self.buf_size or (self.buf_type == BUF_LINE and b"\n" in data):
+            self.flush_buffer()
+        return num
+
+    def putc(self, ch):
+        """write a character through the guest buffer"""
+        if not self._use_buffer():
+            return self.write(bytes((ch,)))
+        pos = self._prepare_write()
+        # the fast path of FPutC leaves a full buffer to us
+        if pos >= self.buf_size:
+            if self._flush_buffer() < 0:
+                return -1
+            pos = 0
+        self.ram.w8(self.buf_addr + pos, ch)
+        pos += 1
+        self.mem.access.w_s("fh_Pos", pos)
+        if pos >= self.buf_size or (self.buf_type == BUF_LINE and ch == 10):
+            self.flush_buffer()
+        return 1
+
     def read(self, len):
         """read data
 
         return -1 on error, 0=EOF, >0 written bytes"""
-        if self.terminal:
-            return self.terminal.read(len)
-        try:
-            return self.obj.read(len)
-        except IOError:
-            return -1
+        pos, end = self._get_read_data(False)
+        if pos < end:
+            num = min(len, end - pos)
+            self.mem.access.w_s("fh_Pos", pos + num)
+            return self.ram.r_block(self.buf_addr + pos, num)
+        self._flush_buffer()
+        return self._read_raw(len, False)
+
+    def read_mem(self, mem, addr, size):
+        """read up to size bytes into guest memory at addr
+
+        return -1 on error, 0=EOF, >0 read bytes"""
+        # first take data read ahead into guest buffer
+        total = 0
+        pos, end = self._get_read_data(False)
+        if pos < end:
+            num = min(size, end - pos)
+            mem.w_block(addr, self.ram.r_block(self.buf_addr + pos, num))
+            self.mem.access.w_s("fh_Pos", pos + num)
+            total = num
+            addr += num
+            size -= num
+            if size == 0 or self.interactive:
+                return total
+        self._flush_buffer()
+        data = self._read_raw(size, False)
+        if data == -1:
+            return total if total > 0 else -1
+        if len(data) > 0:
+            mem.w_block(addr, data)
+        return total + len(data)
+
+    def write_mem(self, mem, addr, size):
+        """write size bytes from guest memory at addr
+
+        return -1 on error, 0=EOF, >0 written bytes"""
+        self._flush_buffer()
+        return self._write_raw(mem.r_block(addr, size))
 
     def getc(self):
         """read character
 
         return char 0-255 or -1 on Error and -2 on EOF
         """
-        if len(self.unch) > 0:
-            # first unget char
-            self.ch = self.unch.pop(0)
-        else:
-            # handle NIL:
-            if self.is_nil:
-                return -1
-
-            # read from terminal or direct
-            if self.terminal:
-                d = self.terminal.read(1)
-            else:
-                d = self.obj.read(1)
-
-            # -1 on Error
-            if d == -1:
-                return -1
-            # -2 on EOF
-            elif d == b"":
-                return -2
-            self.ch = d[0]
+        # handle NIL:
+        if self.is_nil and len(self.unch) == 0:
+            return -1
+        if self._use_buffer():
+            pos, end = self._get_read_data()
+            if pos >= end:
+                got = self._fill_buffer()
+                if got < 0:
+                    return -1
+                elif got == 0:
+                    return -2
+                pos = 0
+            self.ch = self.ram.r8(self.buf_addr + pos)
+            self.mem.access.w_s("fh_Pos", pos + 1)
+            return self.ch
+        d = self._read_raw(1)
+        # -1 on Error
+        if d == -1:
+            return -1
+        # -2 on EOF
+        elif len(d) == 0:
+            return -2
+        self.ch = d[0]
         return self.ch
 
-    def gets(self, len):
-        """read up to len bytes or line ending with newline
+    def gets(self, size):
+        """read up to size bytes or line ending with newline
 
         return <string>, error=True/False
         """
         res = bytearray()
         error = False
-        for a in range(len):
-            ch = self.getc()
-            if ch == -1:
-                error = True
-                break
-            elif ch == -2:
-                break
-            res.append(ch)
-            if ch == 10:
+        if not self._use_buffer() or (self.is_nil and not self.unch):
+            for a in range(size):
+                ch = self.getc()
+                if ch == -1:
+                    error = True
+                    break
+                elif ch == -2:
+                    break
+                res.append(ch)
+                if ch == 10:
+                    break
+            return res.decode("latin-1"), error
+        # scan guest buffer for line ending
+        while len(res) < size:
+            pos, end = self._get_read_data()
+            if pos >= end:
+                got = self._fill_buffer()
+                if got <= 0:
+                    error = got < 0
+                    break
+                pos, end = 0, got
+            num = min(end - pos, size - len(res))
+            chunk = self.ram.r_block(self.buf_addr + pos, num)
+            nl = chunk.find(b"\n")
+            if nl >= 0:
+                chunk = chunk[: nl + 1]
+            res += chunk
+            self.mem.access.w_s("fh_Pos", pos + len(chunk))
+            if nl >= 0:
                 break
         return res.decode("latin-1"), error
 
     def ungetc(self, var):
         if var == 0xFFFFFFFF:
             var = -1
+        # step back in guest buffer
+        if self.buf_mode == BUF_MODE_READ:
+            pos, end = self._get_read_data()
+            if pos > 0:
+                pos -= 1
+                if var < 0:
+                    var = self.ram.r8(self.buf_addr + pos)
+                else:
+                    self.ram.w8(self.buf_addr + pos, var)
+                self.mem.access.w_s("fh_Pos", pos)
+                return var
         # var == -1 -> unget last char
         if var < 0 and self.ch >= 0:
             var = self.ch
             self.ch = -1
-        elif var >= 0:
+        if var >= 0:
+            self._unbuffer()
             self.unch.insert(0, var)
         return var
 
     def setbuf(self, s):
         if isinstance(s, str):
             s = s.encode("latin-1")
+        self._unbuffer(keep_injected=False)
         self.unch = bytearray(s)
 
     def tell(self):
-        return self.obj.tell()
+        pos = self.obj.tell()
+        if self.buf_mode == BUF_MODE_WRITE:
+            pos += self.mem.access.r_s("fh_Pos")
+        elif self.buf_from_host:
+            buf_pos, buf_end = self._get_read_data()
+            pos -= buf_end - buf_pos + len(self.pending)
+        return pos
 
     def seek(self, pos, whence):
         """set to position from whence
@@ -186,6 +552,14 @@ class FileHandle:
         return -1 on error, -2 on too far or new_pos
         """
         try:
+            self._flush_buffer()
+            # relative seeks are based on the logical position
+            if whence == 1 and self.buf_from_host:
+                buf_pos, buf_end = self._get_read_data()
+                pos -= buf_end - buf_pos + len(self.pending)
+            self._reset_buffer()
+            self.pending = bytearray()
+
             new_pos = self.obj.seek(pos, whence)
 
             # we have to limit seek to file size
@@ -204,6 +578,8 @@ class FileHandle:
             return -1
 
     def flush(self):
+        self._flush_buffer()
+        self._drop_read_buffer()
         self.obj.flush()
 
     def is_interactive(self):
@@ -10,7 +10,7 @@ from amitools.vamos.astructs import AccessStruct
 from amitools.vamos.libstructs import MessageStruct, DosPacketStruct
 from .Error import *
 from .DosProtection import DosProtection
-from .FileHandle import FileHandle
+from .FileHandle import FileHandle, BUF_LINE, BUF_NONE
 from .action import DosAction
 
 
@@ -40,10 +40,19 @@ class FileManager:
         # setup std input/output
         self.std_input = self._create_stdin_fh()
         self.std_output = self._create_stdout_fh()
+        # flush pending output before waiting for input
+        self.std_input.tie(self.std_output)
         self._register_file(self.std_input)
         self._register_file(self.std_output)
 
+    def flush_buffers(self):
+        """write out the guest buffers of all open files"""
+        for fh in self.files_by_b_addr.values():
+            fh.flush_buffer()
+
     def finish(self):
+        # write out buffers of files left open
+        self.flush_buffers()
         self._unregister_file(self.std_input)
         self._unregister_file(self.std_output)
         # close stdin/out (cleanup TTY if needed)
@@ -57,13 +66,20 @@ class FileManager:
         return FileHandle(sys.stdin.buffer, "<STDIN>", "/dev/stdin", need_close=False)
 
     def _create_stdout_fh(self):
-        return FileHandle(
+        fh = FileHandle(
             sys.stdout.buffer,
             "<STDOUT>",
             "/dev/stdout",
             need_close=False,
             auto_flush=True,
         )
+        fh.set_vbuf(0, BUF_LINE, 0)
+        return fh
+
+    def rebind_std_files(self):
+        """attach std input/output to the current sys streams"""
+        self.std_input.rebind(sys.stdin.buffer)
+        self.std_output.rebind(sys.stdout.buffer)
 
     def get_fs_handler_port(self):
         return self.fs_handler_port
@@ -93,6 +109,10 @@ class FileManager:
     def get_output(self):
         return self.std_output
 
+    def _invalidate_path(self, sys_path):
+        # keep case insensitive path lookups in sync
+        self.path_mgr.get_vol_mgr().invalidate_sys_path(sys_path)
+
     def open(self, lock, ami_path, f_mode):
         try:
             # special names
@@ -108,6 +128,9 @@ class FileManager:
             elif uname == "*" or uname.startswith("CONSOLE:"):
                 sys_name = ""
                 fh = self._create_stdout_fh()
+                # keep the order of output with the std output
+                fh.set_vbuf(0, BUF_NONE, 0)
+                fh.tie(self.std_output)
             else:
                 # map to system path
                 sys_path = self.path_mgr.ami_to_sys_path(
@@ -118,7 +141,8 @@ class FileManager:
                     return None
 
                 # make some checks on existing file
-                if os.path.exists(sys_path):
+                exists = os.path.exists(sys_path)
+                if exists:
                     # if not writeable -> no append mode
                     if f_mode == "rwb+":
                         f_mode = "rb+"
@@ -136,6 +160,8 @@ class FileManager:
                 )
                 fobj = open(sys_path, f_mode)
                 fh = FileHandle(fobj, ami_path, sys_path)
+                if not exists:
+                    self._invalidate_path(sys_path)
 
             self._register_file(fh)
             return fh
@@ -178,6 +204,7 @@ class FileManager:
                 os.rmdir(sys_path)
             else:
                 os.remove(sys_path)
+            self._invalidate_path(sys_path)
             return 0
         except OSError as e:
             if e.errno == errno.ENOTEMPTY:  # Directory not empty
@@ -198,6 +225,8 @@ class FileManager:
             return ERROR_OBJECT_NOT_FOUND
         try:
             os.rename(old_sys_path, new_sys_path)
+            self._invalidate_path(old_sys_path)
+            self._invalidate_path(new_sys_path)
             return 0
         except OSError as e:
             log_file.info(
@@ -240,6 +269,7 @@ class FileManager:
         sys_path = self.path_mgr.ami_to_sys_path(lock, ami_path)
         try:
             os.mkdir(sys_path)
+            self._invalidate_path(sys_path)
             return NO_ERROR
         except OSError:
             return ERROR_OBJECT_EXISTS
@@ -269,9 +299,7 @@ class FileManager:
             size = dos_pkt.r_s("dp_Arg3")
             # get fh and read
             fh = self.get_by_b_addr(fh_b_addr)
-            data = fh.read(size)
-            self.mem.w_block(buf_ptr, data)
-            got = len(data)
+            got = fh.read_mem(self.mem, buf_ptr, size)
             log_file.info(
                 "DosPacket: Read fh_b_addr=%06x buf=%06x len=%06x -> got=%06x fh=%s",
                 fh_b_addr,
@@ -286,9 +314,8 @@ class FileManager:
             buf_ptr = dos_pkt.r_s("dp_Arg2")
             size = dos_pkt.r_s("dp_Arg3")
             fh = self.get_by_b_addr(fh_b_addr)
-            data = self.mem.r_block(buf_ptr, size)
-            fh.write(data)
-            put = len(data)
+            fh.write_mem(self.mem, buf_ptr, size)
+            put = size
             log_file.info(
                 "DosPacket: Write fh=%06x buf=%06x len=%06x -> put=%06x fh=%s",
                 fh_b_addr,
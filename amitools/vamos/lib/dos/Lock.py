@@ -1,14 +1,54 @@
 import os
+import stat
 import uuid
 
 from amitools.vamos.log import log_lock
 
 from amitools.vamos.astructs import AccessStruct
-from amitools.vamos.libstructs import FileLockStruct, DateStampStruct
+from amitools.vamos.libstructs import (
+    FileLockStruct,
+    DateStampStruct,
+    ExAllDataStruct,
+)
 from .DosProtection import DosProtection
+from .PatternMatch import pattern_match
 from .AmiTime import *
 from .Error import *
 
+# ExAll() data types
+ED_NAME = 1
+ED_TYPE = 2
+ED_SIZE = 3
+ED_PROTECTION = 4
+ED_DATE = 5
+ED_COMMENT = 6
+ED_OWNER = 7
+
+# fields of ExAllData filled in for a data type
+ed_field_names = (
+    "ed_Next",
+    "ed_Name",
+    "ed_Type",
+    "ed_Size",
+    "ed_Prot",
+    "ed_Days",
+    "ed_Mins",
+    "ed_Ticks",
+    "ed_Comment",
+    "ed_OwnerUID",
+    "ed_OwnerGID",
+)
+# data type -> (number of fields, size of record without strings)
+ed_layouts = {
+    ED_NAME: (2, 8),
+    ED_TYPE: (3, 12),
+    ED_SIZE: (4, 16),
+    ED_PROTECTION: (5, 20),
+    ED_DATE: (8, 32),
+    ED_COMMENT: (9, 36),
+    ED_OWNER: (11, 40),
+}
+
 
 class Lock:
     """represent an AmigaOS Lock in vamos"""
@@ -23,6 +63,7 @@ class Lock:
         self.vol_addr = 0
         self.key = 0
         self.dirent = None
+        self.exall_dirent = None
 
     def __repr__(self):
         addr = 0
@@ -63,74 +104,89 @@ class Lock:
 
     # --- lock ops ---
 
-    def _examine_file(self, fib_mem, name, sys_path, key):
-        # name
-        name_addr = fib_mem.s_get_addr("fib_FileName")
-        # clear 32 name bytes
-        mem = fib_mem.mem
-        mem.clear_block(name_addr, 32, 0)
-        mem.w_cstr(name_addr, name)
-        # comment
-        comment_addr = fib_mem.s_get_addr("fib_Comment")
-        mem.w_cstr(comment_addr, "")
-        # create the "inode" information
-        fib_mem.w_s("fib_DiskKey", key)
-        log_lock.debug("examine key: %08x", key)
+    def _stat_info(self, name, os_stat):
+        """convert a host stat result into the dos entry infos.
+
+        return entry type, protection mask, size (None for non-files),
+        number of blocks and the AmiTime of the last modification
+        """
+        mode = os_stat.st_mode
         # type
-        if os.path.isdir(sys_path):
+        if stat.S_ISDIR(mode):
             dirEntryType = 2
         else:
             dirEntryType = -3
-        fib_mem.w_s("fib_DirEntryType", dirEntryType)
-        fib_mem.w_s("fib_EntryType", dirEntryType)
         # protection
-        try:
-            os_stat = os.stat(sys_path)
-            mode = os_stat.st_mode
-            prot = DosProtection.from_host_mode(mode)
-            log_lock.debug("examine lock: '%s' mode=%03o: prot=%s", name, mode, prot)
-        except OSError:
-            return ERROR_OBJECT_IN_USE
-        fib_mem.w_s("fib_Protection", prot.mask)
+        prot = DosProtection.from_host_mode(mode)
+        log_lock.debug("examine lock: '%s' mode=%03o: prot=%s", name, mode, prot)
         # size
-        if os.path.isfile(sys_path):
-            size = os.path.getsize(sys_path)
+        if stat.S_ISREG(mode):
+            size = os_stat.st_size
             # limit to 32bit
             if size > 0xFFFFFFFF:
                 size = 0xFFFFFFFF
-            fib_mem.w_s("fib_Size", size)
             blocks = (size + 511) // 512
-            fib_mem.w_s("fib_NumBlocks", blocks)
-            log_lock.debug(
-                "examine lock: '%s' size=%d, blocks=%d", sys_path, size, blocks
-            )
+            log_lock.debug("examine lock: '%s' size=%d, blocks=%d", name, size, blocks)
         else:
-            fib_mem.w_s("fib_NumBlocks", 1)
-            log_lock.debug("examine lock: '%s' no file", sys_path)
+            size = None
+            blocks = 1
+            log_lock.debug("examine lock: '%s' no file", name)
         # date (use mtime here)
-        date_addr = fib_mem.s_get_addr("fib_Date")
-        date = AccessStruct(fib_mem.mem, DateStampStruct, date_addr)
-        t = os.path.getmtime(sys_path)
-        at = sys_to_ami_time(t)
-        date.w_s("ds_Days", at.tday)
-        date.w_s("ds_Minute", at.tmin)
-        date.w_s("ds_Tick", at.tick)
-        # fill in UID/GID
-        fib_mem.w_s("fib_OwnerUID", 0)
-        fib_mem.w_s("fib_OwnerGID", 0)
+        at = sys_to_ami_time(os_stat.st_mtime)
+        return dirEntryType, prot.mask, size, blocks, at
+
+    def _examine_file(self, fib_mem, name, os_stat, key):
+        # name
+        name_addr = fib_mem.s_get_addr("fib_FileName")
+        # clear 32 name bytes
+        mem = fib_mem.mem
+        mem.clear_block(name_addr, 32, 0)
+        mem.w_cstr(name_addr, name)
+        # comment
+        comment_addr = fib_mem.s_get_addr("fib_Comment")
+        mem.w_cstr(comment_addr, "")
+        # create the "inode" information
+        log_lock.debug("examine key: %08x", key)
+        dirEntryType, prot, size, blocks, at = self._stat_info(name, os_stat)
+        fields = {
+            "fib_DiskKey": key,
+            "fib_DirEntryType": dirEntryType,
+            "fib_Protection": prot,
+            "fib_EntryType": dirEntryType,
+            "fib_NumBlocks": blocks,
+            "fib_Date.ds_Days": at.tday,
+            "fib_Date.ds_Minute": at.tmin,
+            "fib_Date.ds_Tick": at.tick,
+            # fill in UID/GID
+            "fib_OwnerUID": 0,
+            "fib_OwnerGID": 0,
+        }
+        if size is not None:
+            fields["fib_Size"] = size
+        # write all fields at once
+        fib_mem.write_fields(fields)
         return NO_ERROR
 
+    def _scan_dir(self):
+        """return the DirEntry list of the lock's dir. Entries cache stat()"""
+        try:
+            with os.scandir(self.sys_path) as it:
+                return list(it)
+        except OSError:
+            return []
+
     def examine_lock(self, fib_mem):
-        return self._examine_file(fib_mem, self.name, self.sys_path, self.key)
+        try:
+            os_stat = os.stat(self.sys_path)
+        except OSError:
+            return ERROR_OBJECT_IN_USE
+        return self._examine_file(fib_mem, self.name, os_stat, self.key)
 
     def examine_next(self, fib_mem):
         # start scan
         if self.dirent is None:
             # scan real dir
-            if os.path.isdir(self.sys_path):
-                self.dirent = os.listdir(self.sys_path)
-            else:
-                self.dirent = []
+            self.dirent = self._scan_dir()
             # assume that key stored in given FIB is my own one
             # (otherwise no Examine() on my lock was done before..., aka broken code!)
             self._check_disk_key(fib_mem)
@@ -140,12 +196,99 @@ class Lock:
 
         if index < len(self.dirent):
             entry = self.dirent[index]
-            e_path = os.path.join(self.sys_path, entry)
-            return self._examine_file(fib_mem, entry, e_path, index + 1)
+            try:
+                os_stat = entry.stat()
+            except OSError:
+                return ERROR_OBJECT_IN_USE
+            return self._examine_file(fib_mem, entry.name, os_stat, index + 1)
         else:
             self.dirent = None
             return ERROR_NO_MORE_ENTRIES
 
+    def examine_all(self, mem, buf_addr, buf_size, data_type, ctrl_mem, pattern):
+        """fill the buffer with ExAllData records of the next dir entries.
+
+        The dir is scanned once when eac_LastKey is 0. The index of the next
+        entry is kept in eac_LastKey for the next call.
+        return NO_ERROR if more entries are pending or an error code
+        (ERROR_NO_MORE_ENTRIES if the scan is done)
+        """
+        if data_type < ED_NAME or data_type > ED_OWNER:
+            return ERROR_BAD_NUMBER
+        index = ctrl_mem.r_s("eac_LastKey")
+        if index == 0 or self.exall_dirent is None:
+            self.exall_dirent = self._scan_dir()
+            index = 0
+        dirent = self.exall_dirent
+        num_fields, fixed_size = ed_layouts[data_type]
+        field_names = ed_field_names[:num_fields]
+        buf_end = buf_addr + buf_size
+        addr = buf_addr
+        last_addr = 0
+        num = 0
+        while index < len(dirent):
+            entry = dirent[index]
+            name = entry.name
+            if pattern and not pattern_match(pattern, name):
+                index += 1
+                continue
+            try:
+                os_stat = entry.stat()
+            except OSError:
+                index += 1
+                continue
+            # record: fixed part, name and empty comment
+            name_bytes = name.encode("latin-1") + b"\0"
+            rec_size = fixed_size + len(name_bytes)
+            if data_type >= ED_COMMENT:
+                rec_size += 1
+            rec_size = (rec_size + 3) & ~3
+            if addr + rec_size > buf_end:
+                break
+            dirEntryType, prot, size, blocks, at = self._stat_info(name, os_stat)
+            name_addr = addr + fixed_size
+            values = (
+                0,
+                name_addr,
+                dirEntryType,
+                size or 0,
+                prot,
+                at.tday,
+                at.tmin,
+                at.tick,
+                name_addr + len(name_bytes),
+                0,
+                0,
+            )
+            ed = AccessStruct(mem, ExAllDataStruct, addr)
+            ed.write_fields(dict(zip(field_names, values)))
+            mem.w_block(name_addr, name_bytes)
+            if data_type >= ED_COMMENT:
+                mem.w8(name_addr + len(name_bytes), 0)
+            # link previous record
+            if last_addr:
+                mem.w32(last_addr, addr)
+            last_addr = addr
+            addr += rec_size
+            num += 1
+            index += 1
+        ctrl_mem.w_s("eac_Entries", num)
+        if index < len(dirent):
+            # buffer is full
+            if num == 0:
+                self.exall_end(ctrl_mem)
+                return ERROR_NO_FREE_STORE
+            ctrl_mem.w_s("eac_LastKey", index)
+            return NO_ERROR
+        else:
+            self.exall_end(ctrl_mem)
+            return ERROR_NO_MORE_ENTRIES
+
+    def exall_end(self, ctrl_mem):
+        """drop the state of a running ExAll()"""
+        self.exall_dirent = None
+        ctrl_mem.w_s("eac_LastKey", 0)
+
     def _check_disk_key(self, fib_mem):
         # make sure its a dir entry
         dirEntryType = fib_mem.r_s("fib_DirEntryType")
@@ -95,9 +95,11 @@ class MatchFirstNext:
 
     def _push_dodir(self, name, path):
         abs_path = self.path_mgr.ami_abs_path(self.lock, path)
-        dir_entries = sorted(self.path_mgr.ami_list_dir(self.lock, path))
+        dir_entries = self.path_mgr.ami_list_dir(self.lock, path)
         # its really a dir
         if dir_entries != None:
+            # keep reversed to pop entries from the end
+            dir_entries = sorted(dir_entries, reverse=True)
             self.dodir_stack.append((name, path, dir_entries))
             self._fill_lock(path)
 
@@ -106,7 +108,7 @@ class MatchFirstNext:
             name, path, dir_entries = self.dodir_stack[-1]
             # entry left in current dodir?
             if len(dir_entries) > 0:
-                sub_name = dir_entries.pop(0)
+                sub_name = dir_entries.pop()
                 if path == "":
                     sub_path = sub_name
                 elif path[-1] in (":", "/"):
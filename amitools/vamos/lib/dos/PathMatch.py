@@ -1,10 +1,11 @@
-from .PatternMatch import pattern_parse, pattern_match
+from .PatternMatch import pattern_parse, pattern_compile
 
 
 class PathMatchChain:
     def __init__(self, lock, pattern, prefix="", parent=None):
         self.lock = lock
         self.pattern = pattern
+        self.matcher = pattern_compile(pattern)
         self.prefix = prefix
         self.parent = parent
         self.child = None
@@ -30,39 +31,38 @@ class PathMatchChain:
     def next(self, path_mgr, prefix, postfix):
         full_prefix = self._join(prefix, self.prefix)
 
-        # need candidates?
+        # need candidates? list dir once and keep the matching entries
         if self.pos == -1:
-            self.candidates = path_mgr.ami_list_dir(self.lock, full_prefix)
+            names = path_mgr.ami_list_dir(self.lock, full_prefix)
             # no dir?
-            if self.candidates == None:
+            if names == None:
                 return None
+            self.candidates = list(filter(self.matcher, names))
             self.pos = 0
 
         # try all candidates
         n = len(self.candidates)
         while self.pos < n:
-            # get candidate and match
             name = self.candidates[self.pos]
-            if pattern_match(self.pattern, name):
-                if full_prefix != "":
-                    ami_path = self._join(full_prefix, name)
-                else:
-                    ami_path = name
-
-                # is tail?
-                if self.child == None:
-                    if postfix != "":
-                        ami_path = self._join(ami_path, postfix)
-                    if path_mgr.ami_path_exists(self.lock, ami_path):
-                        self.pos += 1
-                        return ami_path
-                    else:
+            if full_prefix != "":
+                ami_path = self._join(full_prefix, name)
+            else:
+                ami_path = name
+
+            # is tail?
+            if self.child == None:
+                # entries of the listing exist. only check postfix
+                if postfix != "":
+                    ami_path = self._join(ami_path, postfix)
+                    if not path_mgr.ami_path_exists(self.lock, ami_path):
                         return None
-                else:
-                    # sub paths
-                    match = self.child.next(path_mgr, ami_path, postfix)
-                    if match != None:
-                        return match
+                self.pos += 1
+                return ami_path
+            else:
+                # sub paths
+                match = self.child.next(path_mgr, ami_path, postfix)
+                if match != None:
+                    return match
 
             # try next candidate
             self.pos += 1
@@ -1,3 +1,6 @@
+import re
+import functools
+
 # pattern match constants
 P_ANY = 0x80
 P_SINGLE = 0x81
@@ -55,8 +58,16 @@ def _pop_non_or(blocks, dst):
             return dst
 
 
+# number of parsed and compiled patterns kept
+PATTERN_CACHE_SIZE = 256
+
+
+@functools.lru_cache(maxsize=PATTERN_CACHE_SIZE)
 def pattern_parse(src_str, ignore_case=True, star_is_wild=False):
-    """tokenize pattern. return tokenized pattern or None if an error occurred"""
+    """tokenize pattern. return tokenized pattern or None if an error occurred
+
+    The returned Pattern is cached and shared and must not be modified.
+    """
     dst = ""
     n_src = len(src_str)
 
@@ -336,8 +347,8 @@ def _scan_or_block(pat, pat_pos, str_pos, markers):
         pat_pos += 1
 
 
-def pattern_match(pattern, in_str, debug=False):
-    """match pattern pat against str and return True/False"""
+def pattern_interpret(pattern, in_str, debug=False):
+    """match pattern against str by interpreting the tokens and return True/False"""
     if pattern.ignore_case:
         tr = lambda x: x.lower()
     else:
@@ -572,6 +583,125 @@ def pattern_match(pattern, in_str, debug=False):
                 markers.push(Marker(True, pat_pos, str_pos + 1))
 
 
+# ----- pattern compiler -----
+
+
+def _re_range(begin, end):
+    if begin == end:
+        return "\\U%08x" % begin
+    return "\\U%08x-\\U%08x" % (begin, end)
+
+
+def _compile_class(pat, pos):
+    """translate class tokens starting at pos. return (regex_set, pos)"""
+    n_pat = len(pat)
+    ranges = []
+    while True:
+        if pos >= n_pat:
+            return None, pos
+        begin = ord(pat[pos])
+        pos += 1
+        # end of class
+        if begin == P_CLASS:
+            return "".join(ranges), pos
+        end = begin
+        # range '-': like the matcher keep the end char for the next round
+        if pos + 1 < n_pat and pat[pos] == "-":
+            pos += 1
+            end = ord(pat[pos])
+            # end '-]' -> match until 255
+            if end == P_CLASS:
+                end = 255
+        # an empty range matches nothing
+        if begin <= end:
+            ranges.append(_re_range(begin, end))
+
+
+def pattern_to_regex(pat_str):
+    """translate a tokenized pattern to a regular expression string.
+
+    return None if the pattern can't be expressed as a regex (NOT blocks)
+    or is malformed.
+    """
+    res = []
+    blocks = []
+    pos = 0
+    n_pat = len(pat_str)
+    while pos < n_pat:
+        p_ch = pat_str[pos]
+        cmd = ord(p_ch)
+        pos += 1
+        if cmd == P_ANY:
+            res.append(".*")
+        elif cmd == P_SINGLE:
+            res.append(".")
+        elif cmd == P_REPBEG:
+            res.append("(?:")
+            blocks.append(P_REPEND)
+        elif cmd == P_ORSTART:
+            res.append("(?:")
+            blocks.append(P_OREND)
+        elif cmd == P_ORNEXT:
+            if len(blocks) == 0 or blocks[-1] != P_OREND:
+                return None
+            res.append("|")
+        elif cmd in (P_REPEND, P_OREND):
+            if len(blocks) == 0 or blocks.pop() != cmd:
+                return None
+            res.append(")*" if cmd == P_REPEND else ")")
+        elif cmd in (P_CLASS, P_NOTCLASS):
+            ranges, pos = _compile_class(pat_str, pos)
+            if ranges is None:
+                return None
+            if cmd == P_NOTCLASS:
+                res.append("[^%s]" % ranges if ranges else ".")
+            else:
+                res.append("[%s]" % ranges if ranges else "(?!)")
+        elif cmd in (P_NOT, P_NOTEND, P_STOP, 0):
+            return None
+        else:
+            res.append(re.escape(p_ch))
+    if len(blocks) > 0:
+        return None
+    return "".join(res)
+
+
+@functools.lru_cache(maxsize=PATTERN_CACHE_SIZE)
+def _get_matcher(pat_str, ignore_case):
+    regex = pattern_to_regex(pat_str)
+    prog = None
+    if regex is not None:
+        try:
+            prog = re.compile(regex, re.DOTALL)
+        except re.error:
+            pass
+    # fall back to the interpreter
+    if prog is None:
+        pattern = Pattern(None, pat_str, ignore_case, True)
+        return lambda in_str: pattern_interpret(pattern, in_str)
+    fullmatch = prog.fullmatch
+    if ignore_case:
+        return lambda in_str: fullmatch(in_str.lower()) is not None
+    else:
+        return lambda in_str: fullmatch(in_str) is not None
+
+
+def pattern_compile(pattern):
+    """return a function that matches a str against the pattern.
+
+    Patterns are compiled to regular expressions if possible and the
+    matchers are kept in a LRU cache keyed by the tokenized pattern.
+    """
+    return _get_matcher(pattern.pat_str, pattern.ignore_case)
+
+
+def pattern_match(pattern, in_str, debug=False):
+    """match pattern pat against str and return True/False"""
+    if debug:
+        return pattern_interpret(pattern, in_str, debug)
+    return _get_matcher(pattern.pat_str, pattern.ignore_case)(in_str)
+
+
 # ----- test -----
 if __name__ == "__main__":
     import sys
@@ -1,8 +1,12 @@
 """Handle printf like Functions including VPrintf and RawDoFmt"""
 
 import re
+import functools
 from amitools.util.Math import *
 
+# number of parsed format strings kept
+PRINTF_CACHE_SIZE = 256
+
 
 class printf_element:
     def __init__(
@@ -16,6 +20,7 @@ class printf_element:
         self.width_limit = width_limit
         self.length = length
         self.data = None
+        self.sys_fmt = None
 
     def __str__(self):
         sf = self.gen_sys_printf_format()
@@ -54,8 +59,12 @@ class printf_element:
         return "".join(result)
 
     def gen_value(self):
-        fmt = self.gen_sys_printf_format()
-        val = self.data
+        return self.format_value(self.data)
+
+    def format_value(self, val):
+        fmt = self.sys_fmt
+        if fmt is None:
+            fmt = self.sys_fmt = self.gen_sys_printf_format()
 
         # handle negative values in '%d'
         if self.etype == "d":
@@ -122,48 +131,52 @@ def printf_parse_string(string):
     return printf_state(elements, fragments)
 
 
-def printf_read_data(state, mem_access, data_ptr):
-    elements = state.elements
-    for e in elements:
-        t = e.etype
-        if t == "b":  # BSTR
-            bptr = mem_access.r32(data_ptr)
+def printf_read_value(element, mem_access, data_ptr):
+    """read the value of an element. return (value, new data_ptr)"""
+    t = element.etype
+    if t == "b":  # BSTR
+        bptr = mem_access.r32(data_ptr)
+        data_ptr += 4
+        bptr *= 4
+        data = mem_access.r_bstr(bptr)
+    elif t in ("d", "u", "x"):  # number
+        l = element.length
+        if l is not None and "l" in l:
+            data = mem_access.r32(data_ptr)
+            if t == "d":
+                data = int32(data)
             data_ptr += 4
-            bptr *= 4
-            data = mem_access.r_bstr(bptr)
-        elif t in ("d", "u", "x"):  # number
-            l = e.length
-            if l is not None and "l" in l:
-                data = mem_access.r32(data_ptr)
-                if t == "d":
-                    data = int32(data)
-                data_ptr += 4
-            else:
-                data = mem_access.r16(data_ptr)
-                if t == "d":
-                    data = int16(data)
-                elif t == "u":
-                    data = signext16(data)
-                data_ptr += 2
-        elif t == "s":  # STR
-            cptr = mem_access.r32(data_ptr)
+        else:
+            data = mem_access.r16(data_ptr)
+            if t == "d":
+                data = int16(data)
+            elif t == "u":
+                data = signext16(data)
+            data_ptr += 2
+    elif t == "s":  # STR
+        cptr = mem_access.r32(data_ptr)
+        data_ptr += 4
+        if cptr > 0:
+            data = mem_access.r_cstr(cptr)
+        else:
+            data = ""  # thor: exec ignores NULL strings.
+    elif t == "c":  # char
+        l = element.length
+        if l is not None and "l" in l:
+            data = mem_access.r32(data_ptr)
             data_ptr += 4
-            if cptr > 0:
-                data = mem_access.r_cstr(cptr)
-            else:
-                data = ""  # thor: exec ignores NULL strings.
-        elif t == "c":  # char
-            l = e.length
-            if l is not None and "l" in l:
-                data = mem_access.r32(data_ptr)
-                data_ptr += 4
-            else:
-                data = mem_access.r16(data_ptr)
-                data_ptr += 2
-            data = chr(data)
-        elif t == "%":
-            data = ord("%")
-        e.data = data
+        else:
+            data = mem_access.r16(data_ptr)
+            data_ptr += 2
+        data = chr(data)
+    elif t == "%":
+        data = ord("%")
+    return data, data_ptr
+
+
+def printf_read_data(state, mem_access, data_ptr):
+    for e in state.elements:
+        e.data, data_ptr = printf_read_value(e, mem_access, data_ptr)
     return data_ptr
 
 
@@ -183,10 +196,43 @@ def printf_generate_output(state):
     return "".join(result)
 
 
-def printf(string, mem_access, data_ptr):
+@functools.lru_cache(maxsize=PRINTF_CACHE_SIZE)
+def printf_compile(string):
+    """parse a format string and return a tuple of its parts.
+
+    Each part is either a literal str or a printf_element. The result is
+    cached and shared, i.e. its elements must not be modified.
+    """
     ps = printf_parse_string(string)
-    printf_read_data(ps, mem_access, data_ptr)
-    return printf_generate_output(ps)
+    parts = []
+    pos = 0
+    for e in ps.elements:
+        if pos < e.begin:
+            parts.append(string[pos : e.begin])
+        parts.append(e)
+        pos = e.end
+    if pos < len(string):
+        parts.append(string[pos:])
+    return tuple(parts)
+
+
+def printf_format(string, mem_access, data_ptr):
+    """format string with the data found at data_ptr.
+
+    return (result string, data_ptr after the consumed data)
+    """
+    result = []
+    for part in printf_compile(string):
+        if type(part) is str:
+            result.append(part)
+        else:
+            val, data_ptr = printf_read_value(part, mem_access, data_ptr)
+            result.append(part.format_value(val))
+    return "".join(result), data_ptr
+
+
+def printf(string, mem_access, data_ptr):
+    return printf_format(string, mem_access, data_ptr)[0]
 
 
 # test
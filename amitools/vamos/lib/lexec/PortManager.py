@@ -45,6 +45,13 @@ class Port:
         else:
             return None
 
+    def remove_msg(self, msg_addr):
+        if self.queue is not None and msg_addr in self.queue:
+            self.queue.remove(msg_addr)
+            return True
+        else:
+            return False
+
 
 class PortManager:
     def __init__(self, alloc):
@@ -104,3 +111,7 @@ class PortManager:
     def peek_msg(self, port_addr):
         port = self._ensure_port(port_addr)
         return port.peek_msg()
+
+    def remove_msg(self, port_addr, msg_addr):
+        port = self._ensure_port(port_addr)
+        return port.remove_msg(msg_addr)
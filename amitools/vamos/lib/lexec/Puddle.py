@@ -11,7 +11,9 @@ class Puddle:
         self.mem = mem
         self.size = size
         self.mem_obj = self.alloc.alloc_memory(size, label=name)
-        self.chunks = MemoryAlloc(self.mem, self.mem_obj.addr, size, label_mgr)
+        self.chunks = MemoryAlloc(
+            self.mem, self.mem_obj.addr, size, label_mgr, mode=alloc.get_mode()
+        )
 
     def __del__(self):
         if self.mem_obj != None:
@@ -1,6 +1,6 @@
 import struct
 from amitools.vamos.machine import Code, REG_A2, REG_A3
-from amitools.vamos.lib.dos.Printf import *
+from amitools.vamos.lib.dos.Printf import printf_format
 
 # setup loop code fragment:
 # +0000: 243c <len-1.l>       move.l #<len-1>,d2
@@ -15,47 +15,130 @@ from amitools.vamos.lib.dos.Printf import *
 code_hex = (0x243C, 0, 0, 0x49F9, 0, 0, 0x101C, 0x4EB9, 0, 0, 0x51CA, 0xFFF6, 0x4E75)
 code_bin = b"".join([struct.pack(">H", x) for x in code_hex])
 
+# ----- known PutChProcs -----
+# the output is directly applied to putData without running the m68k code.
+# out_data contains the terminating null byte, as the proc is called for it
 
-def _setup_fragment(ctx, fmt_str, put_proc):
-    fmt_len = len(fmt_str)
-    code_len = len(code_bin)
-    assert code_len == 0x1A
-    size = fmt_len + code_len
-    mem_obj = ctx.alloc.alloc_memory(size, "RawDoFmtFrag")
-    addr = mem_obj.addr
-    fmt_addr = addr + 0x1A
-    ctx.mem.w_block(addr, code_bin)
-    ctx.mem.w32(addr + 2, fmt_len - 1)
-    ctx.mem.w32(addr + 8, fmt_addr)
-    ctx.mem.w32(addr + 16, put_proc)
-    ctx.mem.w_cstr(addr + 0x1A, fmt_str)
-    return mem_obj
 
+def _put_stuff(mem, put_data, out_data):
+    mem.w_block(put_data, out_data)
 
-def raw_do_fmt(ctx, fmtString, dataStream, putProc, putData):
+
+def _put_stuff_ptr(mem, put_data, out_data):
+    ptr = mem.r32(put_data)
+    mem.w_block(ptr, out_data)
+    mem.w32(put_data, (ptr + len(out_data)) & 0xFFFFFFFF)
+
+
+def _put_count_long(mem, put_data, out_data):
+    mem.w32(put_data, (mem.r32(put_data) + len(out_data)) & 0xFFFFFFFF)
+
+
+def _put_count_word(mem, put_data, out_data):
+    mem.w16(put_data, (mem.r16(put_data) + len(out_data)) & 0xFFFF)
+
+
+def _put_none(mem, put_data, out_data):
+    pass
+
+
+def _code(*words):
+    return b"".join([struct.pack(">H", x) for x in words])
+
+
+put_procs = (
+    # move.b d0,(a3)+ ; rts
+    (_code(0x16C0, 0x4E75), _put_stuff),
+    # link a5,#-4 ; move.l d0,-4(a5) ; move.b d0,(a3)+ ; unlk a5 ; rts
+    (_code(0x4E55, 0xFFFC, 0x2B40, 0xFFFC, 0x16C0, 0x4E5D, 0x4E75), _put_stuff),
+    # move.l (a3),a0 ; move.b d0,(a0)+ ; move.l a0,(a3) ; rts
+    (_code(0x2053, 0x10C0, 0x2688, 0x4E75), _put_stuff_ptr),
+    # addq.l #1,(a3) ; rts
+    (_code(0x5293, 0x4E75), _put_count_long),
+    # addq.w #1,(a3) ; rts
+    (_code(0x5253, 0x4E75), _put_count_word),
+    # rts
+    (_code(0x4E75), _put_none),
+)
+
+# first code word -> [(code, func)]
+put_proc_map = {}
+for _put_code, _put_func in put_procs:
+    put_proc_map.setdefault(_put_code[:2], []).append((_put_code, _put_func))
+
+
+def find_put_proc(mem, put_proc):
+    """return the Python replacement for the PutChProc or None if unknown"""
+    candidates = put_proc_map.get(struct.pack(">H", mem.r16(put_proc)))
+    if candidates:
+        for code, func in candidates:
+            if mem.r_block(put_proc, len(code)) == code:
+                return func
+    return None
+
+
+class PutProcFragment:
+    """a code fragment that calls an unknown PutChProc for each char.
+
+    The fragment is allocated on first use and reused for all later calls.
+    Its buffer grows if a larger output needs to be processed.
+    """
+
+    def __init__(self, alloc, mem):
+        self.alloc = alloc
+        self.mem = mem
+        self.mem_obj = None
+        self.buf_size = 0
+        self.busy = False
+
+    def _setup(self, size):
+        self.free()
+        buf_size = (size + 255) & ~255
+        self.mem_obj = self.alloc.alloc_memory(len(code_bin) + buf_size, "RawDoFmtFrag")
+        self.buf_size = buf_size
+        addr = self.mem_obj.addr
+        self.mem.w_block(addr, code_bin)
+        self.mem.w32(addr + 8, addr + len(code_bin))
+
+    def run(self, ctx, out_data, put_proc, put_data):
+        size = len(out_data)
+        if size > self.buf_size:
+            self._setup(size)
+        addr = self.mem_obj.addr
+        self.mem.w32(addr + 2, size - 1)
+        self.mem.w32(addr + 16, put_proc)
+        self.mem.w_block(addr + len(code_bin), out_data)
+        set_regs = {REG_A2: put_proc, REG_A3: put_data}
+        code = Code(addr, set_regs=set_regs)
+        self.busy = True
+        try:
+            ctx.runner(code, name="RawDoFmt")
+        finally:
+            self.busy = False
+
+    def free(self):
+        if self.mem_obj:
+            self.alloc.free_memory(self.mem_obj)
+            self.mem_obj = None
+            self.buf_size = 0
+
+
+def raw_do_fmt(ctx, fmtString, dataStream, putProc, putData, frag=None):
     fmt = ctx.mem.r_cstr(fmtString)
-    ps = printf_parse_string(fmt)
-    dataStream = printf_read_data(ps, ctx.mem, dataStream)
-    resultstr = printf_generate_output(ps)
-    fmtstr = resultstr + "\0"
+    resultstr, dataStream = printf_format(fmt, ctx.mem, dataStream)
+    out_data = resultstr.encode("latin-1") + b"\0"
     # Try to use a shortcut to avoid an unnecessary slow-down
-    known = False
-    putcode = ctx.mem.r32(putProc)
-    if putcode == 0x16C04E75:
-        known = True
-    elif putcode == 0x4E55FFFC:  # link #-4,a5
-        putcode2 = ctx.mem.r32(putProc + 4)
-        putcode3 = ctx.mem.r32(putProc + 8)
-        putcode4 = ctx.mem.r16(putProc + 12)
-        if putcode2 == 0x2B40FFFC and putcode3 == 0x16C04E5D and putcode4 == 0x4E75:
-            known = True
+    put_func = find_put_proc(ctx.mem, putProc)
+    known = put_func is not None
     if known:
-        ctx.mem.w_cstr(putData, fmtstr)
+        put_func(ctx.mem, putData, out_data)
+    elif frag and not frag.busy:
+        frag.run(ctx, out_data, putProc, putData)
     else:
-        mem_obj = _setup_fragment(ctx, fmtstr, putProc)
-        set_regs = {REG_A2: putProc, REG_A3: putData}
-        addr = mem_obj.addr
-        code = Code(addr, set_regs=set_regs)
-        ctx.runner(code, name="RawDoFmt")
-        ctx.alloc.free_memory(mem_obj)
+        # no or nested use of fragment: use a temporary one
+        tmp_frag = PutProcFragment(ctx.alloc, ctx.mem)
+        try:
+            tmp_frag.run(ctx, out_data, putProc, putData)
+        finally:
+            tmp_frag.free()
     return dataStream, fmt, resultstr, known
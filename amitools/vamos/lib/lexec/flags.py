@@ -1,4 +1,4 @@
-from enum import IntFlag
+from enum import IntEnum, IntFlag
 
 
 class MemFlag(IntFlag):
@@ -16,3 +16,17 @@ class MemFlag(IntFlag):
     MEMF_TOTAL = 1 << 19
 
     MEMF_NO_EXPUNGE = 1 << 31
+
+
+class IOFlag(IntFlag):
+    IOF_QUICK = 1 << 0
+
+
+class IOErr(IntEnum):
+    IOERR_OPENFAIL = -1
+    IOERR_ABORTED = -2
+    IOERR_NOCMD = -3
+    IOERR_BADLENGTH = -4
+    IOERR_BADADDRESS = -5
+    IOERR_UNITBUSY = -6
+    IOERR_SELFTEST = -7
@@ -37,6 +37,7 @@ class LibCreator(object):
         pos_size = info.get_pos_size()
         library = Library.alloc(
             self.alloc,
+            tag=name,
             name=name,
             id_string=id_str,
             neg_size=neg_size,
@@ -1,3 +1,6 @@
+from amitools.vamos.schedule.clock import default_clock
+
+
 class LibCtx(object):
     """the default context a library receives"""
 
@@ -7,6 +10,10 @@ class LibCtx(object):
         self.alloc = alloc
         self.cpu = machine.get_cpu()
         self.mem = machine.get_mem()
+        # the clock for all time queries and delays
+        self.clock = default_clock
+        # the scheduler if tasks are available
+        self.scheduler = None
         # will be set on creation
         self.vlib = None
 
@@ -1,3 +1,4 @@
+from amitools.vamos.label import LabelTraps
 from .jumptab import LibJumpTable
 
 
@@ -28,8 +29,14 @@ class LibPatcherMultiTrap(object):
         name = "%s(Traps)" % self.stub.name
         func_table = self.stub.get_func_tab()
         size = len(func_table) * 4  # trap + rts
-        self.mem_obj = self.alloc.alloc_memory(size, label=name)
+        self.mem_obj = self.alloc.alloc_memory(size)
         addr = self.mem_obj.addr
+        # label knows the function of each trap
+        label_mgr = self.alloc.label_mgr
+        if label_mgr:
+            label = LabelTraps(name, addr, size, self.stub.fd)
+            self.mem_obj.label = label
+            label_mgr.add_label(label)
         self.trap_base = addr
         mem = self.alloc.mem
         for func in func_table:
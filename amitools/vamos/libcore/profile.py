@@ -1,10 +1,16 @@
 from amitools.vamos.log import log_prof
-from amitools.vamos.profiler import Profiler
+from amitools.vamos.profiler import Profiler, LogHistogram
 from amitools.vamos.cfgcore import ConfigDict
 
 
 class LibFuncProfileData(object):
-    """keep info for a library function"""
+    """keep info for a library function
+
+    The time of a call is inclusive, i.e. it also contains the time of
+    nested m68k runs triggered by the call (e.g. hooks or callbacks). The
+    time spent in these runs and the m68k cycles they consumed are kept
+    separately, so the exclusive (own Python) time can be derived.
+    """
 
     def __init__(self, func_id, add_samples=False):
         self.func_id = func_id
@@ -14,8 +20,12 @@ class LibFuncProfileData(object):
             self.deltas = None
         self.sum = 0.0
         self.num = 0
+        self.nested_sum = 0.0
+        self.cycles = 0
         self.add_samples = add_samples
         self.tag = None
+        # bounded distribution of all deltas
+        self.hist = LogHistogram()
 
     def __eq__(self, other):
         return (
@@ -24,18 +34,14 @@ class LibFuncProfileData(object):
             and self.deltas == other.deltas
             and self.sum == other.sum
             and self.num == other.num
+            and self.nested_sum == other.nested_sum
+            and self.cycles == other.cycles
             and self.tag == other.tag
+            and self.hist == other.hist
         )
 
     def __ne__(self, other):
-        return (
-            self.func_id != other.func_id
-            or self.add_samples != other.add_samples
-            or self.deltas != other.deltas
-            or self.sum != other.sum
-            or self.num != other.num
-            or self.tag != other.tag
-        )
+        return not self == other
 
     @classmethod
     def from_dict(cls, data_dict, add_samples=False):
@@ -47,25 +53,67 @@ class LibFuncProfileData(object):
             d.deltas = None
         if "tag" in data_dict:
             d.tag = data_dict.tag
+        if "hist" in data_dict:
+            d.hist = LogHistogram.from_dict(data_dict.hist)
         d.sum = data_dict.sum
         d.num = data_dict.num
+        if "nested_sum" in data_dict:
+            d.nested_sum = data_dict.nested_sum
+        if "cycles" in data_dict:
+            d.cycles = data_dict.cycles
         return d
 
     def get_data(self):
-        cfg = ConfigDict({"fid": self.func_id, "sum": self.sum, "num": self.num})
+        cfg = ConfigDict(
+            {
+                "fid": self.func_id,
+                "sum": self.sum,
+                "num": self.num,
+                "nested_sum": self.nested_sum,
+                "cycles": self.cycles,
+                "hist": self.hist.get_data(),
+            }
+        )
         if self.deltas is not None:
             cfg["deltas"] = self.deltas
         if self.tag:
             cfg["tag"] = self.tag
         return cfg
 
-    def count(self, delta):
+    def count(self, delta, nested_delta=0.0, cycles=0):
+        """count a call with its inclusive time delta.
+
+        nested_delta is the time spent in nested m68k runs during the call
+        and cycles are the m68k cycles executed in these runs.
+        """
         v = round(delta, 6)
         self.sum += v
         self.num += 1
+        if nested_delta:
+            self.nested_sum += nested_delta
+        if cycles:
+            self.cycles += cycles
+        self.hist.add(v)
         if self.add_samples:
             self.deltas.append(v)
 
+    def merge(self, other):
+        """add the calls of another profile of the same function"""
+        self.sum += other.sum
+        self.num += other.num
+        self.nested_sum += other.nested_sum
+        self.cycles += other.cycles
+        self.hist.merge(other.hist)
+        if self.deltas is not None:
+            if other.deltas is not None:
+                self.deltas += other.deltas
+            else:
+                # samples are incomplete now
+                self.deltas = None
+                self.add_samples = False
+        if self.tag is None:
+            self.tag = other.tag
+
     def get_func_id(self):
         return self.func_id
 
@@ -78,12 +126,32 @@ class LibFuncProfileData(object):
     def get_sum_delta(self):
         return round(self.sum, 6)
 
+    def get_nested_delta(self):
+        """time spent in nested m68k runs"""
+        return round(self.nested_sum, 6)
+
+    def get_self_delta(self):
+        """exclusive time spent in the Python code of the function"""
+        return round(max(self.sum - self.nested_sum, 0.0), 6)
+
+    def get_cycles(self):
+        return self.cycles
+
     def get_avg_delta(self):
         if self.num > 0:
             return self.sum / self.num
         else:
             return 0.0
 
+    def get_hist(self):
+        return self.hist
+
+    def get_percentile_delta(self, percent):
+        return self.hist.get_percentile(percent)
+
+    def get_max_delta(self):
+        return self.hist.get_max()
+
     def set_tag(self, tag):
         self.tag = tag
 
@@ -92,12 +160,15 @@ class LibFuncProfileData(object):
 
     def __repr__(self):
         return (
-            "LibProfileFuncData(func_id=%r,add_samples=%r):num=%r,sum=%r,deltas=%r,tag=%r"
+            "LibProfileFuncData(func_id=%r,add_samples=%r):num=%r,sum=%r,"
+            "nested_sum=%r,cycles=%r,deltas=%r,tag=%r"
             % (
                 self.func_id,
                 self.add_samples,
                 self.num,
                 self.sum,
+                self.nested_sum,
+                self.cycles,
                 self.deltas,
                 self.tag,
             )
@@ -106,13 +177,17 @@ class LibFuncProfileData(object):
     def dump(self, name):
         n = self.num
         s = self.sum * 1000
+        e = self.get_self_delta() * 1000
         a = self.get_avg_delta() * 1000
-        return "%-20s  %6d calls  %10.3f ms  avg  %10.3f ms  %s" % (
-            name,
-            n,
-            s,
-            a,
-            self.tag,
+        h = self.hist
+        p50 = h.get_percentile(50) * 1000
+        p90 = h.get_percentile(90) * 1000
+        p99 = h.get_percentile(99) * 1000
+        m = h.get_max() * 1000
+        return (
+            "%-20s  %6d calls  %10.3f ms  excl  %10.3f ms  avg  %10.3f ms  "
+            "p50 %8.3f  p90 %8.3f  p99 %8.3f  max %8.3f ms  %10d cycles  %s"
+            % (name, n, s, e, a, p50, p90, p99, m, self.cycles, self.tag)
         )
 
 
@@ -153,6 +228,15 @@ class LibProfileData(object):
             obj.setup_func_table(fd)
         return obj
 
+    def merge(self, other):
+        """add the calls of another profile of the same lib"""
+        for name, other_func in other.func_map.items():
+            func = self.func_map.get(name)
+            if func is None:
+                func = LibFuncProfileData(other_func.func_id, self.add_samples)
+                self.func_map[name] = func
+            func.merge(other_func)
+
     def get_data(self):
         res = ConfigDict()
         res["add_samples"] = self.add_samples
@@ -270,6 +354,17 @@ class LibProfiler(Profiler):
             self.lib_profiles[name] = prof
         return True
 
+    def merge_data(self, data_dict):
+        """merge the lib profiles stored in a data dict"""
+        data_list = data_dict.data
+        for name in data_list:
+            prof = LibProfileData.from_dict(data_list[name])
+            if name in self.lib_profiles:
+                self.lib_profiles[name].merge(prof)
+            else:
+                self.lib_profiles[name] = prof
+        return True
+
     def get_data(self):
         res = ConfigDict()
         libs = {}
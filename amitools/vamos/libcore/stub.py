@@ -61,10 +61,15 @@ class LibStubGen(object):
     """the lib stub generator scans a lib impl and creates stubs for all
     methods found there"""
 
-    def __init__(self, log_missing=None, log_valid=None, ignore_invalid=True):
+    def __init__(
+        self, log_missing=None, log_valid=None, ignore_invalid=True, compiled=True
+    ):
         self.log_missing = log_missing
         self.log_valid = log_valid
         self.ignore_invalid = ignore_invalid
+        # generate specialized code for each valid func (compile mode)
+        # or stack generic closures
+        self.compiled = compiled
 
     def gen_fake_stub(self, name, fd, ctx, profile=None):
         """a fake stub exists without an implementation and only contains
@@ -94,7 +99,10 @@ class LibStubGen(object):
         valid_funcs = list(impl_scan.get_valid_funcs().values())
         for impl_func in valid_funcs:
             fd_func = impl_func.fd_func
-            stub_func = self._wrap_func(stub, impl_func, ctx, profile)
+            if self.compiled:
+                stub_func = self._compile_func(stub, impl_func, ctx, profile)
+            else:
+                stub_func = self._wrap_func(stub, impl_func, ctx, profile)
             self._set_method(fd_func, stub, stub_func)
 
         # generate missing funcs
@@ -343,17 +351,20 @@ class LibStubGen(object):
 
         return log_func
 
-    def _gen_profile_func(self, fd_func, profile, func):
+    def _gen_profile_func(self, fd_func, profile, func, ctx):
         """wrap profiling around func"""
         index = fd_func.get_index()
         prof = profile.get_func_by_index(index)
+        cost = ctx.machine.run_cost
 
         def profile_func(this, *args, **kwargs):
             start = time.perf_counter()
+            nested = cost.time
+            cycles = cost.cycles
             res = func(this, *args, **kwargs)
             end = time.perf_counter()
             delta = end - start
-            prof.count(delta)
+            prof.count(delta, cost.time - nested, cost.cycles - cycles)
             return res
 
         return profile_func
@@ -387,6 +398,165 @@ class LibStubGen(object):
 
         # wrap profiling?
         if profile:
-            func = self._gen_profile_func(fd_func, profile, func)
+            func = self._gen_profile_func(fd_func, profile, func, ctx)
 
         return func
+
+    def _compile_func(self, stub, impl_func, ctx, profile):
+        """create a stub func for a valid impl func by generating the
+        Python source of a single specialized function.
+
+        All register reads, argument conversions, the result write and
+        optional logging/profiling are inlined, so a call does not need to
+        dispatch on types at runtime.
+
+        returns an unbound method for the stub instance
+        """
+        fd_func = impl_func.fd_func
+        name = fd_func.get_name()
+        cpu = ctx.cpu
+        glob = {
+            "method": impl_func.method,
+            "ctx": ctx,
+            "mem": ctx.mem,
+            "r_reg": cpu.r_reg,
+            "w_reg": cpu.w_reg,
+        }
+        body = []
+
+        # profiling entry: like the wrapped stub it includes logging
+        if profile:
+            glob["prof"] = profile.get_func_by_index(fd_func.get_index())
+            glob["perf_counter"] = time.perf_counter
+            glob["cost"] = ctx.machine.run_cost
+            body.append("start = perf_counter()")
+            body.append("nested = cost.time")
+            body.append("cycles = cost.cycles")
+
+        # logging entry
+        log = self.log_valid
+        if log:
+            glob["log"] = log
+            glob["r32"] = ctx.mem.r32
+            glob["get_result_str"] = self._get_result_str
+            body.append(
+                "log.info('{ CALL: ' + %r %% (%s))"
+                % self._compile_call_info(stub, fd_func)
+            )
+
+        # fetch extra args from registers
+        call_args = ["ctx"]
+        extra_args = impl_func.extra_args
+        if extra_args:
+            for num, arg in enumerate(extra_args):
+                call_args.append(self._compile_extra_arg(body, glob, num, arg))
+
+        # call impl and store result
+        body.append("res = method(%s)" % ", ".join(call_args))
+        result = impl_func.result
+        if result:
+            result_type = result.type
+        else:
+            result_type = None
+        self._compile_set_result(body, glob, result_type)
+
+        # logging exit
+        if log:
+            body.append("log.info('} CALL: -> %s' % get_result_str(res))")
+
+        # profiling exit
+        if profile:
+            body.append(
+                "prof.count(perf_counter() - start, "
+                "cost.time - nested, cost.cycles - cycles)"
+            )
+
+        body.append("return res")
+
+        lines = ["def %s(this, *args, **kwargs):" % name]
+        lines += ["    " + line for line in body]
+        src = "\n".join(lines) + "\n"
+        code = compile(src, "<stub %s:%s>" % (stub.name, name), "exec")
+        exec(code, glob)
+        return glob[name]
+
+    def _compile_call_info(self, stub, fd_func):
+        """return format and source of the value tuple of a call log line"""
+        regs = []
+        arg_fmt = []
+        func_args = fd_func.get_args()
+        if func_args:
+            for arg_name, arg_reg in func_args:
+                reg_num = int(arg_reg[1])
+                if arg_reg[0] == "a":
+                    reg_num += 8
+                arg_fmt.append("%s[%s]=%%08x" % (arg_name, arg_reg))
+                regs.append("r_reg(%d)" % reg_num)
+        fmt = "(%s) %4d %s( %s ) from PC=%%06x" % (
+            stub.name.replace("%", "%%"),
+            fd_func.get_bias(),
+            fd_func.get_name(),
+            ", ".join(arg_fmt),
+        )
+        regs.append("r32(r_reg(%d))" % REG_A7)
+        return fmt, ", ".join(regs) + ","
+
+    def _compile_extra_arg(self, body, glob, num, arg):
+        """add code for an extra arg and return the expression of its value"""
+        arg_type = arg.type
+        reg = arg.reg
+        # int and bool (a subclass of int): keep register value
+        if issubclass(arg_type, int):
+            return "r_reg(%d)" % reg
+        type_name = "arg_type%d" % num
+        glob[type_name] = arg_type
+        # scalar values and pointers are bound to the register
+        if issubclass(arg_type, ScalarType) or issubclass(arg_type, PointerType):
+            return "%s(cpu=ctx.cpu, reg=%d, mem=mem)" % (type_name, reg)
+        # all other types are bound to the address in memory
+        # (implicit APTR conversion), NULL object is none
+        var = "arg%d" % num
+        body.append("%s = r_reg(%d)" % (var, reg))
+        return "%s(mem=mem, addr=%s) if %s != 0 else None" % (type_name, var, var)
+
+    def _compile_set_result(self, body, glob, result_type):
+        """add code to write the result value to the registers"""
+        # if no result type is given then standard return rules apply
+        # either single value for d0 or tuple/list with (d0, d1)
+        if result_type is None or result_type is int:
+            glob["result_type"] = result_type
+            body += [
+                "if res is not None:",
+                "    res_type = type(res)",
+                "    if res_type is int or res_type is bool:",
+                "        w_reg(%d, int(res) & 0xFFFFFFFF)" % REG_D0,
+                "    elif res_type is list or res_type is tuple:",
+                "        w_reg(%d, res[0] & 0xFFFFFFFF)" % REG_D0,
+                "        w_reg(%d, res[1] & 0xFFFFFFFF)" % REG_D1,
+                "    else:",
+                "        raise ValueError(",
+                "            f\"Unknown result value '{res}' for type {result_type}\"",
+                "        )",
+            ]
+        else:
+            # if a return type is annotated then assume either
+            # object with memory address or None
+            glob["result_type"] = result_type
+            if getattr(result_type, "get_addr", None):
+                addr_code = ["    w_reg(%d, res.get_addr())" % REG_D0]
+            else:
+                addr_code = [
+                    "    raise ValueError(",
+                    "        f\"Unknown result value '{res}' for type {result_type}\"",
+                    "    )",
+                ]
+            body += [
+                "if res is None:",
+                "    w_reg(%d, 0)" % REG_D0,
+                "elif isinstance(res, result_type):",
+                *addr_code,
+                "else:",
+                "    raise ValueError(",
+                "        f\"Invalid result value '{res}' for type {result_type}\"",
+                "    )",
+            ]
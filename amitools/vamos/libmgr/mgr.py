@@ -9,7 +9,16 @@ from .proxy import LibProxyManager
 class LibManager(object):
     """the library manager handles both native and vamos libs"""
 
-    def __init__(self, machine, alloc, runner, segloader, cfg, main_profiler=None):
+    def __init__(
+        self,
+        machine,
+        alloc,
+        runner,
+        segloader,
+        cfg,
+        main_profiler=None,
+        scheduler=None,
+    ):
         self.mem = machine.get_mem()
         self.cfg = cfg
         self.machine = machine
@@ -20,6 +29,10 @@ class LibManager(object):
         self.proxy_mgr = LibProxyManager(self)
         # inject proxy mgr into all ctx
         self.vlib_mgr.set_ctx_extra_attr("proxies", self.proxy_mgr)
+        # inject the scheduler and its clock
+        if scheduler:
+            self.vlib_mgr.set_ctx_extra_attr("scheduler", scheduler)
+            self.vlib_mgr.set_ctx_extra_attr("clock", scheduler.get_clock())
         cfg.dump(log_libmgr.info)
 
     def get_lib_proxy_mgr(self):
@@ -19,6 +19,7 @@ class SetupLibManager(object):
         path_mgr,
         lib_cfg=None,
         main_profiler=None,
+        seg_cache=None,
     ):
         self.machine = machine
         self.mem_map = mem_map
@@ -28,6 +29,7 @@ class SetupLibManager(object):
         self.alloc = mem_map.get_alloc()
         self.lib_mgr_cfg = lib_cfg
         self.main_profiler = main_profiler
+        self.seg_cache = seg_cache
         # state
         self.seg_loader = None
         self.exec_ctx = None
@@ -45,7 +47,7 @@ class SetupLibManager(object):
         if self.lib_mgr_cfg is None:
             self.lib_mgr_cfg = LibMgrCfg()
         # create segment loader
-        self.seg_loader = SegmentLoader(self.alloc, self.path_mgr)
+        self.seg_loader = SegmentLoader(self.alloc, self.path_mgr, self.seg_cache)
         # setup contexts
         odg_base = self.mem_map.get_old_dos_guard_base()
         # create lib mgr
@@ -56,6 +58,7 @@ class SetupLibManager(object):
             self.seg_loader,
             self.lib_mgr_cfg,
             main_profiler=self.main_profiler,
+            scheduler=self.scheduler,
         )
         # setup special lib contexts for exec and dos
         self.exec_ctx = ExecLibCtx(
@@ -1,2 +1,3 @@
 from .seglist import SegList, Segment
 from .segload import SegmentLoader
+from .segcache import SegmentCache, SegImage
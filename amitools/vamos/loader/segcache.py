@@ -0,0 +1,176 @@
+import os
+import io
+import hashlib
+import pickle
+import struct
+import collections
+
+from amitools.binfmt.BinFmt import BinFmt
+from amitools.binfmt.BinImage import BIN_IMAGE_RELOC_32, BIN_IMAGE_RELOC_PC32
+from amitools.binfmt.Relocate import Relocate
+from amitools.vamos.log import log_segload
+
+
+class SegImage(object):
+    """a parsed binary with flattened relocations ready to be placed in memory.
+
+    The relocations of each segment are stored as a list of
+    (offset, to_seg_id, type, addend) tuples so relocating the image to
+    new addresses does not need to walk the BinImage again.
+    """
+
+    _long = struct.Struct(">i")
+
+    def __init__(self, bin_img):
+        self.bin_img = bin_img
+        self.sizes = Relocate(bin_img).get_sizes()
+        self.names = bin_img.get_segment_names()
+        self.datas = []
+        self.relocs = []
+        for segment in bin_img.get_segments():
+            data = segment.data
+            self.datas.append(bytes(data) if data is not None else b"")
+            relocs = []
+            for to_seg in segment.get_reloc_to_segs():
+                to_id = to_seg.id
+                for r in segment.get_reloc(to_seg).get_relocs():
+                    relocs.append((r.get_offset(), to_id, r.get_type(), r.addend))
+            self.relocs.append(relocs)
+
+    def get_num_segments(self):
+        return len(self.sizes)
+
+    def relocate(self, addrs):
+        """return the list of segment datas relocated to the given addrs"""
+        if len(addrs) != len(self.sizes):
+            raise ValueError("addrs != segments")
+        unpack_from = self._long.unpack_from
+        pack_into = self._long.pack_into
+        datas = []
+        for seg_id, size in enumerate(self.sizes):
+            data = bytearray(size)
+            src = self.datas[seg_id]
+            data[: len(src)] = src
+            my_addr = addrs[seg_id]
+            for offset, to_id, reloc_type, addend in self.relocs[seg_id]:
+                delta = unpack_from(data, offset)[0] + addend
+                if reloc_type == BIN_IMAGE_RELOC_32:
+                    addr = addrs[to_id] + delta
+                elif reloc_type == BIN_IMAGE_RELOC_PC32:
+                    addr = delta + addrs[to_id] - my_addr - offset
+                else:
+                    raise ValueError("unsupported reloc type %d" % reloc_type)
+                pack_into(data, offset, addr)
+            datas.append(data)
+        return datas
+
+
+class SegmentCache(object):
+    """cache parsed binaries for the segment loader.
+
+    Images are kept in memory and are keyed by the sys path of the binary.
+    A cached image is valid as long as size and mtime of the file match.
+    If a cache_dir is given then images are also pickled to disk keyed by
+    the hash of the file contents so another vamos process can skip the
+    parsing of the binary, too.
+    """
+
+    # bump if the layout of SegImage changes
+    disk_version = 1
+
+    def __init__(self, max_images=32, cache_dir=None):
+        self.max_images = max_images
+        if cache_dir:
+            cache_dir = os.path.expanduser(cache_dir)
+        self.cache_dir = cache_dir
+        self.binfmt = BinFmt()
+        # sys_path -> (size, mtime_ns, seg_img)
+        self.images = collections.OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get_num_images(self):
+        return len(self.images)
+
+    def flush(self):
+        self.images.clear()
+
+    def get_image(self, sys_path):
+        """return the SegImage for the binary at sys_path or None"""
+        try:
+            st = os.stat(sys_path)
+        except OSError:
+            return None
+        key = (st.st_size, st.st_mtime_ns)
+        entry = self.images.get(sys_path)
+        if entry is not None and entry[:2] == key:
+            self.images.move_to_end(sys_path)
+            self.hits += 1
+            return entry[2]
+        seg_img = self._load_image(sys_path)
+        if seg_img is None:
+            self.images.pop(sys_path, None)
+            return None
+        self.images[sys_path] = key + (seg_img,)
+        self.images.move_to_end(sys_path)
+        if len(self.images) > self.max_images:
+            self.images.popitem(last=False)
+        return seg_img
+
+    def _load_image(self, sys_path):
+        if not self.cache_dir:
+            self.misses += 1
+            bin_img = self.binfmt.load_image(sys_path)
+            if bin_img is None:
+                return None
+            return SegImage(bin_img)
+        # read file and look up its hash on disk
+        with open(sys_path, "rb") as fobj:
+            data = fobj.read()
+        cache_file = self._get_cache_file(data)
+        seg_img = self._read_cache_file(cache_file)
+        if seg_img is not None:
+            self.disk_hits += 1
+            log_segload.debug("seg cache: disk hit for '%s'", sys_path)
+            return seg_img
+        self.misses += 1
+        bin_img = self.binfmt.load_image_fobj(io.BytesIO(data))
+        if bin_img is None:
+            return None
+        seg_img = SegImage(bin_img)
+        self._write_cache_file(cache_file, seg_img)
+        return seg_img
+
+    def _get_cache_file(self, data):
+        digest = hashlib.sha1(data).hexdigest()
+        name = "%s-v%d.seg" % (digest, self.disk_version)
+        return os.path.join(self.cache_dir, name)
+
+    def _read_cache_file(self, cache_file):
+        try:
+            with open(cache_file, "rb") as fobj:
+                seg_img = pickle.load(fobj)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            log_segload.warning("seg cache: can't read '%s': %s", cache_file, e)
+            return None
+        if not isinstance(seg_img, SegImage):
+            return None
+        return seg_img
+
+    def _write_cache_file(self, cache_file, seg_img):
+        # write to temp file and rename to avoid races with other processes
+        tmp_file = "%s.%d.tmp" % (cache_file, os.getpid())
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(tmp_file, "wb") as fobj:
+                pickle.dump(seg_img, fobj, pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+        except (OSError, pickle.PicklingError) as e:
+            log_segload.warning("seg cache: can't write '%s': %s", cache_file, e)
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
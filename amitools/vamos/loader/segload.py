@@ -1,9 +1,8 @@
 import os.path
 
-from amitools.binfmt.BinFmt import BinFmt
-from amitools.binfmt.Relocate import Relocate
 from amitools.vamos.log import log_segload
 from .seglist import SegList
+from .segcache import SegmentCache
 
 
 class SegLoadInfo(object):
@@ -22,11 +21,13 @@ class SegLoadInfo(object):
 
 
 class SegmentLoader(object):
-    def __init__(self, alloc, path_mgr=None):
+    def __init__(self, alloc, path_mgr=None, seg_cache=None):
         self.alloc = alloc
         self.path_mgr = path_mgr
         self.mem = alloc.get_mem()
-        self.binfmt = BinFmt()
+        if seg_cache is None:
+            seg_cache = SegmentCache()
+        self.seg_cache = seg_cache
         # map seglist baddr to bin_img
         self.infos = {}
 
@@ -114,17 +115,16 @@ class SegmentLoader(object):
             return None
 
         # try to load bin image in supported format (e.g. HUNK or ELF)
-        bin_img = self.binfmt.load_image(sys_bin_file)
-        if bin_img is None:
+        # the cache keeps the parsed image and its relocations
+        seg_img = self.seg_cache.get_image(sys_bin_file)
+        if seg_img is None:
             log_segload.debug("load_image failed: %s", sys_bin_file)
             return None
-
-        # create relocator
-        relocator = Relocate(bin_img)
+        bin_img = seg_img.bin_img
 
         # get info about segments to allocate
-        sizes = relocator.get_sizes()
-        names = bin_img.get_segment_names()
+        sizes = seg_img.sizes
+        names = seg_img.names
         bin_img_segs = bin_img.get_segments()
 
         # build label names
@@ -143,7 +143,7 @@ class SegmentLoader(object):
         addrs = seg_list.get_all_addrs()
 
         # relocate to addresses and return data
-        datas = relocator.relocate(addrs)
+        datas = seg_img.relocate(addrs)
 
         # write contents to allocated memory
         for i in range(len(sizes)):
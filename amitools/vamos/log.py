@@ -37,6 +37,8 @@ log_prof = logging.getLogger("prof")
 log_tp = logging.getLogger("tp")
 log_hw = logging.getLogger("hw")
 
+log_server = logging.getLogger("server")
+
 loggers = [
     log_main,
     log_mode,
@@ -64,9 +66,10 @@ loggers = [
     log_schedule,
     log_intuition,
     log_timer,
+    log_server,
 ]
 
-preset = {log_prof: logging.INFO}
+preset = {log_prof: logging.INFO, log_server: logging.INFO}
 
 # --- end ---
 
@@ -155,6 +158,18 @@ def log_shutdown():
     logging.shutdown()
 
 
+def log_get_state():
+    """return handlers and levels of all loggers"""
+    return [(l, list(l.handlers), l.level) for l in loggers]
+
+
+def log_set_state(state):
+    """restore handlers and levels returned by log_get_state()"""
+    for l, handlers, level in state:
+        l.handlers = handlers
+        l.setLevel(level)
+
+
 def _setup_levels(levels):
     for name in levels:
         # get and parse level
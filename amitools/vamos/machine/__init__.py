@@ -7,7 +7,7 @@ from .hwaccess import HWAccess, HWAccessError
 from .hwexc import CPUHWExceptionHandler
 from .memmap import MemoryMap
 from .disasm import DisAsm
-from .runtime import Runtime, Code
+from .runtime import Runtime, Code, RunCost, RunState
 from .error import (
     MachineError,
     InvalidMemoryAccessError,
@@ -2,6 +2,7 @@ from .opcodes import op_rts, op_rte
 from .error import InvalidMemoryAccessError, CPUHWExceptionError, ResetOpcodeError
 from .hwexc import CPUHWExceptionHandler
 from .backend import Backend
+from .runtime import RunCost
 from amitools.vamos.log import log_machine
 from amitools.vamos.label import LabelManager
 
@@ -85,6 +86,12 @@ class Machine(object):
         self.reset_hook = None
         self.hw_exc_hook = None
         self.addr_err_hook = None
+        # pc sampling in runtime
+        self.sample_hook = None
+        self.sample_cycles = 0
+        self.sample_left = 0
+        # cost of nested runs
+        self.run_cost = RunCost()
         # call init
         self._setup_handler()
         self._setup_quick_traps()
@@ -330,6 +337,20 @@ class Machine(object):
         Return True to continue execution or False to raise Error"""
         self.addr_err_hook = func
 
+    def set_sample_hook(self, sample_cycles, func):
+        """call func(run_states) every sample_cycles m68k cycles.
+
+        The runtimes stop the CPU at the sample points, i.e. this is much
+        cheaper than an instruction hook. Pass None to disable sampling.
+        """
+        if func:
+            self.sample_cycles = sample_cycles
+            self.sample_left = sample_cycles
+        else:
+            self.sample_cycles = 0
+            self.sample_left = 0
+        self.sample_hook = func
+
     def set_cpu_mem_trace_hook(self, func):
         if func:
             self.mem.set_trace_mode(1)
@@ -13,6 +13,7 @@ class MemoryMap(object):
         # options
         self.hw_access = None
         self.dos_guard_base = 0xFF01DD05
+        self.alloc_mode = MemoryAlloc.MODE_BINS
         # init
         self._init_base_labels()
         # alloc
@@ -37,6 +38,10 @@ class MemoryMap(object):
         odg = cfg.old_dos_guard
         if odg:
             self.setup_old_dos_guard()
+        # allocator
+        alloc_mode = cfg.alloc
+        if alloc_mode:
+            self.alloc_mode = alloc_mode
         if not self.validate():
             return False
         self.setup_ram_allocator()
@@ -57,6 +62,7 @@ class MemoryMap(object):
 
     def cleanup(self):
         if self.alloc:
+            self.alloc.dump_stats()
             self.alloc.dump_orphans()
 
     def setup_hw_access(self, mode_str):
@@ -76,8 +82,15 @@ class MemoryMap(object):
         mem = self.machine.get_mem()
         mem_begin = 0x1000
         mem_size = self.ram_total - mem_begin
-        log_mem_map.info("setup ram allocator: @%06x +%06x", mem_begin, mem_size)
-        self.alloc = MemoryAlloc(mem, mem_begin, mem_size, self.label_mgr)
+        log_mem_map.info(
+            "setup ram allocator: @%06x +%06x (%s)",
+            mem_begin,
+            mem_size,
+            self.alloc_mode,
+        )
+        self.alloc = MemoryAlloc(
+            mem, mem_begin, mem_size, self.label_mgr, mode=self.alloc_mode
+        )
 
     def get_old_dos_guard_base(self):
         return self.dos_guard_base
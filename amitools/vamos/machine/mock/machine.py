@@ -1,6 +1,7 @@
 from .cpu import MockCPU
 from .mem import MockMemory
 from .traps import MockTraps
+from ..runtime import RunCost
 from amitools.vamos.label import LabelManager
 
 
@@ -13,6 +14,10 @@ class MockMachine(object):
             self.label_mgr = LabelManager()
         else:
             self.label_mgr = None
+        self.sample_hook = None
+        self.sample_cycles = 0
+        self.sample_left = 0
+        self.run_cost = RunCost()
 
     def get_cpu(self):
         return self.cpu
@@ -29,6 +34,15 @@ class MockMachine(object):
     def get_ram_begin(self):
         return 0x800
 
+    def set_sample_hook(self, sample_cycles, func):
+        if func:
+            self.sample_cycles = sample_cycles
+            self.sample_left = sample_cycles
+        else:
+            self.sample_cycles = 0
+            self.sample_left = 0
+        self.sample_hook = func
+
     def set_cpu_mem_trace_hook(self, func):
         pass
 
@@ -32,7 +32,7 @@ class MockTraps(object):
         return len(self.tids)
 
     def get_func(self, tid):
-        return self.traps[tid]
+        return self.traps.get(tid)
 
     def trigger(self, tid, pc=0):
         # mask opcode
@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from time import perf_counter
 
 from .regs import reg_to_str
 from .error import MachineError, ErrorReporter
@@ -14,12 +15,25 @@ class RunState:
     cycles: int = 0
     total_cycles: int = 0
     slice_cycles: int = 0
+    trap_pc: int = None
     exit: bool = False
     regs: dict = None
     mach_error: MachineError = None
     mach_error_run_state = None
 
 
+@dataclass
+class RunCost:
+    """host time and m68k cycles spent in nested runs of a machine.
+
+    The values only grow. Take the difference before and after a library
+    call to get the cost of the m68k code it ran.
+    """
+
+    cycles: int = 0
+    time: float = 0.0
+
+
 @dataclass
 class Code:
     pc: int
@@ -36,6 +50,8 @@ class Runtime:
     The runtime counts the cycles for the main run and nested runs.
     Whenever the slice cycle limit is reached then an optional callback is
     triggered. This callback may be used by a scheduler to issue a task switch.
+    If the machine has a sample hook then the run is also stopped every
+    sample cycles of the machine and the hook gets the stack of run states.
 
     PyTraps that are encountered during the run are executed after the m68k
     code execution directly in the current context. I.e. any exception that
@@ -147,9 +163,16 @@ class Runtime:
             name,
             total_cycles=old_total,
             slice_cycles=slice_cycles,
+            trap_pc=self.machine.get_pc(),
         )
         self.run_states.append(run_state)
 
+        # the cost of this run already contains the cost of inner runs
+        cost = self.machine.run_cost
+        cost_cycles = cost.cycles
+        cost_time = cost.time
+        start = perf_counter()
+
         # perform nested run
         try:
             log_machine.info("runtime nested start %s", run_state)
@@ -161,6 +184,10 @@ class Runtime:
             er = ErrorReporter(self.machine)
             er.report_error(me)
 
+        # account cost
+        cost.time = cost_time + perf_counter() - start
+        cost.cycles = cost_cycles + run_state.total_cycles - old_total
+
         # pop current run state
         self.run_states.pop()
 
@@ -207,8 +234,14 @@ class Runtime:
                 # non-slice runs use run_cycles
                 run_cycles = self.run_cycles
 
+            # stop at next sample point of pc sampler
+            machine = self.machine
+            sample_hook = machine.sample_hook
+            if sample_hook and machine.sample_left < run_cycles:
+                run_cycles = max(machine.sample_left, 1)
+
             # let m68k run
-            er = self.machine.execute(run_cycles)
+            er = machine.execute(run_cycles)
 
             # account cycles
             run_state.cycles += er.cycles
@@ -216,13 +249,15 @@ class Runtime:
             if self.left_cycles > 0:
                 self.left_cycles -= er.cycles
                 run_state.slice_cycles = self.slice_cycles - self.left_cycles
+            if sample_hook:
+                machine.sample_left -= er.cycles
 
             # update run state pc, sp
-            run_state.pc = self.machine.get_pc()
-            run_state.sp = self.machine.get_sp()
+            run_state.pc = machine.get_pc()
+            run_state.sp = machine.get_sp()
 
             # machine run has ended?
-            if self.machine.was_exit(er):
+            if machine.was_exit(er):
                 run_state.exit = True
                 log_machine.debug("exit code reached. (%s)", er)
                 break
@@ -230,6 +265,11 @@ class Runtime:
             else:
                 log_machine.debug("run cycles reached: %s", er)
 
+            # sample point reached?
+            if sample_hook and machine.sample_left <= 0:
+                machine.sample_left = machine.sample_cycles
+                sample_hook(self.run_states)
+
         # return regs?
         if get_regs:
             regs = {}
@@ -3,14 +3,15 @@ import io
 import pstats
 
 from .cfg import VamosMainParser
-from .machine import Machine, MemoryMap, Runtime
 from .log import log_main, log_setup, log_help
-from .path import VamosPathManager
-from .trace import TraceManager
-from .libmgr import SetupLibManager
-from .schedule import Scheduler
-from .profiler import MainProfiler
-from .mode import ModeContext, ModeSetup
+from .session import VamosSession
+from .server.server import VamosServer
+from .snapshot import (
+    VamosSnapshot,
+    SnapshotEntry,
+    snapshot_registry,
+    snapshot_fingerprint,
+)
 
 RET_CODE_CONFIG_ERROR = 1000
 
@@ -51,110 +52,55 @@ def main(
         log_help()
         return error_code
 
-    # setup main profiler
-    main_profiler = MainProfiler()
-    prof_cfg = mp.get_profile_dict().profile
-    main_profiler.parse_config(prof_cfg)
-
-    # setup machine
-    machine_cfg = mp.get_machine_dict().machine
-    use_labels = mp.get_trace_dict().trace.labels
-    machine = Machine.from_cfg(machine_cfg, use_labels)
-    if not machine:
-        return error_code
-
-    # setup memory map
-    mem_map_cfg = mp.get_machine_dict().memmap
-    mem_map = MemoryMap(machine)
-    if not mem_map.parse_config(mem_map_cfg):
-        log_main.error("memory map setup failed!")
-        return error_code
-
-    # setup trace manager
-    trace_mgr_cfg = mp.get_trace_dict().trace
-    trace_mgr = TraceManager(machine)
-    if not trace_mgr.parse_config(trace_mgr_cfg):
-        log_main.error("tracing setup failed!")
-        return error_code
-
-    # setup path manager
-    path_mgr = VamosPathManager()
-    try:
-        if not path_mgr.parse_config(mp.get_path_dict()):
-            log_main.error("path config failed!")
-            return error_code
-        if not path_mgr.setup():
-            log_main.error("path setup failed!")
+    # --- job server mode ---
+    server_cfg = mp.get_server_dict().server
+    if server_cfg.enabled:
+        server = VamosServer(server_cfg, mp, main)
+        return server.serve()
+
+    # --- setup session or reuse a snapshot ---
+    snap_cfg = mp.get_snapshot_dict().snapshot
+    snap_name = snap_cfg.load or snap_cfg.save
+    entry = None
+    if snap_name:
+        fingerprint = snapshot_fingerprint(mp)
+        if snap_cfg.load:
+            entry = snapshot_registry.take(snap_name, fingerprint)
+    if entry:
+        session = entry.session
+        session.rebind_std_io()
+    else:
+        session = VamosSession()
+        if not session.setup(mp):
             return error_code
-
-        # setup scheduler
-        schedule_cfg = mp.get_schedule_dict().schedule
-        scheduler = Scheduler.from_cfg(machine, schedule_cfg)
-
-        # a default runtime for m68k code execution after scheduling
-        default_runtime = Runtime(machine, machine.scratch_end)
-
-        # setup default runner
-        def runner(code, name=None):
-            task = scheduler.get_cur_task()
-            if task:
-                return task.sub_run(code, name=name)
-            else:
-                return default_runtime.run(code, name=name)
-
-        # setup lib mgr
-        lib_cfg = mp.get_libs_dict()
-        slm = SetupLibManager(
-            machine,
-            mem_map,
-            runner,
-            scheduler,
-            path_mgr,
-            main_profiler=main_profiler,
-        )
-        if not slm.parse_config(lib_cfg):
-            log_main.error("lib manager setup failed!")
-            return error_code
-        slm.setup()
-
-        # setup profiler
-        main_profiler.setup()
-
-        # open base libs
-        slm.open_base_libs()
-
-        # prepare mode context
-        proc_cfg = mp.get_proc_dict().process
-        exec_ctx = slm.exec_ctx
-        dos_ctx = slm.dos_ctx
-        mode_ctx = ModeContext(proc_cfg, exec_ctx, dos_ctx, scheduler, default_runtime)
-
-        # select mode via ModeSetup
-        if mode is None:
-            cmd_cfg = proc_cfg.command
-            mode = ModeSetup.select(cmd_cfg)
-
-        # run mode
-        if mode is None:
-            exit_code = error_code
-        else:
-            exit_code = mode.run(mode_ctx)
-            if single_return_code:
-                exit_code = exit_code[0]
-
-        # libs shutdown
-        slm.close_base_libs()
-        main_profiler.shutdown()
-        slm.cleanup()
-
-    finally:
-        # always shutdown path manager to ensure that
-        # external resources are cleaned up properly
-        path_mgr.shutdown()
-
-    # mem_map and machine shutdown
-    mem_map.cleanup()
-    machine.cleanup()
+        if snap_name:
+            entry = SnapshotEntry(
+                snap_name, fingerprint, session, VamosSnapshot(session)
+            )
+            log_main.info("snapshot '%s': saved", snap_name)
+
+    # --- run mode ---
+    proc_cfg = mp.get_proc_dict().process
+    try:
+        exit_code = session.run(proc_cfg, mode)
+    except:
+        session.abort()
+        raise
+    if exit_code is None:
+        exit_code = error_code
+    elif single_return_code:
+        exit_code = exit_code[0]
+
+    # --- shutdown or roll back session ---
+    if entry:
+        try:
+            entry.snapshot.restore()
+        except:
+            session.shutdown()
+            raise
+        snapshot_registry.put(entry)
+    else:
+        session.shutdown()
 
     # exit
     log_main.info("vamos is exiting: code=%r", exit_code)
@@ -1,7 +1,9 @@
+from dataclasses import dataclass
 from amitools.vamos.error import *
 from amitools.vamos.log import log_mem_alloc
 from amitools.vamos.label import LabelRange, LabelStruct, LabelLib
 from amitools.vamos.astructs import AccessStruct
+from .freelist import FirstFitFreeList, BinFreeList
 
 
 class Memory:
@@ -18,29 +20,34 @@ class Memory:
             return "[@%06x +%06x %06x]" % (self.addr, self.size, self.addr + self.size)
 
 
-class MemoryChunk:
-    def __init__(self, addr, size):
-        self.addr = addr
-        self.size = size
-        self.next = None
-        self.prev = None
-
-    def __str__(self):
-        end = self.addr + self.size
-        return "[@%06x +%06x %06x]" % (self.addr, self.size, end)
+@dataclass
+class MemoryAllocStats:
+    """a snapshot of the allocator state"""
 
-    def does_fit(self, size):
-        """check if new size would fit into chunk
-        return < 0 if it does not fit, 0 for exact fit, > 0 n wasted bytes
-        """
-        return self.size - size
+    total_bytes: int
+    free_bytes: int
+    used_bytes: int
+    high_water_bytes: int
+    num_allocs: int
+    num_free_chunks: int
+    largest_free_chunk: int
+    # 0.0 = all free memory in one chunk, towards 1.0 = scattered
+    fragmentation: float
+    # power of two chunk size -> number of free chunks
+    free_chunk_histogram: dict
 
 
 class MemoryAlloc:
-    def __init__(self, mem, addr=0, size=0, label_mgr=None):
+    MODE_BINS = "bins"
+    MODE_FIRST_FIT = "first_fit"
+
+    free_list_classes = {MODE_BINS: BinFreeList, MODE_FIRST_FIT: FirstFitFreeList}
+
+    def __init__(self, mem, addr=0, size=0, label_mgr=None, mode=MODE_BINS):
         """mem is a interface.
         setup allocator starting at addr with size bytes.
         if label_mgr is set then labels are created for allocations.
+        mode selects the free list: size class bins or the classic first fit.
         """
         # if no size is specified then take mem total
         if size == 0:
@@ -62,18 +69,25 @@ class MemoryAlloc:
         self.mem_objs = {}
 
         # init free list
+        if mode not in self.free_list_classes:
+            raise ValueError("invalid alloc mode: " + mode)
+        self.mode = mode
         self.free_bytes = size
-        self.free_first = MemoryChunk(addr, self.free_bytes)
-        self.free_entries = 1
+        self.free_list = self.free_list_classes[mode](addr, size)
+        self.high_water = 0
 
     @classmethod
-    def for_machine(cls, machine):
+    def for_machine(cls, machine, mode=MODE_BINS):
         return cls(
             machine.get_mem(),
             addr=machine.get_ram_begin(),
             label_mgr=machine.get_label_mgr(),
+            mode=mode,
         )
 
+    def get_mode(self):
+        return self.mode
+
     def get_mem(self):
         return self.mem
 
@@ -92,93 +106,11 @@ class MemoryAlloc:
     def is_all_free(self):
         return self.size == self.free_bytes
 
-    def _find_best_chunk(self, size):
-        """find best chunk that could take the given alloc
-        return: index of chunk in free list or -1 if none found + bytes left in chunk
-        """
-        chunk = self.free_first
-        while chunk != None:
-            left = chunk.does_fit(size)
-            # exact match
-            if left == 0:
-                return (chunk, 0)
-            # potential candidate: has some bytes left
-            elif left > 0:
-                # Don't make such a hassle. Return the first one that fits.
-                # This function takes too much time.
-                return (chunk, left)
-            chunk = chunk.next
-        # nothing found?
-        return (None, -1)
-
-    def _remove_chunk(self, chunk):
-        next = chunk.next
-        prev = chunk.prev
-        if chunk == self.free_first:
-            self.free_first = next
-        if next != None:
-            next.prev = prev
-        if prev != None:
-            prev.next = next
-        self.free_entries -= 1
-
-    def _replace_chunk(self, old_chunk, new_chunk):
-        next = old_chunk.next
-        prev = old_chunk.prev
-        if old_chunk == self.free_first:
-            self.free_first = new_chunk
-        if next != None:
-            next.prev = new_chunk
-        if prev != None:
-            prev.next = new_chunk
-        new_chunk.next = next
-        new_chunk.prev = prev
-
-    def _insert_chunk(self, chunk):
-        cur = self.free_first
-        last = None
-        addr = chunk.addr
-        while cur != None:
-            # fits right before
-            if addr < cur.addr:
-                break
-            last = cur
-            cur = cur.next
-        # inster after last but before cur
-        if last == None:
-            self.free_first = chunk
-        else:
-            last.next = chunk
-            chunk.prev = last
-        if cur != None:
-            chunk.next = cur
-            cur.prev = chunk
-        self.free_entries += 1
-
-    def _merge_chunk(self, a, b):
-        # can we merge?
-        if a.addr + a.size == b.addr:
-            chunk = MemoryChunk(a.addr, a.size + b.size)
-            prev = a.prev
-            if prev != None:
-                prev.next = chunk
-                chunk.prev = prev
-            next = b.next
-            if next != None:
-                next.prev = chunk
-                chunk.next = next
-            if self.free_first == a:
-                self.free_first = chunk
-            self.free_entries -= 1
-            return chunk
-        else:
-            return None
-
     def _stat_info(self):
         num_allocs = len(self.addrs)
         return "(free %06x #%d) (allocs #%d)" % (
             self.free_bytes,
-            self.free_entries,
+            self.free_list.get_num_chunks(),
             num_allocs,
         )
 
@@ -186,26 +118,21 @@ class MemoryAlloc:
         """allocate memory and return addr or 0 if no more memory"""
         # align size to 4 bytes
         size = (size + 3) & ~3
-        # find best free chunk
-        chunk, left = self._find_best_chunk(size)
+        # take range from free list
+        addr = self.free_list.take(size)
         # out of memory?
-        if chunk == None:
+        if addr is None:
             if except_on_fail:
                 self.dump_orphans()
                 log_mem_alloc.error("[alloc: NO MEMORY for %06x bytes]" % size)
                 raise VamosInternalError("[alloc: NO MEMORY for %06x bytes]" % size)
             return 0
-        # remove chunk from free list
-        # is something left?
-        addr = chunk.addr
-        if left == 0:
-            self._remove_chunk(chunk)
-        else:
-            left_chunk = MemoryChunk(addr + size, left)
-            self._replace_chunk(chunk, left_chunk)
         # add to valid allocs map
         self.addrs[addr] = size
         self.free_bytes -= size
+        used = self.size - self.free_bytes
+        if used > self.high_water:
+            self.high_water = used
         # erase memory
         self.mem.clear_block(addr, size, 0)
         log_mem_alloc.info(
@@ -231,26 +158,8 @@ class MemoryAlloc:
         assert size == real_size
         # remove from valid allocs
         del self.addrs[addr]
-        # create a new free chunk
-        chunk = MemoryChunk(addr, real_size)
-        self._insert_chunk(chunk)
-
-        # try to merge with prev/next
-        prev = chunk.prev
-        if prev != None:
-            new_chunk = self._merge_chunk(prev, chunk)
-            if new_chunk != None:
-                log_mem_alloc.debug(
-                    "merged: %s + this=%s -> %s", prev, chunk, new_chunk
-                )
-                chunk = new_chunk
-        next = chunk.next
-        if next != None:
-            new_chunk = self._merge_chunk(chunk, next)
-            if new_chunk != None:
-                log_mem_alloc.debug(
-                    "merged: this=%s + %s -> %s", chunk, next, new_chunk
-                )
+        # return range to free list
+        self.free_list.give(addr, real_size)
 
         # correct free bytes
         self.free_bytes += size
@@ -270,12 +179,54 @@ class MemoryAlloc:
             return None
 
     def dump_mem_state(self):
-        chunk = self.free_first
-        num = 0
-        while chunk != None:
-            log_mem_alloc.debug("dump #%02d: %s" % (num, chunk))
-            num += 1
-            chunk = chunk.next
+        for num, (addr, size) in enumerate(self.free_list.get_chunks()):
+            log_mem_alloc.debug(
+                "dump #%02d: [@%06x +%06x %06x]" % (num, addr, size, addr + size)
+            )
+
+    def get_stats(self):
+        """return a MemoryAllocStats snapshot"""
+        histogram = {}
+        chunks = self.free_list.get_chunks()
+        for _, size in chunks:
+            bucket = 1 << (size.bit_length() - 1)
+            histogram[bucket] = histogram.get(bucket, 0) + 1
+        largest = self.free_list.get_largest()
+        if self.free_bytes > 0:
+            frag = 1.0 - largest / self.free_bytes
+        else:
+            frag = 0.0
+        return MemoryAllocStats(
+            total_bytes=self.size,
+            free_bytes=self.free_bytes,
+            used_bytes=self.size - self.free_bytes,
+            high_water_bytes=self.high_water,
+            num_allocs=len(self.addrs),
+            num_free_chunks=len(chunks),
+            largest_free_chunk=largest,
+            fragmentation=frag,
+            free_chunk_histogram=dict(sorted(histogram.items())),
+        )
+
+    def dump_stats(self, log_func=log_mem_alloc.info):
+        stats = self.get_stats()
+        log_func(
+            "alloc stats (%s): total=%06x used=%06x free=%06x high_water=%06x",
+            self.mode,
+            stats.total_bytes,
+            stats.used_bytes,
+            stats.free_bytes,
+            stats.high_water_bytes,
+        )
+        log_func(
+            "alloc stats: allocs=#%d free_chunks=#%d largest=%06x fragmentation=%.2f",
+            stats.num_allocs,
+            stats.num_free_chunks,
+            stats.largest_free_chunk,
+            stats.fragmentation,
+        )
+        for bucket, num in stats.free_chunk_histogram.items():
+            log_func("alloc stats: free chunks >= %06x: #%d", bucket, num)
 
     def _dump_orphan(self, addr, size):
         log_mem_alloc.warning("orphan: [@%06x +%06x %06x]" % (addr, size, addr + size))
@@ -285,25 +236,24 @@ class MemoryAlloc:
                 log_mem_alloc.warning("-> %s", l)
 
     def dump_orphans(self):
-        last = self.free_first
-        if last is None:
+        chunks = self.free_list.get_chunks()
+        if not chunks:
             log_mem_alloc.warning("orphan: free list is empty")
             return
         # orphan at begin?
-        if last.addr != self.addr:
+        last_addr, last_size = chunks[0]
+        if last_addr != self.addr:
             addr = self.addr
-            size = last.addr - addr
+            size = last_addr - addr
             self._dump_orphan(addr, size)
         # walk along free list
-        cur = last.next
-        while cur != None:
-            addr = last.addr + last.size
-            size = cur.addr - addr
+        for cur_addr, cur_size in chunks[1:]:
+            addr = last_addr + last_size
+            size = cur_addr - addr
             self._dump_orphan(addr, size)
-            last = cur
-            cur = cur.next
+            last_addr, last_size = cur_addr, cur_size
         # orphan at end?
-        addr = last.addr + last.size
+        addr = last_addr + last_size
         end = self.addr + self.size
         if addr != end:
             self._dump_orphan(addr, end - addr)
@@ -454,18 +404,7 @@ class MemoryAlloc:
         return self.size
 
     def available(self):
-        free = 0
-        chunk = self.free_first
-        while chunk != None:
-            free += chunk.size
-            chunk = chunk.next
-        return free
+        return self.free_bytes
 
     def largest_chunk(self):
-        largest = 0
-        chunk = self.free_first
-        while chunk != None:
-            if chunk.size > largest:
-                largest = chunk.size
-            chunk = chunk.next
-        return largest
+        return self.free_list.get_largest()
@@ -0,0 +1,317 @@
+from amitools.vamos.log import log_mem_alloc
+
+
+class MemoryChunk:
+    def __init__(self, addr, size):
+        self.addr = addr
+        self.size = size
+        self.next = None
+        self.prev = None
+
+    def __str__(self):
+        end = self.addr + self.size
+        return "[@%06x +%06x %06x]" % (self.addr, self.size, end)
+
+    def does_fit(self, size):
+        """check if new size would fit into chunk
+        return < 0 if it does not fit, 0 for exact fit, > 0 n wasted bytes
+        """
+        return self.size - size
+
+
+class FirstFitFreeList:
+    """the classic free list of the allocator.
+
+    All free chunks are kept in an address ordered linked list. An alloc
+    takes the first chunk that fits. Both alloc and free walk the list.
+    """
+
+    def __init__(self, addr, size):
+        self.free_first = MemoryChunk(addr, size)
+        self.free_entries = 1
+
+    def get_num_chunks(self):
+        return self.free_entries
+
+    def get_chunks(self):
+        """return list of (addr, size) of all free chunks ordered by addr"""
+        result = []
+        chunk = self.free_first
+        while chunk != None:
+            result.append((chunk.addr, chunk.size))
+            chunk = chunk.next
+        return result
+
+    def get_largest(self):
+        largest = 0
+        chunk = self.free_first
+        while chunk != None:
+            if chunk.size > largest:
+                largest = chunk.size
+            chunk = chunk.next
+        return largest
+
+    def take(self, size):
+        """find a free chunk for size bytes and remove them from the list.
+        return addr or None if no chunk fits.
+        """
+        chunk, left = self._find_best_chunk(size)
+        if chunk == None:
+            return None
+        # remove chunk from free list
+        # is something left?
+        addr = chunk.addr
+        if left == 0:
+            self._remove_chunk(chunk)
+        else:
+            left_chunk = MemoryChunk(addr + size, left)
+            self._replace_chunk(chunk, left_chunk)
+        return addr
+
+    def give(self, addr, size):
+        """return a range to the free list and merge it with neighbors"""
+        # create a new free chunk
+        chunk = MemoryChunk(addr, size)
+        self._insert_chunk(chunk)
+
+        # try to merge with prev/next
+        prev = chunk.prev
+        if prev != None:
+            new_chunk = self._merge_chunk(prev, chunk)
+            if new_chunk != None:
+                log_mem_alloc.debug(
+                    "merged: %s + this=%s -> %s", prev, chunk, new_chunk
+                )
+                chunk = new_chunk
+        next = chunk.next
+        if next != None:
+            new_chunk = self._merge_chunk(chunk, next)
+            if new_chunk != None:
+                log_mem_alloc.debug(
+                    "merged: this=%s + %s -> %s", chunk, next, new_chunk
+                )
+
+    def _find_best_chunk(self, size):
+        """find best chunk that could take the given alloc
+        return: index of chunk in free list or -1 if none found + bytes left in chunk
+        """
+        chunk = self.free_first
+        while chunk != None:
+            left = chunk.does_fit(size)
+            # exact match
+            if left == 0:
+                return (chunk, 0)
+            # potential candidate: has some bytes left
+            elif left > 0:
+                # Don't make such a hassle. Return the first one that fits.
+                # This function takes too much time.
+                return (chunk, left)
+            chunk = chunk.next
+        # nothing found?
+        return (None, -1)
+
+    def _remove_chunk(self, chunk):
+        next = chunk.next
+        prev = chunk.prev
+        if chunk == self.free_first:
+            self.free_first = next
+        if next != None:
+            next.prev = prev
+        if prev != None:
+            prev.next = next
+        self.free_entries -= 1
+
+    def _replace_chunk(self, old_chunk, new_chunk):
+        next = old_chunk.next
+        prev = old_chunk.prev
+        if old_chunk == self.free_first:
+            self.free_first = new_chunk
+        if next != None:
+            next.prev = new_chunk
+        if prev != None:
+            prev.next = new_chunk
+        new_chunk.next = next
+        new_chunk.prev = prev
+
+    def _insert_chunk(self, chunk):
+        cur = self.free_first
+        last = None
+        addr = chunk.addr
+        while cur != None:
+            # fits right before
+            if addr < cur.addr:
+                break
+            last = cur
+            cur = cur.next
+        # inster after last but before cur
+        if last == None:
+            self.free_first = chunk
+        else:
+            last.next = chunk
+            chunk.prev = last
+        if cur != None:
+            chunk.next = cur
+            cur.prev = chunk
+        self.free_entries += 1
+
+    def _merge_chunk(self, a, b):
+        # can we merge?
+        if a.addr + a.size == b.addr:
+            chunk = MemoryChunk(a.addr, a.size + b.size)
+            prev = a.prev
+            if prev != None:
+                prev.next = chunk
+                chunk.prev = prev
+            next = b.next
+            if next != None:
+                next.prev = chunk
+                chunk.next = next
+            if self.free_first == a:
+                self.free_first = chunk
+            self.free_entries -= 1
+            return chunk
+        else:
+            return None
+
+
+class BinFreeList:
+    """a free list with segregated size class bins.
+
+    Free chunks are sorted into bins by size: small sizes get a bin per
+    long word size, larger sizes are split into SUB_BINS bins per power of
+    two. A bit mask of non-empty bins finds the next bin holding a chunk
+    that surely fits with a few integer operations.
+
+    For coalescing all free chunks are indexed by their start and end
+    address so neighbors of a released range are found directly.
+    Alloc and free therefore do not depend on the number of free chunks.
+    """
+
+    SUB_BITS = 3
+    SUB_BINS = 1 << SUB_BITS
+    # sizes below get an exact bin for each multiple of 4
+    SMALL_SIZE = 64
+    SMALL_BINS = SMALL_SIZE // 4
+    SMALL_BITS = SMALL_SIZE.bit_length() - 1
+
+    def __init__(self, addr, size):
+        # chunk index: addr -> size and end addr -> addr
+        self.chunk_starts = {}
+        self.chunk_ends = {}
+        # bins: bin index -> {addr: size}
+        self.bins = {}
+        # bit mask of non-empty bins
+        self.bin_mask = 0
+        if size > 0:
+            self._add_chunk(addr, size)
+
+    def get_num_chunks(self):
+        return len(self.chunk_starts)
+
+    def get_chunks(self):
+        """return list of (addr, size) of all free chunks ordered by addr"""
+        return sorted(self.chunk_starts.items())
+
+    def get_largest(self):
+        mask = self.bin_mask
+        if mask == 0:
+            return 0
+        idx = mask.bit_length() - 1
+        return max(self.bins[idx].values())
+
+    def _bin_index(self, size):
+        """return the bin a chunk of given size is stored in"""
+        if size < self.SMALL_SIZE:
+            return size >> 2
+        top = size.bit_length() - 1
+        sub = (size >> (top - self.SUB_BITS)) & (self.SUB_BINS - 1)
+        return self.SMALL_BINS + ((top - self.SMALL_BITS) << self.SUB_BITS) + sub
+
+    def _fit_index(self, size):
+        """return the first bin where all chunks fit the given size"""
+        if size >= self.SMALL_SIZE:
+            # round up to next bin boundary
+            top = size.bit_length() - 1
+            size += (1 << (top - self.SUB_BITS)) - 1
+        return self._bin_index(size)
+
+    def _add_chunk(self, addr, size):
+        self.chunk_starts[addr] = size
+        self.chunk_ends[addr + size] = addr
+        idx = self._bin_index(size)
+        b = self.bins.get(idx)
+        if b is None:
+            b = {}
+            self.bins[idx] = b
+            self.bin_mask |= 1 << idx
+        b[addr] = size
+
+    def _del_chunk(self, addr, size):
+        del self.chunk_starts[addr]
+        del self.chunk_ends[addr + size]
+        idx = self._bin_index(size)
+        b = self.bins[idx]
+        del b[addr]
+        if not b:
+            del self.bins[idx]
+            self.bin_mask &= ~(1 << idx)
+
+    def take(self, size):
+        """find a free chunk for size bytes and remove them from the list.
+        return addr or None if no chunk fits.
+        """
+        addr = None
+        # first non-empty bin where every chunk fits
+        idx = self._fit_index(size)
+        mask = self.bin_mask >> idx
+        if mask:
+            idx += (mask & -mask).bit_length() - 1
+            b = self.bins[idx]
+            addr = next(iter(b))
+            chunk_size = b[addr]
+        else:
+            # search bin with mixed sizes
+            b = self.bins.get(self._bin_index(size))
+            if b:
+                for chunk_addr, chunk_size in b.items():
+                    if chunk_size >= size:
+                        addr = chunk_addr
+                        break
+        if addr is None:
+            return None
+        self._del_chunk(addr, chunk_size)
+        left = chunk_size - size
+        if left > 0:
+            self._add_chunk(addr + size, left)
+        return addr
+
+    def give(self, addr, size):
+        """return a range to the free list and merge it with neighbors"""
+        # merge with prev chunk
+        prev_addr = self.chunk_ends.get(addr)
+        if prev_addr is not None:
+            prev_size = self.chunk_starts[prev_addr]
+            self._del_chunk(prev_addr, prev_size)
+            log_mem_alloc.debug(
+                "merged: [@%06x +%06x] + this=[@%06x +%06x]",
+                prev_addr,
+                prev_size,
+                addr,
+                size,
+            )
+            addr = prev_addr
+            size += prev_size
+        # merge with next chunk
+        next_addr = addr + size
+        next_size = self.chunk_starts.get(next_addr)
+        if next_size is not None:
+            self._del_chunk(next_addr, next_size)
+            log_mem_alloc.debug(
+                "merged: this=[@%06x +%06x] + [@%06x +%06x]",
+                addr,
+                size,
+                next_addr,
+                next_size,
+            )
+            size += next_size
+        self._add_chunk(addr, size)
@@ -2,6 +2,7 @@ from .assign import AssignManager
 from .mgr import PathManager, SysPathError
 from .spec import Spec
 from .volume import VolumeManager, Volume, resolve_sys_path
+from .dircache import DirCache
 from .amipath import AmiPath, AmiPathError
 from .lazypath import LazyPath, LazyPathList
 from .env import AmiPathEnv
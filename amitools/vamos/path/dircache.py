@@ -0,0 +1,79 @@
+import os
+import stat
+from amitools.vamos.log import log_path
+
+
+class DirCache(object):
+    """cache the listing of host dirs for case insensitive lookups.
+
+    Each cached dir maps the lower case names of its entries to the real
+    names. An entry is valid as long as the modification time of the dir
+    does not change, so a lookup costs a stat() of the dir and a dict
+    lookup instead of a full listing. Changes done by vamos itself should
+    be reported with invalidate() as the mtime resolution of the host fs
+    might be too coarse to notice them.
+    """
+
+    def __init__(self, max_dirs=1024):
+        self.max_dirs = max_dirs
+        # sys dir path -> (mtime_ns, {lo_name: name})
+        self.dirs = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get_num_dirs(self):
+        return len(self.dirs)
+
+    def get_names(self, dir_path):
+        """return dict of lower case names to real names of the entries in
+        the given dir or None if dir_path is no dir"""
+        try:
+            dir_stat = os.stat(dir_path)
+        except OSError:
+            self.dirs.pop(dir_path, None)
+            return None
+        if not stat.S_ISDIR(dir_stat.st_mode):
+            self.dirs.pop(dir_path, None)
+            return None
+        mtime = dir_stat.st_mtime_ns
+        entry = self.dirs.get(dir_path)
+        if entry is not None and entry[0] == mtime:
+            self.hits += 1
+            return entry[1]
+        # (re)read dir
+        self.misses += 1
+        try:
+            files = os.listdir(dir_path)
+        except OSError:
+            return None
+        names = {}
+        for name in files:
+            # the first variant wins like in a linear search
+            names.setdefault(name.lower(), name)
+        if entry is None and len(self.dirs) >= self.max_dirs:
+            # drop oldest entry
+            del self.dirs[next(iter(self.dirs))]
+        self.dirs[dir_path] = (mtime, names)
+        return names
+
+    def lookup(self, dir_path, name):
+        """return the real name of the entry matching name in any case.
+
+        return None if no entry was found or dir_path is no dir
+        """
+        names = self.get_names(dir_path)
+        if names is None:
+            return None
+        return names.get(name.lower())
+
+    def invalidate(self, sys_path):
+        """an entry was created, deleted or renamed at sys_path"""
+        sys_path = os.path.normpath(sys_path)
+        # the entry itself might be a cached dir
+        self.dirs.pop(sys_path, None)
+        parent = os.path.dirname(sys_path)
+        if self.dirs.pop(parent, None):
+            log_path.debug("dir cache: invalidate '%s'", parent)
+
+    def flush(self):
+        self.dirs = {}
@@ -4,6 +4,7 @@ import shutil
 from amitools.vamos.log import log_path
 import logging
 from .spec import Spec
+from .dircache import DirCache
 
 
 def resolve_sys_path(sys_path):
@@ -145,6 +146,7 @@ class VolumeManager(object):
         self.is_setup = False
         self.vols_by_name = {}
         self.vols_base_dir = vols_base_dir
+        self.dir_cache = DirCache()
 
     def get_num_volumes(self):
         return len(self.volumes)
@@ -306,6 +308,13 @@ class VolumeManager(object):
     def get_all_names(self):
         return [x.get_name() for x in self.volumes]
 
+    def get_dir_cache(self):
+        return self.dir_cache
+
+    def invalidate_sys_path(self, sys_path):
+        """report a created, deleted or renamed entry in the host fs"""
+        self.dir_cache.invalidate(sys_path)
+
     def sys_to_ami_path(self, sys_path):
         """try to map an absolute system path back to an amiga path
 
@@ -400,8 +409,9 @@ class VolumeManager(object):
         # base is the name (no more dirs)
         if len(dirs) == 0:
             return base
-        # make sure base is a dir
-        if not os.path.isdir(base):
+        # make sure base is a dir and get its entries
+        names = self.dir_cache.get_names(base)
+        if names is None:
             # assume remainder is new
             return os.path.join(base, os.path.join(*dirs))
         # dir component to search
@@ -411,15 +421,10 @@ class VolumeManager(object):
             dp = os.path.join(base, d)
             if os.path.exists(dp):
                 return self._follow_path_no_case(dp, dirs[1:], fast)
-        # read dir and check for no case variant
-        dlow = d.lower()
-        files = os.listdir(base)
-        dl = len(d)
-        for f in files:
-            if len(f) == dl:
-                flow = f.lower()
-                if flow == dlow:
-                    res = os.path.join(base, f)
-                    return self._follow_path_no_case(res, dirs[1:], fast)
+        # check for no case variant
+        f = names.get(d.lower())
+        if f is not None:
+            res = os.path.join(base, f)
+            return self._follow_path_no_case(res, dirs[1:], fast)
         # can't find it -> we assume rest of path is new
         return os.path.join(base, os.path.join(*dirs))
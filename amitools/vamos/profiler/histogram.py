@@ -0,0 +1,123 @@
+import math
+from amitools.vamos.cfgcore import ConfigDict
+
+
+class LogHistogram(object):
+    """a log-linear bucketed histogram of time deltas (HDR style).
+
+    Values are given in seconds and stored as integer nanoseconds. Each
+    power of two range is split into 2^(sub_bits-1) linear buckets, so a
+    recorded value is off by less than 1/2^(sub_bits-1) of its magnitude.
+    Only non-empty buckets are stored, i.e. the memory needed is bounded by
+    the number of buckets and not by the number of values. Histograms with
+    the same sub_bits can be merged by adding their bucket counts.
+    """
+
+    scale = 1000000000
+
+    def __init__(self, sub_bits=7):
+        self.sub_bits = sub_bits
+        self.sub_count = 1 << sub_bits
+        self.half_shift = sub_bits - 1
+        # bucket index -> count
+        self.buckets = {}
+        self.total = 0
+        self.max_val = 0
+
+    def __eq__(self, other):
+        return (
+            self.sub_bits == other.sub_bits
+            and self.buckets == other.buckets
+            and self.total == other.total
+            and self.max_val == other.max_val
+        )
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __repr__(self):
+        return "LogHistogram(sub_bits=%r):total=%r,max=%r,buckets=%r" % (
+            self.sub_bits,
+            self.total,
+            self.max_val,
+            self.buckets,
+        )
+
+    @classmethod
+    def from_dict(cls, data_dict):
+        obj = cls(data_dict.sub_bits)
+        for idx, cnt in data_dict.buckets:
+            obj.buckets[idx] = cnt
+            obj.total += cnt
+        obj.max_val = data_dict.max
+        return obj
+
+    def get_data(self):
+        return ConfigDict(
+            {
+                "sub_bits": self.sub_bits,
+                "max": self.max_val,
+                "buckets": [[idx, self.buckets[idx]] for idx in sorted(self.buckets)],
+            }
+        )
+
+    def _get_index(self, val):
+        if val < self.sub_count:
+            return val
+        shift = val.bit_length() - self.sub_bits
+        return (shift << self.half_shift) + (val >> shift)
+
+    def _get_range(self, idx):
+        """return lowest and highest value of a bucket"""
+        if idx < self.sub_count:
+            return idx, idx
+        shift = (idx >> self.half_shift) - 1
+        mant = idx - (shift << self.half_shift)
+        return mant << shift, ((mant + 1) << shift) - 1
+
+    def add(self, delta):
+        val = int(delta * self.scale)
+        if val < 0:
+            val = 0
+        idx = self._get_index(val)
+        buckets = self.buckets
+        buckets[idx] = buckets.get(idx, 0) + 1
+        self.total += 1
+        if val > self.max_val:
+            self.max_val = val
+
+    def merge(self, other):
+        """add the values of another histogram"""
+        if other.sub_bits != self.sub_bits:
+            raise ValueError("can't merge histograms with different sub_bits")
+        buckets = self.buckets
+        for idx, cnt in other.buckets.items():
+            buckets[idx] = buckets.get(idx, 0) + cnt
+        self.total += other.total
+        if other.max_val > self.max_val:
+            self.max_val = other.max_val
+
+    def get_total(self):
+        return self.total
+
+    def get_num_buckets(self):
+        return len(self.buckets)
+
+    def get_max(self):
+        return self.max_val / self.scale
+
+    def get_percentile(self, percent):
+        """return the value below or at which the given percent of values are.
+
+        the highest value of the matching bucket is returned in seconds
+        """
+        if self.total == 0:
+            return 0.0
+        limit = max(1, math.ceil(self.total * percent / 100.0))
+        num = 0
+        for idx in sorted(self.buckets):
+            num += self.buckets[idx]
+            if num >= limit:
+                high = self._get_range(idx)[1]
+                return min(high, self.max_val) / self.scale
+        return self.max_val / self.scale
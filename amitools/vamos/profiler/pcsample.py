@@ -0,0 +1,136 @@
+from amitools.vamos.log import log_prof
+from amitools.vamos.cfgcore import ConfigDict
+from amitools.vamos.label import LabelCodeResolver
+from .profiler import Profiler
+
+
+class PCSampleProfiler(Profiler):
+    """sample the pc of the m68k code every n cycles.
+
+    Instead of an instruction hook the runtime stops the CPU at each sample
+    point. The pc of the current run and the pcs of the outer runs (i.e.
+    the traps that triggered the nested runs) are resolved with the
+    labels of the machine to a stack of frames. Each frame is either the
+    symbol of a loaded segment, a library function or the name of a label.
+    The samples are counted per stack and can be written as folded stacks
+    for flame graph tools.
+    """
+
+    name = "pc"
+
+    def __init__(self, machine=None, enabled=False, cycles=10000, folded=None):
+        self.machine = machine
+        self.enabled = enabled
+        self.cycles = cycles
+        self.folded = folded
+        # folded stack -> count
+        self.stacks = {}
+        self.num_samples = 0
+        self.resolver = LabelCodeResolver(None)
+        self.active = False
+
+    def get_name(self):
+        return self.name
+
+    def parse_config(self, cfg):
+        if not cfg:
+            return True
+        self.enabled = cfg.enabled
+        self.cycles = cfg.cycles
+        self.folded = cfg.folded
+        return True
+
+    def set_data(self, data_dict):
+        self.stacks = {}
+        self.num_samples = 0
+        return self.merge_data(data_dict)
+
+    def merge_data(self, data_dict):
+        """merge the samples stored in a data dict"""
+        stacks = self.stacks
+        for stack, count in data_dict.stacks:
+            stacks[stack] = stacks.get(stack, 0) + count
+            self.num_samples += count
+        return True
+
+    def get_data(self):
+        if not self.stacks:
+            return None
+        return ConfigDict(
+            {
+                "cycles": self.cycles,
+                "stacks": [[s, self.stacks[s]] for s in sorted(self.stacks)],
+            }
+        )
+
+    def setup(self):
+        if not self.enabled or not self.machine:
+            return
+        if self.cycles <= 0:
+            log_prof.warning("pc: invalid sample cycles: %d", self.cycles)
+            return
+        label_mgr = self.machine.get_label_mgr()
+        if not label_mgr:
+            log_prof.warning("pc: no labels. can't resolve pcs!")
+        self.resolver = LabelCodeResolver(label_mgr)
+        log_prof.debug("pc: sample every %d cycles", self.cycles)
+        self.machine.set_sample_hook(self.cycles, self.sample)
+        self.active = True
+
+    def shutdown(self):
+        if self.active:
+            self.machine.set_sample_hook(0, None)
+            self.active = False
+        if self.folded:
+            self.save_folded(self.folded)
+
+    def sample(self, run_states):
+        """the sample hook called by the runtime"""
+        frames = []
+        last = len(run_states) - 1
+        for i, run_state in enumerate(run_states):
+            if run_state.name:
+                frames.append(run_state.name)
+            # an outer run is stopped at the trap of the next run
+            if i < last:
+                pc = run_states[i + 1].trap_pc
+            else:
+                pc = run_state.pc
+            frames.append(self.resolve(pc))
+        stack = ";".join(frames)
+        self.stacks[stack] = self.stacks.get(stack, 0) + 1
+        self.num_samples += 1
+
+    def resolve(self, pc):
+        """return the frame name of a pc"""
+        return self.resolver.resolve(pc)
+
+    def get_num_samples(self):
+        return self.num_samples
+
+    def get_stacks(self):
+        return self.stacks
+
+    def get_self_counts(self):
+        """return list of (frame, count) for the innermost frames"""
+        res = {}
+        for stack, count in self.stacks.items():
+            leaf = stack.rsplit(";", 1)[-1]
+            res[leaf] = res.get(leaf, 0) + count
+        return sorted(res.items(), key=lambda x: (-x[1], x[0]))
+
+    def write_folded(self, fobj):
+        """write samples in the folded stack format of flame graph tools"""
+        for stack in sorted(self.stacks):
+            fobj.write("%s %d\n" % (stack, self.stacks[stack]))
+
+    def save_folded(self, file_name):
+        log_prof.debug("pc: saving folded stacks to '%s'", file_name)
+        with open(file_name, "w") as fobj:
+            self.write_folded(fobj)
+
+    def dump(self, write, max_entries=20):
+        total = self.num_samples
+        write("%d samples every %d cycles" % (total, self.cycles))
+        for frame, count in self.get_self_counts()[:max_entries]:
+            write("%-40s  %8d  %6.2f%%" % (frame, count, 100.0 * count / total))
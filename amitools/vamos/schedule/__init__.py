@@ -1,2 +1,3 @@
 from .task import NativeTask, PythonTask, TaskState
 from .scheduler import Scheduler, SchedulerEvent, SchedulerConfig
+from .clock import RealClock, VirtualClock, create_clock, default_clock
@@ -0,0 +1,76 @@
+import time
+
+from amitools.vamos.log import log_schedule
+
+NS_PER_SEC = 1_000_000_000
+
+
+class RealClock:
+    """the host clock: delays really sleep"""
+
+    name = "real"
+    virtual = False
+
+    def get_time_ns(self):
+        """wall clock time in ns since the epoch"""
+        return time.time_ns()
+
+    def get_time(self):
+        """wall clock time in secs since the epoch"""
+        return self.get_time_ns() / NS_PER_SEC
+
+    def get_monotonic_ns(self):
+        """monotonic time in ns, e.g. for the EClock"""
+        return time.monotonic_ns()
+
+    def delay(self, secs):
+        """let the given time pass"""
+        if secs > 0:
+            time.sleep(secs)
+
+    def get_skipped_ns(self):
+        return 0
+
+
+class VirtualClock(RealClock):
+    """the host clock plus all the time skipped by delays.
+
+    A delay returns immediately and simply advances the clock. So programs
+    waiting for some time do not stall the run but all time sources (system
+    time, EClock, DateStamp) still see the time passing.
+    """
+
+    name = "virtual"
+    virtual = True
+
+    def __init__(self):
+        self.skipped_ns = 0
+
+    def get_time_ns(self):
+        return time.time_ns() + self.skipped_ns
+
+    def get_monotonic_ns(self):
+        return time.monotonic_ns() + self.skipped_ns
+
+    def delay(self, secs):
+        if secs > 0:
+            self.skipped_ns += int(secs * NS_PER_SEC)
+
+    def get_skipped_ns(self):
+        return self.skipped_ns
+
+
+clock_types = {RealClock.name: RealClock, VirtualClock.name: VirtualClock}
+
+# used if no clock is configured
+default_clock = RealClock()
+
+
+def create_clock(name):
+    """create a clock by name or return None if name is invalid"""
+    cls = clock_types.get(name)
+    if cls is None:
+        log_schedule.error("invalid clock: %s", name)
+        return None
+    log_schedule.info("using %s clock", name)
+    return cls()
@@ -1,9 +1,11 @@
 from enum import IntEnum
 from dataclasses import dataclass
+import heapq
 import greenlet
 
 from amitools.vamos.log import log_schedule
 from amitools.vamos.schedule.task import TaskState, TaskBase
+from amitools.vamos.schedule.clock import RealClock, create_clock
 
 
 @dataclass
@@ -23,10 +25,11 @@ class SchedulerEvent:
 @dataclass
 class SchedulerConfig:
     slice_cycles: int = 1000
+    clock: str = RealClock.name
 
     @classmethod
     def from_cfg(cls, schedule_cfg):
-        return cls(schedule_cfg.slice_cycles)
+        return cls(schedule_cfg.slice_cycles, schedule_cfg.clock)
 
 
 class Scheduler(object):
@@ -38,6 +41,9 @@ class Scheduler(object):
         log_schedule.info("setup scheduler with %d slice cycles", config.slice_cycles)
         self.machine = machine
         self.config = config
+        self.clock = create_clock(config.clock)
+        if not self.clock:
+            raise ValueError("invalid clock: %s" % config.clock)
         # state
         self.ready_tasks = []
         self.waiting_tasks = []
@@ -48,6 +54,9 @@ class Scheduler(object):
         self.num_switch_same = 0
         self.num_switch_other = 0
         self.running = False
+        # timer heap: [deadline_ns, seq, callback]
+        self.timers = []
+        self.timer_seq = 0
 
     @classmethod
     def from_cfg(cls, machine, schedule_cfg):
@@ -57,6 +66,9 @@ class Scheduler(object):
     def get_machine(self):
         return self.machine
 
+    def get_clock(self):
+        return self.clock
+
     def set_event_callback(self, func):
         """the function will receive ScheduleEvent"""
         self.event_hooks.append(func)
@@ -71,6 +83,80 @@ class Scheduler(object):
     def get_cur_task(self):
         return self.cur_task
 
+    def add_timer(self, deadline_ns, callback):
+        """call the callback once the clock's monotonic time reaches deadline_ns.
+
+        the callback is called from the scheduler and not from a task.
+        return a handle for cancel_timer()
+        """
+        self.timer_seq += 1
+        entry = [deadline_ns, self.timer_seq, callback]
+        heapq.heappush(self.timers, entry)
+        log_schedule.debug("add_timer: deadline=%d #%d", deadline_ns, self.timer_seq)
+        return entry
+
+    def cancel_timer(self, handle):
+        """cancel a pending timer. return True if it was still pending"""
+        if handle[2] is None:
+            return False
+        # entry is skipped when it expires
+        handle[2] = None
+        log_schedule.debug("cancel_timer: #%d", handle[1])
+        return True
+
+    def delay_task(self, task, delay_ns):
+        """let the given task wait until delay_ns passed on the clock"""
+        deadline = self.clock.get_monotonic_ns() + delay_ns
+
+        def wake_up():
+            self.wake_up_task(task)
+
+        self.add_timer(deadline, wake_up)
+        self.wait_task(task)
+
+    def get_num_timers(self):
+        """count the pending timers"""
+        return sum(1 for entry in self.timers if entry[2] is not None)
+
+    def _fire_timers(self):
+        """call all expired timers. return True if one fired"""
+        timers = self.timers
+        now = self.clock.get_monotonic_ns()
+        fired = False
+        cpu_ctx = None
+        while timers and timers[0][0] <= now:
+            entry = heapq.heappop(timers)
+            callback = entry[2]
+            if callback is None:
+                continue
+            entry[2] = None
+            # keep the cpu state of the current task intact
+            if cpu_ctx is None:
+                cpu_ctx = self.machine.cpu.get_cpu_context()
+            log_schedule.debug("fire timer: #%d", entry[1])
+            callback()
+            fired = True
+        if cpu_ctx is not None:
+            self.machine.cpu.set_cpu_context(cpu_ctx)
+        return fired
+
+    def _wait_timer(self):
+        """all tasks wait: let time pass until the next timer expires.
+
+        return False if no timer is pending
+        """
+        timers = self.timers
+        while timers and timers[0][2] is None:
+            heapq.heappop(timers)
+        if not timers:
+            return False
+        delta_ns = timers[0][0] - self.clock.get_monotonic_ns()
+        log_schedule.debug("wait timer: %d ns", delta_ns)
+        if delta_ns > 0:
+            self.clock.delay(delta_ns / 1_000_000_000)
+        self._fire_timers()
+        return True
+
     def schedule(self):
         """main work call for scheduler. at least one task must be added.
         terminates if there are no more tasks to schedule or if a task
@@ -105,6 +191,10 @@ class Scheduler(object):
             if self.get_num_tasks() == 0:
                 break
 
+            # expired timers may wake up tasks
+            if self.timers:
+                self._fire_timers()
+
             # has the current task forbid state?
             if self.cur_task and self.cur_task.is_forbidden():
                 log_schedule.debug("run: keep current (forbid state)")
@@ -113,6 +203,9 @@ class Scheduler(object):
                 # find a task to run
                 task = self._find_run_task()
                 if task is None:
+                    # all tasks wait. is a timer pending?
+                    if self._wait_timer():
+                        continue
                     log_schedule.error("schedule(): no task to run?!")
                     return False
 
@@ -121,6 +214,10 @@ class Scheduler(object):
             if task == self.cur_task:
                 self.num_switch_same += 1
                 log_schedule.debug("run: current %s", task.name)
+                # current task was woken up after waiting
+                if task.get_state() != TaskState.TS_RUN:
+                    self._make_current(task)
+                    task.set_state(TaskState.TS_RUN)
                 task.keep_scheduled()
             else:
                 self.num_switch_other += 1
@@ -152,6 +249,10 @@ class Scheduler(object):
         # end of scheduling
         self._make_current(None)
         self.running = False
+        num_timers = self.get_num_timers()
+        if num_timers > 0:
+            log_schedule.warning("schedule(): dropping %d pending timers", num_timers)
+        self.timers = []
 
         log_schedule.info(
             "schedule(): done (switches: same=%d, other=%d)",
@@ -169,6 +270,8 @@ class Scheduler(object):
 
         # keep current task
         task = self.cur_task
+        if task is None:
+            return None
         log_schedule.debug("take: current task %s", task.name)
         if task.get_state() in (TaskState.TS_READY, TaskState.TS_RUN):
             return task
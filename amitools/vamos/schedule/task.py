@@ -250,7 +250,7 @@ class NativeTask(TaskBase):
 
         log_schedule.debug("%s: start native code %r", self.name, self.code)
         try:
-            self.run_state = self.runtime.start(self.code)
+            self.run_state = self.runtime.start(self.code, name=self.name)
         except TaskStop:
             log_schedule.debug("%s: task stop received!")
             self.run_state = None
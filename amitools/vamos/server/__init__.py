@@ -0,0 +1,10 @@
+# keep the client side light: the server (and with it all of vamos) is
+# imported by vamos main from .server directly
+from .protocol import (
+    default_socket_path,
+    send_msg,
+    recv_msg,
+    ProtocolError,
+    ConnectError,
+)
+from .client import run_job
@@ -0,0 +1,38 @@
+import os
+import socket
+
+from .protocol import send_msg, recv_msg, ProtocolError, ConnectError
+
+
+def run_job(socket_path, args, cfg_files=None, cwd=None, env=None, fds=(0, 1, 2)):
+    """run a vamos job on the server and return its reply dict.
+
+    The reply contains 'exit_code', the job's wall clock 'time' and 'warm'
+    if a bootstrapped session was reused.
+
+    Raises ConnectError if the server can't be reached. Then the job was
+    not sent and can be run elsewhere. Once the job was sent, an OSError or
+    a ProtocolError for an invalid reply is raised.
+    """
+    if cwd is None:
+        cwd = os.getcwd()
+    if env is None:
+        env = dict(os.environ)
+    req = {
+        "args": list(args),
+        "cfg_files": list(cfg_files) if cfg_files else None,
+        "cwd": cwd,
+        "env": env,
+    }
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(socket_path)
+        except OSError as e:
+            raise ConnectError(e.errno, "can't connect to server: %s" % e)
+        send_msg(sock, req, list(fds))
+        reply, _ = recv_msg(sock)
+    if reply is None:
+        raise ProtocolError("server closed connection")
+    if not isinstance(reply, dict) or not isinstance(reply.get("exit_code"), int):
+        raise ProtocolError("invalid reply: %r" % (reply,))
+    return reply
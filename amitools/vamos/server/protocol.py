@@ -0,0 +1,70 @@
+import json
+import os
+import socket
+import struct
+import tempfile
+
+# each message is a big endian 32 bit length followed by a JSON object.
+# file descriptors are passed along with the first chunk of a message.
+HEADER = struct.Struct(">I")
+MAX_MSG_SIZE = 16 * 1024 * 1024
+RECV_SIZE = 64 * 1024
+
+
+class ProtocolError(Exception):
+    pass
+
+
+class ConnectError(OSError):
+    """the server could not be reached: no job was sent"""
+
+    pass
+
+
+def default_socket_path():
+    """socket path used if none is given: $VAMOS_SERVER_SOCKET or per user"""
+    path = os.environ.get("VAMOS_SERVER_SOCKET")
+    if path:
+        return path
+    return os.path.join(tempfile.gettempdir(), "vamos-%d.sock" % os.getuid())
+
+
+def send_msg(sock, obj, fds=None):
+    data = json.dumps(obj).encode("utf-8")
+    buf = HEADER.pack(len(data)) + data
+    if fds:
+        num = socket.send_fds(sock, [buf], fds)
+        buf = buf[num:]
+    if buf:
+        sock.sendall(buf)
+
+
+def recv_msg(sock, max_fds=0):
+    """receive a message and return (obj, fds) or (None, []) on EOF"""
+    if max_fds > 0:
+        buf, fds, _, _ = socket.recv_fds(sock, RECV_SIZE, max_fds)
+    else:
+        buf = sock.recv(RECV_SIZE)
+        fds = []
+    if not buf:
+        return None, fds
+    while len(buf) < HEADER.size:
+        buf += _recv_more(sock)
+    (size,) = HEADER.unpack_from(buf)
+    if size > MAX_MSG_SIZE:
+        raise ProtocolError("message too large: %d" % size)
+    end = HEADER.size + size
+    while len(buf) < end:
+        buf += _recv_more(sock)
+    try:
+        obj = json.loads(buf[HEADER.size : end].decode("utf-8"))
+    except ValueError as e:
+        raise ProtocolError("invalid message: %s" % e)
+    return obj, fds
+
+
+def _recv_more(sock):
+    data = sock.recv(RECV_SIZE)
+    if not data:
+        raise ProtocolError("connection closed in message")
+    return data
@@ -0,0 +1,215 @@
+import os
+import signal
+import socket
+import sys
+import time
+
+from amitools.vamos.log import log_server, log_get_state, log_set_state
+from amitools.vamos.session import VamosSession
+from amitools.vamos.snapshot import (
+    VamosSnapshot,
+    SnapshotEntry,
+    snapshot_registry,
+    snapshot_fingerprint,
+)
+from .protocol import default_socket_path, send_msg, recv_msg
+
+
+class VamosServer:
+    """accept vamos jobs on a unix socket and run them in warm sessions.
+
+    Each worker process bootstraps a session from the server's config and
+    keeps it as snapshot. A job sends its args, config files, cwd and
+    environment together with its stdin/stdout/stderr descriptors. The job
+    is run by job_func(cfg_files, args, cfg_dict) (i.e. vamos main) with
+    the snapshot selected, so the session is reused if the job's config
+    matches and rolled back after the run.
+    """
+
+    snapshot_name = "server"
+
+    def __init__(self, server_cfg, main_parser, job_func):
+        self.socket_path = server_cfg.socket or default_socket_path()
+        self.num_workers = max(server_cfg.workers, 1)
+        self.mp = main_parser
+        self.job_func = job_func
+        self.num_jobs = 0
+        self.worker_pids = []
+        self.stopping = False
+
+    def serve(self):
+        """run the server until it is terminated. return exit code"""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.bind(self.socket_path)
+            sock.listen(self.num_workers * 4)
+            log_server.info(
+                "listening on '%s' with %d worker(s)",
+                self.socket_path,
+                self.num_workers,
+            )
+            old_handler = signal.signal(signal.SIGTERM, self._on_term)
+            try:
+                if self.num_workers == 1:
+                    self._worker_loop(sock)
+                else:
+                    self._spawn_workers(sock)
+            except (KeyboardInterrupt, SystemExit):
+                pass
+            finally:
+                signal.signal(signal.SIGTERM, old_handler)
+                self._stop_workers()
+        finally:
+            sock.close()
+            os.unlink(self.socket_path)
+            log_server.info("stopped")
+        return 0
+
+    def _on_term(self, signum, frame):
+        self.stopping = True
+        raise SystemExit(0)
+
+    def _spawn_workers(self, sock):
+        for _ in range(self.num_workers):
+            pid = os.fork()
+            if pid == 0:
+                # worker: never return into the caller's code
+                code = 0
+                try:
+                    self._worker_loop(sock)
+                except (KeyboardInterrupt, SystemExit):
+                    pass
+                except BaseException:
+                    log_server.exception("worker %d failed", os.getpid())
+                    code = 1
+                finally:
+                    snapshot_registry.shutdown_all()
+                    sys.stdout.flush()
+                    sys.stderr.flush()
+                    os._exit(code)
+            self.worker_pids.append(pid)
+        # wait for all workers
+        while self.worker_pids:
+            pid, _ = os.wait()
+            if pid in self.worker_pids:
+                self.worker_pids.remove(pid)
+
+    def _stop_workers(self):
+        for pid in self.worker_pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        for pid in self.worker_pids:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+        self.worker_pids = []
+
+    def _worker_loop(self, sock):
+        self._warm_up()
+        try:
+            while True:
+                conn, _ = sock.accept()
+                with conn:
+                    self._handle_conn(conn)
+        finally:
+            snapshot_registry.drop(self.snapshot_name)
+            log_server.info(
+                "worker %d: stopped after %d job(s)", os.getpid(), self.num_jobs
+            )
+
+    def _warm_up(self):
+        """bootstrap a session for the server config and keep it"""
+        start = time.perf_counter()
+        session = VamosSession()
+        if not session.setup(self.mp):
+            log_server.error("session setup failed. jobs will run cold")
+            return
+        fingerprint = snapshot_fingerprint(self.mp)
+        entry = SnapshotEntry(
+            self.snapshot_name, fingerprint, session, VamosSnapshot(session)
+        )
+        snapshot_registry.put(entry)
+        log_server.info(
+            "worker %d: warm session ready in %.3fs",
+            os.getpid(),
+            time.perf_counter() - start,
+        )
+
+    def _handle_conn(self, conn):
+        req, fds = recv_msg(conn, 3)
+        try:
+            if req is None:
+                return
+            if len(fds) != 3:
+                log_server.error("job without std file descriptors")
+                return
+            reply = self._run_job(req, fds)
+        finally:
+            for fd in fds:
+                os.close(fd)
+        send_msg(conn, reply)
+
+    def _run_job(self, req, fds):
+        self.num_jobs += 1
+        job_id = self.num_jobs
+        args = req["args"]
+
+        old_entry = snapshot_registry.entries.get(self.snapshot_name)
+        old_cwd = os.getcwd()
+        old_env = dict(os.environ)
+        old_std = (sys.stdin, sys.stdout, sys.stderr)
+        log_state = log_get_state()
+        # the job sets up its own log handlers
+        for logger, _, _ in log_state:
+            logger.handlers = []
+
+        start = time.perf_counter()
+        try:
+            os.chdir(req["cwd"])
+            os.environ.clear()
+            os.environ.update(req["env"])
+            sys.stdin = open(fds[0], "r", closefd=False)
+            sys.stdout = open(fds[1], "w", closefd=False)
+            sys.stderr = open(fds[2], "w", closefd=False)
+            cfg_dict = {"snapshot": {"load": self.snapshot_name}}
+            exit_code = self.job_func(req["cfg_files"], args, cfg_dict)
+        except SystemExit as e:
+            if self.stopping:
+                raise
+            # e.g. argparse help
+            exit_code = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            log_server.exception("job #%d failed", job_id)
+            exit_code = 1
+        finally:
+            for f in (sys.stdin, sys.stdout, sys.stderr):
+                if f not in old_std:
+                    try:
+                        f.flush()
+                    except OSError:
+                        pass
+                    f.close()
+            sys.stdin, sys.stdout, sys.stderr = old_std
+            log_set_state(log_state)
+            os.environ.clear()
+            os.environ.update(old_env)
+            os.chdir(old_cwd)
+        job_time = time.perf_counter() - start
+
+        new_entry = snapshot_registry.entries.get(self.snapshot_name)
+        warm = old_entry is not None and new_entry is old_entry
+        log_server.info(
+            "job #%d: pid=%d exit=%s time=%.3fs warm=%s args=%s",
+            job_id,
+            os.getpid(),
+            exit_code,
+            job_time,
+            warm,
+            " ".join(args),
+        )
+        return {"exit_code": exit_code, "time": job_time, "warm": warm}
@@ -0,0 +1,183 @@
+from .machine import Machine, MemoryMap, Runtime
+from .log import log_main
+from .path import VamosPathManager
+from .trace import TraceManager
+from .libmgr import SetupLibManager
+from .schedule import Scheduler
+from .profiler import MainProfiler, PCSampleProfiler
+from .loader import SegmentCache
+from .mode import ModeContext, ModeSetup
+
+
+class VamosSession:
+    """a bootstrapped vamos machine with exec and dos ready to run modes.
+
+    setup() creates all components from the config, run() executes a mode
+    with a given process config and shutdown() tears down everything.
+    """
+
+    def __init__(self):
+        self.main_profiler = None
+        self.machine = None
+        self.mem_map = None
+        self.trace_mgr = None
+        self.path_mgr = None
+        self.scheduler = None
+        self.default_runtime = None
+        self.slm = None
+
+    def setup(self, mp):
+        """create all components from the config of the main parser.
+
+        return True if all went well
+        """
+
+        # setup main profiler
+        self.main_profiler = MainProfiler()
+        prof_cfg = mp.get_profile_dict().profile
+        self.main_profiler.parse_config(prof_cfg)
+
+        # setup machine
+        machine_cfg = mp.get_machine_dict().machine
+        use_labels = mp.get_trace_dict().trace.labels
+        # pc sampling and call tracing need labels to resolve the pcs
+        if prof_cfg.enabled and prof_cfg.pc.enabled:
+            use_labels = True
+        if mp.get_trace_dict().trace.calls:
+            use_labels = True
+        self.machine = Machine.from_cfg(machine_cfg, use_labels)
+        if not self.machine:
+            return False
+        self.main_profiler.add_profiler(PCSampleProfiler(self.machine))
+
+        # setup memory map
+        mem_map_cfg = mp.get_machine_dict().memmap
+        self.mem_map = MemoryMap(self.machine)
+        if not self.mem_map.parse_config(mem_map_cfg):
+            log_main.error("memory map setup failed!")
+            return False
+
+        # setup trace manager
+        trace_mgr_cfg = mp.get_trace_dict().trace
+        self.trace_mgr = TraceManager(self.machine)
+        if not self.trace_mgr.parse_config(trace_mgr_cfg):
+            log_main.error("tracing setup failed!")
+            return False
+
+        # setup path manager
+        self.path_mgr = VamosPathManager()
+        ok = False
+        try:
+            if not self.path_mgr.parse_config(mp.get_path_dict()):
+                log_main.error("path config failed!")
+                return False
+            if not self.path_mgr.setup():
+                log_main.error("path setup failed!")
+                return False
+
+            # setup scheduler
+            schedule_cfg = mp.get_schedule_dict().schedule
+            self.scheduler = Scheduler.from_cfg(self.machine, schedule_cfg)
+            self.trace_mgr.set_task_func(self.scheduler.get_cur_task)
+
+            # a default runtime for m68k code execution after scheduling
+            self.default_runtime = Runtime(self.machine, self.machine.scratch_end)
+
+            # setup cache of parsed binaries
+            loader_cfg = mp.get_loader_dict().loader
+            if loader_cfg.seg_cache:
+                seg_cache = SegmentCache(
+                    loader_cfg.seg_cache_size, loader_cfg.seg_cache_dir
+                )
+            else:
+                seg_cache = SegmentCache(0)
+
+            # setup lib mgr
+            lib_cfg = mp.get_libs_dict()
+            self.slm = SetupLibManager(
+                self.machine,
+                self.mem_map,
+                self.runner,
+                self.scheduler,
+                self.path_mgr,
+                main_profiler=self.main_profiler,
+                seg_cache=seg_cache,
+            )
+            if not self.slm.parse_config(lib_cfg):
+                log_main.error("lib manager setup failed!")
+                return False
+            self.slm.setup()
+
+            # setup profiler
+            self.main_profiler.setup()
+
+            # open base libs
+            self.slm.open_base_libs()
+            ok = True
+            return True
+
+        finally:
+            # on failure always shutdown path manager to ensure that
+            # external resources are cleaned up properly
+            if not ok:
+                self.path_mgr.shutdown()
+
+    def runner(self, code, name=None):
+        """default runner for m68k code"""
+        task = self.scheduler.get_cur_task()
+        if task:
+            return task.sub_run(code, name=name)
+        else:
+            return self.default_runtime.run(code, name=name)
+
+    def run(self, proc_cfg, mode=None):
+        """run the given or configured mode and return its exit codes.
+
+        return None if no mode was found
+        """
+        # prepare mode context
+        exec_ctx = self.slm.exec_ctx
+        dos_ctx = self.slm.dos_ctx
+        mode_ctx = ModeContext(
+            proc_cfg, exec_ctx, dos_ctx, self.scheduler, self.default_runtime
+        )
+
+        # select mode via ModeSetup
+        if mode is None:
+            cmd_cfg = proc_cfg.command
+            mode = ModeSetup.select(cmd_cfg)
+
+        # run mode
+        if mode is None:
+            return None
+        try:
+            return mode.run(mode_ctx)
+        finally:
+            # write out buffered output now: a snapshot restore or an
+            # abort skips shutdown
+            self.slm.dos_impl.file_mgr.flush_buffers()
+
+    def rebind_std_io(self):
+        """attach the dos std handles to the current sys std streams"""
+        self.slm.dos_impl.file_mgr.rebind_std_files()
+
+    def abort(self):
+        """release external resources after a failed run"""
+        self.path_mgr.shutdown()
+
+    def shutdown(self):
+        """close libs and shutdown all components"""
+        try:
+            # libs shutdown
+            self.slm.close_base_libs()
+            self.main_profiler.shutdown()
+            self.trace_mgr.shutdown()
+            self.slm.cleanup()
+        finally:
+            # always shutdown path manager to ensure that
+            # external resources are cleaned up properly
+            self.path_mgr.shutdown()
+
+        # mem_map and machine shutdown
+        self.mem_map.cleanup()
+        self.machine.cleanup()
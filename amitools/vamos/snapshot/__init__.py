@@ -0,0 +1,9 @@
+from .pystate import PyStateSnapshot
+from .machine import MachineSnapshot
+from .snapshot import VamosSnapshot
+from .registry import (
+    SnapshotEntry,
+    SnapshotRegistry,
+    snapshot_registry,
+    snapshot_fingerprint,
+)
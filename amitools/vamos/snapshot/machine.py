@@ -0,0 +1,42 @@
+from amitools.vamos.machine import CPUState
+from amitools.vamos.error import VamosInternalError
+
+
+class MachineSnapshot:
+    """capture the state of the emulated machine: RAM, CPU and traps"""
+
+    max_traps = 0x1000
+
+    def __init__(self, machine):
+        self.machine = machine
+        mem = machine.get_mem()
+        self.ram_size = mem.get_ram_size_bytes()
+        self.ram = mem.r_block(0, self.ram_size)
+        self.cpu_state = CPUState()
+        self.cpu_state.get(machine.get_cpu())
+        self.trap_funcs = self._get_trap_funcs()
+
+    def _get_trap_funcs(self):
+        traps = self.machine.get_traps()
+        result = {}
+        for tid in range(self.max_traps):
+            func = traps.get_func(tid)
+            if func is not None:
+                result[tid] = func
+        return result
+
+    def restore(self):
+        machine = self.machine
+        # traps: free all allocated after snapshot
+        traps = machine.get_traps()
+        cur_funcs = self._get_trap_funcs()
+        for tid, func in cur_funcs.items():
+            if self.trap_funcs.get(tid) is not func:
+                traps.free(tid)
+        # all traps of snapshot must still be there
+        for tid, func in self.trap_funcs.items():
+            if cur_funcs.get(tid) is not func:
+                raise VamosInternalError("snapshot: trap #%d was freed" % tid)
+        # ram and cpu
+        machine.get_mem().w_block(0, self.ram)
+        self.cpu_state.set(machine.get_cpu())
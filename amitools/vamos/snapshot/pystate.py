@@ -0,0 +1,95 @@
+from enum import Enum
+from types import MethodType
+
+
+class PyStateSnapshot:
+    """record the Python side state of vamos objects and roll it back.
+
+    Starting from a set of root objects all reachable instances of vamos
+    classes are collected. For each of them the attribute dict is saved.
+    Builtin containers found in the attributes are copied while all other
+    objects are kept by reference. A restore puts back the saved attributes
+    into the very same instances, so references held elsewhere (e.g. trap
+    functions bound to library stubs) stay valid.
+
+    Objects created after the snapshot are simply no longer referenced
+    after a restore.
+    """
+
+    container_types = (list, dict, set, tuple, bytearray)
+
+    def __init__(self, roots, module_prefix="amitools.vamos"):
+        self.module_prefix = module_prefix
+        # id -> (obj, saved attr dict)
+        self.objs = {}
+        self._take(roots)
+
+    def get_num_objs(self):
+        return len(self.objs)
+
+    def _is_tracked(self, obj):
+        if isinstance(obj, (type, Enum)):
+            return False
+        if not hasattr(obj, "__dict__"):
+            return False
+        return type(obj).__module__.startswith(self.module_prefix)
+
+    def _take(self, roots):
+        todo = list(roots)
+        objs = self.objs
+        memo = {}
+
+        def visit(val):
+            if type(val) is MethodType:
+                val = val.__self__
+            if id(val) not in objs and self._is_tracked(val):
+                todo.append(val)
+
+        while todo:
+            obj = todo.pop()
+            if id(obj) in objs:
+                continue
+            state = self._copy(obj.__dict__, memo, visit)
+            objs[id(obj)] = (obj, state)
+
+    def _copy(self, val, memo, visit=None):
+        """copy containers recursively and keep all other objects"""
+        val_type = type(val)
+        if val_type not in self.container_types:
+            if visit:
+                visit(val)
+            return val
+        val_id = id(val)
+        if val_id in memo:
+            return memo[val_id]
+        if val_type is dict:
+            result = {}
+            memo[val_id] = result
+            for k, v in val.items():
+                result[self._copy(k, memo, visit)] = self._copy(v, memo, visit)
+        elif val_type is list:
+            result = []
+            memo[val_id] = result
+            for v in val:
+                result.append(self._copy(v, memo, visit))
+        elif val_type is set:
+            result = set()
+            memo[val_id] = result
+            for v in val:
+                result.add(self._copy(v, memo, visit))
+        elif val_type is tuple:
+            result = tuple(self._copy(v, memo, visit) for v in val)
+            memo[val_id] = result
+        else:
+            result = bytearray(val)
+            memo[val_id] = result
+        return result
+
+    def restore(self):
+        """put back the saved state into all recorded objects"""
+        memo = {}
+        for obj, state in self.objs.values():
+            attrs = self._copy(state, memo)
+            obj_dict = obj.__dict__
+            obj_dict.clear()
+            obj_dict.update(attrs)
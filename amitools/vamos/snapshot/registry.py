@@ -0,0 +1,78 @@
+import atexit
+import os
+
+from amitools.vamos.log import log_main
+
+
+def snapshot_fingerprint(main_parser):
+    """return a key of all config entries that affect a session setup"""
+    mp = main_parser
+    cfgs = (
+        mp.get_machine_dict(),
+        mp.get_trace_dict(),
+        mp.get_path_dict(),
+        mp.get_libs_dict(),
+        mp.get_profile_dict(),
+        mp.get_schedule_dict(),
+        mp.get_loader_dict(),
+    )
+    return (os.getcwd(),) + tuple(repr(cfg) for cfg in cfgs)
+
+
+class SnapshotEntry:
+    def __init__(self, name, fingerprint, session, snapshot):
+        self.name = name
+        self.fingerprint = fingerprint
+        self.session = session
+        self.snapshot = snapshot
+
+
+class SnapshotRegistry:
+    """keep warm vamos sessions and their snapshots by name.
+
+    A session in the registry is idle and rolled back to its snapshot.
+    It is taken out while it runs and put back afterwards. All sessions
+    still in the registry are shut down when the interpreter exits.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.atexit_registered = False
+
+    def get_names(self):
+        return list(self.entries)
+
+    def take(self, name, fingerprint):
+        """return the entry for name or None if missing or incompatible"""
+        entry = self.entries.pop(name, None)
+        if entry is None:
+            log_main.info("snapshot '%s': not found", name)
+            return None
+        if entry.fingerprint != fingerprint:
+            log_main.warning("snapshot '%s': config changed. dropping it", name)
+            entry.session.shutdown()
+            return None
+        log_main.info("snapshot '%s': reusing session", name)
+        return entry
+
+    def put(self, entry):
+        """add an idle session. a session with the same name is replaced"""
+        old_entry = self.entries.pop(entry.name, None)
+        if old_entry is not None and old_entry.session is not entry.session:
+            old_entry.session.shutdown()
+        self.entries[entry.name] = entry
+        if not self.atexit_registered:
+            atexit.register(self.shutdown_all)
+            self.atexit_registered = True
+
+    def drop(self, name):
+        entry = self.entries.pop(name, None)
+        if entry is not None:
+            entry.session.shutdown()
+
+    def shutdown_all(self):
+        for name in list(self.entries):
+            self.drop(name)
+
+
+snapshot_registry = SnapshotRegistry()
@@ -0,0 +1,20 @@
+from .machine import MachineSnapshot
+from .pystate import PyStateSnapshot
+
+
+class VamosSnapshot:
+    """snapshot of a bootstrapped vamos session.
+
+    It combines the machine state (RAM, CPU, traps) with the Python state
+    of all vamos objects reachable from the session. A restore rolls back
+    both, so the session looks like it was just set up.
+    """
+
+    def __init__(self, session):
+        self.machine = MachineSnapshot(session.machine)
+        self.pystate = PyStateSnapshot([session])
+
+    def restore(self):
+        # restore Python state first: trap functions are kept by reference
+        self.pystate.restore()
+        self.machine.restore()
@@ -4,3 +4,4 @@ from .path import PathTool
 from .type import TypeTool
 from .libprof import LibProfilerTool
 from .state import StateTool
+from .calltrace import CallTraceTool
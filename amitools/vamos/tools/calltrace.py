@@ -0,0 +1,76 @@
+from .tool import Tool
+from amitools.vamos.trace import CallGraph, CallGraphError
+
+
+class CallTraceTool(Tool):
+    def __init__(self):
+        Tool.__init__(self, "calltrace", "call graph trace utilities")
+        self.graph = None
+
+    def add_args(self, arg_parser):
+        sub = arg_parser.add_subparsers(dest="calltrace_cmd")
+        input_help = "call graph file(s). graphs of multiple files are merged"
+        # dump
+        parser = sub.add_parser("dump", help="display functions with highest cost")
+        parser.add_argument("input", nargs="+", help=input_help)
+        parser.add_argument(
+            "-n",
+            "--num",
+            type=int,
+            default=20,
+            help="number of functions to show",
+        )
+        # callgrind
+        parser = sub.add_parser(
+            "callgrind", help="convert call graph to callgrind format"
+        )
+        parser.add_argument("input", nargs="+", help=input_help)
+        parser.add_argument(
+            "-o", "--output", required=True, help="callgrind output file"
+        )
+
+    def run(self, args):
+        if not self._load_graph(args):
+            return 1
+        cmd = args.calltrace_cmd
+        if cmd == "dump":
+            return self._do_dump(args)
+        elif cmd == "callgrind":
+            return self._do_callgrind(args)
+        else:
+            return 1
+
+    def _load_graph(self, args):
+        self.graph = CallGraph()
+        for input_file in args.input:
+            try:
+                graph = CallGraph.load(input_file)
+            except (IOError, CallGraphError) as e:
+                print("loading '%s' failed: %s" % (input_file, e))
+                return False
+            self.graph.merge(graph)
+        return True
+
+    def _do_dump(self, args):
+        graph = self.graph
+        total = graph.get_total_cost()
+        # inclusive cost of a function is the sum of its incoming edges
+        incl = {}
+        for _, callee_id, _, cost in graph.get_edges():
+            incl[callee_id] = incl.get(callee_id, 0) + cost
+        print("%-50s  %12s  %12s" % ("function", "self", "incl"))
+        for name, cost in graph.get_funcs()[: args.num]:
+            func_id = graph.get_func_id(name)
+            incl_cost = incl.get(func_id, cost)
+            print("%-50s  %12d  %12d" % (name, cost, incl_cost))
+        print("%-50s  %12d" % ("total", total))
+        return 0
+
+    def _do_callgrind(self, args):
+        try:
+            with open(args.output, "w") as fobj:
+                self.graph.write_callgrind(fobj, " ".join(args.input))
+        except IOError as e:
+            print("saving '%s' failed: %s" % (args.output, e))
+            return 1
+        return 0
@@ -2,8 +2,9 @@ import sys
 import json
 
 from .tool import Tool
-from amitools.vamos.libcore import LibProfiler, LibImplScan
+from amitools.vamos.libcore import LibProfiler, LibImplScan, LibImplFuncTag
 from amitools.vamos.cfgcore import ConfigDict
+from amitools.vamos.profiler import ProfDataFile
 
 
 class LibProfilerTool(Tool):
@@ -13,17 +14,18 @@ class LibProfilerTool(Tool):
 
     def add_args(self, arg_parser):
         sub = arg_parser.add_subparsers(dest="libprof_cmd")
+        input_help = "profile json file(s). profiles of multiple files are merged"
         # dump
         parser = sub.add_parser("dump", help="display library function profile info")
-        parser.add_argument("input", help="profile json file")
+        parser.add_argument("input", nargs="+", help=input_help)
         # missing
         parser = sub.add_parser("missing", help="display missing library functions")
-        parser.add_argument("input", help="profile json file")
+        parser.add_argument("input", nargs="+", help=input_help)
         # coverage
         parser = sub.add_parser(
             "coverage", help="display library function coverage info"
         )
-        parser.add_argument("input", help="profile json file")
+        parser.add_argument("input", nargs="+", help=input_help)
         parser.add_argument(
             "-f",
             "--functions",
@@ -31,6 +33,12 @@ class LibProfilerTool(Tool):
             default=False,
             help="show uncovered functions",
         )
+        # merge
+        parser = sub.add_parser("merge", help="merge library profiles of many runs")
+        parser.add_argument("input", nargs="+", help=input_help)
+        parser.add_argument(
+            "-o", "--output", required=True, help="merged profile json file"
+        )
 
     def setup(self, args):
         return True
@@ -48,30 +56,43 @@ class LibProfilerTool(Tool):
             return self._do_missing()
         elif cmd == "coverage":
             return self._do_coverage(args)
+        elif cmd == "merge":
+            return self._do_merge(args)
         else:
             return 1
 
     def _load_profile(self, args):
-        # read file
-        try:
-            with open(args.input) as fh:
-                data = json.load(fh)
-                if "libs" in data:
-                    data = ConfigDict(data["libs"])
-                    self.profiler = LibProfiler()
-                    self.profiler.set_data(data)
-                    return True
-                else:
-                    print("no 'libs' found in '%s'" % args.input)
-                    return False
-        except IOError as e:
-            print("loading '%s' failed: %s" % (args.input, e))
-            return False
+        self.profiler = LibProfiler()
+        for input_file in args.input:
+            # read file
+            try:
+                with open(input_file) as fh:
+                    data = json.load(fh)
+            except IOError as e:
+                print("loading '%s' failed: %s" % (input_file, e))
+                return False
+            if "libs" in data:
+                data = ConfigDict(data["libs"])
+                self.profiler.merge_data(data)
+            else:
+                print("no 'libs' found in '%s'" % input_file)
+                return False
+        return True
 
     def _do_dump(self):
         self.profiler.dump()
         return 0
 
+    def _do_merge(self, args):
+        df = ProfDataFile()
+        df.set_prof_data(self.profiler.get_name(), self.profiler.get_data())
+        try:
+            df.save_json_file(args.output)
+        except IOError as e:
+            print("saving '%s' failed: %s" % (args.output, e))
+            return 1
+        return 0
+
     def _do_missing(self):
         p = self.profiler
         for lib_name, lib_prof in p.get_all_libs():
@@ -1,2 +1,4 @@
 from .mem import TraceMemory
 from .mgr import TraceManager
+from .calls import CallTracer
+from .callgraph import CallGraph, CallGraphError
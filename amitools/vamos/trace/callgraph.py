@@ -0,0 +1,175 @@
+import struct
+
+
+class CallGraphError(Exception):
+    pass
+
+
+class CallGraph(object):
+    """a call graph of guest functions with the cost of each call edge.
+
+    Functions are identified by their name. For each function the self cost
+    is kept and for each edge (caller, callee) the number of calls and the
+    inclusive cost of all those calls. The cost unit is the number of
+    executed m68k instructions.
+
+    The graph is stored in a compact binary file:
+
+        magic 'VCG1', num_names.l, num_funcs.l, num_edges.l
+        names:  len.w, name bytes (utf-8)
+        funcs:  name_id.l, self_cost.q
+        edges:  caller_id.l, callee_id.l, calls.q, incl_cost.q
+    """
+
+    magic = b"VCG1"
+
+    def __init__(self):
+        self.names = []
+        self.name_ids = {}
+        # func id -> self cost
+        self.costs = {}
+        # (caller id, callee id) -> [calls, incl cost]
+        self.edges = {}
+
+    def __eq__(self, other):
+        return (
+            self.names == other.names
+            and self.costs == other.costs
+            and self.edges == other.edges
+        )
+
+    def __ne__(self, other):
+        return not self == other
+
+    def get_func_id(self, name):
+        """return the id of a function name and add it if it is new"""
+        func_id = self.name_ids.get(name)
+        if func_id is None:
+            func_id = len(self.names)
+            self.names.append(name)
+            self.name_ids[name] = func_id
+        return func_id
+
+    def get_name(self, func_id):
+        return self.names[func_id]
+
+    def add_self(self, func_id, cost):
+        self.costs[func_id] = self.costs.get(func_id, 0) + cost
+
+    def add_call(self, caller_id, callee_id, cost, calls=1):
+        key = (caller_id, callee_id)
+        edge = self.edges.get(key)
+        if edge is None:
+            self.edges[key] = [calls, cost]
+        else:
+            edge[0] += calls
+            edge[1] += cost
+
+    def get_self_cost(self, func_id):
+        return self.costs.get(func_id, 0)
+
+    def get_total_cost(self):
+        return sum(self.costs.values())
+
+    def get_edges(self):
+        """return sorted list of (caller_id, callee_id, calls, incl_cost)"""
+        return [(a, b) + tuple(self.edges[(a, b)]) for a, b in sorted(self.edges)]
+
+    def get_funcs(self):
+        """return list of (name, self_cost) sorted by descending cost"""
+        res = [(self.names[i], c) for i, c in self.costs.items()]
+        return sorted(res, key=lambda x: (-x[1], x[0]))
+
+    def merge(self, other):
+        """add the costs of another graph"""
+        id_map = [self.get_func_id(name) for name in other.names]
+        for func_id, cost in other.costs.items():
+            self.add_self(id_map[func_id], cost)
+        for (caller_id, callee_id), (calls, cost) in other.edges.items():
+            self.add_call(id_map[caller_id], id_map[callee_id], cost, calls)
+
+    # ----- binary file -----
+
+    def write(self, fobj):
+        fobj.write(self.magic)
+        fobj.write(
+            struct.pack(">III", len(self.names), len(self.costs), len(self.edges))
+        )
+        for name in self.names:
+            data = name.encode("utf-8")
+            fobj.write(struct.pack(">H", len(data)))
+            fobj.write(data)
+        for func_id in sorted(self.costs):
+            fobj.write(struct.pack(">IQ", func_id, self.costs[func_id]))
+        for caller_id, callee_id, calls, cost in self.get_edges():
+            fobj.write(struct.pack(">IIQQ", caller_id, callee_id, calls, cost))
+
+    @classmethod
+    def read(cls, fobj):
+        if fobj.read(4) != cls.magic:
+            raise CallGraphError("no call graph file!")
+        num_names, num_funcs, num_edges = cls._read(fobj, ">III")
+        graph = cls()
+        for _ in range(num_names):
+            (size,) = cls._read(fobj, ">H")
+            data = fobj.read(size)
+            if len(data) != size:
+                raise CallGraphError("truncated call graph file!")
+            graph.get_func_id(data.decode("utf-8"))
+        for _ in range(num_funcs):
+            func_id, cost = cls._read(fobj, ">IQ")
+            graph.add_self(func_id, cost)
+        for _ in range(num_edges):
+            caller_id, callee_id, calls, cost = cls._read(fobj, ">IIQQ")
+            graph.add_call(caller_id, callee_id, cost, calls)
+        return graph
+
+    @staticmethod
+    def _read(fobj, fmt):
+        size = struct.calcsize(fmt)
+        data = fobj.read(size)
+        if len(data) != size:
+            raise CallGraphError("truncated call graph file!")
+        return struct.unpack(fmt, data)
+
+    def save(self, file_name):
+        with open(file_name, "wb") as fobj:
+            self.write(fobj)
+
+    @classmethod
+    def load(cls, file_name):
+        with open(file_name, "rb") as fobj:
+            return cls.read(fobj)
+
+    # ----- callgrind -----
+
+    def write_callgrind(self, fobj, cmd=None):
+        """write the graph in the callgrind format of kcachegrind"""
+        fobj.write("# callgrind format\n")
+        fobj.write("version: 1\n")
+        fobj.write("creator: vamos\n")
+        if cmd:
+            fobj.write("cmd: %s\n" % cmd)
+        fobj.write("positions: line\n")
+        fobj.write("events: Instr\n")
+        fobj.write("summary: %d\n" % self.get_total_cost())
+        # group edges by caller
+        calls = {}
+        for caller_id, callee_id, num, cost in self.get_edges():
+            calls.setdefault(caller_id, []).append((callee_id, num, cost))
+        seen = set()
+
+        def fn_name(func_id):
+            if func_id in seen:
+                return "(%d)" % func_id
+            seen.add(func_id)
+            return "(%d) %s" % (func_id, self.names[func_id])
+
+        func_ids = sorted(set(self.costs) | set(calls))
+        for func_id in func_ids:
+            fobj.write("\nfn=%s\n" % fn_name(func_id))
+            fobj.write("0 %d\n" % self.costs.get(func_id, 0))
+            for callee_id, num, cost in calls.get(func_id, ()):
+                fobj.write("cfn=%s\n" % fn_name(callee_id))
+                fobj.write("calls=%d 0\n" % num)
+                fobj.write("0 %d\n" % cost)
@@ -0,0 +1,121 @@
+from amitools.vamos.log import log_instr
+from amitools.vamos.label import LabelCodeResolver
+from amitools.vamos.machine.regs import REG_A7
+from .callgraph import CallGraph
+
+# return opcodes and offset of the return address on the stack
+ret_ops = {
+    0x4E75: 0,  # rts
+    0x4E74: 0,  # rtd
+    0x4E77: 2,  # rtr
+}
+
+# sp of a frame that is never left
+root_sp = 1 << 32
+
+
+class CallStack(object):
+    """the shadow call stack of a task.
+
+    Each frame is a list [func_id, entry_sp, start, child_cost] where
+    entry_sp is the stack pointer holding the return address, start is the
+    instruction count on entry and child_cost the inclusive cost of all
+    calls made by the frame.
+    """
+
+    def __init__(self, root_id):
+        self.frames = [[root_id, root_sp, 0, 0]]
+        self.instr = 0
+        # sp before a jsr/bsr whose target is the next instruction
+        self.call_sp = None
+
+
+class CallTracer(object):
+    """trace calls of the guest code and build a call graph.
+
+    The tracer is an instruction hook: on each JSR/BSR it pushes a frame for
+    the called function on a shadow stack, on each RTS it pops all frames
+    whose return address is at or below the current stack pointer. Calls
+    into library jump tables are resolved to the library functions. Each
+    task gets its own shadow stack.
+
+    The cost of a call is the number of executed instructions. The cost of
+    each finished call is added to its edge in the call graph.
+    """
+
+    def __init__(self, machine, get_task=None):
+        self.cpu = machine.get_cpu()
+        self.mem = machine.get_mem()
+        self.resolver = LabelCodeResolver(machine.get_label_mgr())
+        self.get_task = get_task
+        self.graph = CallGraph()
+        # task -> call stack
+        self.stacks = {}
+
+    def set_task_func(self, get_task):
+        """set function that returns the current task (if any)"""
+        self.get_task = get_task
+
+    def get_graph(self):
+        return self.graph
+
+    def instr_hook(self, pc):
+        get_task = self.get_task
+        if get_task:
+            task = get_task()
+        else:
+            task = None
+        stack = self.stacks.get(task)
+        if stack is None:
+            stack = self._new_stack(task, pc)
+        stack.instr += 1
+        sp = self.cpu.r_reg(REG_A7)
+        # the instruction after a call is the callee
+        call_sp = stack.call_sp
+        if call_sp is not None:
+            stack.call_sp = None
+            if sp == call_sp - 4:
+                func_id = self.graph.get_func_id(self.resolver.resolve(pc, True))
+                stack.frames.append([func_id, sp, stack.instr - 1, 0])
+        op = self.mem.r16(pc)
+        # jsr or bsr
+        if op & 0xFFC0 == 0x4E80 or op & 0xFF00 == 0x6100:
+            stack.call_sp = sp
+        else:
+            ret_off = ret_ops.get(op)
+            if ret_off is not None:
+                self._leave(stack, sp + ret_off)
+
+    def flush(self):
+        """finish all open calls and add their costs to the graph"""
+        for stack in self.stacks.values():
+            self._leave(stack, root_sp - 1)
+            root_id, _, start, child_cost = stack.frames[0]
+            self.graph.add_self(root_id, stack.instr - start - child_cost)
+        self.stacks = {}
+
+    def save(self, file_name):
+        self.flush()
+        log_instr.info("saving call graph to '%s'", file_name)
+        self.graph.save(file_name)
+
+    def _new_stack(self, task, pc):
+        if task is not None:
+            name = task.name
+        else:
+            name = self.resolver.resolve(pc, True)
+        stack = CallStack(self.graph.get_func_id(name))
+        self.stacks[task] = stack
+        return stack
+
+    def _leave(self, stack, sp):
+        """pop all frames that return at or above sp"""
+        frames = stack.frames
+        graph = self.graph
+        while len(frames) > 1 and frames[-1][1] <= sp:
+            func_id, _, start, child_cost = frames.pop()
+            cost = stack.instr - start
+            parent = frames[-1]
+            parent[3] += cost
+            graph.add_call(parent[0], func_id, cost)
+            graph.add_self(func_id, cost - child_cost)
@@ -4,6 +4,7 @@ from amitools.vamos.label import LabelStruct, LabelLib, LabelSegment
 from amitools.vamos.machine import CPUState, DisAsm
 from amitools.vamos.machine.regs import *
 from .mem import TraceMemory
+from .calls import CallTracer
 
 
 class TraceManager(object):
@@ -16,6 +17,9 @@ class TraceManager(object):
         self.disasm = DisAsm(machine)
         # state
         self.mem_tracer = None
+        self.call_tracer = None
+        self.call_file = None
+        self.instr_hooks = []
 
     def parse_config(self, cfg):
         if not cfg:
@@ -27,8 +31,22 @@ class TraceManager(object):
         if cfg.instr:
             with_regs = cfg.reg_dump
             self.setup_cpu_instr_trace(with_regs)
+        call_file = cfg.get("calls")
+        if call_file:
+            self.setup_call_trace(call_file)
         return True
 
+    def shutdown(self):
+        """finish tracing and write results"""
+        if self.call_tracer and self.call_file:
+            self.call_tracer.save(self.call_file)
+            self.call_file = None
+
+    def set_task_func(self, get_task):
+        """set function that returns the current task for call tracing"""
+        if self.call_tracer:
+            self.call_tracer.set_task_func(get_task)
+
     def setup_vamos_ram_trace(self):
         mem = self.machine.get_mem()
         self.mem_tracer = TraceMemory(mem, self)
@@ -64,7 +82,27 @@ class TraceManager(object):
                 # disassemble line
                 self.trace_code_line(pc)
 
-        self.machine.set_instr_hook(instr_hook)
+        self._add_instr_hook(instr_hook)
+
+    def setup_call_trace(self, file_name=None):
+        """trace calls of the guest code and write call graph to file"""
+        self.call_tracer = CallTracer(self.machine)
+        self.call_file = file_name
+        self._add_instr_hook(self.call_tracer.instr_hook)
+        return self.call_tracer
+
+    def _add_instr_hook(self, func):
+        self.instr_hooks.append(func)
+        hooks = self.instr_hooks
+        if len(hooks) == 1:
+            self.machine.set_instr_hook(func)
+        else:
+
+            def instr_hook(pc):
+                for hook in hooks:
+                    hook(pc)
+
+            self.machine.set_instr_hook(instr_hook)
 
     # trace callback from CPU core
     def trace_cpu_mem(self, mode, width, addr, value=0):
@@ -0,0 +1,21 @@
+from amitools.vamos.lib.dos.PatternMatch import (
+    pattern_parse,
+    pattern_match,
+    pattern_interpret,
+)
+
+NAMES = ["file%04d.%s" % (i, "oc"[i % 2]) for i in range(1000)]
+
+
+def _match_all(match_func, pat):
+    return sum(1 for name in NAMES if match_func(pat, name))
+
+
+def dos_pattern_interpret_benchmark(benchmark):
+    pat = pattern_parse("#?.o")
+    assert benchmark(_match_all, pattern_interpret, pat) == 500
+
+
+def dos_pattern_compiled_benchmark(benchmark):
+    pat = pattern_parse("#?.o")
+    assert benchmark(_match_all, pattern_match, pat) == 500
@@ -0,0 +1,36 @@
+from amitools.vamos.machine.mock import MockMemory
+from amitools.vamos.lib.dos.Printf import (
+    printf_parse_string,
+    printf_read_data,
+    printf_generate_output,
+    printf_format,
+)
+
+FMT = "%s: value=%ld (%04lx) count=%d\n"
+
+
+def _setup():
+    mem = MockMemory()
+    mem.w32(0x100, 0x200)
+    mem.w32(0x104, 1234)
+    mem.w32(0x108, 0xBEEF)
+    mem.w16(0x10C, 7)
+    mem.w_cstr(0x200, "entry")
+    return mem
+
+
+def _parse_each(mem):
+    ps = printf_parse_string(FMT)
+    printf_read_data(ps, mem, 0x100)
+    return printf_generate_output(ps)
+
+
+def dos_printf_parse_each_benchmark(benchmark):
+    mem = _setup()
+    assert benchmark(_parse_each, mem) == "entry: value=1234 (BEEF) count=7\n"
+
+
+def dos_printf_cached_benchmark(benchmark):
+    mem = _setup()
+    res = benchmark(printf_format, FMT, mem, 0x100)
+    assert res[0] == "entry: value=1234 (BEEF) count=7\n"
@@ -0,0 +1,32 @@
+import pytest
+from amitools.fs.blkdev.HDFBlockDevice import HDFBlockDevice
+from amitools.fs.blkdev.DiskGeometry import DiskGeometry
+from amitools.fs.ADFSVolume import ADFSVolume
+from amitools.fs.FSString import FSString
+
+
+@pytest.fixture
+def big_volume(tmp_path):
+    # about 8M blocks: the bitmap covers 1 MiB
+    geo = DiskGeometry()
+    assert geo.setup({"size": "4G"})
+    blkdev = HDFBlockDevice(str(tmp_path / "big.hdf"))
+    blkdev.create(geo)
+    vol = ADFSVolume(blkdev)
+    vol.create(FSString("Big"), is_ffs=True)
+    yield vol
+    vol.close()
+    blkdev.close()
+
+
+def _alloc(bitmap, num, count=200):
+    for _ in range(count):
+        assert bitmap.alloc_n(num) is not None
+
+
+def fs_adfsbitmap_big_alloc_one_benchmark(benchmark, big_volume):
+    benchmark(_alloc, big_volume.bitmap, 1)
+
+
+def fs_adfsbitmap_big_alloc_run_benchmark(benchmark, big_volume):
+    benchmark(_alloc, big_volume.bitmap, 40)
@@ -17,7 +17,7 @@ def _create_ctx():
     return LibCtx(machine, runtime.run, alloc)
 
 
-def _create_stub(do_profile=False, do_log=False):
+def _create_stub(do_profile=False, do_log=False, compiled=True):
     name = "vamostest.library"
     impl = VamosTestLibrary()
     fd = read_lib_fd(name)
@@ -35,7 +35,7 @@ def _create_stub(do_profile=False, do_log=False):
         log_missing = None
         log_valid = None
     # create stub
-    gen = LibStubGen(log_missing=log_missing, log_valid=log_valid)
+    gen = LibStubGen(log_missing=log_missing, log_valid=log_valid, compiled=compiled)
     stub = gen.gen_stub(scan, ctx, profile)
     return stub
 
@@ -58,3 +58,33 @@ def libcore_stub_log_benchmark(benchmark):
 def libcore_stub_log_profile_benchmark(benchmark):
     stub = _create_stub(do_profile=True, do_log=True)
     benchmark(stub.PrintHello)
+
+
+def libcore_stub_closure_base_benchmark(benchmark):
+    stub = _create_stub(compiled=False)
+    benchmark(stub.PrintHello)
+
+
+def libcore_stub_closure_profile_benchmark(benchmark):
+    stub = _create_stub(do_profile=True, compiled=False)
+    benchmark(stub.PrintHello)
+
+
+def libcore_stub_args_benchmark(benchmark):
+    stub = _create_stub()
+    benchmark(stub.Add)
+
+
+def libcore_stub_closure_args_benchmark(benchmark):
+    stub = _create_stub(compiled=False)
+    benchmark(stub.Add)
+
+
+def libcore_stub_aptr_benchmark(benchmark):
+    stub = _create_stub()
+    benchmark(stub.MyFindTagData)
+
+
+def libcore_stub_closure_aptr_benchmark(benchmark):
+    stub = _create_stub(compiled=False)
+    benchmark(stub.MyFindTagData)
@@ -0,0 +1,35 @@
+import random
+import pytest
+
+from amitools.vamos.machine.mock import MockMemory
+from amitools.vamos.mem import MemoryAlloc
+
+
+def _fragment(mode, num=2000):
+    """create an allocator with many small allocs and holes in between"""
+    rnd = random.Random(23)
+    mem = MockMemory(size_kib=4096)
+    alloc = MemoryAlloc(mem, mode=mode)
+    addrs = []
+    for i in range(num):
+        size = rnd.choice((8, 16, 24, 100, 200))
+        addrs.append((alloc.alloc_mem(size), size))
+    # free every other alloc
+    for addr, size in addrs[::2]:
+        alloc.free_mem(addr, size)
+    return alloc
+
+
+def _alloc_free(alloc):
+    addr = alloc.alloc_mem(256)
+    alloc.free_mem(addr, 256)
+
+
+def mem_alloc_bins_benchmark(benchmark):
+    alloc = _fragment(MemoryAlloc.MODE_BINS)
+    benchmark(_alloc_free, alloc)
+
+
+def mem_alloc_first_fit_benchmark(benchmark):
+    alloc = _fragment(MemoryAlloc.MODE_FIRST_FIT)
+    benchmark(_alloc_free, alloc)
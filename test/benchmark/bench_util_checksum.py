@@ -0,0 +1,43 @@
+import random
+import struct
+from amitools.util.CheckSum import calc_neg_chksum, calc_carry_chksum
+
+rnd = random.Random(42)
+BLOCK = bytes(rnd.getrandbits(8) for _ in range(512))
+ROM = bytes(rnd.getrandbits(8) for _ in range(512 * 1024))
+
+
+def _loop_neg_chksum(data, skip_long):
+    chksum = 0
+    for i in range(len(data) // 4):
+        if i != skip_long:
+            chksum += struct.unpack_from(">I", data, i * 4)[0]
+    return (-chksum) & 0xFFFFFFFF
+
+
+def _loop_carry_chksum(data, skip_long):
+    chksum = 0
+    for i in range(len(data) // 4):
+        if i != skip_long:
+            chksum += struct.unpack_from(">I", data, i * 4)[0]
+            if chksum > 0xFFFFFFFF:
+                chksum = (chksum & 0xFFFFFFFF) + 1
+    return 0xFFFFFFFF - chksum
+
+
+def util_checksum_block_loop_benchmark(benchmark):
+    assert benchmark(_loop_neg_chksum, BLOCK, 5) == calc_neg_chksum(BLOCK, 5)
+
+
+def util_checksum_block_benchmark(benchmark):
+    assert benchmark(calc_neg_chksum, BLOCK, 5) == _loop_neg_chksum(BLOCK, 5)
+
+
+def util_checksum_rom_loop_benchmark(benchmark):
+    skip = len(ROM) // 4 - 6
+    assert benchmark(_loop_carry_chksum, ROM, skip) == calc_carry_chksum(ROM, skip)
+
+
+def util_checksum_rom_benchmark(benchmark):
+    skip = len(ROM) // 4 - 6
+    assert benchmark(calc_carry_chksum, ROM, skip) == _loop_carry_chksum(ROM, skip)
@@ -0,0 +1,52 @@
+import amitools.fd.FDDatabase as FDDatabase
+from amitools.vamos.cfg import VamosMainParser
+from amitools.vamos.session import VamosSession
+from amitools.fd import read_lib_fd
+from amitools.util.DataDir import get_data_sub_dir
+
+LIBS = ("exec.library", "dos.library", "vamostest.library")
+
+
+def _startup():
+    # a minimal vamos run: bootstrap exec and dos and shut down again
+    mp = VamosMainParser()
+    mp.parse(args=[])
+    session = VamosSession()
+    assert session.setup(mp)
+    session.shutdown()
+
+
+def _reset_fd_db(use_db):
+    # drop the tables cached by earlier rounds
+    FDDatabase._fd_db = None
+    FDDatabase.use_fd_db = use_db
+
+
+def _run_startup(benchmark, use_db):
+    try:
+        benchmark.pedantic(
+            _startup, setup=lambda: _reset_fd_db(use_db), rounds=20, warmup_rounds=1
+        )
+    finally:
+        _reset_fd_db(True)
+
+
+def vamos_startup_fd_text_benchmark(benchmark):
+    _run_startup(benchmark, False)
+
+
+def vamos_startup_fd_db_benchmark(benchmark):
+    _run_startup(benchmark, True)
+
+
+def fd_read_text_benchmark(benchmark):
+    fd_dir = get_data_sub_dir("fd")
+    benchmark(lambda: [read_lib_fd(name, fd_dir) for name in LIBS])
+
+
+def fd_read_db_benchmark(benchmark):
+    def read():
+        fd_db = FDDatabase.FDDatabase()
+        return [fd_db.get_fd(name) for name in LIBS]
+
+    benchmark(read)
@@ -1,3 +1,6 @@
+import os
+
+
 def test_execpy_exec_test(vamos):
     # execute command and set return value
     code = "rc = 42 ; print('hello, world!')"
@@ -60,7 +63,7 @@ def test_execpy_vamos_ctx_func_test(vamos):
     assert stdout == [
         "hello, world!",
         "<class 'amitools.vamos.libcore.ctx.LibCtx'>",
-        "['alloc', 'cpu', 'machine', 'mem', 'proxies', 'runner', 'vlib']",
+        "['alloc', 'clock', 'cpu', 'machine', 'mem', 'proxies', 'runner', 'scheduler', 'vlib']",
     ]
     assert stderr == []
 
@@ -70,11 +73,13 @@ def test_execpy_vamos_ctx_func_checked_test(vamos):
         """the nested test ctx_func without return"""
         assert sorted(ctx.__dict__) == [
             "alloc",
+            "clock",
             "cpu",
             "machine",
             "mem",
             "proxies",
             "runner",
+            "scheduler",
             "vlib",
         ]
 
@@ -127,3 +132,195 @@ def test_execpy_vamos_ctx_func_dos_test(vamos, tmpdir):
     with open(sys_file_name, "r") as fobj:
         data = fobj.read()
         assert data == ami_file_name
+
+
+def test_execpy_vamos_ctx_func_timer_test(vamos):
+    """send async timer requests via proxy in ctx func"""
+
+    def test(ctx):
+        import time
+
+        exec = ctx.proxies.get_exec_lib_proxy()
+        port = exec.CreateMsgPort()
+        assert port
+        io = exec.CreateIORequest(port, 40)
+        assert io
+        name_addr = exec.AllocMem(16, 0)
+        ctx.mem.w_cstr(name_addr, "timer.device")
+        assert exec.OpenDevice(name_addr, 0, io, 0) == 0
+        # TR_ADDREQUEST: 50ms
+        ctx.mem.w16(io + 28, 9)
+        ctx.mem.w32(io + 32, 0)
+        ctx.mem.w32(io + 36, 50_000)
+        start = time.monotonic()
+        exec.SendIO(io)
+        assert exec.CheckIO(io) == 0
+        assert exec.WaitIO(io) == 0
+        assert time.monotonic() - start >= 0.05
+        assert exec.CheckIO(io) == io
+        # abort a long request
+        ctx.mem.w32(io + 32, 100)
+        exec.SendIO(io)
+        assert exec.CheckIO(io) == 0
+        exec.AbortIO(io)
+        assert exec.WaitIO(io) & 0xFF == 0xFE
+        assert time.monotonic() - start < 10
+        # a long real delay is capped
+        if not ctx.clock.virtual:
+            start = time.monotonic()
+            ctx.mem.w32(io + 32, 60)
+            exec.SendIO(io)
+            assert exec.WaitIO(io) == 0
+            assert time.monotonic() - start < 10
+        # clean up
+        exec.CloseDevice(io)
+        exec.FreeMem(name_addr, 16)
+        exec.DeleteIORequest(io)
+        # port flags beyond the action bits still free the signal
+        sig_bit = ctx.mem.r8(port + 15)
+        ctx.mem.w8(port + 14, ctx.mem.r8(port + 14) | 0x80)
+        exec.DeleteMsgPort(port)
+        assert exec.AllocSignal(sig_bit) == sig_bit
+        exec.FreeSignal(sig_bit)
+
+    vamos.run_ctx_func_checked(test)
+
+
+def test_execpy_vamos_ctx_func_exall_test(vamos, tmpdir):
+    """scan a dir with ExNext and ExAll via proxy in ctx func"""
+    test_dir = tmpdir / "exall"
+    os.mkdir(str(test_dir))
+    names = set()
+    for i in range(20):
+        name = "file%02d.c" % i
+        (test_dir / name).write_text("x" * i, "utf-8")
+        names.add(name)
+    os.mkdir(str(test_dir / "sub"))
+    ami_dir_name = "root:" + str(test_dir)[1:]
+
+    def test(ctx):
+        exec = ctx.proxies.get_exec_lib_proxy()
+        dos = ctx.proxies.get_dos_lib_proxy()
+        name_addr = exec.AllocMem(256, 0)
+        ctx.mem.w_cstr(name_addr, ami_dir_name)
+        lock = dos.Lock(name_addr, -2)
+        assert lock
+        # Examine/ExNext
+        fib = dos.AllocDosObject(2, 0)
+        assert dos.Examine(lock, fib)
+        assert ctx.mem.r32(fib + 4) == 2
+        found = {}
+        while dos.ExNext(lock, fib):
+            name = ctx.mem.r_cstr(fib + 8)
+            found[name] = (ctx.mem.r32s(fib + 4), ctx.mem.r32(fib + 124))
+        assert dos.IoErr() == 232
+        assert found["sub"][0] == 2
+        assert found["file07.c"] == (-3, 7)
+        assert len(found) == 21
+        # ExAll with a small buffer
+        ctrl = dos.AllocDosObject(1, 0)
+        assert ctrl
+        buf_size = 200
+        buf = exec.AllocMem(buf_size, 0)
+        found = {}
+        calls = 0
+        while True:
+            more = dos.ExAll(lock, buf, buf_size, 3, ctrl)
+            calls += 1
+            num = ctx.mem.r32(ctrl)
+            ed = buf
+            for _ in range(num):
+                name = ctx.mem.r_cstr(ctx.mem.r32(ed + 4))
+                found[name] = (ctx.mem.r32s(ed + 8), ctx.mem.r32(ed + 12))
+                ed = ctx.mem.r32(ed)
+            assert ed == 0
+            if not more:
+                break
+        assert dos.IoErr() == 232
+        assert calls > 1
+        assert len(found) == 21
+        assert found["sub"][0] == 2
+        assert found["file11.c"] == (-3, 11)
+        # ExAll with pattern
+        pat_addr = name_addr + 128
+        ctx.mem.w_cstr(name_addr, "file1#?")
+        assert dos.ParsePatternNoCase(name_addr, pat_addr, 128) == 1
+        ctx.mem.w32(ctrl + 8, pat_addr)
+        assert not dos.ExAll(lock, buf, buf_size, 1, ctrl)
+        assert ctx.mem.r32(ctrl) == 10
+        # ExAllEnd after partial scan
+        ctx.mem.w32(ctrl + 8, 0)
+        assert dos.ExAll(lock, buf, 32, 1, ctrl)
+        assert ctx.mem.r32(ctrl + 4) != 0
+        dos.ExAllEnd(lock, buf, 32, 1, ctrl)
+        assert ctx.mem.r32(ctrl + 4) == 0
+        # clean up
+        exec.FreeMem(buf, buf_size)
+        dos.FreeDosObject(1, ctrl)
+        dos.FreeDosObject(2, fib)
+        dos.UnLock(lock)
+        exec.FreeMem(name_addr, 256)
+
+    vamos.run_ctx_func_checked(test)
+
+
+def test_execpy_vamos_ctx_func_fastio_test(vamos, tmpdir):
+    """buffered char I/O with native FGetC/FPutC calls in ctx func"""
+    sys_file_name = str(tmpdir / "fastio")
+    ami_file_name = "root:" + sys_file_name[1:]
+
+    def test(ctx):
+        from amitools.vamos.machine import Code, REG_D0, REG_D1, REG_D2
+
+        exec = ctx.proxies.get_exec_lib_proxy()
+        dos = ctx.proxies.get_dos_lib_proxy()
+
+        def native(bias, d1, d2=0):
+            # call through the jump table to use the fast paths
+            code = Code(dos.base_addr - bias, None, {REG_D1: d1, REG_D2: d2}, [REG_D0])
+            return ctx.runner(code, name="fastio").regs[REG_D0]
+
+        # FGetC/FPutC point to a fragment
+        for bias in (306, 312):
+            assert ctx.mem.r16(ctx.mem.r32(dos.base_addr - bias + 2)) == 0x4A81
+        name_addr = exec.AllocMem(256, 0)
+        ctx.mem.w_cstr(name_addr, ami_file_name)
+        # write chars: they stay in the buffer
+        fh = dos.Open(name_addr, 1006)
+        assert fh
+        for ch in b"hello\nworld\n":
+            assert native(312, fh, ch) == ch
+        assert os.path.getsize(sys_file_name) == 0
+        ctx.mem.w_cstr(name_addr + 128, "more\n")
+        assert dos.FPuts(fh, name_addr + 128) == 0
+        assert dos.Flush(fh)
+        assert os.path.getsize(sys_file_name) == 17
+        # unbuffered: each char is passed to the host file
+        assert dos.SetVBuf(fh, 0, 2, 0) == 0
+        assert native(312, fh, ord("!")) == ord("!")
+        assert dos.SetVBuf(fh, 0, 5, 0) == 0xFFFFFFFF
+        # a caller buffer needs a size
+        assert dos.SetVBuf(fh, name_addr + 128, 1, 0) == 0xFFFFFFFF
+        assert dos.SetVBuf(fh, name_addr + 128, 1, -4) == 0xFFFFFFFF
+        dos.Close(fh)
+        # read chars
+        fh = dos.Open(name_addr, 1005)
+        assert fh
+        assert native(306, fh) == ord("h")
+        assert native(306, fh) == ord("e")
+        assert dos.UnGetC(fh, -1) == ord("e")
+        assert native(306, fh) == ord("e")
+        buf = name_addr + 128
+        assert dos.FGets(fh, buf, 100) == buf
+        assert ctx.mem.r_cstr(buf) == "llo\n"
+        # buffer is consumed before the rest is read
+        assert dos.Read(fh, buf, 6) == 6
+        assert ctx.mem.r_block(buf, 6) == b"world\n"
+        assert dos.Seek(fh, -2, 1) == 12
+        assert native(306, fh) == ord("\n")
+        assert native(306, fh) == ord("!")
+        assert native(306, fh) == 0xFFFFFFFF
+        dos.Close(fh)
+        exec.FreeMem(name_addr, 256)
+
+    vamos.run_ctx_func_checked(test)
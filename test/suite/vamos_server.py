@@ -0,0 +1,114 @@
+import os
+import subprocess
+import time
+
+from amitools.vamos.server import run_job
+
+VAMOS_ARGS = ["-c", "test.vamosrc"]
+HELLO = "bin/test_hello_gcc"
+# print a text without newline via dos
+PUT_STR_CODE = "; ".join(
+    [
+        "e = ctx.proxies.get_exec_lib_proxy()",
+        "buf = e.AllocMem(32, 0)",
+        "ctx.mem.w_cstr(buf, 'NO-NEWLINE-OUTPUT')",
+        "ctx.proxies.get_dos_lib_proxy().PutStr(buf)",
+        "e.FreeMem(buf, 32)",
+    ]
+)
+PUT_STR = ["--", "bin/test_execpy_gcc", "-x", PUT_STR_CODE]
+
+
+def _start_server(sock_path, workers):
+    args = ["../bin/vamos"] + VAMOS_ARGS
+    args += ["--server", "--server-socket", sock_path]
+    args += ["--server-workers", str(workers)]
+    srv = subprocess.Popen(args, stderr=subprocess.PIPE)
+    for _ in range(100):
+        if os.path.exists(sock_path):
+            return srv
+        time.sleep(0.1)
+    srv.kill()
+    raise RuntimeError("server did not start")
+
+
+def _stop_server(srv, sock_path):
+    srv.terminate()
+    _, err = srv.communicate(timeout=10)
+    assert not os.path.exists(sock_path)
+    return err.decode("utf-8").splitlines()
+
+
+def _run_job(sock_path, tmp_path, args):
+    out_path = tmp_path / "out"
+    with open(os.devnull, "rb") as fin, open(out_path, "wb") as fout:
+        fds = (fin.fileno(), fout.fileno(), fout.fileno())
+        reply = run_job(sock_path, VAMOS_ARGS + args, fds=fds)
+    with open(out_path) as fh:
+        return reply, fh.read().splitlines()
+
+
+def vamos_server_job_test(tmp_path):
+    sock_path = str(tmp_path / "vamos.sock")
+    srv = _start_server(sock_path, 1)
+    try:
+        for _ in range(3):
+            reply, output = _run_job(sock_path, tmp_path, [HELLO])
+            assert reply["exit_code"] == 0
+            assert reply["warm"]
+            assert output == ["VamosTest: PrintHello()"]
+        # other config: new session is created
+        reply, output = _run_job(sock_path, tmp_path, ["-m", "4096", HELLO])
+        assert reply["exit_code"] == 0
+        assert not reply["warm"]
+        assert output == ["VamosTest: PrintHello()"]
+        # output without newline
+        reply, output = _run_job(sock_path, tmp_path, PUT_STR)
+        assert reply["exit_code"] == 0
+        assert output == ["NO-NEWLINE-OUTPUT"]
+        # failing job
+        reply, output = _run_job(sock_path, tmp_path, ["bin/not_there"])
+        assert reply["exit_code"] == 255
+    finally:
+        log = _stop_server(srv, sock_path)
+    assert any("stopped after 6 job(s)" in line for line in log)
+
+
+def vamos_server_client_test(tmp_path):
+    sock_path = str(tmp_path / "vamos.sock")
+    srv = _start_server(sock_path, 2)
+    try:
+        env = dict(os.environ, VAMOS_SERVER_SOCKET=sock_path)
+        for _ in range(4):
+            p = subprocess.run(
+                ["../bin/vamosclient"] + VAMOS_ARGS + [HELLO],
+                stdout=subprocess.PIPE,
+                env=env,
+            )
+            assert p.returncode == 0
+            assert p.stdout.decode("utf-8").splitlines() == ["VamosTest: PrintHello()"]
+    finally:
+        _stop_server(srv, sock_path)
+
+
+def vamos_server_snapshot_output_test():
+    # a snapshot run skips the shutdown: buffered output must be written
+    args = ["../bin/vamos"] + VAMOS_ARGS + ["--snapshot-load", "put_str"] + PUT_STR
+    p = subprocess.run(args, stdout=subprocess.PIPE)
+    assert p.returncode == 0
+    assert p.stdout == b"NO-NEWLINE-OUTPUT"
+
+
+def vamos_error_output_test():
+    # buffered output written before an error is not lost
+    code = "; ".join(
+        [
+            PUT_STR_CODE,
+            "from amitools.vamos.error import UnsupportedFeatureError",
+            "raise UnsupportedFeatureError('test')",
+        ]
+    )
+    args = ["../bin/vamos"] + VAMOS_ARGS + ["--", "bin/test_execpy_gcc", "-x", code]
+    p = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    assert p.returncode == 1
+    assert p.stdout == b"NO-NEWLINE-OUTPUT"
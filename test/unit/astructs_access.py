@@ -10,7 +10,15 @@ from amitools.vamos.astructs import (
     BYTE,
     CSTR,
     BPTR_VOID,
+    ULONG,
+    WORD,
+    UWORD,
+    Enum,
+    EnumType,
+    BitField,
+    BitFieldType,
 )
+from amitools.vamos.astructs.access import get_field_accessor
 from amitools.vamos.machine.mock import MockMemory
 
 
@@ -40,6 +48,32 @@ class MyBCPLStruct(AmigaStruct):
     ]
 
 
+@EnumType
+class MyEnum(Enum, UBYTE):
+    a = 3
+    b = 4
+
+
+@BitFieldType
+class MyBitField(BitField, UWORD):
+    foo = 1
+    bar = 2
+
+
+@AmigaStructDef
+class MyMixStruct(AmigaStruct):
+    _format = [
+        (ULONG, "ms_Long"),
+        (WORD, "ms_Word"),
+        (MyEnum, "ms_Enum"),
+        (BYTE, "ms_Byte"),
+        (MyBitField, "ms_Bits"),
+        (UWORD, "ms_Pad"),
+        (BPTR_VOID, "ms_Bptr"),
+        (MyNodeStruct, "ms_Node"),
+    ]
+
+
 def mem_access_rw_field_node_test():
     mem = MockMemory()
     a = AccessStruct(mem, MyNodeStruct, 0x42)
@@ -84,3 +118,82 @@ def mem_access_bptr_test():
     assert a.r_s("bs_TestBptr") == 44
     # check auto converted baddr
     assert mem.r32(0x42) == 11
+
+
+def mem_access_accessor_cache_test():
+    acc = get_field_accessor(MyTaskStruct, "tc_Node.ln_Pri")
+    assert acc is get_field_accessor(MyTaskStruct, "tc_Node.ln_Pri")
+    assert acc.offset == 9
+    assert acc.width == 0
+    assert acc.signed
+    assert get_field_accessor(MyTaskStruct, "tc_Node.bla") is None
+    # sub structs are not compiled
+    acc = get_field_accessor(MyTaskStruct, "tc_Node")
+    assert not acc.is_compiled()
+
+
+def mem_access_enum_bitfield_test():
+    mem = MockMemory()
+    a = AccessStruct(mem, MyMixStruct, 0x40)
+    a.w_s("ms_Enum", "b")
+    assert a.r_s("ms_Enum") == 4
+    a.w_s("ms_Enum", 3)
+    assert a.r_s("ms_Enum") == 3
+    with pytest.raises(ValueError):
+        a.w_s("ms_Enum", 7)
+    a.w_s("ms_Bits", "foo|bar")
+    assert a.r_s("ms_Bits") == 3
+
+
+def mem_access_sub_struct_test():
+    mem = MockMemory()
+    a = AccessStruct(mem, MyMixStruct, 0x40)
+    a.w_s("ms_Node.ln_Succ", 0x1234)
+    assert mem.r32(0x40 + 16) == 0x1234
+    assert a.s_get_addr("ms_Node.ln_Pred") == 0x40 + 16 + 4
+
+
+def mem_access_read_write_fields_test():
+    mem = MockMemory()
+    a = AccessStruct(mem, MyMixStruct, 0x40)
+    a.w_s("ms_Pad", 0xBEEF)
+    a.write_fields(
+        {
+            "ms_Bptr": 0x100,
+            "ms_Word": -2,
+            "ms_Long": 0xDEADBEEF,
+            "ms_Enum": "a",
+            "ms_Byte": -1,
+            "ms_Bits": "bar",
+        }
+    )
+    # gap was kept
+    assert a.r_s("ms_Pad") == 0xBEEF
+    assert mem.r32(0x40 + 12) == 0x40
+    assert a.r_s("ms_Word") == -2
+    assert a.r_s("ms_Byte") == -1
+    assert a.read_fields("ms_Enum", "ms_Long", "ms_Bptr", "ms_Bits", "ms_Word") == [
+        3,
+        0xDEADBEEF,
+        0x100,
+        2,
+        -2,
+    ]
+
+
+def mem_access_read_write_fields_sub_test():
+    mem = MockMemory()
+    a = AccessStruct(mem, MyTaskStruct, 0x42)
+    a.write_fields({"tc_Node.ln_Type": 7, "tc_Node.ln_Pri": -5})
+    assert a.read_fields("tc_Node.ln_Pri", "tc_Node.ln_Type") == [-5, 7]
+
+
+def mem_access_read_write_fields_invalid_test():
+    mem = MockMemory()
+    a = AccessStruct(mem, MyMixStruct, 0x40)
+    with pytest.raises(KeyError):
+        a.read_fields("ms_Long", "bla")
+    with pytest.raises(ValueError):
+        a.read_fields("ms_Long", "ms_Node")
+    with pytest.raises(ValueError):
+        a.read_fields("ms_Long", "ms_Long")
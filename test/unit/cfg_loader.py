@@ -0,0 +1,45 @@
+from amitools.vamos.cfg import LoaderParser
+import argparse
+
+
+def cfg_loader_dict_test():
+    lp = LoaderParser()
+    input_dict = {
+        "loader": {
+            "seg_cache": True,
+            "seg_cache_size": 10,
+            "seg_cache_dir": "/tmp/foo",
+        }
+    }
+    lp.parse_config(input_dict, "dict")
+    assert lp.get_cfg_dict() == input_dict
+
+
+def cfg_loader_ini_test():
+    lp = LoaderParser("vamos")
+    ini_dict = {"vamos": {"seg_cache": False, "seg_cache_dir": "/tmp/foo"}}
+    lp.parse_config(ini_dict, "ini")
+    assert lp.get_cfg_dict() == {
+        "loader": {
+            "seg_cache": False,
+            "seg_cache_size": 32,
+            "seg_cache_dir": "/tmp/foo",
+        }
+    }
+
+
+def cfg_loader_args_test():
+    lp = LoaderParser()
+    ap = argparse.ArgumentParser()
+    lp.setup_args(ap)
+    args = ap.parse_args(
+        ["--no-seg-cache", "--seg-cache-size", "4", "--seg-cache-dir", "/tmp/foo"]
+    )
+    lp.parse_args(args)
+    assert lp.get_cfg_dict() == {
+        "loader": {
+            "seg_cache": False,
+            "seg_cache_size": 4,
+            "seg_cache_dir": "/tmp/foo",
+        }
+    }
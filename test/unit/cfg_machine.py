@@ -11,7 +11,7 @@ def cfg_machine_dict_test():
             "ram_size": 512,
             "hw_exc": {},
         },
-        "memmap": {"hw_access": "abort", "old_dos_guard": True},
+        "memmap": {"hw_access": "abort", "old_dos_guard": True, "alloc": "first_fit"},
     }
     lp.parse_config(input_dict, "dict")
     assert lp.get_cfg_dict() == input_dict
@@ -26,6 +26,7 @@ def cfg_machine_ini_test():
             "ram_size": 512,
             "hw_access": "abort",
             "old_dos_guard": True,
+            "mem_alloc": "first_fit",
             "hw_exc": "zero_div:abort,bus:ignore",
         }
     }
@@ -41,7 +42,7 @@ def cfg_machine_ini_test():
             "ram_size": 512,
             "hw_exc": {"zero_div": "abort", "bus": "ignore"},
         },
-        "memmap": {"hw_access": "abort", "old_dos_guard": True},
+        "memmap": {"hw_access": "abort", "old_dos_guard": True, "alloc": "first_fit"},
     }
 
 
@@ -54,6 +55,8 @@ def cfg_machine_args_test():
             "-C",
             "68020",
             "--old-dos-guard",
+            "--mem-alloc",
+            "first_fit",
             "-m",
             "512",
             "-H",
@@ -76,5 +79,5 @@ def cfg_machine_args_test():
             "ram_size": 512,
             "hw_exc": {"bus": "ignore"},
         },
-        "memmap": {"hw_access": "abort", "old_dos_guard": True},
+        "memmap": {"hw_access": "abort", "old_dos_guard": True, "alloc": "first_fit"},
     }
@@ -8,6 +8,7 @@ def cfg_profile_dict_test():
         "profile": {
             "enabled": True,
             "libs": {"names": ["exec.library", "dos.library"], "calls": True},
+            "pc": {"enabled": True, "cycles": 5000, "folded": "pc.folded"},
             "output": {"file": "foo/bar", "append": True, "dump": True},
         }
     }
@@ -25,6 +26,11 @@ def cfg_profile_args_test():
             "--profile-libs",
             "exec.library,dos.library",
             "--profile-lib-calls",
+            "--profile-pc",
+            "--profile-pc-cycles",
+            "5000",
+            "--profile-pc-folded",
+            "pc.folded",
             "--profile-file",
             "foo/bar",
             "--profile-file-append",
@@ -36,6 +42,7 @@ def cfg_profile_args_test():
         "profile": {
             "enabled": True,
             "libs": {"names": ["exec.library", "dos.library"], "calls": True},
+            "pc": {"enabled": True, "cycles": 5000, "folded": "pc.folded"},
             "output": {"file": "foo/bar", "append": True, "dump": True},
         }
     }
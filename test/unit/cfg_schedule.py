@@ -7,6 +7,7 @@ def cfg_schedule_dict_test():
     input_dict = {
         "schedule": {
             "slice_cycles": 2000,
+            "clock": "real",
         }
     }
     lp.parse_config(input_dict, "dict")
@@ -15,11 +16,12 @@ def cfg_schedule_dict_test():
 
 def cfg_schedule_ini_test():
     lp = ScheduleParser("vamos")
-    ini_dict = {"vamos": {"slice_cycles": 2000}}
+    ini_dict = {"vamos": {"slice_cycles": 2000, "clock": "virtual"}}
     lp.parse_config(ini_dict, "ini")
     assert lp.get_cfg_dict() == {
         "schedule": {
             "slice_cycles": 2000,
+            "clock": "virtual",
         }
     }
 
@@ -32,11 +34,14 @@ def cfg_schedule_args_test():
         [
             "--slice-cycles",
             "2000",
+            "--clock",
+            "virtual",
         ]
     )
     lp.parse_args(args)
     assert lp.get_cfg_dict() == {
         "schedule": {
             "slice_cycles": 2000,
+            "clock": "virtual",
         }
     }
@@ -0,0 +1,45 @@
+from amitools.vamos.cfg import ServerParser
+import argparse
+
+
+def cfg_server_dict_test():
+    lp = ServerParser()
+    input_dict = {
+        "server": {
+            "enabled": True,
+            "socket": "/tmp/foo.sock",
+            "workers": 4,
+        }
+    }
+    lp.parse_config(input_dict, "dict")
+    assert lp.get_cfg_dict() == input_dict
+
+
+def cfg_server_ini_test():
+    lp = ServerParser("vamos")
+    ini_dict = {"vamos": {"server_socket": "/tmp/foo.sock", "server_workers": 4}}
+    lp.parse_config(ini_dict, "ini")
+    assert lp.get_cfg_dict() == {
+        "server": {
+            "enabled": False,
+            "socket": "/tmp/foo.sock",
+            "workers": 4,
+        }
+    }
+
+
+def cfg_server_args_test():
+    lp = ServerParser()
+    ap = argparse.ArgumentParser()
+    lp.setup_args(ap)
+    args = ap.parse_args(
+        ["--server", "--server-socket", "/tmp/foo.sock", "--server-workers", "4"]
+    )
+    lp.parse_args(args)
+    assert lp.get_cfg_dict() == {
+        "server": {
+            "enabled": True,
+            "socket": "/tmp/foo.sock",
+            "workers": 4,
+        }
+    }
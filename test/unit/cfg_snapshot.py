@@ -0,0 +1,40 @@
+from amitools.vamos.cfg import SnapshotParser
+import argparse
+
+
+def cfg_snapshot_dict_test():
+    lp = SnapshotParser()
+    input_dict = {
+        "snapshot": {
+            "save": "foo",
+            "load": None,
+        }
+    }
+    lp.parse_config(input_dict, "dict")
+    assert lp.get_cfg_dict() == input_dict
+
+
+def cfg_snapshot_ini_test():
+    lp = SnapshotParser("vamos")
+    ini_dict = {"vamos": {"snapshot_load": "foo"}}
+    lp.parse_config(ini_dict, "ini")
+    assert lp.get_cfg_dict() == {
+        "snapshot": {
+            "save": None,
+            "load": "foo",
+        }
+    }
+
+
+def cfg_snapshot_args_test():
+    lp = SnapshotParser()
+    ap = argparse.ArgumentParser()
+    lp.setup_args(ap)
+    args = ap.parse_args(["--snapshot-save", "foo", "--snapshot-load", "bar"])
+    lp.parse_args(args)
+    assert lp.get_cfg_dict() == {
+        "snapshot": {
+            "save": "foo",
+            "load": "bar",
+        }
+    }
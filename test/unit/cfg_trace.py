@@ -11,6 +11,7 @@ def cfg_trace_dict_test():
             "vamos_ram": True,
             "reg_dump": True,
             "labels": True,
+            "calls": "calls.vcg",
         }
     }
     lp.parse_config(input_dict, "dict")
@@ -26,6 +27,7 @@ def cfg_trace_ini_test():
             "internal_memory_trace": True,
             "reg_dump": True,
             "labels": True,
+            "call_trace": "calls.vcg",
         }
     }
     lp.parse_config(ini_dict, "ini")
@@ -36,6 +38,7 @@ def cfg_trace_ini_test():
             "vamos_ram": True,
             "reg_dump": True,
             "labels": True,
+            "calls": "calls.vcg",
         }
     }
 
@@ -44,7 +47,7 @@ def cfg_trace_args_test():
     lp = TraceParser()
     ap = argparse.ArgumentParser()
     lp.setup_args(ap)
-    args = ap.parse_args(["-I", "-t", "-T", "-r", "-B"])
+    args = ap.parse_args(["-I", "-t", "-T", "-r", "-B", "--call-trace", "calls.vcg"])
     lp.parse_args(args)
     assert lp.get_cfg_dict() == {
         "trace": {
@@ -53,5 +56,6 @@ def cfg_trace_args_test():
             "vamos_ram": True,
             "reg_dump": True,
             "labels": True,
+            "calls": "calls.vcg",
         }
     }
@@ -0,0 +1,29 @@
+import io
+
+from amitools.vamos.machine.mock import MockMemory
+from amitools.vamos.lib.dos.FileHandle import FileHandle
+
+
+def _fh(obj):
+    return FileHandle(obj, "ram:foo", "/tmp/foo", need_close=False)
+
+
+def dos_filehandle_read_mem_test():
+    mem = MockMemory()
+    fh = _fh(io.BytesIO(b"hello, world!"))
+    assert fh.read_mem(mem, 0x100, 5) == 5
+    assert mem.r_block(0x100, 5) == b"hello"
+    assert fh.read_mem(mem, 0x200, 100) == 8
+    assert mem.r_block(0x200, 8) == b", world!"
+    # EOF
+    assert fh.read_mem(mem, 0x200, 100) == 0
+
+
+def dos_filehandle_write_mem_test():
+    for base in (0, 0x1000):
+        mem = MockMemory(base_addr=base)
+        mem.w_block(base + 0x100, b"hello")
+        out = io.BytesIO()
+        fh = _fh(out)
+        assert fh.write_mem(mem, base + 0x100, 5) == 5
+        assert out.getvalue() == b"hello"
@@ -1,6 +1,9 @@
 from amitools.vamos.lib.dos.PatternMatch import (
     pattern_parse,
     pattern_match,
+    pattern_interpret,
+    pattern_compile,
+    pattern_to_regex,
     pattern_dump,
 )
 
@@ -38,3 +41,40 @@ def pattern_not_any_test():
     pat = pattern_parse("~(#?.o)")
     assert pattern_match(pat, "bla")
     assert not pattern_match(pat, "test.o", True)
+
+
+def _check_same(src, names, ignore_case=True):
+    pat = pattern_parse(src, ignore_case=ignore_case)
+    for name in names:
+        assert pattern_match(pat, name) == pattern_interpret(pat, name), name
+
+
+def pattern_compile_test():
+    pat = pattern_parse("#?.o")
+    assert pattern_to_regex(pat.pat_str) == ".*\\.o"
+    match = pattern_compile(pat)
+    assert match("bla.o")
+    assert match("BLA.O")
+    assert not match("bla.c")
+    # matchers are cached
+    assert pattern_compile(pattern_parse("#?.o")) is match
+    # NOT blocks are interpreted
+    pat = pattern_parse("~(#?.o)")
+    assert pattern_to_regex(pat.pat_str) is None
+    assert pattern_compile(pat)("bla")
+
+
+def pattern_compile_same_test():
+    names = ["", "a", "ab", "abc", "ABC", "a.o", "b.c", "aab", "a-b", "z"]
+    _check_same("#?.o", names)
+    _check_same("?", names)
+    _check_same("a#b", names)
+    _check_same("#(a|b)", names)
+    _check_same("(a|b|%)c", names)
+    _check_same("[a-b]#?", names)
+    _check_same("[~a-b]#?", names)
+    _check_same("[b-]", names)
+    _check_same("[A-C]#?", names)
+    _check_same("[A-C]#?", names, False)
+    _check_same("ABC", names, False)
+    _check_same("#?'?", names + ["a?"])
@@ -0,0 +1,26 @@
+from amitools.vamos.machine.mock import MockMemory
+from amitools.vamos.lib.dos.Printf import printf, printf_compile, printf_format
+
+
+def dos_printf_compile_test():
+    parts = printf_compile("a=%ld b=%s!")
+    assert len(parts) == 5
+    assert parts[0] == "a="
+    assert parts[1].etype == "d"
+    assert parts[2] == " b="
+    assert parts[3].etype == "s"
+    assert parts[4] == "!"
+    # parsed formats are cached
+    assert printf_compile("a=%ld b=%s!") is parts
+
+
+def dos_printf_format_test():
+    mem = MockMemory()
+    mem.w32(0x100, 0xFFFFFFFF)
+    mem.w16(0x104, 0x2A)
+    mem.w32(0x106, 0x200)
+    mem.w_cstr(0x200, "hello")
+    res, ptr = printf_format("%ld %04x %-6s|%%", mem, 0x100)
+    assert res == "-1 002A hello |%"
+    assert ptr == 0x10A
+    assert printf("%ld %04x %-6s|%%", mem, 0x100) == res
@@ -0,0 +1,93 @@
+import os
+import shutil
+from amitools.fd import read_lib_fd
+from amitools.fd.FDDatabase import (
+    FDDatabase,
+    build_fd_db,
+    save_fd_db,
+    load_fd_db,
+    get_default_db_file,
+)
+from amitools.util.DataDir import get_data_sub_dir
+
+
+def _func_list(fd):
+    return [
+        (f.get_name(), f.get_bias(), f.is_private(), f.get_args(), f.is_std())
+        for f in fd.get_funcs()
+    ]
+
+
+def _make_db(tmpdir, fd_dir=None):
+    db_file = str(tmpdir / "fd.db")
+    save_fd_db(build_fd_db(fd_dir), db_file)
+    return db_file
+
+
+def fd_database_get_fd_test(tmpdir):
+    fd_dir = get_data_sub_dir("fd")
+    db_file = _make_db(tmpdir)
+    fd_db = FDDatabase(db_file)
+    assert fd_db.is_precompiled()
+    for name in ("exec.library", "dos.library", "timer.device"):
+        for std in (True, False):
+            fd = fd_db.get_fd(name, std)
+            ref = read_lib_fd(name, fd_dir, std)
+            assert fd.get_base_name() == ref.get_base_name()
+            assert fd.is_device == ref.is_device
+            assert fd.get_neg_size() == ref.get_neg_size()
+            assert _func_list(fd) == _func_list(ref)
+    # tables are created only once
+    assert fd_db.get_fd("exec.library") is fd_db.get_fd("exec.library")
+    assert fd_db.get_fd("bla.library") is None
+
+
+def fd_database_outdated_test(tmpdir):
+    fd_dir = str(tmpdir / "fd")
+    shutil.copytree(get_data_sub_dir("fd"), fd_dir)
+    db_file = _make_db(tmpdir, fd_dir)
+    # change an fd file
+    fd_file = os.path.join(fd_dir, "vamostest_lib.fd")
+    with open(fd_file) as fobj:
+        text = fobj.read()
+    with open(fd_file, "w") as fobj:
+        fobj.write(text.replace("##end", "Foo()()\n##end"))
+    fd_db = FDDatabase(db_file, fd_dir)
+    assert not fd_db.is_precompiled()
+    fd = fd_db.get_fd("vamostest.library")
+    assert fd.has_func("Foo")
+    assert fd_db.get_fd("bla.library") is None
+
+
+def fd_database_outdated_same_size_test(tmpdir):
+    fd_dir = str(tmpdir / "fd")
+    shutil.copytree(get_data_sub_dir("fd"), fd_dir)
+    db_file = _make_db(tmpdir, fd_dir)
+    # change an fd file but keep its size
+    fd_file = os.path.join(fd_dir, "vamostest_lib.fd")
+    with open(fd_file) as fobj:
+        text = fobj.read()
+    new_text = text.replace("PrintHello", "PrintHallo")
+    assert new_text != text
+    with open(fd_file, "w") as fobj:
+        fobj.write(new_text)
+    fd_db = FDDatabase(db_file, fd_dir)
+    assert not fd_db.is_precompiled()
+    assert fd_db.get_fd("vamostest.library").has_func("PrintHallo")
+
+
+def fd_database_load_invalid_test(tmpdir):
+    db_file = str(tmpdir / "fd.db")
+    assert load_fd_db(db_file) is None
+    with open(db_file, "wb") as fobj:
+        fobj.write(b"junk")
+    assert load_fd_db(db_file) is None
+    fd_db = FDDatabase(db_file)
+    assert not fd_db.is_precompiled()
+    assert fd_db.get_fd("exec.library")
+
+
+def fd_database_bundled_test():
+    # the shipped database must match the fd files
+    assert FDDatabase().is_precompiled()
+    assert load_fd_db(get_default_db_file()) == build_fd_db()
@@ -0,0 +1,125 @@
+import os
+from amitools.fs.blkdev.HDFBlockDevice import HDFBlockDevice
+from amitools.fs.blkdev.DiskGeometry import DiskGeometry
+from amitools.fs.ADFSVolume import ADFSVolume
+from amitools.fs.FSString import FSString
+
+
+def create_volume(tmpdir, size="10M"):
+    geo = DiskGeometry()
+    assert geo.setup({"size": size})
+    blkdev = HDFBlockDevice(str(tmpdir.join("test.hdf")))
+    blkdev.create(geo)
+    vol = ADFSVolume(blkdev)
+    vol.create(FSString("Test"), is_ffs=True)
+    return vol
+
+
+def open_volume(tmpdir):
+    path = str(tmpdir.join("test.hdf"))
+    geo = DiskGeometry()
+    assert geo.detect(os.path.getsize(path))
+    blkdev = HDFBlockDevice(path)
+    blkdev.open(geo)
+    vol = ADFSVolume(blkdev)
+    vol.open()
+    return vol
+
+
+def count_free(bitmap):
+    num_blocks = bitmap.blkdev.num_blocks
+    res = bitmap.blkdev.reserved
+    return sum(1 for i in range(res, num_blocks) if bitmap.get_bit(i))
+
+
+def fs_adfsbitmap_count_test(tmpdir):
+    vol = create_volume(tmpdir)
+    bitmap = vol.bitmap
+    assert len(bitmap.bitmap_blks) > 1
+    num_free = bitmap.get_num_free()
+    assert num_free == count_free(bitmap)
+    assert bitmap.get_num_used() == bitmap.bitmap_bits - num_free
+    # last block of the bitmap
+    last = bitmap.blkdev.num_blocks - 1
+    bitmap.clr_bit(last)
+    assert bitmap.get_num_free() == num_free - 1
+    assert not bitmap.get_bit(last)
+    bitmap.set_bit(last)
+    assert bitmap.get_num_free() == num_free
+    assert bitmap.get_bit(bitmap.blkdev.num_blocks) is None
+
+
+def fs_adfsbitmap_alloc_run_test(tmpdir):
+    vol = create_volume(tmpdir)
+    bitmap = vol.bitmap
+    num_free = bitmap.get_num_free()
+    blks = bitmap.alloc_n(100)
+    assert blks == list(range(blks[0], blks[0] + 100))
+    assert bitmap.get_num_free() == num_free - 100
+    # free every other block: no run of 2 in this area
+    bitmap.dealloc_n(blks[::2])
+    blks2 = bitmap.alloc_n(2)
+    assert blks2[1] == blks2[0] + 1
+    assert blks2[0] not in blks
+    assert bitmap.get_num_free() == num_free - 52
+
+
+def fs_adfsbitmap_alloc_fragmented_test(tmpdir):
+    vol = create_volume(tmpdir, size="1M")
+    bitmap = vol.bitmap
+    num_free = bitmap.get_num_free()
+    blks = bitmap.alloc_n(num_free)
+    assert len(blks) == num_free
+    assert bitmap.get_num_free() == 0
+    assert bitmap.alloc_n(1) is None
+    # free blocks without a contiguous run
+    free = blks[10:20:2] + blks[-4::2]
+    bitmap.dealloc_n(free)
+    assert bitmap.get_num_free() == len(free)
+    assert bitmap.find_n_free(3) is not None
+    got = bitmap.alloc_n(len(free))
+    assert sorted(got) == sorted(free)
+    assert bitmap.alloc_n(1) is None
+
+
+def fs_adfsbitmap_alloc_window_test(tmpdir):
+    vol = create_volume(tmpdir)
+    bitmap = vol.bitmap
+    res = bitmap.blkdev.reserved
+    num_free = bitmap.get_num_free()
+    # use all blocks except a few short gaps and one long run near the end
+    blks = bitmap.alloc_n(num_free)
+    gaps = [blks[i : i + 3] for i in range(100, 5000, 700)]
+    run = blks[-500:-200]
+    for gap in gaps:
+        bitmap.dealloc_n(gap)
+    bitmap.dealloc_n(run)
+    # search starts behind the run and wraps around
+    bitmap.find_start_off = (blks[-1] - res) // 32
+    # the run is found in a later and larger search window
+    assert bitmap.alloc_n(len(run)) == run
+    assert bitmap.alloc_n(3) == gaps[0]
+    assert bitmap.alloc_n(3) == gaps[1]
+    assert bitmap.alloc_n(4) is not None
+    assert bitmap.get_num_free() == 3 * (len(gaps) - 2) - 4
+
+
+def fs_adfsbitmap_dirty_write_test(tmpdir):
+    vol = create_volume(tmpdir)
+    bitmap = vol.bitmap
+    assert not bitmap.dirty
+    assert bitmap.dirty_blks == set()
+    last = bitmap.blkdev.num_blocks - 1
+    bitmap.clr_bit(last)
+    assert bitmap.dirty
+    assert bitmap.dirty_blks == {len(bitmap.bitmap_blks) - 1}
+    num_free = bitmap.get_num_free()
+    vol.close()
+    vol.blkdev.close()
+    assert bitmap.dirty_blks == set()
+    # re-read bitmap
+    vol2 = open_volume(tmpdir)
+    assert vol2.bitmap.get_num_free() == num_free
+    assert not vol2.bitmap.get_bit(last)
+    vol2.close()
+    vol2.blkdev.close()
@@ -0,0 +1,85 @@
+import io
+import pytest
+from amitools.fs.blkdev.BlkDevFactory import BlkDevFactory
+from amitools.fs.ADFSVolume import ADFSVolume
+from amitools.fs.FSString import FSString
+from amitools.fs.FSError import FSError
+
+DATA = bytes(i * 7 & 0xFF for i in range(20000))
+
+
+def setup_file(tmpdir, is_ffs, data=DATA):
+    path = str(tmpdir.join("test.adf"))
+    blkdev = BlkDevFactory().create(path)
+    vol = ADFSVolume(blkdev)
+    vol.create(FSString("Test"), is_ffs=is_ffs)
+    name = FSString("file")
+    vol.write_file(data, name)
+    return vol, vol.get_path_name(name)
+
+
+@pytest.mark.parametrize("is_ffs", [False, True])
+def fs_adfsfile_iter_data_test(tmpdir, is_ffs):
+    vol, node = setup_file(tmpdir, is_ffs)
+    assert b"".join(node.iter_data()) == DATA
+    assert node.data is None
+    # ranges
+    assert b"".join(node.iter_data(1000, 3000)) == DATA[1000:4000]
+    assert b"".join(node.iter_data(19990)) == DATA[19990:]
+    assert b"".join(node.iter_data(19990, 100)) == DATA[19990:]
+    assert b"".join(node.iter_data(30000)) == b""
+    assert node.get_file_data() == DATA
+
+
+def fs_adfsfile_iter_data_runs_test(tmpdir):
+    vol, node = setup_file(tmpdir, True)
+    blkdev = vol.blkdev
+    reads = []
+    read_block = blkdev.read_block
+
+    def count_read(blk_num, num_blks=1):
+        reads.append(num_blks)
+        return read_block(blk_num, num_blks)
+
+    blkdev.read_block = count_read
+    node.max_read_blks = 16
+    assert b"".join(node.iter_data()) == DATA
+    # 40 adjacent data blocks
+    assert reads == [16, 16, 8]
+
+
+def fs_adfsfile_ofs_seq_num_test(tmpdir):
+    vol, node = setup_file(tmpdir, False)
+    # swap two data blocks
+    blks = node.data_blk_nums
+    blks[1], blks[2] = blks[2], blks[1]
+    # first block is fine
+    chunks = node.iter_data()
+    assert next(chunks) == DATA[:488]
+    with pytest.raises(FSError):
+        next(chunks)
+
+
+@pytest.mark.parametrize("is_ffs", [False, True])
+def fs_adfsfile_open_data_test(tmpdir, is_ffs):
+    vol, node = setup_file(tmpdir, is_ffs)
+    fobj = node.open_data()
+    assert fobj.readable()
+    assert fobj.seekable()
+    assert fobj.read(10) == DATA[:10]
+    assert fobj.tell() == 10
+    assert fobj.seek(5000) == 5000
+    buf = bytearray(600)
+    assert fobj.readinto(buf) == 600
+    assert buf == DATA[5000:5600]
+    assert fobj.seek(-100, io.SEEK_END) == 19900
+    assert fobj.read() == DATA[19900:]
+    assert fobj.read(10) == b""
+    fobj.seek(0)
+    assert fobj.read() == DATA
+    with pytest.raises(ValueError):
+        fobj.seek(-1)
+    fobj.close()
+    # buffered reader
+    fobj = io.BufferedReader(node.open_data())
+    assert fobj.read() == DATA
@@ -0,0 +1,151 @@
+import io
+import pytest
+from amitools.fs.blkdev.ImageFile import ImageFile
+from amitools.fs.blkdev.BlockCache import BlockCache
+from amitools.fs.blkdev.RawBlockDevice import RawBlockDevice
+from amitools.fs.blkdev.BlkDevFactory import BlkDevFactory
+
+
+class CountFile(io.BytesIO):
+    """a BytesIO that counts its reads and writes"""
+
+    def __init__(self, data):
+        io.BytesIO.__init__(self, data)
+        self.num_reads = 0
+        self.num_writes = 0
+
+    def read(self, *args):
+        self.num_reads += 1
+        return io.BytesIO.read(self, *args)
+
+    def write(self, data):
+        self.num_writes += 1
+        return io.BytesIO.write(self, data)
+
+
+def make_data(num_blocks, block_bytes=512):
+    return b"".join(bytes([i]) * block_bytes for i in range(num_blocks))
+
+
+def setup_cache(num_blocks=16, capacity=BlockCache.DEFAULT_CAPACITY):
+    fobj = CountFile(make_data(num_blocks))
+    img = ImageFile("bla", fobj=fobj)
+    img.open()
+    return fobj, BlockCache(img, capacity)
+
+
+def fs_blkdev_blockcache_read_test():
+    fobj, cache = setup_cache()
+    assert cache.read_blk(3) == b"\x03" * 512
+    assert cache.read_blk(3) == b"\x03" * 512
+    assert fobj.num_reads == 1
+    stats = cache.get_stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["blocks"] == 1
+
+
+def fs_blkdev_blockcache_read_multi_test():
+    fobj, cache = setup_cache()
+    cache.write_blk(5, b"\xff" * 512)
+    data = cache.read_blk(4, num_blks=3)
+    assert data == b"\x04" * 512 + b"\xff" * 512 + b"\x06" * 512
+    assert cache.get_stats()["misses"] == 2
+    # now all blocks are cached
+    assert cache.read_blk(4, num_blks=3) == data
+    assert fobj.num_reads == 1
+
+
+def fs_blkdev_blockcache_write_back_test():
+    fobj, cache = setup_cache()
+    cache.write_blk(2, b"\xaa" * 512)
+    cache.write_blk(1, b"\xbb" * 512)
+    cache.write_blk(3, b"\xcc" * 1024, num_blks=2)
+    cache.write_blk(8, b"\xdd" * 512)
+    # nothing written yet
+    assert fobj.num_writes == 0
+    assert cache.read_blk(2) == b"\xaa" * 512
+    assert cache.get_stats()["dirty"] == 5
+    cache.flush()
+    # adjacent blocks 1-4 are written at once
+    assert fobj.num_writes == 2
+    stats = cache.get_stats()
+    assert stats["writes"] == 5
+    assert stats["write_ios"] == 2
+    assert stats["dirty"] == 0
+    data = fobj.getvalue()
+    assert data[512:1024] == b"\xbb" * 512
+    assert data[1024:1536] == b"\xaa" * 512
+    assert data[1536:2560] == b"\xcc" * 1024
+    assert data[8 * 512 : 9 * 512] == b"\xdd" * 512
+    assert data[9 * 512 : 10 * 512] == b"\x09" * 512
+
+
+def fs_blkdev_blockcache_evict_test():
+    fobj, cache = setup_cache(capacity=4)
+    for i in range(4):
+        cache.read_blk(i)
+    cache.read_blk(0)
+    # evict LRU block 1
+    cache.read_blk(8)
+    assert cache.get_stats()["evictions"] == 1
+    assert set(cache.blocks) == {0, 2, 3, 8}
+    # evicting a dirty block writes all dirty blocks
+    cache.write_blk(9, b"\x99" * 512)
+    cache.write_blk(10, b"\xaa" * 512)
+    assert fobj.num_writes == 0
+    for i in range(4):
+        cache.read_blk(i)
+    assert fobj.num_writes == 1
+    assert fobj.getvalue()[9 * 512 : 11 * 512] == b"\x99" * 512 + b"\xaa" * 512
+    assert len(cache.blocks) == 4
+    assert cache.get_stats()["dirty"] == 0
+
+
+def fs_blkdev_blockcache_no_cache_test():
+    fobj, cache = setup_cache(capacity=0)
+    cache.read_blk(1)
+    cache.read_blk(1)
+    assert fobj.num_reads == 2
+    cache.write_blk(1, b"\x11" * 512)
+    assert fobj.num_writes == 1
+    assert cache.get_stats()["blocks"] == 0
+
+
+def fs_blkdev_blockcache_write_error_test():
+    fobj, cache = setup_cache()
+    with pytest.raises(IOError):
+        cache.write_blk(16, b"\x00" * 512)
+    with pytest.raises(IOError):
+        cache.write_blk(0, b"\x00" * 100)
+    cache.img_file.read_only = True
+    with pytest.raises(IOError):
+        cache.write_blk(0, b"\x00" * 512)
+
+
+def fs_blkdev_blockcache_raw_blkdev_test(tmpdir):
+    path = str(tmpdir.join("raw.img"))
+    blkdev = RawBlockDevice(path)
+    blkdev.create(16)
+    blkdev.write_block(3, b"\x33" * 512)
+    assert blkdev.get_cache().get_stats()["dirty"] == 1
+    blkdev.close()
+    with open(path, "rb") as fh:
+        data = fh.read()
+    assert data[3 * 512 : 4 * 512] == b"\x33" * 512
+
+
+def fs_blkdev_blockcache_factory_test(tmpdir):
+    path = str(tmpdir.join("test.hdf"))
+    f = BlkDevFactory()
+    blkdev = f.create(path, options={"size": "1M", "cache": "8"})
+    cache = blkdev.get_cache()
+    assert cache.capacity == 8
+    blkdev.write_block(1, b"\x01" * 512)
+    blkdev.close()
+    blkdev = f.open(path, options={"cache": "0"})
+    assert blkdev.get_cache().capacity == 0
+    assert blkdev.read_block(1) == b"\x01" * 512
+    blkdev.close()
+    with pytest.raises(ValueError):
+        f.open(path, options={"cache": "-1"})
@@ -0,0 +1,108 @@
+import io
+import pytest
+from amitools.fs.blkdev.ImageFile import ImageFile
+
+
+def make_image(tmpdir, num_blocks=8):
+    path = str(tmpdir.join("test.img"))
+    with open(path, "wb") as fh:
+        for i in range(num_blocks):
+            fh.write(bytes([i]) * 512)
+    return path
+
+
+def fs_blkdev_imagefile_mmap_read_test(tmpdir):
+    path = make_image(tmpdir)
+    img = ImageFile(path, read_only=True)
+    img.open()
+    assert img.is_mapped()
+    data = img.read_blk(2)
+    assert isinstance(data, memoryview)
+    assert data == b"\x02" * 512
+    assert img.read_blk(6, num_blks=2) == b"\x06" * 512 + b"\x07" * 512
+    with pytest.raises(IOError):
+        img.read_blk(8)
+    with pytest.raises(IOError):
+        img.write_blk(0, b"\x00" * 512)
+    # a view is still alive on close: keep the mapping
+    with pytest.raises(IOError):
+        img.close()
+    assert img.is_mapped()
+    assert data == b"\x02" * 512
+    data.release()
+    img.close()
+    assert not img.is_mapped()
+
+
+def fs_blkdev_imagefile_mmap_write_test(tmpdir):
+    path = make_image(tmpdir)
+    img = ImageFile(path)
+    img.open()
+    assert img.is_mapped()
+    img.write_blk(1, b"\xaa" * 512)
+    img.write_blk(3, bytearray(b"\xbb" * 1024), num_blks=2)
+    assert img.read_blk(1) == b"\xaa" * 512
+    img.flush()
+    img.close()
+    with open(path, "rb") as fh:
+        data = fh.read()
+    assert len(data) == 8 * 512
+    assert data[512:1024] == b"\xaa" * 512
+    assert data[1536:2560] == b"\xbb" * 1024
+    assert data[2560:3072] == b"\x05" * 512
+
+
+def fs_blkdev_imagefile_no_mmap_test(tmpdir):
+    path = make_image(tmpdir)
+    img = ImageFile(path, use_mmap=False)
+    img.open()
+    assert not img.is_mapped()
+    assert img.read_blk(2) == b"\x02" * 512
+    img.write_blk(2, b"\xcc" * 512)
+    img.close()
+    with open(path, "rb") as fh:
+        assert fh.read()[1024:1536] == b"\xcc" * 512
+
+
+def fs_blkdev_imagefile_fobj_test():
+    fobj = io.BytesIO(b"\x01" * 1024)
+    img = ImageFile("bla", fobj=fobj)
+    img.open()
+    assert not img.is_mapped()
+    assert img.read_blk(1) == b"\x01" * 512
+    img.write_blk(0, b"\x02" * 512)
+    assert fobj.getvalue()[:512] == b"\x02" * 512
+
+
+def fs_blkdev_imagefile_mmap_resize_in_use_test(tmpdir):
+    path = make_image(tmpdir)
+    img = ImageFile(path)
+    img.open()
+    data = img.read_blk(7)
+    # never truncate the file below a view
+    with pytest.raises(IOError):
+        img.resize(4)
+    with pytest.raises(IOError):
+        img.create(4)
+    assert img.is_mapped()
+    assert data == b"\x07" * 512
+    assert ImageFile.get_image_size(path) == 8 * 512
+    del data
+    img.resize(4)
+    assert not img.is_mapped()
+    assert ImageFile.get_image_size(path) == 4 * 512
+
+
+def fs_blkdev_imagefile_mmap_resize_test(tmpdir):
+    path = make_image(tmpdir)
+    img = ImageFile(path)
+    img.open()
+    assert img.is_mapped()
+    img.write_blk(0, b"\xdd" * 512)
+    img.resize(16)
+    assert not img.is_mapped()
+    img.open()
+    assert img.num_blocks == 16
+    assert img.read_blk(0) == b"\xdd" * 512
+    assert img.read_blk(15) == b"\x00" * 512
+    img.close()
@@ -0,0 +1,105 @@
+import random
+from amitools.vamos.label import LabelManager, LabelRange
+
+
+def _brute_get_label(labels, addr):
+    for r in labels:
+        if r.addr <= addr and addr < r.end:
+            return r
+    return None
+
+
+def _brute_intersecting(labels, addr, size):
+    return [r for r in labels if r.does_intersect(addr, size)]
+
+
+def label_mgr_empty_test():
+    lm = LabelManager()
+    assert lm.get_label(0) is None
+    assert lm.get_label_offset(0x100) == (None, 0)
+    assert lm.get_intersecting_labels(0, 0x1000) == []
+    assert lm.get_all_labels() == []
+
+
+def label_mgr_add_remove_test():
+    lm = LabelManager()
+    a = LabelRange("a", 0x100, 0x100)
+    b = LabelRange("b", 0x200, 0x80)
+    lm.add_label(a)
+    lm.add_label(b)
+    assert lm.get_all_labels() == [a, b]
+    assert lm.get_label(0xFF) is None
+    assert lm.get_label(0x100) is a
+    assert lm.get_label(0x1FF) is a
+    assert lm.get_label(0x200) is b
+    assert lm.get_label(0x27F) is b
+    assert lm.get_label(0x280) is None
+    assert lm.get_label_offset(0x210) == (b, 0x10)
+    # ends touch: both intersect
+    assert lm.get_intersecting_labels(0x1F0, 0x10) == [a, b]
+    assert lm.get_intersecting_labels(0x280, 0x10) == [b]
+    assert lm.get_intersecting_labels(0x300, 0x10) == []
+    lm.remove_label(a)
+    assert lm.get_all_labels() == [b]
+    assert lm.get_label(0x100) is None
+    # removing twice is harmless
+    lm.remove_label(a)
+    lm.remove_label(b)
+    assert lm.get_all_labels() == []
+    assert lm.bounds == []
+    assert lm.covers == []
+
+
+def label_mgr_nested_test():
+    lm = LabelManager()
+    puddle = LabelRange("puddle", 0x1000, 0x1000)
+    lm.add_label(puddle)
+    chunk1 = LabelRange("chunk1", 0x1000, 0x100)
+    chunk2 = LabelRange("chunk2", 0x1800, 0x100)
+    lm.add_label(chunk1)
+    lm.add_label(chunk2)
+    other = LabelRange("other", 0x2000, 0x100)
+    lm.add_label(other)
+    # first label added wins
+    assert lm.get_label(0x1000) is puddle
+    assert lm.get_label(0x1850) is puddle
+    assert lm.get_intersecting_labels(0x1800, 0x10) == [puddle, chunk2]
+    # release whole puddle
+    lm.delete_labels_within(0x1000, 0x1000)
+    assert lm.get_all_labels() == [other]
+    assert lm.get_label(0x1000) is None
+    assert lm.get_label(0x2000) is other
+
+
+def label_mgr_empty_label_test():
+    lm = LabelManager()
+    e = LabelRange("empty", 0x100, 0)
+    lm.add_label(e)
+    assert lm.get_label(0x100) is None
+    assert lm.get_intersecting_labels(0x100, 0) == [e]
+    lm.delete_labels_within(0x100, 0x10)
+    assert lm.get_all_labels() == []
+
+
+def label_mgr_random_test():
+    rnd = random.Random(1234)
+    lm = LabelManager()
+    labels = []
+    for i in range(2000):
+        op = rnd.randint(0, 2)
+        if op < 2 or not labels:
+            addr = rnd.randint(0, 0x1000)
+            size = rnd.randint(0, 0x100)
+            r = LabelRange("l%d" % i, addr, size)
+            lm.add_label(r)
+            labels.append(r)
+        else:
+            r = labels.pop(rnd.randint(0, len(labels) - 1))
+            lm.remove_label(r)
+        addr = rnd.randint(0, 0x1100)
+        size = rnd.randint(0, 0x80)
+        assert lm.get_label(addr) is _brute_get_label(labels, addr)
+        assert lm.get_intersecting_labels(addr, size) == _brute_intersecting(
+            labels, addr, size
+        )
+    assert lm.get_all_labels() == labels
@@ -0,0 +1,91 @@
+from amitools.vamos.libcore import LibCtx
+from amitools.vamos.machine.mock import MockMachine
+from amitools.vamos.mem import MemoryAlloc
+from amitools.vamos.lib.lexec.RawDoFmt import (
+    raw_do_fmt,
+    find_put_proc,
+    PutProcFragment,
+)
+
+
+def setup():
+    machine = MockMachine()
+    alloc = MemoryAlloc.for_machine(machine)
+    runs = []
+
+    def runner(code, name=None):
+        runs.append(code)
+
+    ctx = LibCtx(machine, runner, alloc)
+    mem = ctx.mem
+    fmt = 0x1000
+    data = 0x1100
+    proc = 0x1200
+    buf = 0x1300
+    mem.w_cstr(fmt, "a=%ld b=%s")
+    mem.w32(data, 42)
+    mem.w32(data + 4, fmt + 0x80)
+    mem.w_cstr(fmt + 0x80, "hello")
+    return ctx, alloc, runs, fmt, data, proc, buf
+
+
+def _w_code(mem, addr, words):
+    for w in words:
+        mem.w16(addr, w)
+        addr += 2
+
+
+def lexec_rawdofmt_stuff_test():
+    ctx, alloc, runs, fmt, data, proc, buf = setup()
+    _w_code(ctx.mem, proc, (0x16C0, 0x4E75))
+    ds, fmt_str, res, known = raw_do_fmt(ctx, fmt, data, proc, buf)
+    assert known
+    assert ds == data + 8
+    assert res == "a=42 b=hello"
+    assert ctx.mem.r_cstr(buf) == res
+    assert runs == []
+
+
+def lexec_rawdofmt_stuff_ptr_test():
+    ctx, alloc, runs, fmt, data, proc, buf = setup()
+    _w_code(ctx.mem, proc, (0x2053, 0x10C0, 0x2688, 0x4E75))
+    ctx.mem.w32(buf, buf + 16)
+    raw_do_fmt(ctx, fmt, data, proc, buf)
+    assert ctx.mem.r_cstr(buf + 16) == "a=42 b=hello"
+    assert ctx.mem.r32(buf) == buf + 16 + 13
+
+
+def lexec_rawdofmt_count_test():
+    ctx, alloc, runs, fmt, data, proc, buf = setup()
+    _w_code(ctx.mem, proc, (0x5293, 0x4E75))
+    ctx.mem.w32(buf, 2)
+    raw_do_fmt(ctx, fmt, data, proc, buf)
+    assert ctx.mem.r32(buf) == 2 + 13
+    _w_code(ctx.mem, proc, (0x5253, 0x4E75))
+    ctx.mem.w16(buf, 0)
+    raw_do_fmt(ctx, fmt, data, proc, buf)
+    assert ctx.mem.r16(buf) == 13
+
+
+def lexec_rawdofmt_unknown_test():
+    ctx, alloc, runs, fmt, data, proc, buf = setup()
+    _w_code(ctx.mem, proc, (0x4E71, 0x16C0, 0x4E75))
+    assert find_put_proc(ctx.mem, proc) is None
+    frag = PutProcFragment(alloc, ctx.mem)
+    free = alloc.get_free_bytes()
+    ds, fmt_str, res, known = raw_do_fmt(ctx, fmt, data, proc, buf, frag)
+    assert not known
+    assert len(runs) == 1
+    addr = runs[0].pc
+    # fragment is reused
+    raw_do_fmt(ctx, fmt, data, proc, buf, frag)
+    assert len(runs) == 2
+    assert runs[1].pc == addr
+    assert ctx.mem.r32(addr + 2) == 12
+    assert ctx.mem.r32(addr + 16) == proc
+    assert ctx.mem.r_cstr(ctx.mem.r32(addr + 8)) == "a=42 b=hello"
+    # without fragment a temporary one is used
+    raw_do_fmt(ctx, fmt, data, proc, buf)
+    assert len(runs) == 3
+    frag.free()
+    assert alloc.get_free_bytes() == free
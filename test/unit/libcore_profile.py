@@ -30,8 +30,12 @@ def libcore_profile_func_data_test():
     # str
     assert (
         func_data.dump("Foo")
-        == "Foo                        3 calls    6000.000 ms  avg    2000.000 ms  None"
+        == "Foo                        3 calls    6000.000 ms  excl    6000.000 ms  "
+        "avg    2000.000 ms  p50 2013.266  p90 3000.000  p99 3000.000  "
+        "max 3000.000 ms           0 cycles  None"
     )
+    assert func_data.get_max_delta() == 3.0
+    assert func_data.get_percentile_delta(100) == 3.0
 
 
 def libcore_profile_func_data_samples_test():
@@ -58,6 +62,42 @@ def libcore_profile_func_data_samples_test():
     assert func_data != func_data3
 
 
+def libcore_profile_func_data_nested_test():
+    func_data = LibFuncProfileData(42)
+    func_data.count(1.0, 0.25, 100)
+    func_data.count(2.0, 0.5, 200)
+    assert func_data.get_sum_delta() == 3.0
+    assert func_data.get_nested_delta() == 0.75
+    assert func_data.get_self_delta() == 2.25
+    assert func_data.get_cycles() == 300
+    # to/from dict
+    data_dict = func_data.get_data()
+    func_data2 = LibFuncProfileData.from_dict(data_dict)
+    assert func_data2 == func_data
+    func_data2.merge(func_data)
+    assert func_data2.get_self_delta() == 4.5
+    assert func_data2.get_cycles() == 600
+
+
+def libcore_profile_func_data_merge_test():
+    func_data = LibFuncProfileData(42)
+    func_data.count(1.0)
+    func_data.count(2.0)
+    func_data2 = LibFuncProfileData(42)
+    func_data2.count(3.0)
+    func_data.merge(func_data2)
+    assert func_data.get_num_calls() == 3
+    assert func_data.get_sum_delta() == 6.0
+    assert func_data.get_hist().get_total() == 3
+    assert func_data.get_max_delta() == 3.0
+    # samples are dropped if the other has none
+    func_data3 = LibFuncProfileData(42, True)
+    func_data3.count(1.0)
+    func_data3.merge(func_data)
+    assert func_data3.get_num_calls() == 4
+    assert func_data3.get_deltas() is None
+
+
 def libcore_profile_data_test():
     # from fd
     name = "dos.library"
@@ -151,6 +191,22 @@ def libcore_profiler_profiler_set_get_data_test():
     assert p == p2
 
 
+def libcore_profiler_profiler_merge_data_test():
+    name = "dos.library"
+    fd = read_lib_fd(name)
+    prof = LibProfiler(names=[name])
+    prof.setup()
+    p = prof.create_profile(name, fd)
+    p.get_func_by_name("Input").count(1.0)
+    data = prof.get_data()
+    prof2 = LibProfiler()
+    assert prof2.merge_data(data)
+    assert prof2.merge_data(data)
+    f2 = prof2.get_profile(name).get_func_by_name("Input")
+    assert f2.get_num_calls() == 2
+    assert f2.get_hist().get_total() == 2
+
+
 def libcore_profiler_profiler_config_test():
     name = "dos.library"
     fd = read_lib_fd(name)
@@ -1,4 +1,5 @@
 import logging
+import time
 import pytest
 
 from amitools.vamos.libcore import LibStubGen, LibCtx, LibImplScanner
@@ -7,6 +8,7 @@ from amitools.vamos.machine.mock import MockMachine
 from amitools.vamos.machine import Runtime
 from amitools.vamos.mem import MemoryAlloc
 from amitools.vamos.libcore import LibProfileData
+from amitools.vamos.libtypes import TagList, TagItem
 from amitools.fd import read_lib_fd
 from amitools.vamos.machine.regs import *
 
@@ -100,11 +102,12 @@ def _create_scan():
     return scanner.scan(name, impl, fd, True)
 
 
-def libcore_stub_gen_base_test(capsys):
+@pytest.mark.parametrize("compiled", [True, False])
+def libcore_stub_gen_base_test(capsys, compiled):
     scan = _create_scan()
     ctx = _create_ctx()
     # create stub
-    gen = LibStubGen()
+    gen = LibStubGen(compiled=compiled)
     stub = gen.gen_stub(scan, ctx)
     _check_stub(stub)
     # call func
@@ -126,12 +129,13 @@ def libcore_stub_gen_base_test(capsys):
     assert cap.out.strip() == "VamosTest: PrintString('hello, world!')"
 
 
-def libcore_stub_gen_profile_test():
+@pytest.mark.parametrize("compiled", [True, False])
+def libcore_stub_gen_profile_test(compiled):
     scan = _create_scan()
     ctx = _create_ctx()
     profile = LibProfileData(scan.get_fd())
     # create stub
-    gen = LibStubGen()
+    gen = LibStubGen(compiled=compiled)
     stub = gen.gen_stub(scan, ctx, profile)
     _check_stub(stub)
     # call func
@@ -142,14 +146,15 @@ def libcore_stub_gen_profile_test():
     _check_profile(scan.get_fd(), profile)
 
 
-def libcore_stub_gen_log_test(caplog):
+@pytest.mark.parametrize("compiled", [True, False])
+def libcore_stub_gen_log_test(caplog, compiled):
     caplog.set_level(logging.INFO)
     scan = _create_scan()
     ctx = _create_ctx()
     log_missing = logging.getLogger("missing")
     log_valid = logging.getLogger("valid")
     # create stub
-    gen = LibStubGen(log_missing=log_missing, log_valid=log_valid)
+    gen = LibStubGen(log_missing=log_missing, log_valid=log_valid, compiled=compiled)
     stub = gen.gen_stub(scan, ctx)
     _check_stub(stub)
     # call func
@@ -160,7 +165,8 @@ def libcore_stub_gen_log_test(caplog):
     _check_log(caplog)
 
 
-def libcore_stub_gen_log_profile_test(caplog):
+@pytest.mark.parametrize("compiled", [True, False])
+def libcore_stub_gen_log_profile_test(caplog, compiled):
     caplog.set_level(logging.INFO)
     scan = _create_scan()
     ctx = _create_ctx()
@@ -168,7 +174,7 @@ def libcore_stub_gen_log_profile_test(caplog):
     log_valid = logging.getLogger("valid")
     profile = LibProfileData(scan.get_fd())
     # create stub
-    gen = LibStubGen(log_missing=log_missing, log_valid=log_valid)
+    gen = LibStubGen(log_missing=log_missing, log_valid=log_valid, compiled=compiled)
     stub = gen.gen_stub(scan, ctx, profile)
     _check_stub(stub)
     # call func
@@ -180,11 +186,47 @@ def libcore_stub_gen_log_profile_test(caplog):
     _check_profile(scan.get_fd(), profile)
 
 
-def libcore_stub_gen_exc_default_test():
+class ClockLogHandler(logging.Handler):
+    """advance a fake clock on each log record"""
+
+    def __init__(self):
+        logging.Handler.__init__(self)
+        self.now = 0.0
+
+    def emit(self, record):
+        self.now += 1.0
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def libcore_stub_gen_log_profile_time_test(monkeypatch, compiled):
+    scan = _create_scan()
+    ctx = _create_ctx()
+    log_valid = logging.getLogger("valid_time")
+    log_valid.setLevel(logging.INFO)
+    log_valid.propagate = False
+    handler = ClockLogHandler()
+    log_valid.addHandler(handler)
+    monkeypatch.setattr(time, "perf_counter", lambda: handler.now)
+    profile = LibProfileData(scan.get_fd())
+    gen = LibStubGen(log_valid=log_valid, compiled=compiled)
+    stub = gen.gen_stub(scan, ctx, profile)
+    try:
+        stub.Swap()
+    finally:
+        log_valid.removeHandler(handler)
+    # both stub variants include the entry and exit log in the time
+    swap_func = scan.get_fd().get_func_by_name("Swap")
+    prof = profile.get_func_by_index(swap_func.get_index())
+    assert prof.get_num_calls() == 1
+    assert prof.get_sum_delta() == 2.0
+
+
+@pytest.mark.parametrize("compiled", [True, False])
+def libcore_stub_gen_exc_default_test(compiled):
     scan = _create_scan()
     ctx = _create_ctx()
     # create stub
-    gen = LibStubGen()
+    gen = LibStubGen(compiled=compiled)
     stub = gen.gen_stub(scan, ctx)
     _check_stub(stub)
     # call func
@@ -194,7 +236,8 @@ def libcore_stub_gen_exc_default_test():
         stub.RaiseError()
 
 
-def libcore_stub_gen_multi_arg_test(caplog):
+@pytest.mark.parametrize("compiled", [True, False])
+def libcore_stub_gen_multi_arg_test(caplog, compiled):
     caplog.set_level(logging.INFO)
     scan = _create_scan()
     ctx = _create_ctx()
@@ -202,7 +245,7 @@ def libcore_stub_gen_multi_arg_test(caplog):
     log_valid = logging.getLogger("valid")
     profile = LibProfileData(scan.get_fd())
     # create stub
-    gen = LibStubGen(log_missing=log_missing, log_valid=log_valid)
+    gen = LibStubGen(log_missing=log_missing, log_valid=log_valid, compiled=compiled)
     stub = gen.gen_stub(scan, ctx, profile)
     _check_stub(stub)
     # call func
@@ -214,6 +257,40 @@ def libcore_stub_gen_multi_arg_test(caplog):
     _check_profile(scan.get_fd(), profile)
 
 
+@pytest.mark.parametrize("compiled", [True, False])
+def libcore_stub_gen_typed_args_test(compiled):
+    scan = _create_scan()
+    ctx = _create_ctx()
+    # create stub
+    gen = LibStubGen(compiled=compiled)
+    stub = gen.gen_stub(scan, ctx)
+    _check_stub(stub)
+    # setup a tag list
+    tag_list = TagList.alloc(ctx.alloc, (0x80000001, 42), (0x80000002, 23))
+    tag_addr = tag_list.get_addr()
+    # APTR arg
+    ctx.cpu.w_reg(REG_D0, 0x80000002)
+    ctx.cpu.w_reg(REG_A0, tag_addr)
+    assert stub.MyFindTagData() == 23
+    assert ctx.cpu.r_reg(REG_D0) == 23
+    # NULL APTR arg is None
+    ctx.cpu.w_reg(REG_A0, 0)
+    assert stub.MyFindTagData() == 0
+    assert ctx.cpu.r_reg(REG_D0) == 0
+    # typed result returns address in d0
+    ctx.cpu.w_reg(REG_D0, 0x80000002)
+    ctx.cpu.w_reg(REG_A0, tag_addr)
+    tag = stub.MyFindTag()
+    assert isinstance(tag, TagItem)
+    assert ctx.cpu.r_reg(REG_D0) == tag.get_addr()
+    assert ctx.cpu.r_reg(REG_D0) == tag_addr + 8
+    # typed result None is d0=0
+    ctx.cpu.w_reg(REG_D0, 0x80000003)
+    assert stub.MyFindTag() is None
+    assert ctx.cpu.r_reg(REG_D0) == 0
+    tag_list.free()
+
+
 def libcore_stub_gen_fake_base_test():
     name = "vamostest.library"
     fd = read_lib_fd(name)
@@ -0,0 +1,70 @@
+import os
+from amitools.binfmt.Relocate import Relocate
+from amitools.vamos.loader import SegmentCache, SegImage
+
+
+def loader_segcache_relocate_test(buildlibnix):
+    lib_file = buildlibnix.make_lib("testnix")
+    seg_cache = SegmentCache()
+    seg_img = seg_cache.get_image(lib_file)
+    assert isinstance(seg_img, SegImage)
+    n = seg_img.get_num_segments()
+    addrs = [0x1000 + i * 0x10000 for i in range(n)]
+    relocator = Relocate(seg_img.bin_img)
+    assert seg_img.sizes == relocator.get_sizes()
+    assert seg_img.relocate(addrs) == relocator.relocate(addrs)
+
+
+def loader_segcache_mem_test(buildlibnix):
+    lib_file = buildlibnix.make_lib("testnix")
+    seg_cache = SegmentCache()
+    seg_img = seg_cache.get_image(lib_file)
+    assert seg_cache.get_image(lib_file) is seg_img
+    assert seg_cache.hits == 1
+    assert seg_cache.misses == 1
+    assert seg_cache.get_num_images() == 1
+    # a changed file is parsed again
+    st = os.stat(lib_file)
+    os.utime(lib_file, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    try:
+        assert seg_cache.get_image(lib_file) is not seg_img
+        assert seg_cache.misses == 2
+    finally:
+        os.utime(lib_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+    # no binary
+    assert seg_cache.get_image(lib_file + ".missing") is None
+    seg_cache.flush()
+    assert seg_cache.get_num_images() == 0
+
+
+def loader_segcache_max_images_test(buildlibnix):
+    lib_file = buildlibnix.make_lib("testnix")
+    seg_cache = SegmentCache(max_images=0)
+    assert seg_cache.get_image(lib_file)
+    assert seg_cache.get_image(lib_file)
+    assert seg_cache.misses == 2
+    assert seg_cache.get_num_images() == 0
+
+
+def loader_segcache_disk_test(buildlibnix, tmpdir):
+    lib_file = buildlibnix.make_lib("testnix")
+    cache_dir = str(tmpdir / "cache")
+    seg_cache = SegmentCache(cache_dir=cache_dir)
+    seg_img = seg_cache.get_image(lib_file)
+    assert seg_cache.misses == 1
+    assert len(os.listdir(cache_dir)) == 1
+    # a new cache reads the image from disk
+    seg_cache = SegmentCache(cache_dir=cache_dir)
+    disk_img = seg_cache.get_image(lib_file)
+    assert seg_cache.misses == 0
+    assert seg_cache.disk_hits == 1
+    addrs = [0x2000 + i * 0x10000 for i in range(seg_img.get_num_segments())]
+    assert disk_img.relocate(addrs) == seg_img.relocate(addrs)
+    assert disk_img.names == seg_img.names
+    # broken cache files are ignored
+    for name in os.listdir(cache_dir):
+        with open(os.path.join(cache_dir, name), "wb") as fobj:
+            fobj.write(b"junk")
+    seg_cache = SegmentCache(cache_dir=cache_dir)
+    assert seg_cache.get_image(lib_file)
+    assert seg_cache.misses == 1
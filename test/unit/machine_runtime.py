@@ -210,6 +210,46 @@ def machine_runtime_nested_run_trap_test(ctx):
     assert a == ["foo"]
 
 
+def machine_runtime_nested_run_cost_test(ctx):
+    cost = ctx.mach.run_cost
+    res = {}
+
+    def func2(op, pc):
+        cycles = cost.cycles
+        res["rs_b"] = ctx.rt.nested_run(Code(ctx.code + 20))
+        res["b"] = cost.cycles - cycles
+
+    def func(op, pc):
+        cycles = cost.cycles
+        time = cost.time
+        res["rs_a"] = ctx.rt.nested_run(Code(ctx.code + 10))
+        res["a"] = cost.cycles - cycles
+        res["time"] = cost.time - time
+
+    addr = ctx.mach.setup_quick_trap(func)
+    addr2 = ctx.mach.setup_quick_trap(func2)
+    ctx.mem.w16(ctx.code, op_jsr)
+    ctx.mem.w32(ctx.code + 2, addr)
+    ctx.mem.w16(ctx.code + 6, op_rts)
+    # run a: call func2
+    ctx.mem.w16(ctx.code + 10, op_jsr)
+    ctx.mem.w32(ctx.code + 12, addr2)
+    ctx.mem.w16(ctx.code + 16, op_rts)
+    # run b
+    ctx.mem.w16(ctx.code + 20, op_nop)
+    ctx.mem.w16(ctx.code + 22, op_nop)
+    ctx.mem.w16(ctx.code + 24, op_rts)
+    rs = ctx.rt.start(Code(ctx.code, ctx.stack))
+    assert rs.exit
+    ctx.cleanup()
+    # cost of a contains cost of b only once
+    assert res["b"] == res["rs_b"].cycles
+    assert res["a"] == res["rs_a"].cycles + res["rs_b"].cycles
+    assert cost.cycles == res["a"]
+    assert cost.time == res["time"]
+    assert res["time"] > 0
+
+
 def machine_runtime_nested_run_set_get_regs_test(ctx):
 
     def func2(op, pc):
@@ -331,3 +371,57 @@ def machine_runtime_slice_hook_test(slice_cycles, ctx):
     for run_state in slice_reports:
         if not run_state.exit:
             assert run_state.slice_cycles >= slice_cycles
+
+
+@pytest.mark.parametrize("sample_cycles", (4, 10, 40, 100))
+def machine_runtime_sample_hook_test(sample_cycles, ctx):
+
+    samples = []
+
+    def hook(run_states):
+        pcs = [rs.trap_pc for rs in run_states[1:]] + [run_states[-1].pc]
+        samples.append([(rs.name, pc) for rs, pc in zip(run_states, pcs)])
+
+    ctx.mach.set_sample_hook(sample_cycles, hook)
+
+    def func(op, pc):
+        ctx.rt.nested_run(Code(ctx.code + 110), name="foo")
+
+    addr = ctx.mach.setup_quick_trap(func)
+
+    # first code
+    for i in range(0, 100, 2):
+        ctx.mem.w16(ctx.code + i, op_nop)
+    ctx.mem.w16(ctx.code + 100, op_jsr)
+    ctx.mem.w32(ctx.code + 102, addr)
+    ctx.mem.w16(ctx.code + 106, op_rts)
+
+    # second code
+    for i in range(110, 300, 2):
+        ctx.mem.w16(ctx.code + i, op_nop)
+    ctx.mem.w16(ctx.code + 300, op_rts)
+
+    rs = ctx.rt.start(Code(ctx.code, ctx.stack), name="go")
+    assert rs.exit
+    ctx.mach.set_sample_hook(0, None)
+    assert ctx.mach.sample_hook is None
+    exit_addr = ctx.mach.get_run_exit_addr()
+    ctx.cleanup()
+
+    # at most one sample every sample_cycles (instructions may overshoot)
+    num = (260 + 400) // sample_cycles
+    assert num // 2 <= len(samples) <= num
+    nested = [s for s in samples if len(s) == 2]
+    assert len(nested) > 0
+    for s in nested:
+        # outer run is stopped at trap
+        assert s[0][0] == "go"
+        assert addr <= s[0][1] <= addr + 2
+        assert s[1][0] == "foo"
+        pc = s[1][1]
+        assert ctx.code + 110 <= pc <= ctx.code + 300 or pc == exit_addr
+    for s in samples:
+        if len(s) == 1:
+            pc = s[0][1]
+            in_code = ctx.code <= pc <= ctx.code + 106
+            assert in_code or addr <= pc <= addr + 2 or pc == exit_addr
@@ -1,20 +1,106 @@
+import random
+import pytest
 from amitools.vamos.machine.mock import MockMemory
 from amitools.vamos.mem import MemoryAlloc
 
+modes = (MemoryAlloc.MODE_BINS, MemoryAlloc.MODE_FIRST_FIT)
 
-def mem_alloc_base_test():
+
+@pytest.mark.parametrize("mode", modes)
+def mem_alloc_base_test(mode):
     mem = MockMemory()
-    alloc = MemoryAlloc(mem)
+    alloc = MemoryAlloc(mem, mode=mode)
     assert alloc.is_all_free()
     addr = alloc.alloc_mem(1024)
     alloc.free_mem(addr, 1024)
     assert alloc.is_all_free()
 
 
-def mem_alloc_nonbase4_test():
+@pytest.mark.parametrize("mode", modes)
+def mem_alloc_nonbase4_test(mode):
     mem = MockMemory()
-    alloc = MemoryAlloc(mem)
+    alloc = MemoryAlloc(mem, mode=mode)
     assert alloc.is_all_free()
     addr = alloc.alloc_mem(1021)
     alloc.free_mem(addr, 1021)
     assert alloc.is_all_free()
+
+
+def mem_alloc_invalid_mode_test():
+    mem = MockMemory()
+    with pytest.raises(ValueError):
+        MemoryAlloc(mem, mode="foo")
+
+
+@pytest.mark.parametrize("mode", modes)
+def mem_alloc_out_of_mem_test(mode):
+    mem = MockMemory()
+    alloc = MemoryAlloc(mem, addr=0x1000, size=0x1000, mode=mode)
+    addr = alloc.alloc_mem(0x800)
+    assert alloc.alloc_mem(0x1000, except_on_fail=False) == 0
+    assert alloc.largest_chunk() == 0x800
+    alloc.free_mem(addr, 0x800)
+    assert alloc.largest_chunk() == 0x1000
+    assert alloc.alloc_mem(0x1000) == 0x1000
+
+
+@pytest.mark.parametrize("mode", modes)
+def mem_alloc_random_test(mode):
+    rnd = random.Random(42)
+    mem = MockMemory(size_kib=1024)
+    alloc = MemoryAlloc(mem, mode=mode)
+    used = {}
+    for i in range(3000):
+        if rnd.randint(0, 2) < 2 or not used:
+            size = rnd.choice((4, 12, 40, 100, 256, 1000, 5000))
+            addr = alloc.alloc_mem(size)
+            assert addr % 4 == 0
+            size = (size + 3) & ~3
+            used[addr] = size
+        else:
+            addr = rnd.choice(list(used))
+            alloc.free_mem(addr, used.pop(addr))
+        assert alloc.available() == alloc.get_size() - sum(used.values())
+    # no allocations overlap
+    last_end = 0
+    for addr in sorted(used):
+        assert addr >= last_end
+        last_end = addr + used[addr]
+    # free all and check coalescing
+    for addr, size in used.items():
+        alloc.free_mem(addr, size)
+    assert alloc.is_all_free()
+    assert alloc.largest_chunk() == alloc.get_size()
+    assert alloc.get_stats().num_free_chunks == 1
+
+
+@pytest.mark.parametrize("mode", modes)
+def mem_alloc_stats_test(mode):
+    mem = MockMemory()
+    alloc = MemoryAlloc(mem, addr=0x1000, size=0x10000, mode=mode)
+    stats = alloc.get_stats()
+    assert stats.total_bytes == 0x10000
+    assert stats.free_bytes == 0x10000
+    assert stats.used_bytes == 0
+    assert stats.high_water_bytes == 0
+    assert stats.num_free_chunks == 1
+    assert stats.fragmentation == 0.0
+    assert stats.free_chunk_histogram == {0x10000: 1}
+    a = alloc.alloc_mem(0x100)
+    b = alloc.alloc_mem(0x100)
+    c = alloc.alloc_mem(0x100)
+    alloc.free_mem(b, 0x100)
+    stats = alloc.get_stats()
+    assert stats.used_bytes == 0x200
+    assert stats.high_water_bytes == 0x300
+    assert stats.num_allocs == 2
+    assert stats.num_free_chunks == 2
+    assert stats.largest_free_chunk == 0x10000 - 0x300
+    assert stats.fragmentation == pytest.approx(0x100 / (0x10000 - 0x200))
+    assert stats.free_chunk_histogram == {0x100: 1, 0x8000: 1}
+    alloc.free_mem(a, 0x100)
+    alloc.free_mem(c, 0x100)
+    stats = alloc.get_stats()
+    assert stats.high_water_bytes == 0x300
+    assert stats.num_free_chunks == 1
+    alloc.dump_stats()
@@ -0,0 +1,58 @@
+import os
+from amitools.vamos.path import DirCache
+
+
+def path_dircache_lookup_test(tmpdir):
+    dc = DirCache()
+    mp = tmpdir.mkdir("bla")
+    mp.mkdir("Foo")
+    mp.join("Hello.txt").write("hi")
+    my_path = str(mp)
+    assert dc.lookup(my_path, "foo") == "Foo"
+    assert dc.lookup(my_path, "HELLO.TXT") == "Hello.txt"
+    assert dc.lookup(my_path, "bar") is None
+    assert dc.misses == 1
+    assert dc.hits == 2
+    assert dc.get_num_dirs() == 1
+    # no dir
+    assert dc.get_names(os.path.join(my_path, "Hello.txt")) is None
+    assert dc.get_names(os.path.join(my_path, "missing")) is None
+    assert dc.get_num_dirs() == 1
+
+
+def path_dircache_mtime_test(tmpdir):
+    dc = DirCache()
+    mp = tmpdir.mkdir("bla")
+    my_path = str(mp)
+    assert dc.lookup(my_path, "foo") is None
+    mp.mkdir("Foo")
+    # make sure mtime differs even on coarse file systems
+    st = os.stat(my_path)
+    os.utime(my_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert dc.lookup(my_path, "foo") == "Foo"
+    assert dc.misses == 2
+
+
+def path_dircache_invalidate_test(tmpdir):
+    dc = DirCache()
+    mp = tmpdir.mkdir("bla")
+    sub = mp.mkdir("Foo")
+    my_path = str(mp)
+    assert dc.get_names(my_path) == {"foo": "Foo"}
+    assert dc.get_names(str(sub)) == {}
+    assert dc.get_num_dirs() == 2
+    # sub dir and parent are dropped
+    dc.invalidate(str(sub))
+    assert dc.get_num_dirs() == 0
+    dc.get_names(my_path)
+    dc.flush()
+    assert dc.get_num_dirs() == 0
+
+
+def path_dircache_max_dirs_test(tmpdir):
+    dc = DirCache(max_dirs=2)
+    paths = [str(tmpdir.mkdir("d%d" % i)) for i in range(3)]
+    for p in paths:
+        assert dc.get_names(p) == {}
+    assert dc.get_num_dirs() == 2
+    assert paths[0] not in dc.dirs
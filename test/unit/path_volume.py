@@ -167,3 +167,18 @@ def path_volume_temp_test(tmpdir):
     v.shutdown()
     # now temp is gone
     assert not tmpdir.join("bla").check()
+
+
+def path_volume_ami_to_sys_invalidate_test(tmpdir):
+    v = VolumeManager()
+    mp = tmpdir.mkdir("bla")
+    my_path = str(mp)
+    assert v.add_volume("My:" + my_path)
+    a2s = v.ami_to_sys_path
+    assert a2s("my:foo") == os.path.join(my_path, "foo")
+    # create entry with other case and report it
+    new_path = os.path.join(my_path, "FOO")
+    os.mkdir(new_path)
+    v.invalidate_sys_path(new_path)
+    assert a2s("my:foo") == new_path
+    assert v.get_dir_cache().get_num_dirs() == 1
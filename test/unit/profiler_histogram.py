@@ -0,0 +1,58 @@
+from amitools.vamos.profiler import LogHistogram
+from amitools.vamos.cfgcore import ConfigDict
+
+
+def profiler_histogram_empty_test():
+    h = LogHistogram()
+    assert h.get_total() == 0
+    assert h.get_max() == 0.0
+    assert h.get_percentile(50) == 0.0
+
+
+def profiler_histogram_exact_test():
+    # small values have their own bucket
+    h = LogHistogram(sub_bits=5)
+    for i in range(1, 11):
+        h.add(i / 1000000000)
+    assert h.get_total() == 10
+    assert h.get_percentile(50) == 5e-9
+    assert h.get_percentile(90) == 9e-9
+    assert h.get_percentile(100) == 10e-9
+    assert h.get_max() == 10e-9
+
+
+def profiler_histogram_precision_test():
+    h = LogHistogram()
+    vals = [i * 0.000137 for i in range(1, 1001)]
+    for v in vals:
+        h.add(v)
+    # memory is bounded by buckets
+    assert h.get_num_buckets() < 1000
+    for p in (50, 90, 99):
+        exact = vals[int(len(vals) * p / 100) - 1]
+        got = h.get_percentile(p)
+        assert exact <= got <= exact * 1.02
+    assert h.get_percentile(100) == h.get_max()
+
+
+def profiler_histogram_merge_test():
+    h = LogHistogram()
+    h2 = LogHistogram()
+    for i in range(100):
+        h.add(0.001)
+        h2.add(0.002)
+    h.merge(h2)
+    assert h.get_total() == 200
+    assert h.get_max() == 0.002
+    assert h.get_percentile(50) <= 0.00101
+    assert h.get_percentile(51) >= 0.002
+
+
+def profiler_histogram_data_test():
+    h = LogHistogram()
+    for v in (0.1, 0.2, 0.2, 0.5):
+        h.add(v)
+    data = ConfigDict(h.get_data())
+    h2 = LogHistogram.from_dict(data)
+    assert h == h2
+    assert h2.get_total() == 4
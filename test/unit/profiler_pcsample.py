@@ -0,0 +1,116 @@
+import io
+from amitools.vamos.profiler import PCSampleProfiler, MainProfiler
+from amitools.vamos.machine import RunState
+from amitools.vamos.machine.mock import MockMachine
+from amitools.vamos.label import LabelSegment, LabelTraps, LabelRange
+from amitools.vamos.cfgcore import ConfigDict
+from amitools.binfmt.BinImage import (
+    Segment,
+    SymbolTable,
+    Symbol,
+    SEGMENT_TYPE_CODE,
+)
+from amitools.fd import read_lib_fd
+
+
+def setup_labels(machine):
+    label_mgr = machine.get_label_mgr()
+    # a code segment with symbols
+    seg = Segment(SEGMENT_TYPE_CODE, 0x100)
+    symtab = SymbolTable()
+    symtab.add_symbol(Symbol(0x40, b"_main"))
+    symtab.add_symbol(Symbol(0x0, b"_start"))
+    seg.set_symtab(symtab)
+    label_mgr.add_label(LabelSegment("prog_0:code", 0x1000, 0x108, seg))
+    # trap block of dos
+    fd = read_lib_fd("dos.library")
+    size = fd.get_num_indices() * 4
+    label_mgr.add_label(LabelTraps("dos.library(Traps)", 0x2000, size, fd))
+    # some other label
+    label_mgr.add_label(LabelRange("stack", 0x3000, 0x100))
+
+
+def profiler_pcsample_resolve_test():
+    machine = MockMachine()
+    setup_labels(machine)
+    prof = PCSampleProfiler(machine, True)
+    prof.setup()
+    assert machine.sample_hook == prof.sample
+    assert prof.resolve(0x1008) == "prog_0:code:_start"
+    assert prof.resolve(0x1047) == "prog_0:code:_start"
+    assert prof.resolve(0x1048) == "prog_0:code:_main"
+    assert prof.resolve(0x1100) == "prog_0:code:_main"
+    # Output() has bias 60 -> slot 9
+    assert prof.resolve(0x2000 + 9 * 4 + 2) == "dos.library(Traps):Output"
+    assert prof.resolve(0x3010) == "stack"
+    assert prof.resolve(0x4000) == "??"
+    prof.shutdown()
+    assert machine.sample_hook is None
+
+
+def profiler_pcsample_sample_test():
+    machine = MockMachine()
+    setup_labels(machine)
+    prof = PCSampleProfiler(machine, True, 100)
+    prof.setup()
+    main = RunState(0x1050, 0x3100, 0, "task")
+    prof.sample([main])
+    prof.sample([main])
+    nested = RunState(0x3010, 0x3100, 1, "hook", trap_pc=0x2000 + 9 * 4 + 2)
+    prof.sample([main, nested])
+    assert prof.get_num_samples() == 3
+    assert prof.get_stacks() == {
+        "task;prog_0:code:_main": 2,
+        "task;dos.library(Traps):Output;hook;stack": 1,
+    }
+    assert prof.get_self_counts() == [("prog_0:code:_main", 2), ("stack", 1)]
+    # folded
+    fobj = io.StringIO()
+    prof.write_folded(fobj)
+    assert fobj.getvalue() == (
+        "task;dos.library(Traps):Output;hook;stack 1\n" "task;prog_0:code:_main 2\n"
+    )
+    # dump
+    lines = []
+    prof.dump(lines.append)
+    assert lines[0] == "3 samples every 100 cycles"
+    assert len(lines) == 3
+    prof.shutdown()
+
+
+def profiler_pcsample_data_test():
+    prof = PCSampleProfiler()
+    assert prof.get_data() is None
+    prof.stacks = {"a;b": 2, "a": 1}
+    prof.num_samples = 3
+    data = prof.get_data()
+    prof2 = PCSampleProfiler()
+    assert prof2.set_data(data)
+    assert prof2.get_stacks() == prof.get_stacks()
+    assert prof2.merge_data(data)
+    assert prof2.get_stacks() == {"a;b": 4, "a": 2}
+    assert prof2.get_num_samples() == 6
+
+
+def profiler_pcsample_main_profiler_test(tmpdir):
+    folded = str(tmpdir.join("pc.folded"))
+    cfg = ConfigDict(
+        {
+            "enabled": True,
+            "libs": {"names": None, "calls": False},
+            "pc": {"enabled": True, "cycles": 1000, "folded": folded},
+            "output": {"file": None, "append": False, "dump": False},
+        }
+    )
+    machine = MockMachine()
+    mp = MainProfiler()
+    prof = PCSampleProfiler(machine)
+    assert mp.parse_config(cfg)
+    assert mp.add_profiler(prof)
+    mp.setup()
+    assert machine.sample_cycles == 1000
+    prof.sample([RunState(0x4000, 0x3100, 0, "task")])
+    mp.shutdown()
+    assert machine.sample_hook is None
+    with open(folded) as fh:
+        assert fh.read() == "task;?? 1\n"
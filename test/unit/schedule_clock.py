@@ -0,0 +1,69 @@
+import time
+
+from amitools.vamos.machine import Machine
+from amitools.vamos.schedule import (
+    Scheduler,
+    SchedulerConfig,
+    RealClock,
+    VirtualClock,
+    create_clock,
+)
+from amitools.vamos.lib.TimerDevice import TimerDevice
+
+
+def schedule_clock_create_test():
+    assert type(create_clock("real")) is RealClock
+    assert type(create_clock("virtual")) is VirtualClock
+    assert create_clock("foo") is None
+
+
+def schedule_clock_real_test():
+    clk = RealClock()
+    assert not clk.virtual
+    t = time.time_ns()
+    assert abs(clk.get_time_ns() - t) < 1_000_000_000
+    start = time.monotonic()
+    clk.delay(0.01)
+    assert time.monotonic() - start >= 0.01
+    assert clk.get_skipped_ns() == 0
+
+
+def schedule_clock_virtual_test():
+    clk = VirtualClock()
+    assert clk.virtual
+    start = time.monotonic()
+    t0 = clk.get_time_ns()
+    m0 = clk.get_monotonic_ns()
+    # an hour passes in no time
+    clk.delay(3600)
+    assert time.monotonic() - start < 1
+    assert clk.get_skipped_ns() == 3600 * 1_000_000_000
+    assert clk.get_time_ns() - t0 >= 3600 * 1_000_000_000
+    assert clk.get_monotonic_ns() - m0 >= 3600 * 1_000_000_000
+    assert clk.get_time() - t0 / 1_000_000_000 >= 3600
+    # negative delays are ignored
+    clk.delay(-1)
+    assert clk.get_skipped_ns() == 3600 * 1_000_000_000
+
+
+def schedule_clock_timer_test():
+    clk = VirtualClock()
+    secs, micros = TimerDevice.get_sys_time(clk)
+    lo, hi = TimerDevice.get_eclock_lo_hi(clk)
+    clk.delay(10)
+    secs2, micros2 = TimerDevice.get_sys_time(clk)
+    lo2, hi2 = TimerDevice.get_eclock_lo_hi(clk)
+    assert secs2 - secs >= 10
+    assert 0 <= micros2 < TimerDevice.MICRO_HZ
+    eclk = (hi << 32) | lo
+    eclk2 = (hi2 << 32) | lo2
+    assert eclk2 - eclk >= 10 * TimerDevice.ECLOCK_HZ
+
+
+def schedule_clock_scheduler_test():
+    machine = Machine()
+    sched = Scheduler(machine, SchedulerConfig())
+    assert type(sched.get_clock()) is RealClock
+    sched = Scheduler(machine, SchedulerConfig(clock="virtual"))
+    assert type(sched.get_clock()) is VirtualClock
+    machine.cleanup()
@@ -1,4 +1,5 @@
 import logging
+import time
 
 from amitools.vamos.machine import Machine, Code, CPUHWExceptionError
 from amitools.vamos.mem import MemoryAlloc
@@ -26,9 +27,9 @@ class Ctx:
         self.events = events
 
 
-def setup(slice_cycles=1000):
+def setup(slice_cycles=1000, clock="real"):
     machine = Machine()
-    cfg = SchedulerConfig(slice_cycles)
+    cfg = SchedulerConfig(slice_cycles, clock)
     sched = Scheduler(machine, cfg)
     alloc = MemoryAlloc.for_machine(machine)
 
@@ -693,3 +694,125 @@ def schedule_scheduler_python_task_multi_wait_test():
     task2_ctx.free()
     task1_ctx.free()
     cleanup(ctx)
+
+
+# ----- Timers -----
+
+
+def schedule_scheduler_python_task_delay_test():
+    ctx = setup(clock="virtual")
+    sched = ctx.sched
+    clock = sched.get_clock()
+    log = []
+
+    def task1_run(task):
+        log.append("task1 start")
+        sched.delay_task(task, 10_000_000_000)
+        log.append("task1 end")
+        return 42
+
+    def task2_run(task):
+        log.append("task2 start")
+        sched.delay_task(task, 5_000_000_000)
+        log.append("task2 end")
+        return 23
+
+    task1_ctx = MyPythonTask(ctx, task1_run, name="task1")
+    task1 = task1_ctx.task
+    task2_ctx = MyPythonTask(ctx, task2_run, name="task2")
+    task2 = task2_ctx.task
+
+    assert sched.add_task(task1)
+    assert sched.add_task(task2)
+    start = time.monotonic()
+    clock_start = clock.get_monotonic_ns()
+    sched.schedule()
+    # virtual clock: no real waiting
+    assert time.monotonic() - start < 5
+    assert clock.get_monotonic_ns() - clock_start >= 10_000_000_000
+    assert task1.get_exit_code() == 42
+    assert task2.get_exit_code() == 23
+    # both tasks wait in parallel and task2 expires first
+    assert log == ["task1 start", "task2 start", "task2 end", "task1 end"]
+    assert sched.get_num_timers() == 0
+
+    task2_ctx.free()
+    task1_ctx.free()
+    cleanup(ctx)
+
+
+def schedule_scheduler_python_task_delay_real_test():
+    ctx = setup()
+    sched = ctx.sched
+
+    def task1_run(task):
+        sched.delay_task(task, 20_000_000)
+        return 42
+
+    task1_ctx = MyPythonTask(ctx, task1_run, name="task1")
+    task1 = task1_ctx.task
+
+    assert sched.add_task(task1)
+    start = time.monotonic()
+    sched.schedule()
+    assert time.monotonic() - start >= 0.02
+    assert task1.get_exit_code() == 42
+
+    task1_ctx.free()
+    cleanup(ctx)
+
+
+def schedule_scheduler_python_task_timer_signal_test():
+    ctx = setup(clock="virtual")
+    sched = ctx.sched
+    clock = sched.get_clock()
+
+    def task1_run(task):
+        deadline = clock.get_monotonic_ns() + 1_000_000
+        # a cancelled timer never fires
+        handle = sched.add_timer(deadline, lambda: task.set_signal(2, 2))
+        assert sched.cancel_timer(handle)
+        assert not sched.cancel_timer(handle)
+        sched.add_timer(deadline, lambda: task.set_signal(1, 1))
+        got = task.wait(3)
+        assert got == 1
+        return 42
+
+    task1_ctx = MyPythonTask(ctx, task1_run, name="task1")
+    task1 = task1_ctx.task
+
+    assert sched.add_task(task1)
+    sched.schedule()
+    assert task1.get_exit_code() == 42
+    assert ctx.events == [
+        SchedulerEvent(SchedulerEvent.Type.ADD_TASK, task1),
+        SchedulerEvent(SchedulerEvent.Type.ACTIVE_TASK, task1),
+        SchedulerEvent(SchedulerEvent.Type.WAITING_TASK, task1),
+        SchedulerEvent(SchedulerEvent.Type.WAKE_UP_TASK, task1),
+        SchedulerEvent(SchedulerEvent.Type.ACTIVE_TASK, task1),
+        SchedulerEvent(SchedulerEvent.Type.REMOVE_TASK, task1),
+        SchedulerEvent(SchedulerEvent.Type.ACTIVE_TASK, None),
+    ]
+
+    task1_ctx.free()
+    cleanup(ctx)
+
+
+def schedule_scheduler_python_task_timer_drop_test():
+    ctx = setup(clock="virtual")
+    sched = ctx.sched
+
+    def task1_run(task):
+        sched.add_timer(sched.get_clock().get_monotonic_ns() + 1000, lambda: None)
+        return 42
+
+    task1_ctx = MyPythonTask(ctx, task1_run, name="task1")
+    task1 = task1_ctx.task
+
+    assert sched.add_task(task1)
+    sched.schedule()
+    # pending timers of finished tasks are dropped
+    assert sched.get_num_timers() == 0
+
+    task1_ctx.free()
+    cleanup(ctx)
@@ -0,0 +1,103 @@
+import os
+import socket
+import struct
+import threading
+import pytest
+
+from amitools.vamos.server import (
+    send_msg,
+    recv_msg,
+    run_job,
+    ProtocolError,
+    ConnectError,
+)
+from amitools.tools import vamosclient
+
+
+def server_protocol_msg_test():
+    a, b = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    with a, b:
+        msg = {"args": ["foo", "bar"], "env": {"a": "b" * 100000}}
+        send_msg(a, msg)
+        obj, fds = recv_msg(b)
+        assert obj == msg
+        assert fds == []
+        # eof
+        a.close()
+        assert recv_msg(b) == (None, [])
+
+
+def server_protocol_fds_test():
+    a, b = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    r, w = os.pipe()
+    with a, b:
+        send_msg(a, {"hello": 1}, [w])
+        obj, fds = recv_msg(b, 3)
+        assert obj == {"hello": 1}
+        assert len(fds) == 1
+        os.write(fds[0], b"hi")
+        os.close(fds[0])
+    os.close(w)
+    assert os.read(r, 10) == b"hi"
+    os.close(r)
+
+
+def server_protocol_invalid_msg_test():
+    a, b = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+    with a, b:
+        data = b"\xff{bad"
+        a.sendall(struct.pack(">I", len(data)) + data)
+        with pytest.raises(ProtocolError):
+            recv_msg(b)
+
+
+def run_fake_server(path, reply):
+    srv = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    srv.bind(path)
+    srv.listen(1)
+
+    def serve():
+        conn, _ = srv.accept()
+        with conn:
+            _, fds = recv_msg(conn, 3)
+            for fd in fds:
+                os.close(fd)
+            if reply is not None:
+                send_msg(conn, reply)
+        srv.close()
+
+    t = threading.Thread(target=serve)
+    t.start()
+    return t
+
+
+def _patch_run_local(monkeypatch):
+    local_args = []
+    monkeypatch.setattr(
+        vamosclient, "run_local", lambda args: local_args.append(args) or 7
+    )
+    return local_args
+
+
+def server_protocol_client_no_server_test(tmpdir, monkeypatch):
+    path = str(tmpdir.join("server.sock"))
+    monkeypatch.setenv("VAMOS_SERVER_SOCKET", path)
+    local_args = _patch_run_local(monkeypatch)
+    with pytest.raises(ConnectError):
+        run_job(path, ["foo"])
+    # no server: run locally
+    assert vamosclient.main(["foo"]) == 7
+    assert local_args == [["foo"]]
+
+
+@pytest.mark.parametrize("reply", [None, {"time": 1.0}, ["bla"]])
+def server_protocol_client_invalid_reply_test(tmpdir, monkeypatch, capsys, reply):
+    path = str(tmpdir.join("server.sock"))
+    t = run_fake_server(path, reply)
+    monkeypatch.setenv("VAMOS_SERVER_SOCKET", path)
+    local_args = _patch_run_local(monkeypatch)
+    # the job was sent: never run it again locally
+    assert vamosclient.main(["foo"]) == 1
+    t.join()
+    assert local_args == []
+    assert "server job failed" in capsys.readouterr().err
@@ -0,0 +1,40 @@
+import pytest
+
+from amitools.vamos.machine import Machine
+from amitools.vamos.error import VamosInternalError
+from amitools.vamos.snapshot import MachineSnapshot
+
+
+def snapshot_machine_restore_test():
+    mach = Machine()
+    mem = mach.get_mem()
+    cpu = mach.get_cpu()
+    traps = mach.get_traps()
+    mem.w32(0x1000, 0xDEADBEEF)
+    cpu.w_reg(0, 0x1234)
+    func = lambda op, pc: None
+    tid = traps.alloc(func)
+    snap = MachineSnapshot(mach)
+    # modify machine
+    mem.w32(0x1000, 0)
+    mem.w32(0x2000, 0x42)
+    cpu.w_reg(0, 0)
+    tid2 = traps.alloc(lambda op, pc: None)
+    snap.restore()
+    assert mem.r32(0x1000) == 0xDEADBEEF
+    assert mem.r32(0x2000) == 0
+    assert cpu.r_reg(0) == 0x1234
+    assert traps.get_func(tid) is func
+    assert traps.get_func(tid2) is None
+    mach.cleanup()
+
+
+def snapshot_machine_trap_freed_test():
+    mach = Machine()
+    traps = mach.get_traps()
+    tid = traps.alloc(lambda op, pc: None)
+    snap = MachineSnapshot(mach)
+    traps.free(tid)
+    with pytest.raises(VamosInternalError):
+        snap.restore()
+    mach.cleanup()
@@ -0,0 +1,64 @@
+from amitools.vamos.snapshot import PyStateSnapshot
+
+
+class Node:
+    def __init__(self, name):
+        self.name = name
+        self.items = []
+        self.peer = None
+
+    def get_name(self):
+        return self.name
+
+
+class Root:
+    def __init__(self):
+        self.a = Node("a")
+        self.b = Node("b")
+        self.a.peer = self.b
+        self.b.peer = self.a
+        self.shared = [1, 2]
+        self.a.items = self.shared
+        self.table = {"x": (3, [4])}
+        self.func = self.b.get_name
+
+
+def snapshot_pystate_restore_test():
+    root = Root()
+    a = root.a
+    b = root.b
+    snap = PyStateSnapshot([root], module_prefix=__name__)
+    assert snap.get_num_objs() == 3
+    # modify state
+    root.a = Node("c")
+    a.name = "z"
+    a.items.append(3)
+    root.table["y"] = 1
+    root.table["x"][1].append(5)
+    root.new_attr = 42
+    b.peer = None
+    snap.restore()
+    # same instances with old state
+    assert root.a is a
+    assert root.b is b
+    assert a.name == "a"
+    assert a.peer is b
+    assert b.peer is a
+    assert not hasattr(root, "new_attr")
+    assert root.table == {"x": (3, [4])}
+    # shared containers stay shared
+    assert root.shared == [1, 2]
+    assert a.items is root.shared
+    # bound methods were followed
+    assert root.func() == "b"
+
+
+def snapshot_pystate_restore_twice_test():
+    root = Root()
+    snap = PyStateSnapshot([root], module_prefix=__name__)
+    for _ in range(2):
+        root.shared.append(3)
+        root.a.name = "foo"
+        snap.restore()
+        assert root.shared == [1, 2]
+        assert root.a.name == "a"
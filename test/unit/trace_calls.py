@@ -0,0 +1,143 @@
+import io
+from amitools.vamos.trace import CallTracer, CallGraph, CallGraphError
+from amitools.vamos.machine import Machine, Runtime, Code
+from amitools.vamos.machine.opcodes import op_rts, op_jsr, op_nop
+from amitools.vamos.label import LabelRange
+import pytest
+
+op_bsr_w = 0x6100
+
+
+def setup_code():
+    machine = Machine()
+    mem = machine.get_mem()
+    code = machine.get_ram_begin()
+    label_mgr = machine.get_label_mgr()
+    label_mgr.add_label(LabelRange("main", code, 0x40))
+    label_mgr.add_label(LabelRange("sub1", code + 0x40, 0x20))
+    label_mgr.add_label(LabelRange("sub2", code + 0x60, 0x20))
+    # main: call sub1 twice
+    mem.w16(code, op_jsr)
+    mem.w32(code + 2, code + 0x40)
+    mem.w16(code + 6, op_jsr)
+    mem.w32(code + 8, code + 0x40)
+    mem.w16(code + 12, op_rts)
+    # sub1: call sub2
+    mem.w16(code + 0x40, op_nop)
+    mem.w16(code + 0x42, op_bsr_w)
+    mem.w16(code + 0x44, 0x60 - 0x44)
+    mem.w16(code + 0x46, op_rts)
+    # sub2
+    mem.w16(code + 0x60, op_nop)
+    mem.w16(code + 0x62, op_nop)
+    mem.w16(code + 0x64, op_rts)
+    return machine, code
+
+
+def trace_calls_tracer_test():
+    machine, code = setup_code()
+    tracer = CallTracer(machine)
+    machine.set_instr_hook(tracer.instr_hook)
+    rt = Runtime(machine)
+    rs = rt.start(Code(code, machine.get_scratch_top()))
+    assert rs.exit
+    machine.set_instr_hook(None)
+    machine.cleanup()
+    tracer.flush()
+    graph = tracer.get_graph()
+    main = graph.get_func_id("main+0")
+    sub1 = graph.get_func_id("sub1+0")
+    sub2 = graph.get_func_id("sub2+0")
+    edges = graph.get_edges()
+    # sub2: 3 instr, sub1: 3 instr + sub2
+    assert (main, sub1, 2, 12) in edges
+    assert (sub1, sub2, 2, 6) in edges
+    assert graph.get_self_cost(sub1) == 6
+    assert graph.get_self_cost(sub2) == 6
+    assert graph.get_self_cost(main) >= 3
+    assert graph.get_funcs()[0] == ("sub1+0", 6)
+
+
+def trace_calls_tracer_tasks_test():
+    machine, code = setup_code()
+
+    class Task:
+        name = "task"
+
+    task = Task()
+    tracer = CallTracer(machine, lambda: task)
+    machine.set_instr_hook(tracer.instr_hook)
+    rt = Runtime(machine)
+    rt.start(Code(code, machine.get_scratch_top()))
+    machine.set_instr_hook(None)
+    machine.cleanup()
+    tracer.flush()
+    graph = tracer.get_graph()
+    assert graph.get_name(0) == "task"
+    assert (0, graph.get_func_id("sub1+0"), 2, 12) in graph.get_edges()
+
+
+def trace_calls_graph_test():
+    graph = CallGraph()
+    a = graph.get_func_id("a")
+    b = graph.get_func_id("b")
+    assert graph.get_func_id("a") == a
+    assert graph.get_name(b) == "b"
+    graph.add_self(a, 10)
+    graph.add_self(b, 5)
+    graph.add_call(a, b, 5)
+    assert graph.get_total_cost() == 15
+    assert graph.get_edges() == [(a, b, 1, 5)]
+    assert graph.get_funcs() == [("a", 10), ("b", 5)]
+    # binary file
+    fobj = io.BytesIO()
+    graph.write(fobj)
+    fobj.seek(0)
+    graph2 = CallGraph.read(fobj)
+    assert graph == graph2
+    # merge
+    graph3 = CallGraph()
+    graph3.get_func_id("c")
+    graph3.merge(graph)
+    graph3.merge(graph2)
+    assert graph3.get_self_cost(graph3.get_func_id("a")) == 20
+    assert graph3.get_edges() == [(1, 2, 2, 10)]
+
+
+def trace_calls_graph_error_test():
+    with pytest.raises(CallGraphError):
+        CallGraph.read(io.BytesIO(b"bla"))
+    graph = CallGraph()
+    graph.add_self(graph.get_func_id("a"), 1)
+    fobj = io.BytesIO()
+    graph.write(fobj)
+    with pytest.raises(CallGraphError):
+        CallGraph.read(io.BytesIO(fobj.getvalue()[:-2]))
+
+
+def trace_calls_graph_callgrind_test():
+    graph = CallGraph()
+    a = graph.get_func_id("a")
+    b = graph.get_func_id("b")
+    graph.add_self(a, 10)
+    graph.add_self(b, 5)
+    graph.add_call(a, b, 5)
+    fobj = io.StringIO()
+    graph.write_callgrind(fobj)
+    assert fobj.getvalue() == (
+        "# callgrind format\n"
+        "version: 1\n"
+        "creator: vamos\n"
+        "positions: line\n"
+        "events: Instr\n"
+        "summary: 15\n"
+        "\n"
+        "fn=(0) a\n"
+        "0 10\n"
+        "cfn=(1) b\n"
+        "calls=1 0\n"
+        "0 5\n"
+        "\n"
+        "fn=(1)\n"
+        "0 5\n"
+    )
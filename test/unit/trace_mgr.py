@@ -1,5 +1,5 @@
 import logging
-from amitools.vamos.trace import TraceManager
+from amitools.vamos.trace import TraceManager, CallGraph
 from amitools.vamos.label import *
 from amitools.vamos.machine import *
 from amitools.vamos.machine.mock import MockMachine
@@ -164,3 +164,19 @@ def trace_mgr_code_line_test(caplog):
             "@0003ac +000030 vamostest.library(-36)    0003dc    nop                   ; PrintString",
         ),
     ]
+
+
+def trace_mgr_call_trace_test(tmpdir):
+    file_name = str(tmpdir.join("calls.vcg"))
+    cfg = ConfigDict(
+        {"vamos_ram": False, "memory": False, "instr": False, "calls": file_name}
+    )
+    machine = Machine()
+    tm = TraceManager(machine)
+    assert tm.parse_config(cfg)
+    assert tm.call_tracer
+    tm.call_tracer.instr_hook(machine.get_ram_begin())
+    tm.shutdown()
+    machine.cleanup()
+    graph = CallGraph.load(file_name)
+    assert graph.get_total_cost() == 1
@@ -0,0 +1,61 @@
+import random
+import struct
+from amitools.util.CheckSum import (
+    unpack_longs,
+    sum_longs,
+    calc_neg_chksum,
+    calc_carry_chksum,
+)
+
+
+def make_data(num_longs, seed=42):
+    rnd = random.Random(seed)
+    return bytes(rnd.getrandbits(8) for _ in range(num_longs * 4))
+
+
+def ref_neg_chksum(data, skip_long):
+    chksum = 0
+    for i in range(len(data) // 4):
+        if i != skip_long:
+            chksum += struct.unpack_from(">I", data, i * 4)[0]
+    return (-chksum) & 0xFFFFFFFF
+
+
+def ref_carry_chksum(data, skip_long=None):
+    chksum = 0
+    for i in range(len(data) // 4):
+        if i != skip_long:
+            chksum += struct.unpack_from(">I", data, i * 4)[0]
+            if chksum > 0xFFFFFFFF:
+                chksum = (chksum & 0xFFFFFFFF) + 1
+    return (~chksum) & 0xFFFFFFFF
+
+
+def util_checksum_unpack_longs_test():
+    data = bytes(range(16))
+    assert unpack_longs(data) == (0x00010203, 0x04050607, 0x08090A0B, 0x0C0D0E0F)
+    assert unpack_longs(data, 2, 4) == (0x04050607, 0x08090A0B)
+    assert unpack_longs(memoryview(data), 0) == ()
+    assert sum_longs(data) == 0x00010203 + 0x04050607 + 0x08090A0B + 0x0C0D0E0F
+    assert sum_longs(data, 0) == 0x04050607 + 0x08090A0B + 0x0C0D0E0F
+
+
+def util_checksum_neg_test():
+    for seed in range(4):
+        data = make_data(128, seed)
+        assert calc_neg_chksum(data, 5) == ref_neg_chksum(data, 5)
+        assert calc_neg_chksum(data, 2) == ref_neg_chksum(data, 2)
+    assert calc_neg_chksum(bytes(512), 5) == 0
+
+
+def util_checksum_carry_test():
+    for seed in range(4):
+        data = make_data(256, seed)
+        assert calc_carry_chksum(data, 1) == ref_carry_chksum(data, 1)
+        assert calc_carry_chksum(data) == ref_carry_chksum(data)
+    # corner cases of end-around carry
+    assert calc_carry_chksum(bytes(16)) == 0xFFFFFFFF
+    all_ones = b"\xff" * 16
+    assert calc_carry_chksum(all_ones) == ref_carry_chksum(all_ones)
+    data = struct.pack(">II", 0xFFFFFFFF, 1)
+    assert calc_carry_chksum(data) == ref_carry_chksum(data)
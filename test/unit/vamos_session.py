@@ -0,0 +1,45 @@
+from amitools.vamos.cfg import VamosMainParser
+from amitools.vamos.path import VamosPathManager
+from amitools.vamos.libmgr import SetupLibManager
+from amitools.vamos.session import VamosSession
+
+
+def setup_failing_session(monkeypatch, cls, method):
+    calls = []
+    orig_shutdown = VamosPathManager.shutdown
+
+    def shutdown(self):
+        calls.append(True)
+        orig_shutdown(self)
+
+    monkeypatch.setattr(VamosPathManager, "shutdown", shutdown)
+    monkeypatch.setattr(cls, method, lambda self, *args: False)
+    mp = VamosMainParser()
+    mp.parse(args=[])
+    session = VamosSession()
+    assert not session.setup(mp)
+    session.machine.cleanup()
+    return calls
+
+
+def vamos_session_path_config_fail_test(monkeypatch):
+    calls = setup_failing_session(monkeypatch, VamosPathManager, "parse_config")
+    assert calls == [True]
+
+
+def vamos_session_path_setup_fail_test(monkeypatch):
+    calls = setup_failing_session(monkeypatch, VamosPathManager, "setup")
+    assert calls == [True]
+
+
+def vamos_session_lib_config_fail_test(monkeypatch):
+    calls = setup_failing_session(monkeypatch, SetupLibManager, "parse_config")
+    assert calls == [True]
+
+
+def vamos_session_setup_ok_test():
+    mp = VamosMainParser()
+    mp.parse(args=[])
+    session = VamosSession()
+    assert session.setup(mp)
+    session.shutdown()